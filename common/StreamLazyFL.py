@@ -0,0 +1,214 @@
+#=========================================================================
+# StreamLazyFL
+#=========================================================================
+# Stream source and sink that pull their messages on demand from a
+# Python iterator instead of holding a fully materialized list. Memory
+# stays constant no matter how long the stream is, which makes
+# multi-million message soak runs practical.
+#
+# The msgs parameter is either a zero-argument function returning a new
+# iterator (e.g., a generator function) or any iterable. A function is
+# preferred since it is called again on every reset, so the stream
+# restarts from the beginning; a plain iterable can only be consumed
+# once. The source and sink of a test usually get two functions that
+# regenerate the same seeded stream, so the expected output is computed
+# in lockstep with the input rather than stored.
+#
+# Shared by the stream tests and tools of every lab, so it lives here
+# rather than in one lab's test directory.
+
+from random import Random
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+# Sentinel marking the end of a stream, since None may be a valid message
+
+_end = object()
+
+def _restart( msgs ):
+  return iter( msgs() if callable( msgs ) else msgs )
+
+def _next_delay( rng, interval_delay, interval_delay_mode ):
+  if interval_delay_mode == 'random':
+    return rng.randint( 0, interval_delay )
+  return interval_delay
+
+#-------------------------------------------------------------------------
+# StreamSourceLazyFL
+#-------------------------------------------------------------------------
+
+class StreamSourceLazyFL( Component ):
+
+  def construct( s, Type, msgs=(), initial_delay=0, interval_delay=0,
+                 interval_delay_mode='fixed', seed=0xdeadbeef ):
+
+    # Interface
+
+    s.ostream = OStreamIfc( Type )
+
+    # Data
+
+    s.msgs  = msgs
+    s.it    = None
+    s.msg   = _end
+    s.count = 0
+    s.nmsgs = 0
+
+    # Random delays come from a private generator so that the schedule
+    # is reproducible and independent of any other use of random
+
+    s.rng = Random( seed )
+
+    @update_ff
+    def up_src():
+
+      if s.reset:
+        s.it    = _restart( s.msgs )
+        s.msg   = next( s.it, _end )
+        s.count = initial_delay
+        s.nmsgs = 0
+        s.rng.seed( seed )
+        s.ostream.val <<= 0
+
+      else:
+
+        # Advance to the next message if the current one was accepted
+
+        if s.ostream.val & s.ostream.rdy:
+          s.nmsgs += 1
+          s.msg    = next( s.it, _end )
+          s.count  = _next_delay( s.rng, interval_delay, interval_delay_mode )
+
+        if s.count > 0:
+          s.count -= 1
+          s.ostream.val <<= 0
+
+        elif s.msg is not _end:
+          s.ostream.val <<= 1
+          s.ostream.msg <<= s.msg
+
+        else:
+          s.ostream.val <<= 0
+
+  def done( s ):
+    return s.it is not None and s.msg is _end
+
+  # Line tracing
+
+  def line_trace( s ):
+    return f"{s.ostream}"
+
+#-------------------------------------------------------------------------
+# StreamSinkLazyFL
+#-------------------------------------------------------------------------
+# When ordered is False, received messages may arrive in any order. The
+# sink then keeps a window of expected messages which have been pulled
+# from the iterator but not yet received, so memory is bounded by how
+# far the design reorders messages rather than by the stream length.
+
+class StreamSinkLazyFL( Component ):
+
+  def construct( s, Type, msgs=(), initial_delay=0, interval_delay=0,
+                 interval_delay_mode='fixed', cmp_fn=lambda a, b : a == b,
+                 ordered=True, seed=0xdeadbeef ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Type )
+
+    # Data
+
+    s.msgs    = msgs
+    s.cmp_fn  = cmp_fn
+    s.ordered = ordered
+    s.it      = None
+    s.ref     = _end
+    s.pending = []
+    s.count   = 0
+    s.nmsgs   = 0
+    s.ncycles = 0
+
+    s.rng = Random( seed )
+
+    @update_ff
+    def up_sink():
+
+      if s.reset:
+        s.it      = _restart( s.msgs )
+        s.ref     = next( s.it, _end ) if s.ordered else _end
+        s.pending = []
+        s.count   = initial_delay
+        s.nmsgs   = 0
+        s.ncycles = 0
+        s.rng.seed( seed )
+        s.istream.rdy <<= 0
+
+      else:
+        s.ncycles += 1
+
+        if s.istream.val & s.istream.rdy:
+          s.check( s.istream.msg )
+          s.nmsgs += 1
+          s.count  = _next_delay( s.rng, interval_delay, interval_delay_mode )
+
+        if s.count > 0:
+          s.count -= 1
+          s.istream.rdy <<= 0
+        else:
+          s.istream.rdy <<= 1
+
+  # Check a received message against the expected stream
+
+  def check( s, msg ):
+
+    if s.ordered:
+
+      if s.ref is _end:
+        s.error( msg, "the sink received more messages than expected" )
+
+      if not s.cmp_fn( msg, s.ref ):
+        s.error( msg, f"expected {s.ref}" )
+
+      s.ref = next( s.it, _end )
+
+    else:
+
+      # Look for a match among the expected messages seen so far, then
+      # keep pulling from the iterator until we find one
+
+      for i, ref in enumerate( s.pending ):
+        if s.cmp_fn( msg, ref ):
+          del s.pending[i]
+          return
+
+      for ref in s.it:
+        if s.cmp_fn( msg, ref ):
+          return
+        s.pending.append( ref )
+
+      s.error( msg, "no matching message is expected" )
+
+  def error( s, msg, reason ):
+    raise AssertionError(
+      f"\nThe test sink {s} received an incorrect message!"
+      f"\n- msg #{s.nmsgs} received at cycle {s.ncycles}"
+      f"\n- actual msg : {msg}"
+      f"\n- {reason}" )
+
+  def done( s ):
+    if s.it is None:
+      return False
+    if s.ordered:
+      return s.ref is _end
+    if not s.pending:
+      ref = next( s.it, _end )
+      if ref is _end:
+        return True
+      s.pending.append( ref )
+    return False
+
+  # Line tracing
+
+  def line_trace( s ):
+    return f"{s.istream}"
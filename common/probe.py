@@ -0,0 +1,58 @@
+#=========================================================================
+# probe
+#=========================================================================
+# Attach a monitor to the test harness of any lab. The lab harnesses
+# build their TestHarness by name, so attach swaps in a subclass while
+# it is active. The probe function is called at the end of construct
+# and adds its counters and update blocks to the harness:
+#
+#   def count_cycles( s ):
+#     s.ncycles = 0
+#
+#     @update_ff
+#     def up_ncycles():
+#       if not s.reset:
+#         s.ncycles += 1
+#
+#   th = probe.run_probe( harness, count_cycles, harness.run_test, ... )
+#
+# Probes nest, so a probe attached for a whole session (e.g., bypass
+# coverage) still sees the harnesses built by run_probe.
+
+from contextlib import contextmanager
+
+#-------------------------------------------------------------------------
+# attach
+#-------------------------------------------------------------------------
+# Attach probe to every harness built inside the with block, and yield
+# the list of those harnesses.
+
+@contextmanager
+def attach( harness, probe ):
+
+  ths = []
+
+  class ProbeTestHarness( harness.TestHarness ):
+
+    def construct( s, *args, **kwargs ):
+      super().construct( *args, **kwargs )
+      probe( s )
+      ths.append( s )
+
+  TestHarness = harness.TestHarness
+  harness.TestHarness = ProbeTestHarness
+
+  try:
+    yield ths
+  finally:
+    harness.TestHarness = TestHarness
+
+#-------------------------------------------------------------------------
+# run_probe
+#-------------------------------------------------------------------------
+# Call run_test with probe attached and return the harness it built.
+
+def run_probe( harness, probe, run_test, *args, **kwargs ):
+  with attach( harness, probe ) as ths:
+    run_test( *args, **kwargs )
+  return ths[-1]
@@ -0,0 +1,30 @@
+#=========================================================================
+# IntMulBooth
+#=========================================================================
+# PyMTL wrapper for the Booth-recoded multiplier in IntMulBooth.v. nbits
+# is the number of multiplier bits retired per cycle: 2 for radix-4 and
+# 3 for radix-8.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+class IntMulBooth( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, nbits=2 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Bits64 )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "IntMulBooth.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab1_imul_IntMulBooth" )
+    s.set_metadata( VerilogPlaceholderPass.params, { "p_nbits" : nbits } )
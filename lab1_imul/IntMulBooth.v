@@ -0,0 +1,398 @@
+//========================================================================
+// Integer Multiplier Booth-Recoded Implementation
+//========================================================================
+// Iterative multiplier that retires p_nbits multiplier bits per cycle
+// using Booth recoding: p_nbits = 2 gives radix-4 (digits -2..2) and
+// p_nbits = 3 gives radix-8 (digits -4..4). The b register is shifted
+// arithmetically, so b is treated as a signed operand, which gives the
+// same low 32 bits of the product. The calculation stops as soon as all
+// remaining Booth digits are zero, i.e., once the bits left in b and
+// the last bit shifted out are all zeros or all ones. This makes small
+// positive and small negative multipliers equally fast.
+//
+// Like IntMulAlt, the design spends one cycle in IDLE, one cycle per
+// Booth digit plus one more in CALC, and one cycle in DONE.
+
+`ifndef LAB1_IMUL_INT_MUL_BOOTH_V
+`define LAB1_IMUL_INT_MUL_BOOTH_V
+
+`include "vc/muxes.v"
+`include "vc/regs.v"
+`include "vc/trace.v"
+
+//========================================================================
+// Integer Multiplier Booth Datapath
+//========================================================================
+
+module lab1_imul_IntMulBoothDpath
+#(
+  parameter p_nbits = 2
+)(
+  input  logic        clk,
+  input  logic        reset,
+
+  // Data signals
+  input  logic [63:0] istream_msg,
+  output logic [31:0] ostream_msg,
+
+  // Control signals
+  input  logic        ab_mux_sel,      // Sel for muxes in front of A/B regs
+  input  logic        ab_en,           // Enable for A/B/prev registers
+  input  logic        result_mux_sel,  // Sel for mux in front of result reg
+  input  logic        result_en,       // Enable for result register
+
+  // Status signals
+  output logic        is_b_done        // All remaining Booth digits are zero
+);
+
+  // Split out the a and b operands
+
+  logic [31:0] istream_msg_a;
+  assign istream_msg_a = istream_msg[63:32];
+
+  logic [31:0] istream_msg_b;
+  assign istream_msg_b = istream_msg[31:0];
+
+  // A mux and register
+
+  logic [31:0] a_reg_out;
+  logic [31:0] a_shift_out;
+  logic [31:0] a_mux_out;
+
+  assign a_shift_out = a_reg_out << p_nbits;
+
+  vc_Mux2#(32) a_mux
+  (
+    .sel   (ab_mux_sel),
+    .in0   (a_shift_out),
+    .in1   (istream_msg_a),
+    .out   (a_mux_out)
+  );
+
+  vc_EnReg#(32) a_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (ab_en),
+    .d     (a_mux_out),
+    .q     (a_reg_out)
+  );
+
+  // B mux and register, shifted arithmetically
+
+  logic [31:0] b_reg_out;
+  logic [31:0] b_shift_out;
+  logic [31:0] b_mux_out;
+
+  assign b_shift_out = $signed( b_reg_out ) >>> p_nbits;
+
+  vc_Mux2#(32) b_mux
+  (
+    .sel   (ab_mux_sel),
+    .in0   (b_shift_out),
+    .in1   (istream_msg_b),
+    .out   (b_mux_out)
+  );
+
+  vc_EnReg#(32) b_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (ab_en),
+    .d     (b_mux_out),
+    .q     (b_reg_out)
+  );
+
+  // Prev register holds the last multiplier bit shifted out of B
+
+  logic prev_reg_out;
+  logic prev_mux_out;
+
+  vc_Mux2#(1) prev_mux
+  (
+    .sel   (ab_mux_sel),
+    .in0   (b_reg_out[p_nbits-1]),
+    .in1   (1'b0),
+    .out   (prev_mux_out)
+  );
+
+  vc_EnReg#(1) prev_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (ab_en),
+    .d     (prev_mux_out),
+    .q     (prev_reg_out)
+  );
+
+  // Booth digit: the low p_nbits bits of B with the previous bit, i.e.,
+  // -2^(n-1)*b[n-1] + ... + 2*b[1] + b[0] + prev
+
+  logic signed [3:0] digit;
+
+  always_comb begin
+    digit = $signed( { 3'b0, prev_reg_out } );
+    for ( int i = 0; i < p_nbits; i = i + 1 ) begin
+      if ( b_reg_out[i] ) begin
+        if ( i == p_nbits-1 )
+          digit = digit - ( 4'sd1 <<< i );
+        else
+          digit = digit + ( 4'sd1 <<< i );
+      end
+    end
+  end
+
+  // Partial product: select |digit| times A, then negate if needed
+
+  logic [31:0] a_times3;
+  assign a_times3 = a_reg_out + ( a_reg_out << 1 );
+
+  logic [3:0]  digit_mag;
+  logic [31:0] pp_mag;
+  logic [31:0] pp;
+
+  assign digit_mag = digit[3] ? -digit : digit;
+
+  always_comb begin
+    case ( digit_mag )
+      4'd0:    pp_mag = 32'b0;
+      4'd1:    pp_mag = a_reg_out;
+      4'd2:    pp_mag = a_reg_out << 1;
+      4'd3:    pp_mag = a_times3;
+      4'd4:    pp_mag = a_reg_out << 2;
+      default: pp_mag = 32'bx;
+    endcase
+  end
+
+  assign pp = digit[3] ? -pp_mag : pp_mag;
+
+  // Result mux and register
+
+  logic [31:0] result_reg_out;
+  logic [31:0] adder_out;
+  logic [31:0] result_mux_out;
+
+  assign adder_out = result_reg_out + pp;
+
+  vc_Mux2#(32) result_mux
+  (
+    .sel   (result_mux_sel),
+    .in0   (adder_out),
+    .in1   (32'b0),
+    .out   (result_mux_out)
+  );
+
+  vc_EnReg#(32) result_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (result_en),
+    .d     (result_mux_out),
+    .q     (result_reg_out)
+  );
+
+  // Connect to output ports
+
+  assign ostream_msg = result_reg_out;
+  assign is_b_done   = ( b_reg_out == {32{prev_reg_out}} );
+
+endmodule
+
+//========================================================================
+// Integer Multiplier Booth Control
+//========================================================================
+
+module lab1_imul_IntMulBoothCtrl
+(
+  input  logic        clk,
+  input  logic        reset,
+
+  // Dataflow signals
+  input  logic        istream_val,
+  output logic        istream_rdy,
+  output logic        ostream_val,
+  input  logic        ostream_rdy,
+
+  // Control signals
+  output logic        ab_mux_sel,
+  output logic        ab_en,
+  output logic        result_mux_sel,
+  output logic        result_en,
+
+  // Status signals
+  input  logic        is_b_done
+);
+
+  //---------------------------------------------------------------------
+  // State Definitions
+  //---------------------------------------------------------------------
+
+  localparam STATE_IDLE = 2'd0;
+  localparam STATE_CALC = 2'd1;
+  localparam STATE_DONE = 2'd2;
+
+  //---------------------------------------------------------------------
+  // State
+  //---------------------------------------------------------------------
+
+  logic [1:0] state_reg;
+  logic [1:0] state_next;
+
+  always_ff @( posedge clk ) begin
+    if ( reset )
+      state_reg <= STATE_IDLE;
+    else
+      state_reg <= state_next;
+  end
+
+  //---------------------------------------------------------------------
+  // State Transitions
+  //---------------------------------------------------------------------
+
+  logic req_done;
+  logic resp_done;
+
+  assign req_done  = istream_val && istream_rdy;
+  assign resp_done = ostream_val && ostream_rdy;
+
+  always_comb begin
+    state_next = state_reg;
+
+    case ( state_reg )
+      STATE_IDLE: if ( req_done  ) state_next = STATE_CALC;
+      STATE_CALC: if ( is_b_done ) state_next = STATE_DONE;
+      STATE_DONE: if ( resp_done ) state_next = STATE_IDLE;
+      default:    state_next = 'x;
+    endcase
+  end
+
+  //---------------------------------------------------------------------
+  // State Outputs
+  //---------------------------------------------------------------------
+
+  localparam ab_x = 1'dx;
+  localparam r_x  = 1'dx;
+
+  function void cs
+  (
+    input logic    cs_istream_rdy,
+    input logic    cs_ostream_val,
+    input logic    cs_ab_mux_sel,
+    input logic    cs_ab_en,
+    input logic    cs_result_mux_sel,
+    input logic    cs_result_en
+  );
+  begin
+    istream_rdy    = cs_istream_rdy;
+    ostream_val    = cs_ostream_val;
+    ab_mux_sel     = cs_ab_mux_sel;
+    ab_en          = cs_ab_en;
+    result_mux_sel = cs_result_mux_sel;
+    result_en      = cs_result_en;
+  end
+  endfunction
+
+  // Set outputs using a control signal table
+
+  always_comb begin
+    cs( 0, 0, ab_x, 0, r_x, 0 );
+
+    case ( state_reg )
+      // Key for Control Signal Table:
+      // i_rdy = istream_rdy, o_val = ostream_val, ab_sl = ab_mux_sel,
+      // ab_en = ab_en, r_sl = result_mux_sel, r_en = result_en
+      //
+      //                                i_rdy o_val ab_sl ab_en r_sl  r_en
+      STATE_IDLE:                    cs(  1,    0,   1,    1,    1,    1 );
+      STATE_CALC: if ( !is_b_done )  cs(  0,    0,   0,    1,    0,    1 );
+      STATE_DONE:                    cs(  0,    1,   ab_x, 0,    r_x,  0 );
+      default                        cs( 'x,   'x,   ab_x, 'x,   r_x, 'x );
+    endcase
+  end
+
+endmodule
+
+//========================================================================
+// Integer Multiplier Booth-Recoded Implementation
+//========================================================================
+
+module lab1_imul_IntMulBooth
+#(
+  parameter p_nbits = 2
+)(
+  input  logic        clk,
+  input  logic        reset,
+
+  input  logic        istream_val,
+  output logic        istream_rdy,
+  input  logic [63:0] istream_msg,
+
+  output logic        ostream_val,
+  input  logic        ostream_rdy,
+  output logic [31:0] ostream_msg
+);
+
+  //----------------------------------------------------------------------
+  // Connect Control Unit and Datapath
+  //----------------------------------------------------------------------
+
+  // Control signals
+  logic        ab_mux_sel;
+  logic        ab_en;
+  logic        result_mux_sel;
+  logic        result_en;
+
+  // Status signals
+  logic        is_b_done;
+
+  // Control unit
+  lab1_imul_IntMulBoothCtrl ctrl
+  (
+    .*
+  );
+
+  // Datapath
+  lab1_imul_IntMulBoothDpath#(p_nbits) dpath
+  (
+    .*
+  );
+
+  //----------------------------------------------------------------------
+  // Line Tracing
+  //----------------------------------------------------------------------
+
+  `ifndef SYNTHESIS
+
+  logic [`VC_TRACE_NBITS-1:0] str;
+  `VC_TRACE_BEGIN
+  begin
+
+    $sformat( str, "%x", istream_msg );
+    vc_trace.append_val_rdy_str( trace_str, istream_val, istream_rdy, str );
+
+    vc_trace.append_str( trace_str, "(" );
+
+    $sformat( str, "%x %x%x %x %d ", dpath.a_reg_out, dpath.b_reg_out,
+              dpath.prev_reg_out, dpath.result_reg_out, dpath.digit );
+    vc_trace.append_str( trace_str, str );
+
+    case ( ctrl.state_reg )
+      ctrl.STATE_IDLE: vc_trace.append_str( trace_str, "I " );
+      ctrl.STATE_CALC: vc_trace.append_str( trace_str, "C " );
+      ctrl.STATE_DONE: vc_trace.append_str( trace_str, "D " );
+      default:         vc_trace.append_str( trace_str, "? " );
+    endcase
+
+    vc_trace.append_str( trace_str, ")" );
+
+    $sformat( str, "%x", ostream_msg );
+    vc_trace.append_val_rdy_str( trace_str, ostream_val, ostream_rdy, str );
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB1_IMUL_INT_MUL_BOOTH_V */
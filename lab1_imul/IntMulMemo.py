@@ -0,0 +1,35 @@
+#=========================================================================
+# IntMulMemo
+#=========================================================================
+# PyMTL wrapper for the memoizing multiplier in IntMulMemo.v, which puts
+# a num_entries memo table in front of IntMulAlt. memo_access and
+# memo_miss pulse on every request and every miss respectively.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+class IntMulMemo( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, num_entries=4 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Bits64 )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Statistics
+
+    s.memo_access = OutPort()
+    s.memo_miss   = OutPort()
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "IntMulMemo.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab1_imul_IntMulMemo" )
+    s.set_metadata( VerilogPlaceholderPass.params, { "p_num_entries" : num_entries } )
@@ -0,0 +1,252 @@
+//========================================================================
+// Integer Multiplier with Memoization
+//========================================================================
+// Wraps the variable-latency multiplier with a small fully associative
+// memo table mapping an operand pair to its product. A request whose
+// operands (in either order, since multiplication commutes) are in the
+// table is answered the next cycle without starting the multiplier. A
+// miss is forwarded to the multiplier, and its product is written into
+// the table in round-robin order when the response is returned.
+//
+// Like the cache statistics in SingleCoreSys, memo_access is high for
+// every accepted request and memo_miss is high for every response that
+// had to come from the multiplier.
+
+`ifndef LAB1_IMUL_INT_MUL_MEMO_V
+`define LAB1_IMUL_INT_MUL_MEMO_V
+
+`include "vc/regs.v"
+`include "vc/trace.v"
+
+`include "lab1_imul/IntMulAlt.v"
+
+module lab1_imul_IntMulMemo
+#(
+  parameter p_num_entries = 4
+)(
+  input  logic        clk,
+  input  logic        reset,
+
+  input  logic        istream_val,
+  output logic        istream_rdy,
+  input  logic [63:0] istream_msg,
+
+  output logic        ostream_val,
+  input  logic        ostream_rdy,
+  output logic [31:0] ostream_msg,
+
+  // Statistics
+
+  output logic        memo_access,
+  output logic        memo_miss
+);
+
+  localparam c_ptr_nbits = ( p_num_entries > 1 ) ? $clog2( p_num_entries ) : 1;
+
+  //----------------------------------------------------------------------
+  // State Definitions
+  //----------------------------------------------------------------------
+
+  localparam STATE_IDLE = 2'd0;
+  localparam STATE_HIT  = 2'd1;
+  localparam STATE_MISS = 2'd2;
+
+  logic [1:0] state_reg;
+  logic [1:0] state_next;
+
+  //----------------------------------------------------------------------
+  // Memo Table
+  //----------------------------------------------------------------------
+
+  logic                   table_val    [p_num_entries];
+  logic [31:0]            table_a      [p_num_entries];
+  logic [31:0]            table_b      [p_num_entries];
+  logic [31:0]            table_result [p_num_entries];
+  logic [c_ptr_nbits-1:0] victim_ptr;
+
+  logic [31:0] istream_msg_a;
+  logic [31:0] istream_msg_b;
+
+  assign istream_msg_a = istream_msg[63:32];
+  assign istream_msg_b = istream_msg[31:0];
+
+  // Lookup
+
+  logic        hit;
+  logic [31:0] hit_result;
+
+  always_comb begin
+    hit        = 1'b0;
+    hit_result = 32'b0;
+    for ( int i = 0; i < p_num_entries; i = i + 1 ) begin
+      if ( table_val[i]
+        && (    ( table_a[i] == istream_msg_a && table_b[i] == istream_msg_b )
+             || ( table_a[i] == istream_msg_b && table_b[i] == istream_msg_a ) ) )
+      begin
+        hit        = 1'b1;
+        hit_result = table_result[i];
+      end
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Multiplier
+  //----------------------------------------------------------------------
+
+  logic        imul_istream_val;
+  logic        imul_istream_rdy;
+  logic        imul_ostream_val;
+  logic        imul_ostream_rdy;
+  logic [31:0] imul_ostream_msg;
+
+  lab1_imul_IntMulAlt imul
+  (
+    .clk         (clk),
+    .reset       (reset),
+
+    .istream_val (imul_istream_val),
+    .istream_rdy (imul_istream_rdy),
+    .istream_msg (istream_msg),
+
+    .ostream_val (imul_ostream_val),
+    .ostream_rdy (imul_ostream_rdy),
+    .ostream_msg (imul_ostream_msg)
+  );
+
+  //----------------------------------------------------------------------
+  // Control
+  //----------------------------------------------------------------------
+
+  logic req_go;
+  logic resp_go;
+
+  assign istream_rdy      = ( state_reg == STATE_IDLE ) && ( hit || imul_istream_rdy );
+  assign imul_istream_val = ( state_reg == STATE_IDLE ) && istream_val && !hit;
+
+  assign req_go  = istream_val && istream_rdy;
+  assign resp_go = ostream_val && ostream_rdy;
+
+  always_comb begin
+    state_next = state_reg;
+
+    case ( state_reg )
+      STATE_IDLE: if ( req_go  ) state_next = hit ? STATE_HIT : STATE_MISS;
+      STATE_HIT:  if ( resp_go ) state_next = STATE_IDLE;
+      STATE_MISS: if ( resp_go ) state_next = STATE_IDLE;
+      default:    state_next = 'x;
+    endcase
+  end
+
+  always_ff @( posedge clk ) begin
+    if ( reset )
+      state_reg <= STATE_IDLE;
+    else
+      state_reg <= state_next;
+  end
+
+  //----------------------------------------------------------------------
+  // Datapath
+  //----------------------------------------------------------------------
+
+  // Operands of the outstanding miss, written into the table with the
+  // product when the multiplier responds
+
+  logic [31:0] a_reg_out;
+  logic [31:0] b_reg_out;
+  logic [31:0] hit_result_reg_out;
+
+  vc_EnReg#(32) a_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (req_go),
+    .d     (istream_msg_a),
+    .q     (a_reg_out)
+  );
+
+  vc_EnReg#(32) b_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (req_go),
+    .d     (istream_msg_b),
+    .q     (b_reg_out)
+  );
+
+  vc_EnReg#(32) hit_result_reg
+  (
+    .clk   (clk),
+    .reset (reset),
+    .en    (req_go),
+    .d     (hit_result),
+    .q     (hit_result_reg_out)
+  );
+
+  // Table update
+
+  logic table_wen;
+  assign table_wen = ( state_reg == STATE_MISS ) && resp_go;
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      for ( int i = 0; i < p_num_entries; i = i + 1 )
+        table_val[i] <= 1'b0;
+      victim_ptr <= '0;
+    end
+    else if ( table_wen ) begin
+      table_val   [victim_ptr] <= 1'b1;
+      table_a     [victim_ptr] <= a_reg_out;
+      table_b     [victim_ptr] <= b_reg_out;
+      table_result[victim_ptr] <= imul_ostream_msg;
+      victim_ptr <= ( victim_ptr == c_ptr_nbits'(p_num_entries-1) ) ? '0 : victim_ptr + 1'b1;
+    end
+  end
+
+  // Response
+
+  assign ostream_val      = ( state_reg == STATE_HIT ) || ( ( state_reg == STATE_MISS ) && imul_ostream_val );
+  assign ostream_msg      = ( state_reg == STATE_HIT ) ? hit_result_reg_out : imul_ostream_msg;
+  assign imul_ostream_rdy = ( state_reg == STATE_MISS ) && ostream_rdy;
+
+  // Statistics
+
+  assign memo_access = req_go;
+  assign memo_miss   = table_wen;
+
+  //----------------------------------------------------------------------
+  // Line Tracing
+  //----------------------------------------------------------------------
+
+  `ifndef SYNTHESIS
+
+  logic [`VC_TRACE_NBITS-1:0] str;
+  `VC_TRACE_BEGIN
+  begin
+
+    $sformat( str, "%x", istream_msg );
+    vc_trace.append_val_rdy_str( trace_str, istream_val, istream_rdy, str );
+
+    vc_trace.append_str( trace_str, "(" );
+
+    case ( state_reg )
+      STATE_IDLE: vc_trace.append_str( trace_str, "I" );
+      STATE_HIT:  vc_trace.append_str( trace_str, "H" );
+      STATE_MISS: vc_trace.append_str( trace_str, "M" );
+      default:    vc_trace.append_str( trace_str, "?" );
+    endcase
+
+    vc_trace.append_str( trace_str, ")" );
+
+    imul.line_trace( trace_str );
+
+    $sformat( str, "%x", ostream_msg );
+    vc_trace.append_val_rdy_str( trace_str, ostream_val, ostream_rdy, str );
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB1_IMUL_INT_MUL_MEMO_V */
@@ -0,0 +1,78 @@
+#=========================================================================
+# IntMulMemoFL
+#=========================================================================
+# Functional-level model of the memoizing multiplier. The memo table is
+# the same MemoTable used by the latency model, so the FL model hits and
+# misses on exactly the same requests as IntMulMemo.v.
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+from lab1_imul.imul_latency import MemoTable
+
+#-------------------------------------------------------------------------
+# IntMulMemoFL
+#-------------------------------------------------------------------------
+
+class IntMulMemoFL( Component ):
+
+  # Constructor
+
+  def construct( s, num_entries=4 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Bits64 )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Statistics, pulsed the cycle after a request is accepted
+
+    s.memo_access = OutPort()
+    s.memo_miss   = OutPort()
+
+    # State
+
+    s.num_entries = num_entries
+    s.table       = MemoTable( num_entries )
+    s.resp        = None
+    s.hit         = False
+
+    @update
+    def up_rdy():
+      s.istream.rdy @= ( s.resp is None ) or s.ostream.rdy
+
+    @update_ff
+    def up_memo():
+
+      if s.reset:
+        s.table = MemoTable( s.num_entries )
+        s.resp  = None
+        s.memo_access <<= 0
+        s.memo_miss   <<= 0
+
+      else:
+
+        if s.ostream.val & s.ostream.rdy:
+          s.resp = None
+
+        go   = s.istream.val & s.istream.rdy
+        miss = 0
+        if go:
+          a = s.istream.msg[32:64].uint()
+          b = s.istream.msg[ 0:32].uint()
+          s.hit  = s.table.access( a, b )
+          s.resp = Bits32( a * b, trunc_int=True )
+          miss   = int( not s.hit )
+
+        s.memo_access <<= go
+        s.memo_miss   <<= miss
+
+      s.ostream.val <<= s.resp is not None
+      if s.resp is not None:
+        s.ostream.msg <<= s.resp
+
+  # Line tracing
+
+  def line_trace( s ):
+    hit_str = ( "H" if s.hit else "M" ) if s.memo_access else " "
+    return f"{s.istream}({hit_str}){s.ostream}"
@@ -0,0 +1,28 @@
+#=========================================================================
+# IntMulPipe
+#=========================================================================
+# PyMTL wrapper for the pipelined multiplier in IntMulPipe.v.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+class IntMulPipe( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, nstages=4 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Bits64 )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "IntMulPipe.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab1_imul_IntMulPipe" )
+    s.set_metadata( VerilogPlaceholderPass.params, { "p_nstages" : nstages } )
@@ -0,0 +1,219 @@
+//========================================================================
+// Integer Multiplier Pipelined Implementation
+//========================================================================
+// Splits the 32 shift-add iterations of the iterative designs across
+// p_nstages pipeline stages, so the multiplier accepts a new request
+// every cycle and returns each product p_nstages cycles later. Each
+// stage retires ceil(32/p_nstages) bits of the b operand. For some
+// p_nstages (e.g., 12 or 20) the earlier stages retire all 32 bits, and
+// the trailing stages retire none and only pass the message along.
+//
+// The stages form an elastic pipeline: a stage register loads whenever
+// it is empty or its current message is moving on, so bubbles are
+// squeezed out when the sink applies backpressure.
+
+`ifndef LAB1_IMUL_INT_MUL_PIPE_V
+`define LAB1_IMUL_INT_MUL_PIPE_V
+
+`include "vc/regs.v"
+`include "vc/trace.v"
+
+//========================================================================
+// Integer Multiplier Pipeline Stage
+//========================================================================
+// Combinational shift-add over p_nbits bits of b. The a operand is
+// shifted left and b shifted right as each bit is retired, exactly like
+// one CALC cycle of the iterative designs.
+
+module lab1_imul_IntMulPipeStage
+#(
+  parameter p_nbits = 8
+)(
+  input  logic [31:0] a_in,
+  input  logic [31:0] b_in,
+  input  logic [31:0] result_in,
+
+  output logic [31:0] a_out,
+  output logic [31:0] b_out,
+  output logic [31:0] result_out
+);
+
+  always_comb begin
+    a_out      = a_in;
+    b_out      = b_in;
+    result_out = result_in;
+
+    for ( int i = 0; i < p_nbits; i = i + 1 ) begin
+      if ( b_out[0] )
+        result_out = result_out + a_out;
+      a_out = a_out << 1;
+      b_out = b_out >> 1;
+    end
+  end
+
+endmodule
+
+//========================================================================
+// Integer Multiplier Pipelined Implementation
+//========================================================================
+
+module lab1_imul_IntMulPipe
+#(
+  parameter p_nstages = 4
+)(
+  input  logic        clk,
+  input  logic        reset,
+
+  input  logic        istream_val,
+  output logic        istream_rdy,
+  input  logic [63:0] istream_msg,
+
+  output logic        ostream_val,
+  input  logic        ostream_rdy,
+  output logic [31:0] ostream_msg
+);
+
+  // Bits of b retired per stage, the last stage takes what is left
+
+  localparam c_nbits = ( 32 + p_nstages - 1 ) / p_nstages;
+
+  //----------------------------------------------------------------------
+  // Pipeline Registers
+  //----------------------------------------------------------------------
+  // Index 0 is the incoming request, index i is the output of the
+  // pipeline register after stage i.
+
+  logic        val    [0:p_nstages];
+  logic        rdy    [0:p_nstages];
+  logic [31:0] a      [0:p_nstages];
+  logic [31:0] b      [0:p_nstages];
+  logic [31:0] result [0:p_nstages];
+
+  assign val[0]      = istream_val;
+  assign istream_rdy = rdy[0];
+  assign a[0]        = istream_msg[63:32];
+  assign b[0]        = istream_msg[31:0];
+  assign result[0]   = 32'b0;
+
+  genvar i;
+  generate
+  for ( i = 0; i < p_nstages; i = i + 1 ) begin: stages
+
+    // Clamped at zero once the earlier stages have retired every bit
+
+    localparam c_stage_nbits
+      = ( 32 <= i*c_nbits )          ? 0
+      : ( 32 - i*c_nbits < c_nbits ) ? 32 - i*c_nbits
+      :                                c_nbits;
+
+    // Shift-add logic
+
+    logic [31:0] a_next;
+    logic [31:0] b_next;
+    logic [31:0] result_next;
+
+    lab1_imul_IntMulPipeStage#(c_stage_nbits) stage
+    (
+      .a_in       (a[i]),
+      .b_in       (b[i]),
+      .result_in  (result[i]),
+      .a_out      (a_next),
+      .b_out      (b_next),
+      .result_out (result_next)
+    );
+
+    // Stage i can hand off its message when the next register is empty
+    // or that register's message is also moving on
+
+    assign rdy[i] = !val[i+1] || rdy[i+1];
+
+    logic        val_reg_out;
+    logic [31:0] a_reg_out;
+    logic [31:0] b_reg_out;
+    logic [31:0] result_reg_out;
+
+    vc_EnResetReg#(1,0) val_reg
+    (
+      .clk    (clk),
+      .reset  (reset),
+      .en     (rdy[i]),
+      .d      (val[i]),
+      .q      (val_reg_out)
+    );
+
+    vc_EnReg#(32) a_reg
+    (
+      .clk    (clk),
+      .reset  (reset),
+      .en     (rdy[i]),
+      .d      (a_next),
+      .q      (a_reg_out)
+    );
+
+    vc_EnReg#(32) b_reg
+    (
+      .clk    (clk),
+      .reset  (reset),
+      .en     (rdy[i]),
+      .d      (b_next),
+      .q      (b_reg_out)
+    );
+
+    vc_EnReg#(32) result_reg
+    (
+      .clk    (clk),
+      .reset  (reset),
+      .en     (rdy[i]),
+      .d      (result_next),
+      .q      (result_reg_out)
+    );
+
+    assign val[i+1]    = val_reg_out;
+    assign a[i+1]      = a_reg_out;
+    assign b[i+1]      = b_reg_out;
+    assign result[i+1] = result_reg_out;
+
+  end
+  endgenerate
+
+  // Connect to output ports
+
+  assign rdy[p_nstages] = ostream_rdy;
+  assign ostream_val    = val[p_nstages];
+  assign ostream_msg    = result[p_nstages];
+
+  //----------------------------------------------------------------------
+  // Line Tracing
+  //----------------------------------------------------------------------
+
+  `ifndef SYNTHESIS
+
+  logic [`VC_TRACE_NBITS-1:0] str;
+  `VC_TRACE_BEGIN
+  begin
+
+    $sformat( str, "%x", istream_msg );
+    vc_trace.append_val_rdy_str( trace_str, istream_val, istream_rdy, str );
+
+    // Show which pipeline registers hold a valid message
+
+    vc_trace.append_str( trace_str, "(" );
+    for ( int j = 1; j <= p_nstages; j = j + 1 ) begin
+      if ( val[j] )
+        vc_trace.append_str( trace_str, "*" );
+      else
+        vc_trace.append_str( trace_str, " " );
+    end
+    vc_trace.append_str( trace_str, ")" );
+
+    $sformat( str, "%x", ostream_msg );
+    vc_trace.append_val_rdy_str( trace_str, ostream_val, ostream_rdy, str );
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB1_IMUL_INT_MUL_PIPE_V */
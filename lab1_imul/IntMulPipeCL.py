@@ -0,0 +1,68 @@
+#=========================================================================
+# IntMulPipeCL
+#=========================================================================
+# Cycle-level model of the pipelined multiplier. The product is computed
+# when a request enters the pipeline, and the model only tracks which of
+# the nstages pipeline registers hold a message. The stages follow the
+# same elastic handoff as IntMulPipe.v: a register loads whenever it is
+# empty or its message is moving on, so the model matches the RTL cycle
+# for cycle, including under sink backpressure.
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+class IntMulPipeCL( Component ):
+
+  # Constructor
+
+  def construct( s, nstages=4 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( Bits64 )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Pipeline registers, each holds a product or None
+
+    s.nstages = nstages
+    s.stages  = [ None ] * nstages
+
+    # The pipeline can accept a request if any register is empty or the
+    # last one is being drained this cycle
+
+    @update
+    def up_rdy():
+      s.istream.rdy @= s.ostream.rdy | ( None in s.stages )
+
+    @update_ff
+    def up_pipe():
+
+      if s.reset:
+        s.stages = [ None ] * nstages
+
+      else:
+
+        if s.ostream.val & s.ostream.rdy:
+          s.stages[-1] = None
+
+        # Advance from the back so bubbles are squeezed out
+
+        for i in reversed( range( 1, nstages ) ):
+          if s.stages[i] is None:
+            s.stages[i]   = s.stages[i-1]
+            s.stages[i-1] = None
+
+        if s.istream.val & s.istream.rdy:
+          a = s.istream.msg[32:64].uint()
+          b = s.istream.msg[ 0:32].uint()
+          s.stages[0] = Bits32( a * b, trunc_int=True )
+
+      s.ostream.val <<= s.stages[-1] is not None
+      if s.stages[-1] is not None:
+        s.ostream.msg <<= s.stages[-1]
+
+  # Line tracing
+
+  def line_trace( s ):
+    stages_str = "".join( " " if x is None else "*" for x in s.stages )
+    return f"{s.istream}({stages_str}){s.ostream}"
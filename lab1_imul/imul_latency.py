@@ -0,0 +1,182 @@
+#=========================================================================
+# imul_latency
+#=========================================================================
+# Analytical latency models for the iterative multipliers, used to
+# forecast multiplier throughput for a workload without running RTL.
+#
+# All designs spend one cycle in IDLE accepting the request, some number
+# of cycles in CALC, and one cycle in DONE returning the response, so the
+# latency from the request handshake to the response handshake is
+# (CALC cycles + 1), and with no sink backpressure the next request is
+# accepted one cycle later, giving an occupancy of (CALC cycles + 2).
+#
+# IntMulBase always spends 33 cycles in CALC (counter 0 through 32).
+#
+# IntMulBooth leaves CALC the cycle after all remaining Booth digits
+# become zero, so it spends one CALC cycle per retired digit plus one.
+#
+# IntMulAlt leaves CALC the cycle after b_reg becomes zero. Each cycle
+# shifts b right by one and then by the shift amount chosen by the
+# priority encoder. The variable shifters are instantiated with a 1-bit
+# shamt port, so only the LSB of the trailing-zero count is used: a zero
+# run of odd length is skipped one extra bit at a time, and an even run
+# is walked one bit per cycle. The model below follows the RTL exactly,
+# including the priority encoder treating operand[30:0] == 0 as a shift
+# of 31 (an odd shift).
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+# IntMulBase
+#-------------------------------------------------------------------------
+
+base_calc_cycles = 33
+
+def base_latency( a, b ):
+  return base_calc_cycles + 1
+
+def base_occupancy( a, b ):
+  return base_calc_cycles + 2
+
+#-------------------------------------------------------------------------
+# IntMulAlt
+#-------------------------------------------------------------------------
+
+# Shift amount the variable shifters actually apply to operand.
+
+def _alt_skip( operand ):
+  if operand & 0x7fffffff == 0:
+    return 1
+  lsb = operand & -operand
+  return int( lsb & 0xaaaaaaaa != 0 )
+
+# Number of CALC cycles in which b_reg is non-zero.
+
+def alt_iters( b ):
+  b &= 0xffffffff
+  b >>= _alt_skip( b )
+  niters = 0
+  while b:
+    b >>= 1
+    b >>= _alt_skip( b )
+    niters += 1
+  return niters
+
+def alt_latency( a, b ):
+  return alt_iters( b ) + 2
+
+def alt_occupancy( a, b ):
+  return alt_iters( b ) + 3
+
+#-------------------------------------------------------------------------
+# IntMulBooth
+#-------------------------------------------------------------------------
+# b is shifted arithmetically, so all remaining digits are zero once the
+# bits left in b and the last bit shifted out are all equal.
+
+def booth_iters( b, nbits ):
+  b &= 0xffffffff
+  b -= ( b >> 31 ) << 32
+  prev   = 0
+  niters = 0
+  while b != -prev:
+    prev = ( b >> ( nbits-1 ) ) & 1
+    b  >>= nbits
+    niters += 1
+  return niters
+
+def booth_latency( a, b, nbits ):
+  return booth_iters( b, nbits ) + 2
+
+def booth_occupancy( a, b, nbits ):
+  return booth_iters( b, nbits ) + 3
+
+#-------------------------------------------------------------------------
+# IntMulMemo
+#-------------------------------------------------------------------------
+# MemoTable mirrors the memo table in IntMulMemo.v: fully associative,
+# matching an operand pair in either order, and filled in round-robin
+# order on a miss. The RTL handles one transaction at a time, so the
+# table predicts exactly which requests hit. A hit is returned the cycle
+# after the request (occupancy 2) and a miss costs one IntMulAlt
+# transaction.
+
+class MemoTable:
+
+  def __init__( s, num_entries=4 ):
+    s.entries    = [ None ] * num_entries
+    s.victim_ptr = 0
+
+  # Return the product if (a,b) hits in the table, otherwise None
+
+  def lookup( s, a, b ):
+    for entry in s.entries:
+      if entry is not None and entry[:2] in ( (a,b), (b,a) ):
+        return entry[2]
+    return None
+
+  def insert( s, a, b, result ):
+    s.entries[ s.victim_ptr ] = ( a, b, result )
+    s.victim_ptr = ( s.victim_ptr + 1 ) % len( s.entries )
+
+  # Look up (a,b) and insert it on a miss, return True on a hit
+
+  def access( s, a, b ):
+    if s.lookup( a, b ) is not None:
+      return True
+    s.insert( a, b, ( a * b ) & 0xffffffff )
+    return False
+
+memo_hit_latency = 1
+
+def memo_hits( a, b, num_entries=4 ):
+  table = MemoTable( num_entries )
+  return np.array( [ table.access( x, y ) for x, y in zip( a, b ) ], dtype=bool )
+
+#-------------------------------------------------------------------------
+# alt_iters_np
+#-------------------------------------------------------------------------
+# Vectorized alt_iters over a uint32 array of b operands. Every element
+# needs at most 32 iterations, so we just run the RTL recurrence on the
+# whole array 32 times and count the steps in which b was non-zero.
+
+def _alt_skip_np( b ):
+  lsb = b & ( ~b + np.uint64( 1 ) )
+  odd = ( lsb & np.uint64( 0xaaaaaaaa ) ) != 0
+  return ( odd | ( ( b & np.uint64( 0x7fffffff ) ) == 0 ) ).astype( np.uint64 )
+
+def alt_iters_np( b ):
+  b = np.asarray( b, dtype=np.uint64 ) & np.uint64( 0xffffffff )
+  b = b >> _alt_skip_np( b )
+  niters = np.zeros( b.shape, dtype=np.int64 )
+  for _ in range( 32 ):
+    active = b != 0
+    niters += active
+    b = b >> np.uint64( 1 )
+    b = b >> _alt_skip_np( b )
+  return niters
+
+#-------------------------------------------------------------------------
+# predict
+#-------------------------------------------------------------------------
+# Predict per-transaction latency and the total cycles to stream the
+# given operand arrays back to back through impl ('base', 'alt',
+# 'booth4', 'booth8' or 'memo') with no source or sink delays.
+
+booth_impl_nbits = { 'booth4' : 2, 'booth8' : 3 }
+
+def predict( impl, a, b ):
+  b = np.asarray( b, dtype=np.uint64 )
+  if impl == 'base':
+    latency = np.full( b.shape, base_calc_cycles + 1, dtype=np.int64 )
+  elif impl == 'alt':
+    latency = alt_iters_np( b ) + 2
+  elif impl == 'memo':
+    hits    = memo_hits( np.asarray( a ).tolist(), b.tolist() )
+    latency = np.where( hits, memo_hit_latency, alt_iters_np( b ) + 2 )
+  elif impl in booth_impl_nbits:
+    nbits   = booth_impl_nbits[impl]
+    latency = np.array( [ booth_latency( 0, x, nbits ) for x in b.tolist() ], dtype=np.int64 )
+  else:
+    raise ValueError( f"no latency model for impl '{impl}'" )
+  return latency, int( ( latency + 1 ).sum() )
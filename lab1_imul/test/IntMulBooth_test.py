@@ -0,0 +1,21 @@
+#=========================================================================
+# IntMulBooth_test
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+
+from lab1_imul.IntMulBooth import IntMulBooth
+
+from lab1_imul.test.IntMulFL_test import test_case_table, run_test
+
+#-------------------------------------------------------------------------
+# test
+#-------------------------------------------------------------------------
+# Reuse the IntMulFL test cases for both radix-4 and radix-8 recoding.
+
+@pytest.mark.parametrize( "nbits", [ 2, 3 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, nbits, cmdline_opts ):
+  run_test( IntMulBooth( nbits ), test_params, cmdline_opts )
@@ -4,13 +4,17 @@
 
 import pytest
 
-from random import randint
+from functools import lru_cache
+from random import Random
 
 from pymtl3 import *
 from pymtl3.stdlib.test_utils import mk_test_case_table, run_sim
 from pymtl3.stdlib.stream import StreamSourceFL, StreamSinkFL
 
 from lab1_imul.IntMulFL import IntMulFL
+from lab1_imul.test.imul_utils import lazy_bulk_msgs
+from lab1_imul.test.imul_utils import gen_stream_imsgs, gen_stream_omsgs
+from common.StreamLazyFL import StreamSourceLazyFL, StreamSinkLazyFL
 
 #-------------------------------------------------------------------------
 # TestHarness
@@ -18,12 +22,18 @@ from lab1_imul.IntMulFL import IntMulFL
 
 class TestHarness( Component ):
 
-  def construct( s, imul ):
+  def construct( s, imul, lazy=False ):
 
-    # Instantiate models
+    # Instantiate models. The lazy source/sink pull their messages from
+    # generators instead of lists, for long soak runs.
+
+    if lazy:
+      s.src  = StreamSourceLazyFL( Bits64 )
+      s.sink = StreamSinkLazyFL( Bits32 )
+    else:
+      s.src  = StreamSourceFL( Bits64 )
+      s.sink = StreamSinkFL( Bits32 )
 
-    s.src  = StreamSourceFL( Bits64 )
-    s.sink = StreamSinkFL( Bits32 )
     s.imul = imul
 
     # Connect
@@ -160,193 +170,194 @@ dense_ones_msgs = [
 # Random Tests
 #=========================================================================
 
+# The random message lists are functions of a seed, so nothing is
+# generated until a test case actually runs, and the lists are memoized
+# per seed so every design reusing this table sees the same messages.
+
 # Random Mult with Zero, One, and Negative one
-random_cases = []
-for i in range(3):
-    a = randint(0, 0xffffffff)
-    b = randint(-1, 1)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_zero_one_neg_msgs = []
-for operands, result in random_cases:
-    rand_zero_one_neg_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_zero_one_neg_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xffffffff)
+    b = rng.randint(-1, 1)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Two Small Positive
-random_cases = []
-for i in range(3):
-    a = randint(0, 0xf)
-    b = randint(0, 0xf)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_small_pos_msgs = []
-for operands, result in random_cases:
-    rand_small_pos_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_small_pos_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xf)
+    b = rng.randint(0, 0xf)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Small Positive and Negative
-random_cases = []
-for i in range(3):
-    a = randint(0, 0xf)
-    b = (randint(0, 0xf) * -1)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_small_pos_neg_msgs = []
-for operands, result in random_cases:
-    rand_small_pos_neg_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_small_pos_neg_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xf)
+    b = rng.randint(0, 0xf) * -1
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Small Negative and Positive
-random_cases = []
-for i in range(3):
-    a = (randint(0, 0xf) * -1)
-    b = randint(0, 0xf)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_small_neg_pos_msgs = []
-for operands, result in random_cases:
-    rand_small_neg_pos_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_small_neg_pos_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xf) * -1
+    b = rng.randint(0, 0xf)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Small Negative and Negative
-random_cases = []
-for i in range(3):
-    a = (randint(0, 0xf) * -1)
-    b = (randint(0, 0xf) * -1)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_small_neg_msgs = []
-for operands, result in random_cases:
-    rand_small_neg_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_small_neg_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xf) * -1
+    b = rng.randint(0, 0xf) * -1
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Two Large Positive
-random_cases = []
-for i in range(3):
-    a = randint(0, 0x7fffffff)
-    b = randint(0, 0x7fffffff)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_large_pos_msgs = []
-for operands, result in random_cases:
-    rand_large_pos_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_large_pos_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0x7fffffff)
+    b = rng.randint(0, 0x7fffffff)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Large Positive and Negative
-random_cases = []
-for i in range(3):
-    a = randint(0, 0x7fffffff)
-    b = (randint(1, 0x7fffffff) * -1)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_large_pos_neg_msgs = []
-for operands, result in random_cases:
-    rand_large_pos_neg_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_large_pos_neg_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0x7fffffff)
+    b = rng.randint(1, 0x7fffffff) * -1
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Large Negative and Positive
-random_cases = []
-for i in range(3):
-    a = (randint(1, 0x7fffffff) * -1)
-    b = randint(0, 0x7fffffff)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_large_neg_pos_msgs = []
-for operands, result in random_cases:
-    rand_large_neg_pos_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_large_neg_pos_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(1, 0x7fffffff) * -1
+    b = rng.randint(0, 0x7fffffff)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Mult with Large Negative and Negative
-random_cases = []
-for i in range(3):
-    a = (randint(1, 0x7fffffff) * -1)
-    b = (randint(0, 0x7fffffff) * -1)
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
 
-rand_large_neg_msgs = []
-for operands, result in random_cases:
-    rand_large_neg_msgs.extend( [operands, result])
+@lru_cache( maxsize=None )
+def rand_large_neg_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(1, 0x7fffffff) * -1
+    b = rng.randint(0, 0x7fffffff) * -1
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Low Bits Masked Off
-random_cases = []
-for i in range(3):
-    shamt1 = randint(2, 31)
-    shamt2 = randint(2, 31)
-    a = randint(0, 0xffffffff)
-    a = a << shamt1
-    b = randint(0, 0xffffffff)
-    b = b << shamt2
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
-
-rand_low_bit_mask_msgs = []
-for operands, result in random_cases:
-    rand_low_bit_mask_msgs.extend( [operands, result])
+
+@lru_cache( maxsize=None )
+def rand_low_bit_mask_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xffffffff) << rng.randint(2, 31)
+    b = rng.randint(0, 0xffffffff) << rng.randint(2, 31)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random High Bits Masked Off
-random_cases = []
-for i in range(3):
-    shamt1 = randint(2, 31)
-    shamt2 = randint(2, 31)
-    a = randint(0, 0xffffffff)
-    a = a >> shamt1
-    b = randint(0, 0xffffffff)
-    b = b >> shamt2
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
-
-rand_high_bit_mask_msgs = []
-for operands, result in random_cases:
-    rand_high_bit_mask_msgs.extend( [operands, result])
+
+@lru_cache( maxsize=None )
+def rand_high_bit_mask_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = rng.randint(0, 0xffffffff) >> rng.randint(2, 31)
+    b = rng.randint(0, 0xffffffff) >> rng.randint(2, 31)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Low and High Bits Masked Off
-random_cases = []
-for i in range(3):
-    shamt1 = randint(2, 12)
-    shamt2 = randint(2, 12)
-    shamt3 = randint(2, 12)
-    shamt4 = randint(2, 12)
-    a = randint(0, 0xffffffff)
-    a = a << shamt1
-    a = a >> shamt2
-    b = randint(0, 0xffffffff)
-    b = b << shamt3
-    b = b >> shamt4
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
-
-rand_low_high_mask_msgs = []
-for operands, result in random_cases:
-    rand_low_high_mask_msgs.extend( [operands, result])
+
+@lru_cache( maxsize=None )
+def rand_low_high_mask_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = ( rng.randint(0, 0xffffffff) << rng.randint(2, 12) ) >> rng.randint(2, 12)
+    b = ( rng.randint(0, 0xffffffff) << rng.randint(2, 12) ) >> rng.randint(2, 12)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Sparse Numbers with Many Zeros
-random_cases = []
-for i in range(3):
-    shamt1 = randint(0, 31)
-    shamt2 = randint(0, 31)
-    a = 1 << shamt1
-    b = 1 << shamt2
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
-
-rand_sparse_zeros_msgs = []
-for operands, result in random_cases:
-    rand_sparse_zeros_msgs.extend( [operands, result])
+
+@lru_cache( maxsize=None )
+def rand_sparse_zeros_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = 1 << rng.randint(0, 31)
+    b = 1 << rng.randint(0, 31)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
 
 # Random Dense Numbers with Many Ones
-random_cases = []
-for i in range(3):
-    shamt1 = randint(0, 12)
-    shamt2 = randint(0, 12)
-    a = 0xffffffff << shamt1
-    b = 0xffffffff << shamt2
-    c = a*b
-    random_cases.append( (mk_imsg(a, b), mk_omsg(c)) )
-
-rand_dense_ones_msgs = []
-for operands, result in random_cases:
-    rand_dense_ones_msgs.extend( [operands, result])
+
+@lru_cache( maxsize=None )
+def rand_dense_ones_msgs( seed=0xdeadbeef ):
+  rng  = Random( seed )
+  msgs = []
+  for i in range(3):
+    a = 0xffffffff << rng.randint(0, 12)
+    b = 0xffffffff << rng.randint(0, 12)
+    msgs.extend([ mk_imsg(a, b), mk_omsg(a*b) ])
+  return msgs
+
+#=========================================================================
+# Bulk Random Tests
+#=========================================================================
+# Operands and golden products are generated as NumPy arrays by
+# gen_bulk_msgs, so these cases scale to millions of messages by raising
+# bulk_nmsgs without the per-message Bits construction dominating. Like
+# the random lists above they are only generated when a case runs.
+
+bulk_nmsgs = 100
+
+bulk_large_pos_msgs     = lazy_bulk_msgs( 'large_pos',     bulk_nmsgs )
+bulk_large_pos_neg_msgs = lazy_bulk_msgs( 'large_pos_neg', bulk_nmsgs )
+bulk_large_neg_pos_msgs = lazy_bulk_msgs( 'large_neg_pos', bulk_nmsgs )
+bulk_large_neg_msgs     = lazy_bulk_msgs( 'large_neg',     bulk_nmsgs )
+bulk_sparse_zeros_msgs  = lazy_bulk_msgs( 'sparse_zeros',  bulk_nmsgs )
+bulk_dense_ones_msgs    = lazy_bulk_msgs( 'dense_ones',    bulk_nmsgs )
 
 #-------------------------------------------------------------------------
 # Test Case Table
@@ -389,25 +400,78 @@ test_case_table = mk_test_case_table([
   [  "rand_low_high_mask",  rand_low_high_mask_msgs,  0,        0          ],
   [  "rand_sparse_zeros",   rand_sparse_zeros_msgs,   7,        6          ],
   [  "rand_dense_ones",     rand_dense_ones_msgs,     0,        0          ],
+  [  "bulk_large_pos",      bulk_large_pos_msgs,      0,        0          ],
+  [  "bulk_large_pos_neg",  bulk_large_pos_neg_msgs,  3,        5          ],
+  [  "bulk_large_neg_pos",  bulk_large_neg_pos_msgs,  0,        0          ],
+  [  "bulk_large_neg",      bulk_large_neg_msgs,      5,        1          ],
+  [  "bulk_sparse_zeros",   bulk_sparse_zeros_msgs,   0,        0          ],
+  [  "bulk_dense_ones",     bulk_dense_ones_msgs,     2,        3          ],
 ])
 #-------------------------------------------------------------------------
-# TestHarness
+# run_test
 #-------------------------------------------------------------------------
+# Run one row of a test case table through the given multiplier and
+# return the harness, so callers can inspect e.g. the cycle count. The
+# msgs column is either a list or a function generating the list.
 
-@pytest.mark.parametrize( **test_case_table )
-def test( test_params, cmdline_opts ):
+def run_test( imul, test_params, cmdline_opts ):
 
-  th = TestHarness( IntMulFL() )
+  msgs = test_params.msgs
+  if callable( msgs ):
+    msgs = msgs()
+
+  th = TestHarness( imul )
 
   th.set_param("top.src.construct",
-    msgs=test_params.msgs[::2],
+    msgs=msgs[::2],
     initial_delay=test_params.src_delay+3,
     interval_delay=test_params.src_delay )
 
   th.set_param("top.sink.construct",
-    msgs=test_params.msgs[1::2],
+    msgs=msgs[1::2],
     initial_delay=test_params.sink_delay+3,
     interval_delay=test_params.sink_delay )
 
   run_sim( th, cmdline_opts, duts=['imul'] )
 
+  return th
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, cmdline_opts ):
+  run_test( IntMulFL(), test_params, cmdline_opts )
+
+#-------------------------------------------------------------------------
+# Soak Tests
+#-------------------------------------------------------------------------
+# Long random streams fed through the lazy source/sink. Both sides
+# regenerate the same seeded stream on demand, so memory stays constant
+# and soak_nmsgs can be raised to millions of messages (along with
+# --max-cycles for the RTL models).
+
+soak_nmsgs = 1000
+
+@pytest.mark.parametrize( "dist, src_delay, sink_delay", [
+  ( "large_pos",     0, 0 ),
+  ( "large_neg",     0, 0 ),
+  ( "low_high_mask", 2, 3 ),
+  ( "dense_ones",    0, 4 ),
+])
+def test_soak( dist, src_delay, sink_delay, cmdline_opts ):
+
+  th = TestHarness( IntMulFL(), lazy=True )
+
+  th.set_param("top.src.construct",
+    msgs=lambda: gen_stream_imsgs( dist, soak_nmsgs ),
+    initial_delay=src_delay+3,
+    interval_delay=src_delay )
+
+  th.set_param("top.sink.construct",
+    msgs=lambda: gen_stream_omsgs( dist, soak_nmsgs ),
+    initial_delay=sink_delay+3,
+    interval_delay=sink_delay )
+
+  run_sim( th, cmdline_opts, duts=['imul'] )
@@ -0,0 +1,82 @@
+#=========================================================================
+# IntMulMemo_test
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import run_sim
+
+from lab1_imul.IntMulMemo   import IntMulMemo
+from lab1_imul.IntMulMemoFL import IntMulMemoFL
+from lab1_imul.imul_latency import memo_hits
+
+from lab1_imul.test.IntMulFL_test import TestHarness, test_case_table, run_test
+from lab1_imul.test.imul_utils import gen_operands, mk_imsgs, imul_golden
+
+#-------------------------------------------------------------------------
+# test
+#-------------------------------------------------------------------------
+# Reuse the IntMulFL test cases. Most of these have few repeated operand
+# pairs, so they mainly exercise the miss path.
+
+@pytest.mark.parametrize( "IntMulType", [ IntMulMemoFL, IntMulMemo ] )
+@pytest.mark.parametrize( "num_entries", [ 1, 4 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, IntMulType, num_entries, cmdline_opts ):
+  run_test( IntMulType( num_entries ), test_params, cmdline_opts )
+
+#-------------------------------------------------------------------------
+# MemoTestHarness
+#-------------------------------------------------------------------------
+# Counts the memo statistics pulses like the cache statistics in
+# SingleCoreSys.
+
+class MemoTestHarness( TestHarness ):
+
+  def construct( s, imul ):
+    super().construct( imul )
+
+    s.naccesses = 0
+    s.nmisses   = 0
+
+    @update_ff
+    def up_stats():
+      if s.reset:
+        s.naccesses = 0
+        s.nmisses   = 0
+      else:
+        s.naccesses += int( s.imul.memo_access )
+        s.nmisses   += int( s.imul.memo_miss )
+
+#-------------------------------------------------------------------------
+# test_stats
+#-------------------------------------------------------------------------
+# Operands drawn from a small pool of pairs, so the number of misses is
+# predicted exactly by the memo table model.
+
+@pytest.mark.parametrize( "IntMulType", [ IntMulMemoFL, IntMulMemo ] )
+@pytest.mark.parametrize( "num_entries", [ 1, 4, 8 ] )
+@pytest.mark.parametrize( "src_delay,sink_delay", [ (0,0), (3,5) ] )
+def test_stats( IntMulType, num_entries, src_delay, sink_delay, cmdline_opts ):
+
+  a, b = gen_operands( 'repeated', 100 )
+
+  th = MemoTestHarness( IntMulType( num_entries ) )
+
+  th.set_param("top.src.construct",
+    msgs=mk_imsgs( a, b ).tolist(),
+    initial_delay=src_delay+3,
+    interval_delay=src_delay )
+
+  th.set_param("top.sink.construct",
+    msgs=imul_golden( a, b ).tolist(),
+    initial_delay=sink_delay+3,
+    interval_delay=sink_delay )
+
+  run_sim( th, cmdline_opts, duts=['imul'] )
+
+  hits = memo_hits( a.tolist(), b.tolist(), num_entries )
+
+  assert th.naccesses == len( a )
+  assert th.nmisses   == len( a ) - hits.sum()
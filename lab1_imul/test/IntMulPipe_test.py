@@ -0,0 +1,56 @@
+#=========================================================================
+# IntMulPipe_test
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import mk_test_case_table
+
+from lab1_imul.IntMulPipe   import IntMulPipe
+from lab1_imul.IntMulPipeCL import IntMulPipeCL
+
+from lab1_imul.test.IntMulFL_test import test_case_table, run_test
+from lab1_imul.test.imul_utils import lazy_bulk_msgs
+
+#-------------------------------------------------------------------------
+# Functional Tests
+#-------------------------------------------------------------------------
+# Reuse the IntMulFL test cases for the cycle-level model and the RTL
+# with a few pipeline depths.
+
+@pytest.mark.parametrize( "nstages", [ 1, 2, 4, 8 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test_cl( test_params, nstages, cmdline_opts ):
+  run_test( IntMulPipeCL( nstages ), test_params, cmdline_opts )
+
+@pytest.mark.parametrize( "nstages", [ 1, 2, 4, 8, 12 ] )
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, nstages, cmdline_opts ):
+  run_test( IntMulPipe( nstages ), test_params, cmdline_opts )
+
+#-------------------------------------------------------------------------
+# Throughput Tests
+#-------------------------------------------------------------------------
+# With zero source/sink delay the pipeline should accept one request per
+# cycle, so streaming nmsgs multiplies takes about nmsgs + nstages
+# cycles (plus the source's initial delay and reset), compared to about
+# 35 cycles per multiply for the iterative designs.
+
+throughput_nmsgs = 100
+
+throughput_test_case_table = mk_test_case_table([
+  (                       "msgs                                              src_delay sink_delay nstages"),
+  [ "uniform_1stage",     lazy_bulk_msgs( 'uniform',    throughput_nmsgs ), 0,        0,         1       ],
+  [ "uniform_2stage",     lazy_bulk_msgs( 'uniform',    throughput_nmsgs ), 0,        0,         2       ],
+  [ "uniform_4stage",     lazy_bulk_msgs( 'uniform',    throughput_nmsgs ), 0,        0,         4       ],
+  [ "uniform_8stage",     lazy_bulk_msgs( 'uniform',    throughput_nmsgs ), 0,        0,         8       ],
+  [ "large_neg_4stage",   lazy_bulk_msgs( 'large_neg',  throughput_nmsgs ), 0,        0,         4       ],
+  [ "dense_ones_4stage",  lazy_bulk_msgs( 'dense_ones', throughput_nmsgs ), 0,        0,         4       ],
+])
+
+@pytest.mark.parametrize( "IntMulType", [ IntMulPipeCL, IntMulPipe ] )
+@pytest.mark.parametrize( **throughput_test_case_table )
+def test_throughput( test_params, IntMulType, cmdline_opts ):
+  th = run_test( IntMulType( test_params.nstages ), test_params, cmdline_opts )
+  assert th.sim_cycle_count() <= throughput_nmsgs + test_params.nstages + 8
@@ -0,0 +1,161 @@
+#=========================================================================
+# imul_latency_test
+#=========================================================================
+
+import pytest
+
+from random import Random
+
+import numpy as np
+
+from lab1_imul.imul_latency import alt_iters, alt_iters_np, alt_latency
+from lab1_imul.imul_latency import base_latency, booth_latency, predict
+from lab1_imul.imul_latency import MemoTable, memo_hits
+from lab1_imul.test.imul_utils import gen_operands
+
+#-------------------------------------------------------------------------
+# alt_rtl_latency
+#-------------------------------------------------------------------------
+# Cycle-by-cycle replay of the IntMulAlt register transfers, returning
+# the product and the latency from the request to the response
+# handshake. The variable shifters only see the LSB of the priority
+# encoder output.
+
+def alt_rtl_latency( a, b ):
+
+  def encode( operand ):
+    if operand & 0x7fffffff == 0:
+      return 31
+    return ( operand & -operand ).bit_length() - 1
+
+  # IDLE
+
+  shamt  = encode( b ) & 1
+  a_reg  = ( a << shamt ) & 0xffffffff
+  b_reg  = b >> shamt
+  result = 0
+
+  # CALC
+
+  counter = 0
+  cycle   = 1
+  while counter != 32 and b_reg != 0:
+    if b_reg & 1:
+      result = ( result + a_reg ) & 0xffffffff
+    a_mux = ( a_reg << 1 ) & 0xffffffff
+    b_mux = b_reg >> 1
+    shamt = encode( b_mux ) & 1
+    a_reg = ( a_mux << shamt ) & 0xffffffff
+    b_reg = b_mux >> shamt
+    counter += 1
+    cycle   += 1
+
+  # The cycle that sees b_reg == 0 transitions to DONE
+
+  return result, cycle + 1
+
+#-------------------------------------------------------------------------
+# booth_rtl_latency
+#-------------------------------------------------------------------------
+# Cycle-by-cycle replay of the IntMulBooth register transfers.
+
+def booth_rtl_latency( a, b, nbits ):
+
+  a_reg  = a
+  b_reg  = b
+  prev   = 0
+  result = 0
+  cycle  = 1
+
+  while b_reg != ( 0xffffffff if prev else 0 ):
+    digit = prev
+    for i in range( nbits ):
+      if ( b_reg >> i ) & 1:
+        digit += -( 1 << i ) if i == nbits-1 else ( 1 << i )
+    result = ( result + digit*a_reg ) & 0xffffffff
+    a_reg  = ( a_reg << nbits ) & 0xffffffff
+    prev   = ( b_reg >> ( nbits-1 ) ) & 1
+    b_reg  = ( ( b_reg - ( ( b_reg >> 31 ) << 32 ) ) >> nbits ) & 0xffffffff
+    cycle += 1
+
+  return result, cycle + 1
+
+#-------------------------------------------------------------------------
+# test_directed
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "b, latency", [
+  ( 0x00000000,  2 ),
+  ( 0x00000001,  3 ),
+  ( 0x00000002,  3 ),
+  ( 0x00000004,  4 ),
+  ( 0x80000000, 18 ),
+  ( 0xffffffff, 34 ),
+])
+def test_directed( b, latency ):
+  assert alt_latency( 7, b ) == latency
+  assert alt_rtl_latency( 7, b ) == ( ( 7*b ) & 0xffffffff, latency )
+  assert base_latency( 7, b ) == 34
+
+#-------------------------------------------------------------------------
+# test_random
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "dist", [
+  "uniform", "small_pos", "large_neg", "low_bit_mask", "sparse_zeros", "dense_ones",
+])
+def test_random( dist ):
+  a, b = gen_operands( dist, 200 )
+  for x, y in zip( a.tolist(), b.tolist() ):
+    assert alt_rtl_latency( x, y ) == ( ( x*y ) & 0xffffffff, alt_latency( x, y ) )
+
+@pytest.mark.parametrize( "nbits", [ 2, 3 ] )
+@pytest.mark.parametrize( "dist", [
+  "uniform", "small_pos", "small_neg", "large_pos_neg", "sparse_zeros", "dense_ones",
+])
+def test_booth_random( dist, nbits ):
+  a, b = gen_operands( dist, 200 )
+  for x, y in zip( a.tolist(), b.tolist() ):
+    assert booth_rtl_latency( x, y, nbits ) == ( ( x*y ) & 0xffffffff, booth_latency( x, y, nbits ) )
+
+@pytest.mark.parametrize( "b, latency4, latency8", [
+  ( 0x00000000,  2,  2 ),
+  ( 0xffffffff,  3,  3 ),
+  ( 0x00000003,  4,  3 ),
+  ( 0x7fffffff, 18, 13 ),
+  ( 0x80000000, 18, 13 ),
+])
+def test_booth_directed( b, latency4, latency8 ):
+  assert booth_latency( 7, b, 2 ) == latency4
+  assert booth_latency( 7, b, 3 ) == latency8
+
+def test_vectorized():
+  rng = Random( 0xdeadbeef )
+  b = np.array( [ rng.getrandbits(32) >> rng.randint(0,31) for _ in range(1000) ], dtype=np.uint32 )
+  assert alt_iters_np( b ).tolist() == [ alt_iters( x ) for x in b.tolist() ]
+
+  latency, ncycles = predict( 'alt', b, b )
+  assert ncycles == sum( alt_latency( 0, x ) + 1 for x in b.tolist() )
+
+#-------------------------------------------------------------------------
+# test_memo
+#-------------------------------------------------------------------------
+
+def test_memo_table():
+  table = MemoTable( 2 )
+  assert not table.access( 3, 5 )
+  assert     table.access( 5, 3 )
+  assert not table.access( 7, 9 )
+  assert not table.access( 2, 2 )
+  assert     table.lookup( 3, 5 ) is None
+  assert     table.lookup( 9, 7 ) == 63
+
+def test_memo_predict():
+  a, b = gen_operands( 'repeated', 200 )
+  hits = memo_hits( a.tolist(), b.tolist(), 8 )
+  assert hits.sum() == 200 - len( set( zip( a.tolist(), b.tolist() ) ) )
+
+  hits = memo_hits( a.tolist(), b.tolist() )
+  latency, _ = predict( 'memo', a, b )
+  assert ( latency[hits] == 1 ).all()
+  assert ( latency[~hits] == alt_iters_np( b[~hits] ) + 2 ).all()
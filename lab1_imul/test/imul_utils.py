@@ -0,0 +1,235 @@
+#=========================================================================
+# imul_utils
+#=========================================================================
+# Batched operand generation for the integer multiplier tests. Operands
+# and golden products are computed as whole uint32/uint64 NumPy arrays,
+# so random test cases can be scaled to millions of messages without
+# building a pair of Bits32 objects and a concat for every operand.
+
+from functools import lru_cache, partial
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+# Helpers
+#-------------------------------------------------------------------------
+
+# Wrap an array of (possibly negative) integers to its 32-bit two's
+# complement encoding.
+
+def u32( x ):
+  return ( np.asarray( x, dtype=np.int64 ) & 0xffffffff ).astype( np.uint32 )
+
+# Draw n integers uniformly from the closed range [lo, hi].
+
+def _rand( rng, lo, hi, n ):
+  return rng.integers( lo, hi, size=n, dtype=np.int64, endpoint=True )
+
+#-------------------------------------------------------------------------
+# Operand distributions
+#-------------------------------------------------------------------------
+# Each distribution takes a NumPy generator and a count and returns a
+# pair of uint32 operand arrays. The names and ranges mirror the rand_*
+# test cases in IntMulFL_test.
+
+def _uniform( rng, n ):
+  return u32( _rand( rng, 0, 0xffffffff, n ) ), u32( _rand( rng, 0, 0xffffffff, n ) )
+
+def _zero_one_neg( rng, n ):
+  return u32( _rand( rng, 0, 0xffffffff, n ) ), u32( _rand( rng, -1, 1, n ) )
+
+def _small_pos( rng, n ):
+  return u32( _rand( rng, 0, 0xf, n ) ), u32( _rand( rng, 0, 0xf, n ) )
+
+def _small_pos_neg( rng, n ):
+  return u32( _rand( rng, 0, 0xf, n ) ), u32( -_rand( rng, 0, 0xf, n ) )
+
+def _small_neg_pos( rng, n ):
+  return u32( -_rand( rng, 0, 0xf, n ) ), u32( _rand( rng, 0, 0xf, n ) )
+
+def _small_neg( rng, n ):
+  return u32( -_rand( rng, 0, 0xf, n ) ), u32( -_rand( rng, 0, 0xf, n ) )
+
+def _large_pos( rng, n ):
+  return u32( _rand( rng, 0, 0x7fffffff, n ) ), u32( _rand( rng, 0, 0x7fffffff, n ) )
+
+def _large_pos_neg( rng, n ):
+  return u32( _rand( rng, 0, 0x7fffffff, n ) ), u32( -_rand( rng, 1, 0x7fffffff, n ) )
+
+def _large_neg_pos( rng, n ):
+  return u32( -_rand( rng, 1, 0x7fffffff, n ) ), u32( _rand( rng, 0, 0x7fffffff, n ) )
+
+def _large_neg( rng, n ):
+  return u32( -_rand( rng, 1, 0x7fffffff, n ) ), u32( -_rand( rng, 0, 0x7fffffff, n ) )
+
+def _low_bit_mask( rng, n ):
+  a = _rand( rng, 0, 0xffffffff, n ) << _rand( rng, 2, 31, n )
+  b = _rand( rng, 0, 0xffffffff, n ) << _rand( rng, 2, 31, n )
+  return u32( a ), u32( b )
+
+def _high_bit_mask( rng, n ):
+  a = _rand( rng, 0, 0xffffffff, n ) >> _rand( rng, 2, 31, n )
+  b = _rand( rng, 0, 0xffffffff, n ) >> _rand( rng, 2, 31, n )
+  return u32( a ), u32( b )
+
+def _low_high_mask( rng, n ):
+  a = ( ( _rand( rng, 0, 0xffffffff, n ) << _rand( rng, 2, 12, n ) ) & 0xffffffff ) >> _rand( rng, 2, 12, n )
+  b = ( ( _rand( rng, 0, 0xffffffff, n ) << _rand( rng, 2, 12, n ) ) & 0xffffffff ) >> _rand( rng, 2, 12, n )
+  return u32( a ), u32( b )
+
+def _sparse_zeros( rng, n ):
+  return u32( 1 << _rand( rng, 0, 31, n ) ), u32( 1 << _rand( rng, 0, 31, n ) )
+
+def _dense_ones( rng, n ):
+  a = 0xffffffff << _rand( rng, 0, 12, n )
+  b = 0xffffffff << _rand( rng, 0, 12, n )
+  return u32( a ), u32( b )
+
+# Operand pairs drawn from a small pool of random pairs, like a workload
+# multiplying by the same few strides or hash constants.
+
+def _repeated( rng, n ):
+  pool_a = _rand( rng, 0, 0xffffffff, 6 )
+  pool_b = _rand( rng, 0, 0xffffffff, 6 )
+  idx    = _rand( rng, 0, 5, n )
+  return u32( pool_a[idx] ), u32( pool_b[idx] )
+
+operand_dists = {
+  'uniform'       : _uniform,
+  'zero_one_neg'  : _zero_one_neg,
+  'small_pos'     : _small_pos,
+  'small_pos_neg' : _small_pos_neg,
+  'small_neg_pos' : _small_neg_pos,
+  'small_neg'     : _small_neg,
+  'large_pos'     : _large_pos,
+  'large_pos_neg' : _large_pos_neg,
+  'large_neg_pos' : _large_neg_pos,
+  'large_neg'     : _large_neg,
+  'low_bit_mask'  : _low_bit_mask,
+  'high_bit_mask' : _high_bit_mask,
+  'low_high_mask' : _low_high_mask,
+  'sparse_zeros'  : _sparse_zeros,
+  'dense_ones'    : _dense_ones,
+  'repeated'      : _repeated,
+}
+
+#-------------------------------------------------------------------------
+# gen_operands
+#-------------------------------------------------------------------------
+# Generate nmsgs operand pairs from the named distribution.
+
+def gen_operands( dist, nmsgs, seed=0xdeadbeef ):
+  rng = np.random.default_rng( seed )
+  return operand_dists[dist]( rng, nmsgs )
+
+#-------------------------------------------------------------------------
+# imul_golden
+#-------------------------------------------------------------------------
+# Golden model: the low 32 bits of the product. The multiply is done in
+# uint64 so it wraps modulo 2^64, which leaves the low word exact.
+
+def imul_golden( a, b ):
+  c = a.astype( np.uint64 ) * b.astype( np.uint64 )
+  return ( c & np.uint64( 0xffffffff ) ).astype( np.uint32 )
+
+#-------------------------------------------------------------------------
+# mk_imsgs/mk_omsgs
+#-------------------------------------------------------------------------
+# Vectorized versions of mk_imsg/mk_omsg. The input message places a in
+# the upper 32 bits and b in the lower 32 bits, like concat( a, b ).
+
+def mk_imsgs( a, b ):
+  return ( a.astype( np.uint64 ) << np.uint64( 32 ) ) | b.astype( np.uint64 )
+
+def mk_omsgs( c ):
+  return c.astype( np.uint64 )
+
+#-------------------------------------------------------------------------
+# gen_bulk_msgs
+#-------------------------------------------------------------------------
+# Return nmsgs random multiplies from the named distribution as a list of
+# interleaved input/output messages, the same layout as the hand-written
+# *_msgs lists. Messages are plain ints: the stream source and sink
+# convert them to Bits64/Bits32 when they are written to or compared
+# against the ports, which is much cheaper than constructing the Bits
+# up front.
+
+def gen_bulk_msgs( dist, nmsgs, seed=0xdeadbeef ):
+  a, b = gen_operands( dist, nmsgs, seed )
+  msgs = np.empty( 2*nmsgs, dtype=np.uint64 )
+  msgs[0::2] = mk_imsgs( a, b )
+  msgs[1::2] = mk_omsgs( imul_golden( a, b ) )
+  return msgs.tolist()
+
+#-------------------------------------------------------------------------
+# lazy_bulk_msgs
+#-------------------------------------------------------------------------
+# Zero-argument function returning gen_bulk_msgs( dist, nmsgs, seed ),
+# for the msgs column of a test case table. Nothing is generated until a
+# test case calls it, so collecting a test file stays cheap, and the
+# result is memoized per (dist, nmsgs, seed) so test cases sharing a
+# stream build it once. Callers must not modify the returned list.
+
+@lru_cache( maxsize=None )
+def _bulk_msgs( dist, nmsgs, seed ):
+  return gen_bulk_msgs( dist, nmsgs, seed )
+
+def lazy_bulk_msgs( dist, nmsgs, seed=0xdeadbeef ):
+  return partial( _bulk_msgs, dist, nmsgs, seed )
+
+#-------------------------------------------------------------------------
+# gen_stream_imsgs/gen_stream_omsgs
+#-------------------------------------------------------------------------
+# Generators yielding random multiplies like gen_bulk_msgs, but a chunk
+# at a time, so arbitrarily long streams use constant memory. The
+# input and expected output streams are two separate generators that
+# replay the same seeded sequence, which lets a lazy source and sink
+# consume them independently.
+
+def _gen_stream( dist, nmsgs, seed, chunk ):
+  rng = np.random.default_rng( seed )
+  for i in range( 0, nmsgs, chunk ):
+    a, b = operand_dists[dist]( rng, min( chunk, nmsgs-i ) )
+    yield a, b
+
+def gen_stream_imsgs( dist, nmsgs, seed=0xdeadbeef, chunk=4096 ):
+  for a, b in _gen_stream( dist, nmsgs, seed, chunk ):
+    yield from mk_imsgs( a, b ).tolist()
+
+def gen_stream_omsgs( dist, nmsgs, seed=0xdeadbeef, chunk=4096 ):
+  for a, b in _gen_stream( dist, nmsgs, seed, chunk ):
+    yield from mk_omsgs( imul_golden( a, b ) ).tolist()
+
+#-------------------------------------------------------------------------
+# shrink_msgs
+#-------------------------------------------------------------------------
+# Delta debugging (ddmin): shrink a failing list of messages to a small
+# sublist that still fails. fails( msgs ) reruns the test on a candidate
+# list and returns True if it still fails. We try keeping each of n
+# chunks, then dropping each chunk, and double n whenever neither helps,
+# until single messages can no longer be removed.
+
+def shrink_msgs( msgs, fails ):
+  msgs = list( msgs )
+  n    = 2
+
+  while len( msgs ) >= 2:
+
+    size   = -( -len( msgs ) // n )
+    chunks = [ msgs[i:i+size] for i in range( 0, len( msgs ), size ) ]
+
+    for i, chunk in enumerate( chunks ):
+      if fails( chunk ):
+        msgs, n = chunk, 2
+        break
+      rest = [ msg for c in chunks[:i] + chunks[i+1:] for msg in c ]
+      if len( chunks ) > 2 and fails( rest ):
+        msgs, n = rest, max( n-1, 2 )
+        break
+
+    else:
+      if n >= len( msgs ):
+        break
+      n = min( 2*n, len( msgs ) )
+
+  return msgs
@@ -0,0 +1,50 @@
+#=========================================================================
+# imul_utils_test
+#=========================================================================
+
+import pytest
+
+import numpy as np
+
+from lab1_imul.test.imul_utils import operand_dists, gen_operands, imul_golden
+from lab1_imul.test.imul_utils import gen_bulk_msgs, shrink_msgs
+
+#-------------------------------------------------------------------------
+# test_gen
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "dist", list( operand_dists ) )
+def test_gen( dist ):
+  a, b = gen_operands( dist, 50 )
+  assert a.dtype == np.uint32 and b.dtype == np.uint32
+  assert len( a ) == len( b ) == 50
+
+  msgs = gen_bulk_msgs( dist, 50 )
+  assert msgs[0::2] == [ ( x << 32 ) | y for x, y in zip( a.tolist(), b.tolist() ) ]
+  assert msgs[1::2] == [ ( x * y ) & 0xffffffff for x, y in zip( a.tolist(), b.tolist() ) ]
+
+def test_golden():
+  a = np.array( [ 0xffffffff, 0x80000000, 7 ], dtype=np.uint32 )
+  b = np.array( [ 0xffffffff, 2,          9 ], dtype=np.uint32 )
+  assert imul_golden( a, b ).tolist() == [ 1, 0, 63 ]
+
+#-------------------------------------------------------------------------
+# test_shrink
+#-------------------------------------------------------------------------
+
+def test_shrink_single():
+  msgs = list( range( 100 ) )
+  assert shrink_msgs( msgs, lambda m: 42 in m ) == [ 42 ]
+
+def test_shrink_pair():
+  # Fails only when 13 is followed later by 77, like a bug that depends
+  # on the state left behind by an earlier transaction
+
+  def fails( m ):
+    return 13 in m and 77 in m[ m.index( 13 ): ]
+
+  assert shrink_msgs( list( range( 200 ) ), fails ) == [ 13, 77 ]
+
+def test_shrink_minimal():
+  assert shrink_msgs( [ 5 ], lambda m: True ) == [ 5 ]
+  assert shrink_msgs( [ 1, 2, 3 ], lambda m: len( m ) >= 2 ) in ( [ 1, 2 ], [ 2, 3 ], [ 1, 3 ] )
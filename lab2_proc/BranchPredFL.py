@@ -0,0 +1,116 @@
+#=========================================================================
+# BranchPredFL
+#=========================================================================
+# Reference model of the branch predictor in ProcBranchPred.v: a direct
+# mapped BTB with full tags and a BHT of 2-bit saturating counters, both
+# indexed with the low bits of the word address of the PC. Only taken
+# branches and jals are written into the BTB, and only branches train
+# the BHT.
+#
+# The model updates the tables as soon as a branch is accessed, while
+# ProcAlt updates them when the branch leaves X. The two make the same
+# predictions as long as two dynamic instances of the same branch are at
+# least three instructions apart, which holds for any loop whose body is
+# at least three instructions long.
+
+from collections import namedtuple
+
+from lab2_proc.ProcISS import decode, sext
+
+#-------------------------------------------------------------------------
+# BranchPredFL
+#-------------------------------------------------------------------------
+
+class BranchPredFL:
+
+  def __init__( s, num_bht_entries=64, num_btb_entries=16 ):
+    s.bht = [ 1 ] * num_bht_entries
+    s.btb = [ None ] * num_btb_entries
+
+    s.nbranches = 0
+    s.nmispreds = 0
+
+  def _bht_idx( s, pc ):
+    return ( pc >> 2 ) % len( s.bht )
+
+  def _btb_idx( s, pc ):
+    return ( pc >> 2 ) % len( s.btb )
+
+  # Return the predicted ( taken, target ) for the instruction at pc
+
+  def predict( s, pc ):
+    entry = s.btb[ s._btb_idx( pc ) ]
+    if entry is None or entry[0] != pc:
+      return False, ( pc + 4 ) & 0xffffffff
+    _, is_jal, target = entry
+    if is_jal or s.bht[ s._bht_idx( pc ) ] >= 2:
+      return True, target
+    return False, ( pc + 4 ) & 0xffffffff
+
+  def update( s, pc, is_jal, taken, target ):
+    if not is_jal:
+      idx = s._bht_idx( pc )
+      s.bht[idx] = min( s.bht[idx] + 1, 3 ) if taken else max( s.bht[idx] - 1, 0 )
+    if taken:
+      s.btb[ s._btb_idx( pc ) ] = ( pc, is_jal, target )
+
+  # Predict and then update with one branch or jal, counting the branch
+  # and returning True if it was mispredicted
+
+  def access( s, pc, is_jal, taken, target ):
+    pred_taken, _ = s.predict( pc )
+    s.update( pc, is_jal, taken, target )
+    mispred = pred_taken != taken
+    s.nbranches += 1
+    s.nmispreds += mispred
+    return mispred
+
+  def accuracy( s ):
+    return 1.0 - s.nmispreds / max( s.nbranches, 1 )
+
+#-------------------------------------------------------------------------
+# branch_trace
+#-------------------------------------------------------------------------
+# Run a program loaded into a ProcISS one instruction at a time and
+# return every branch and jal it executes, in program order. The
+# direction comes from the branch condition rather than the next PC,
+# since a taken branch to PC+4 still allocates a BTB entry.
+
+BranchRecord = namedtuple( "BranchRecord", "pc is_jal taken target" )
+
+branch_conds = {
+  "beq"  : lambda a, b: a == b,
+  "bne"  : lambda a, b: a != b,
+  "blt"  : lambda a, b: sext( a ) <  sext( b ),
+  "bge"  : lambda a, b: sext( a ) >= sext( b ),
+  "bltu" : lambda a, b: a <  b,
+  "bgeu" : lambda a, b: a >= b,
+  "jal"  : lambda a, b: True,
+}
+
+def branch_trace( iss, max_insts=1000000 ):
+  trace = []
+  nrefs = len( iss.proc2mngr_ref )
+
+  while len( iss.proc2mngr ) < nrefs and iss.num_insts < max_insts:
+    pc   = iss.pc
+    inst = decode( iss.decode_pc( pc )[0] )
+    if inst.name in branch_conds:
+      taken = branch_conds[ inst.name ]( iss.rf[ inst.rs1 ], iss.rf[ inst.rs2 ] )
+      trace.append( BranchRecord( pc, inst.name == "jal", taken,
+                                  ( pc + inst.imm ) & 0xffffffff ) )
+    iss.step()
+
+  return trace
+
+#-------------------------------------------------------------------------
+# replay
+#-------------------------------------------------------------------------
+# Replay a branch trace through a fresh predictor and return it, so its
+# nbranches and nmispreds can be compared against ProcAlt.
+
+def replay( trace, num_bht_entries=64, num_btb_entries=16 ):
+  bp = BranchPredFL( num_bht_entries, num_btb_entries )
+  for record in trace:
+    bp.access( *record )
+  return bp
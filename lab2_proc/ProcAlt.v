@@ -16,10 +16,20 @@
 `include "lab2_proc/ProcAltCtrl.v"
 `include "lab2_proc/ProcAltDpath.v"
 `include "lab2_proc/DropUnit.v"
+`include "lab2_proc/ProcStoreBuffer.v"
 
 module lab2_proc_ProcAlt
 #(
-  parameter p_num_cores = 1
+  parameter p_num_cores       = 1,
+
+  // Branch predictor table sizes, both must be powers of two
+
+  parameter p_num_bht_entries = 64,
+  parameter p_num_btb_entries = 16,
+
+  // Store buffer size, must be a power of two
+
+  parameter p_num_sb_entries  = 4
 )
 (
   input  logic         clk,
@@ -67,7 +77,23 @@ module lab2_proc_ProcAlt
 
   input  logic [31:0]  core_id,
   output logic         commit_inst,
-  output logic         stats_en
+  output logic         stats_en,
+
+  // Reason no instruction committed this cycle, see the CPI stack
+  // section of the control unit
+
+  output logic [2:0]   stall_cause,
+
+  // Branch predictor statistics: bp_resolve is high for every branch and
+  // jal leaving X, and bp_mispred is high if it was mispredicted
+
+  output logic         bp_resolve,
+  output logic         bp_mispred,
+
+  // Bypass and stall coverage events, see the coverage section of the
+  // control unit
+
+  output logic [15:0]  cov_events
 );
 
   //multiplier and X mux
@@ -75,6 +101,7 @@ module lab2_proc_ProcAlt
   logic       imul_resp_rdy_X;
   logic       imul_req_rdy_D;
   logic       imul_resp_val_X;
+  logic       imul_wb_W;
   logic [1:0] ex_result_sel_X;
 
   //----------------------------------------------------------------------
@@ -146,6 +173,10 @@ module lab2_proc_ProcAlt
   logic [31:0] dmem_reqstream_enq_msg_addr;
   logic [31:0] dmem_reqstream_enq_msg_data;
 
+  mem_req_4B_t dmem_reqstream_sb_msg;
+  logic        dmem_reqstream_sb_val;
+  logic        dmem_reqstream_sb_rdy;
+
   assign dmem_reqstream_enq_msg.type_  = (dmem_type_X == 2'd2)? `VC_MEM_REQ_MSG_TYPE_WRITE : `VC_MEM_REQ_MSG_TYPE_READ;
   assign dmem_reqstream_enq_msg.opaque = 8'b0;
   assign dmem_reqstream_enq_msg.addr   = dmem_reqstream_enq_msg_addr;
@@ -162,11 +193,54 @@ module lab2_proc_ProcAlt
     .enq_val (dmem_reqstream_enq_val),
     .enq_rdy (dmem_reqstream_enq_rdy),
 
-    .deq_msg (dmem_reqstream_msg),
-    .deq_val (dmem_reqstream_val),
-    .deq_rdy (dmem_reqstream_rdy)
+    .deq_msg (dmem_reqstream_sb_msg),
+    .deq_val (dmem_reqstream_sb_val),
+    .deq_rdy (dmem_reqstream_sb_rdy)
+  );
+
+  //----------------------------------------------------------------------
+  // Store Buffer
+  //----------------------------------------------------------------------
+  // Between the dmem request queue and the data memory. The control unit
+  // sees the responses of the store buffer instead of the memory, so a
+  // sw gets its response without waiting for the memory.
+
+  mem_resp_4B_t dmem_respstream_sb_msg;
+  logic         dmem_respstream_sb_val;
+  logic         dmem_respstream_sb_rdy;
+
+  logic         store_buffer_empty;
+
+  lab2_proc_ProcStoreBuffer #(p_num_sb_entries) store_buffer
+  (
+    .clk                 (clk),
+    .reset               (reset),
+
+    .proc_reqstream_msg  (dmem_reqstream_sb_msg),
+    .proc_reqstream_val  (dmem_reqstream_sb_val),
+    .proc_reqstream_rdy  (dmem_reqstream_sb_rdy),
+
+    .proc_respstream_msg (dmem_respstream_sb_msg),
+    .proc_respstream_val (dmem_respstream_sb_val),
+    .proc_respstream_rdy (dmem_respstream_sb_rdy),
+
+    .mem_reqstream_msg   (dmem_reqstream_msg),
+    .mem_reqstream_val   (dmem_reqstream_val),
+    .mem_reqstream_rdy   (dmem_reqstream_rdy),
+
+    .mem_respstream_msg  (dmem_respstream_msg),
+    .mem_respstream_val  (dmem_respstream_val),
+    .mem_respstream_rdy  (dmem_respstream_rdy),
+
+    .empty               (store_buffer_empty)
   );
 
+  // No store waiting in the request queue or the store buffer, which a
+  // fence waits for in X
+
+  logic  sb_empty;
+  assign sb_empty = store_buffer_empty && dmem_queue_num_free_entries;
+
   //----------------------------------------------------------------------
   // proc2mngr Bypass Queue
   //----------------------------------------------------------------------
@@ -227,12 +301,19 @@ module lab2_proc_ProcAlt
   logic [1:0]  bypass_rs1_sel;
   logic [1:0]  bypass_rs2_sel;
 
+  //branch predictor
+  logic        bp_pred_taken_X;
+  logic        bp_update_val_X;
+  logic        bp_update_jal_X;
+  logic        bp_update_taken_X;
+
   // status signals (dpath->ctrl)
 
   logic [31:0] inst_D;
   logic        br_cond_eq_X;
   logic        br_cond_lt_X;
   logic        br_cond_ltu_X;
+  logic        bp_pred_taken_F;
 
 
   //----------------------------------------------------------------------
@@ -252,8 +333,8 @@ module lab2_proc_ProcAlt
 
     .dmem_reqstream_val       (dmem_reqstream_enq_val),
     .dmem_reqstream_rdy       (dmem_reqstream_enq_rdy),
-    .dmem_respstream_val      (dmem_respstream_val),
-    .dmem_respstream_rdy      (dmem_respstream_rdy),
+    .dmem_respstream_val      (dmem_respstream_sb_val),
+    .dmem_respstream_rdy      (dmem_respstream_sb_rdy),
 
     // mngr communication ports
 
@@ -282,7 +363,9 @@ module lab2_proc_ProcAlt
 
   lab2_proc_ProcAltDpath
   #(
-    .p_num_cores              (p_num_cores)
+    .p_num_cores              (p_num_cores),
+    .p_num_bht_entries        (p_num_bht_entries),
+    .p_num_btb_entries        (p_num_btb_entries)
   )
   dpath
   (
@@ -294,7 +377,7 @@ module lab2_proc_ProcAlt
     // Data Memory Port
 
     .dmem_reqstream_msg_addr  (dmem_reqstream_enq_msg_addr),
-    .dmem_respstream_msg_data (dmem_respstream_msg.data),
+    .dmem_respstream_msg_data (dmem_respstream_sb_msg.data),
     .dmem_reqstream_msg_data  (dmem_reqstream_enq_msg_data),
 
     // mngr communication ports
@@ -386,6 +469,43 @@ module lab2_proc_ProcAlt
   end
   `VC_TRACE_END
 
+  // Binary trace. With +bintrace=<prefix>, every cycle the signals shown
+  // in the line trace are written as a fixed-size record to the file
+  // <prefix>.<instance name>, which lab4_sys/bintrace.py renders into
+  // the line trace above offline.
+  //
+  //  word 0   : flags (see bintrace_flags)
+  //  word 1-3 : pc_F, pc_D, pc_X
+  //  word 4-7 : inst_D, inst_X, inst_M, inst_W
+
+  string  bintrace_prefix;
+  integer bintrace_fd = 0;
+
+  initial begin
+    if ( $value$plusargs( "bintrace=%s", bintrace_prefix ) ) begin
+      bintrace_fd = $fopen( $sformatf( "%s.%m", bintrace_prefix ), "wb" );
+      $fwrite( bintrace_fd, "%u%u%u", 32'h43525442, 32'd1, 32'd8 );
+    end
+  end
+
+  logic [31:0] bintrace_flags;
+  assign bintrace_flags = { 19'b0, reset,
+                            ctrl.squash_D, ctrl.squash_F,
+                            ctrl.stall_W,  ctrl.stall_M, ctrl.stall_X, ctrl.stall_D, ctrl.stall_F,
+                            ctrl.val_W,    ctrl.val_M,   ctrl.val_X,   ctrl.val_D,   ctrl.val_F };
+
+  always @( posedge clk ) begin
+    if ( bintrace_fd != 0 )
+      $fwrite( bintrace_fd, "%u%u%u%u%u%u%u%u", bintrace_flags,
+               dpath.pc_F, dpath.pc_D, dpath.pc_X,
+               ctrl.inst_D, ctrl.inst_X, ctrl.inst_M, ctrl.inst_W );
+  end
+
+  final begin
+    if ( bintrace_fd != 0 )
+      $fclose( bintrace_fd );
+  end
+
   // These trace modules are useful because they breakout all the
   // individual fields so you can see them in gtkwave
 
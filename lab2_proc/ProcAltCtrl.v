@@ -29,6 +29,10 @@ module lab2_proc_ProcAltCtrl
   input  logic        dmem_respstream_val,
   output logic        dmem_respstream_rdy,
 
+  // High when every store has left the store buffer
+
+  input  logic        sb_empty,
+
   // mngr communication port
 
   input  logic        mngr2proc_val,
@@ -61,6 +65,7 @@ module lab2_proc_ProcAltCtrl
   output logic        reg_en_W,
   output logic [4:0]  rf_waddr_W,
   output logic        rf_wen_W,
+  output logic        imul_wb_W,
   output logic        stats_en_wen_W,
 
   // ex_result_sel_mux_X control signal
@@ -70,18 +75,36 @@ module lab2_proc_ProcAltCtrl
   output  logic [1:0] bypass_rs1_sel,
   output  logic [1:0] bypass_rs2_sel,
 
+  // branch predictor control signals (ctrl->dpath)
+
+  output logic        bp_pred_taken_X,
+  output logic        bp_update_val_X,
+  output logic        bp_update_jal_X,
+  output logic        bp_update_taken_X,
+
   // status signals (dpath->ctrl)
 
   input  logic [31:0] inst_D,
   input  logic        br_cond_eq_X,
   input  logic        br_cond_lt_X,
   input  logic        br_cond_ltu_X,
+  input  logic        bp_pred_taken_F,
 
   output logic        op1_sel_D,
 
   // extra ports
   output logic [1:0]  dmem_type_X,
-  output logic        commit_inst
+  output logic        commit_inst,
+  output logic [2:0]  stall_cause,
+
+  // branch predictor statistics
+
+  output logic        bp_resolve,
+  output logic        bp_mispred,
+
+  // bypass and stall coverage events
+
+  output logic [15:0] cov_events
 );
 
   //----------------------------------------------------------------------
@@ -227,11 +250,15 @@ module lab2_proc_ProcAltCtrl
 
   // Pipline registers
 
+  logic pred_taken_D;
+
   always_ff @( posedge clk ) begin
     if ( reset )
       val_D <= 1'b0;
-    else if ( reg_en_D )
-      val_D <= next_val_F;
+    else if ( reg_en_D ) begin
+      val_D        <= next_val_F;
+      pred_taken_D <= bp_pred_taken_F;
+    end
   end
 
   // Parse instruction fields
@@ -333,10 +360,11 @@ module lab2_proc_ProcAltCtrl
   localparam wm_a     = 1'b0; // Use ex_result_reg__M output
   localparam wm_m     = 1'b1; // Use data memory response
 
-  // jal, redirect PC in F if branch is taken
+  // jal, redirect PC in F unless the branch predictor already fetched
+  // from the jal target
 
   always_comb begin
-    if ( val_D && ( is_jal_D ) ) begin
+    if ( val_D && is_jal_D && !pred_taken_D ) begin
       pc_redirect_D = 1'b1;
       pc_sel_D      = 2'b10; // use jal target
     end
@@ -484,7 +512,7 @@ module lab2_proc_ProcAltCtrl
     else if (val_D && rs1_en_D && val_M &&  rf_wen_M && (rf_waddr_M == inst_rs1_D) && (rf_waddr_M != 5'd0) ) begin //destination register in M stage = source reg in M stage
       bypass_rs1_sel = 2'd2; //bypass from M stage 
     end
-    else if (val_D && rs1_en_D && val_W && rf_wen_W && (rf_waddr_W == inst_rs1_D) && (rf_waddr_W != 5'd0) ) begin //destination register in M stage = source reg in M stage
+    else if (val_D && rs1_en_D && rf_wen_W && (rf_waddr_W == inst_rs1_D) && (rf_waddr_W != 5'd0) ) begin //register written in W, by the instruction in W or a mul
       bypass_rs1_sel = 2'd3; //bypass from W stage
     end
     else begin
@@ -500,7 +528,7 @@ module lab2_proc_ProcAltCtrl
     else if (val_D && rs2_en_D && val_M && rf_wen_M && (rf_waddr_M == inst_rs2_D) && rf_waddr_M != 5'd0) begin //destination register in M stage = source reg in M stage
       bypass_rs2_sel = 2'd2; //bypass from M stage 
     end
-    else if (val_D && rs2_en_D && val_W && rf_wen_W && (rf_waddr_W == inst_rs2_D) && rf_waddr_W != 5'd0) begin //destination register in M stage = source reg in M stage
+    else if (val_D && rs2_en_D && rf_wen_W && (rf_waddr_W == inst_rs2_D) && rf_waddr_W != 5'd0) begin //register written in W, by the instruction in W or a mul
       bypass_rs2_sel = 2'd3; //bypass from M stage
     end
     else begin
@@ -586,6 +614,16 @@ module lab2_proc_ProcAltCtrl
  assign ostall_load_use_X_rs2_D = rs2_en_D && val_X && rf_wen_X && (inst_rs2_D == rf_waddr_X) &&
          (rf_waddr_X != 0) && (dmem_type_X == ld);
 
+  // ostall while D reads or writes the destination of a mul in flight,
+  // unless the mul writes back this cycle and its result is bypassed from
+  // W (see the multiplier scoreboard below)
+
+  logic  ostall_imul_sb_D;
+  assign ostall_imul_sb_D = val_D && imul_pend && !imul_wb_W && ( imul_rd != 5'd0 )
+                         && ( ( rs1_en_D && ( inst_rs1_D == imul_rd ) )
+                           || ( rs2_en_D && ( inst_rs2_D == imul_rd ) )
+                           || ( rf_wen_D && ( rf_waddr_D == imul_rd ) ) );
+
   // Put together ostall signal due to hazards
 
   logic  ostall_hazard_D;
@@ -601,7 +639,7 @@ module lab2_proc_ProcAltCtrl
   // Final ostall signal
   logic ostall_imul_D;
   assign ostall_imul_D = val_D && !imul_req_rdy_D && is_mul_D;
-  assign ostall_D = val_D && ( ostall_mngr2proc_D || ostall_hazard_D || ostall_imul_D);
+  assign ostall_D = val_D && ( ostall_mngr2proc_D || ostall_hazard_D || ostall_imul_D || ostall_imul_sb_D );
 
   // osquash due to jump instruction in D stage (not implemented yet)
 
@@ -633,11 +671,10 @@ module lab2_proc_ProcAltCtrl
   logic        proc2mngr_val_X;
   logic        stats_en_wen_X;
   logic [2:0]  br_type_X;
+  logic        is_jal_X;
   logic        is_jalr_X;
   logic        is_mul_X;
-
-  // Multiplier rdy to accept result
-  assign imul_resp_rdy_X = val_X && !stall_X;
+  logic        pred_taken_X;
 
   // Pipeline registers
 
@@ -647,7 +684,7 @@ module lab2_proc_ProcAltCtrl
     end
     else if ( reg_en_X ) begin
       val_X           <= next_val_D;
-      rf_wen_X        <= rf_wen_D;
+      rf_wen_X        <= rf_wen_D && !is_mul_D; // mul writes back through the scoreboard
       inst_X          <= inst_D;
       alu_fn_X        <= alu_fn_D;
       rf_waddr_X      <= rf_waddr_D;
@@ -657,51 +694,72 @@ module lab2_proc_ProcAltCtrl
       stats_en_wen_X  <= stats_en_wen_D;
       br_type_X       <= br_type_D;
       ex_result_sel_X <= ex_result_sel_D;
+      is_jal_X        <= is_jal_D;
       is_jalr_X       <= is_jalr_D;
       is_mul_X        <= is_mul_D;
+      pred_taken_X    <= pred_taken_D;
     end
 
-  // branch & jump logic, redirect PC in F if branch or jalr is taken
+  // branch & jump logic, resolve the branch direction and select the
+  // PC in F used if the direction was mispredicted or for jalr
+
+  logic br_taken_X;
 
   always_comb begin
     if ( val_X && ( br_type_X == br_bne ) ) begin
-      pc_redirect_X = !br_cond_eq_X;
-      pc_sel_X      = 2'b1; // use branch target (bne)
+      br_taken_X    = !br_cond_eq_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (bne)
     end
     else if (val_X && ( br_type_X == br_beq )) begin
-      pc_redirect_X = br_cond_eq_X;
-      pc_sel_X      = 2'b1; // use branch target (beq)
+      br_taken_X    = br_cond_eq_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (beq)
     end
     else if (val_X && ( br_type_X == br_bge )) begin
-      pc_redirect_X = !br_cond_lt_X;
-      pc_sel_X      = 2'b1; // use branch target (bge)
+      br_taken_X    = !br_cond_lt_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (bge)
     end
     else if (val_X && (br_type_X == br_bgeu )) begin
-      pc_redirect_X = !br_cond_ltu_X;
-      pc_sel_X      = 2'b1; // use branch target (bgeu)
+      br_taken_X    = !br_cond_ltu_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (bgeu)
     end
     else if (val_X && (br_type_X == br_blt )) begin
-      pc_redirect_X = br_cond_lt_X;
-      pc_sel_X      = 2'b1; // use branch target (blt)
+      br_taken_X    = br_cond_lt_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (blt)
     end
     else if (val_X && (br_type_X == br_bltu )) begin
-      pc_redirect_X = br_cond_ltu_X;
-      pc_sel_X      = 2'b1; // use branch target (bltu)
+      br_taken_X    = br_cond_ltu_X;
+      pc_sel_X      = 2'b1; // use branch resolution target (bltu)
     end
     else if (val_X && (is_jalr_X)) begin
-      pc_redirect_X = 1'b1;
+      br_taken_X    = 1'b1;
       pc_sel_X      = 2'd3; // use jalr target 
     end
     else begin
-      pc_redirect_X = 1'b0;
+      br_taken_X    = 1'b0;
       pc_sel_X      = 2'b0; // use pc+4
     end
   end
 
+  // A branch redirects the PC only if its direction was mispredicted. The
+  // datapath uses pred_taken_X to choose between the branch target and
+  // PC+4 as the resolution target. jalr always redirects.
+
+  logic is_br_X;
+  assign is_br_X = val_X && ( br_type_X != br_na );
+
+  assign pc_redirect_X = ( is_br_X && ( br_taken_X != pred_taken_X ) )
+                      || ( val_X && is_jalr_X );
+
+  assign bp_pred_taken_X = pred_taken_X;
+
+  // TinyRV2 has no fence instruction, so a csrw to stats_en is the
+  // fence: it waits in X until the store buffer has drained, so that the
+  // statistics start and stop with every earlier store in memory.
+  logic ostall_fence_X;
+  assign ostall_fence_X = val_X && stats_en_wen_X && !sb_empty;
+
   // ostall due to dmem_reqstream not ready.
-  logic ostall_imul_X;
-  assign ostall_imul_X = val_X && !imul_resp_val_X && is_mul_X;
-  assign ostall_X = val_X && ( (dmem_type_X != nr && !dmem_reqstream_rdy) || ostall_imul_X || ostall_M || ostall_W);
+  assign ostall_X = val_X && ( (dmem_type_X != nr && !dmem_reqstream_rdy) || ostall_fence_X || ostall_M || ostall_W);
 
   // osquash due to taken branch, notice we can't osquash if current
   // stage stalls, otherwise we will send osquash twice.
@@ -712,6 +770,18 @@ module lab2_proc_ProcAltCtrl
 
   assign stall_X = val_X && ( ostall_X || ostall_M || ostall_W );
 
+  // Train the branch predictor with every branch and jal leaving X. A
+  // jal is mispredicted if it missed in the BTB, which was already
+  // repaired in D.
+
+  assign bp_update_val_X   = ( is_br_X || ( val_X && is_jal_X ) ) && !stall_X;
+  assign bp_update_jal_X   = is_jal_X;
+  assign bp_update_taken_X = is_jal_X || br_taken_X;
+
+  assign bp_resolve = bp_update_val_X;
+  assign bp_mispred = bp_update_val_X
+                   && ( is_jal_X ? !pred_taken_X : ( br_taken_X != pred_taken_X ) );
+
   // set dmem_reqstream_val only if not stalling
 
   assign dmem_reqstream_val = val_X && !stall_X && ( dmem_type_X != nr );
@@ -735,6 +805,7 @@ module lab2_proc_ProcAltCtrl
   logic [4:0]  rf_waddr_M;
   logic        proc2mngr_val_M;
   logic        stats_en_wen_M;
+  logic        is_mul_M;
 
   // Pipeline register
 
@@ -751,6 +822,7 @@ module lab2_proc_ProcAltCtrl
       dmem_type_M     <= dmem_type_X;
       wb_result_sel_M <= wb_result_sel_X;
       stats_en_wen_M  <= stats_en_wen_X;
+      is_mul_M        <= is_mul_X;
     end
 
   // ostall due to dmem_respstream not valid
@@ -781,6 +853,7 @@ module lab2_proc_ProcAltCtrl
   logic [31:0] inst_W;
   logic        proc2mngr_val_W;
   logic        rf_wen_pending_W;
+  logic [4:0]  rf_waddr_pending_W;
   logic        stats_en_wen_pending_W;
 
   // Pipeline registers
@@ -793,20 +866,30 @@ module lab2_proc_ProcAltCtrl
       val_W                  <= next_val_M;
       rf_wen_pending_W       <= rf_wen_M;
       inst_W                 <= inst_M;
-      rf_waddr_W             <= rf_waddr_M;
+      rf_waddr_pending_W     <= rf_waddr_M;
       proc2mngr_val_W        <= proc2mngr_val_M;
       stats_en_wen_pending_W <= stats_en_wen_M;
     end
   end
 
-  // write enable
+  // write enable, the write port is shared with the multiplier write
+  // back, which takes it over from the instruction in W
 
-  assign rf_wen_W       = val_W && rf_wen_pending_W;
+  assign rf_wen_W       = ( val_W && rf_wen_pending_W ) || imul_wb_W;
+  assign rf_waddr_W     = imul_wb_W ? imul_rd : rf_waddr_pending_W;
   assign stats_en_wen_W = val_W && stats_en_wen_pending_W;
 
   // ostall due to proc2mngr
 
-  assign ostall_W = val_W && proc2mngr_val_W && !proc2mngr_rdy;
+  logic  ostall_proc2mngr_W;
+  assign ostall_proc2mngr_W = val_W && proc2mngr_val_W && !proc2mngr_rdy;
+
+  // ostall while the multiplier result takes the write port
+
+  logic  ostall_imul_W;
+  assign ostall_imul_W = val_W && rf_wen_pending_W && imul_wb_W;
+
+  assign ostall_W = ostall_proc2mngr_W || ostall_imul_W;
 
   // stall and squash signal used in W stage
 
@@ -818,6 +901,172 @@ module lab2_proc_ProcAltCtrl
 
   assign commit_inst = val_W && !stall_W;
 
+  //----------------------------------------------------------------------
+  // Multiplier scoreboard
+  //----------------------------------------------------------------------
+  // A mul does not wait for its result in X. It goes down the pipeline
+  // without writing the register file, and independent instructions
+  // behind it keep going, while the scoreboard holds its destination
+  // until the multiplier returns the result. The result is written back
+  // through the W write port as soon as the mul itself has reached W, so
+  // that older instructions writing the same register write first. If
+  // the instruction in W writes the register file as well, it stalls for
+  // a cycle; giving W priority instead would let a run of instructions
+  // writing the register file hold off the result, and with it every
+  // instruction waiting on it in D. IntMulAlt works on one mul at a
+  // time, so the scoreboard has a single entry.
+
+  logic       imul_pend;
+  logic [4:0] imul_rd;
+
+  always_ff @( posedge clk ) begin
+    if ( reset )
+      imul_pend <= 1'b0;
+    else if ( imul_req_val_D ) begin
+      imul_pend <= 1'b1;
+      imul_rd   <= rf_waddr_D;
+    end
+    else if ( imul_wb_W )
+      imul_pend <= 1'b0;
+  end
+
+  assign imul_wb_W = imul_pend && imul_resp_val_X
+                  && !( val_X && is_mul_X ) && !( val_M && is_mul_M );
+
+  // The multiplier result is taken when it is written back
+
+  assign imul_resp_rdy_X = imul_wb_W;
+
+  //----------------------------------------------------------------------
+  // CPI stack
+  //----------------------------------------------------------------------
+  // Every cycle in which no instruction commits is charged to one stall
+  // cause. A bubble is tagged with the reason it was inserted when it
+  // enters a stage, and the tag travels with the bubble down to W, so an
+  // empty W stage reports why the instruction that should be there is
+  // missing. A valid instruction stalled in W is waiting on proc2mngr.
+
+  localparam sc_none   = 3'd0; // an instruction committed
+  localparam sc_raw    = 3'd1; // load-use stall in D
+  localparam sc_imul   = 3'd2; // multiplier busy or result not ready
+  localparam sc_squash = 3'd3; // squashed by a jump or taken branch
+  localparam sc_imem   = 3'd4; // waiting on imem response
+  localparam sc_dmem   = 3'd5; // waiting on dmem or the store buffer
+  localparam sc_mngr   = 3'd6; // waiting on mngr2proc or proc2mngr
+  localparam sc_other  = 3'd7; // pipeline filling after reset
+
+  logic [2:0] bubble_cause_F;
+  logic [2:0] bubble_cause_D;
+  logic [2:0] bubble_cause_X;
+  logic [2:0] bubble_cause_M;
+
+  logic [2:0] cause_D;
+  logic [2:0] cause_X;
+  logic [2:0] cause_M;
+  logic [2:0] cause_W;
+
+  // Why each stage is not passing an instruction to the next stage. A
+  // stage only inserts a bubble when the next stage is not stalled, so
+  // only the stall originating in the stage itself can be the reason.
+
+  always_comb begin
+    if ( !val_F )
+      bubble_cause_F = sc_other;
+    else if ( squash_F )
+      bubble_cause_F = sc_squash;
+    else
+      bubble_cause_F = sc_imem;
+  end
+
+  always_comb begin
+    if ( !val_D )
+      bubble_cause_D = cause_D;
+    else if ( squash_D )
+      bubble_cause_D = sc_squash;
+    else if ( ostall_hazard_D )
+      bubble_cause_D = sc_raw;
+    else if ( ostall_imul_D || ostall_imul_sb_D )
+      bubble_cause_D = sc_imul;
+    else
+      bubble_cause_D = sc_mngr;
+  end
+
+  always_comb begin
+    if ( !val_X )
+      bubble_cause_X = cause_X;
+    else
+      bubble_cause_X = sc_dmem;
+  end
+
+  always_comb begin
+    if ( !val_M )
+      bubble_cause_M = cause_M;
+    else
+      bubble_cause_M = sc_dmem;
+  end
+
+  // Bubble tags move with the pipeline registers
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      cause_D <= sc_other;
+      cause_X <= sc_other;
+      cause_M <= sc_other;
+      cause_W <= sc_other;
+    end
+    else begin
+      if ( reg_en_D ) cause_D <= next_val_F ? sc_none : bubble_cause_F;
+      if ( reg_en_X ) cause_X <= next_val_D ? sc_none : bubble_cause_D;
+      if ( reg_en_M ) cause_M <= next_val_X ? sc_none : bubble_cause_X;
+      if ( reg_en_W ) cause_W <= next_val_M ? sc_none : bubble_cause_M;
+    end
+  end
+
+  always_comb begin
+    if ( commit_inst )
+      stall_cause = sc_none;
+    else if ( ostall_imul_W )
+      stall_cause = sc_imul;
+    else if ( val_W )
+      stall_cause = sc_mngr;
+    else
+      stall_cause = cause_W;
+  end
+
+  //----------------------------------------------------------------------
+  // Coverage
+  //----------------------------------------------------------------------
+  // One bit per bypass path and stall or squash condition, for the test
+  // harness to count. A bypass is only counted in the cycle the
+  // instruction leaves D, so a stalled instruction is counted once.
+  // Stalls and squashes are counted every cycle they hold. The order
+  // matches cov_events in test/bypass_cov.py.
+
+  logic  leave_D;
+  assign leave_D = val_D && !stall_D && !squash_D;
+
+  logic  ostall_dmem_X;
+  assign ostall_dmem_X = val_X && ( dmem_type_X != nr ) && !dmem_reqstream_rdy;
+
+  assign cov_events = {
+    osquash_X,                                  // 15 squash from X
+    osquash_D,                                  // 14 squash from D
+    ostall_proc2mngr_W,                         // 13 proc2mngr stall in W
+    ostall_M,                                   // 12 dmem resp stall in M
+    ostall_dmem_X,                              // 11 dmem req stall in X
+    ostall_imul_sb_D,                           // 10 in-flight mul stall in D
+    ostall_mngr2proc_D,                         //  9 mngr2proc stall in D
+    ostall_imul_D,                              //  8 imul req stall in D
+    val_D && ostall_load_use_X_rs2_D,           //  7 load-use stall on rs2
+    val_D && ostall_load_use_X_rs1_D,           //  6 load-use stall on rs1
+    leave_D && ( bypass_rs2_sel == 2'd3 ),      //  5 rs2 bypass from W
+    leave_D && ( bypass_rs2_sel == 2'd2 ),      //  4 rs2 bypass from M
+    leave_D && ( bypass_rs2_sel == 2'd1 ),      //  3 rs2 bypass from X
+    leave_D && ( bypass_rs1_sel == 2'd3 ),      //  2 rs1 bypass from W
+    leave_D && ( bypass_rs1_sel == 2'd2 ),      //  1 rs1 bypass from M
+    leave_D && ( bypass_rs1_sel == 2'd1 )       //  0 rs1 bypass from X
+  };
+
 endmodule
 
 `endif /* LAB2_PROC_PROC_ALT_CTRL_V */
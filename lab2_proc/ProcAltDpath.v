@@ -14,12 +14,15 @@
 `include "lab2_proc/tinyrv2_encoding.v"
 `include "lab2_proc/ProcDpathImmGen.v"
 `include "lab2_proc/ProcDpathAlu.v"
+`include "lab2_proc/ProcBranchPred.v"
 
 `include "lab1_imul/IntMulAlt.v"
 
 module lab2_proc_ProcAltDpath
 #(
-  parameter p_num_cores = 1
+  parameter p_num_cores       = 1,
+  parameter p_num_bht_entries = 64,
+  parameter p_num_btb_entries = 16
 )
 (
   input  logic         clk,
@@ -73,18 +76,26 @@ module lab2_proc_ProcAltDpath
   input  logic         reg_en_W,
   input  logic [4:0]   rf_waddr_W,
   input  logic         rf_wen_W,
+  input  logic         imul_wb_W,
   input  logic         stats_en_wen_W,
 
   //bypass control signal
   input  logic [1:0]   bypass_rs1_sel,
   input  logic [1:0]   bypass_rs2_sel,
 
+  //branch predictor control signals
+  input  logic         bp_pred_taken_X,
+  input  logic         bp_update_val_X,
+  input  logic         bp_update_jal_X,
+  input  logic         bp_update_taken_X,
+
   // status signals (dpath->ctrl)
 
   output logic [31:0]  inst_D,
   output logic         br_cond_eq_X,
   output logic         br_cond_lt_X,
   output logic         br_cond_ltu_X,
+  output logic         bp_pred_taken_F,
 
   //multiplier status signal
   output logic         imul_req_rdy_D,
@@ -111,8 +122,10 @@ module lab2_proc_ProcAltDpath
   logic [31:0] pc_next_F;
   logic [31:0] pc_plus4_F;
   logic [31:0] br_target_X;
+  logic [31:0] br_resolve_target_X;
   logic [31:0] jal_target_D;
   logic [31:0] jalr_target_X;
+  logic [31:0] pc_X;
 
   vc_EnResetReg#(32, c_reset_vector - 32'd4) pc_reg_F
   (
@@ -129,10 +142,44 @@ module lab2_proc_ProcAltDpath
     .out  (pc_plus4_F)
   );
 
-  vc_Mux4#(32) pc_sel_mux_F
+  // Branch prediction, used when no stage behind F redirects the PC
+
+  logic [31:0] bp_pred_target_F;
+  logic [31:0] pc_pred_F;
+
+  lab2_proc_ProcBranchPred
+  #(
+    .p_num_bht_entries (p_num_bht_entries),
+    .p_num_btb_entries (p_num_btb_entries)
+  )
+  branch_pred
+  (
+    .clk             (clk),
+    .reset           (reset),
+
+    .pc_F            (pc_F),
+    .pred_taken_F    (bp_pred_taken_F),
+    .pred_target_F   (bp_pred_target_F),
+
+    .update_val_X    (bp_update_val_X),
+    .update_jal_X    (bp_update_jal_X),
+    .update_taken_X  (bp_update_taken_X),
+    .update_pc_X     (pc_X),
+    .update_target_X (br_target_X)
+  );
+
+  vc_Mux2#(32) pc_pred_mux_F
   (
     .in0  (pc_plus4_F),
-    .in1  (br_target_X),
+    .in1  (bp_pred_target_F),
+    .sel  (bp_pred_taken_F),
+    .out  (pc_pred_F)
+  );
+
+  vc_Mux4#(32) pc_sel_mux_F
+  (
+    .in0  (pc_pred_F),
+    .in1  (br_resolve_target_X),
     .in2  (jal_target_D),
     .in3  (jalr_target_X),
     .sel  (pc_sel_F),
@@ -227,7 +274,7 @@ module lab2_proc_ProcAltDpath
    .in0  (rf_rdata0_D),  //read register
    .in1  (ex_result_mux_X), //bypass from X stage
    .in2  (wb_result_M),  //bypass from M stage
-   .in3  (wb_result_W),  //bypass from W stage
+   .in3  (rf_wdata_W),   //bypass from W stage
    .sel  (bypass_rs1_sel), 
    .out  (bypass_rs1_result)
   );
@@ -238,7 +285,7 @@ module lab2_proc_ProcAltDpath
    .in0  (rf_rdata1_D),  //read register
    .in1  (ex_result_mux_X), //bypass from X stage
    .in2  (wb_result_M),  //bypass from M stage
-   .in3  (wb_result_W),  //bypass from W stage
+   .in3  (rf_wdata_W),   //bypass from W stage
    .sel  (bypass_rs2_sel), 
    .out  (bypass_rs2_result)
   );
@@ -280,7 +327,6 @@ module lab2_proc_ProcAltDpath
   // X stage
   //--------------------------------------------------------------------
   
-  logic [31:0] pc_X;
   vc_EnResetReg#(32,0) pc_reg_X
   (
     .clk   (clk),
@@ -297,6 +343,17 @@ module lab2_proc_ProcAltDpath
     .out   (pc_plus4_X)
   );
 
+  // A mispredicted branch was fetched down the wrong path, so it goes to
+  // PC+4 if it was predicted taken and to its target otherwise
+
+  vc_Mux2#(32) br_resolve_target_mux_X
+  (
+    .in0   (br_target_X),
+    .in1   (pc_plus4_X),
+    .sel   (bp_pred_taken_X),
+    .out   (br_resolve_target_X)
+  );
+
   logic [31:0] op1_X;
   logic [31:0] op2_X;
 
@@ -430,7 +487,10 @@ module lab2_proc_ProcAltDpath
 
   assign proc2mngr_data = wb_result_W;
 
-  assign rf_wdata_W = wb_result_W;
+  // The write port is taken by the multiplier result when the
+  // instruction in W does not write the register file
+
+  assign rf_wdata_W = imul_wb_W ? imul_resp_msg : wb_result_W;
 
   // stats output
   // note the stats en is full 32-bit here but the outside port is one
@@ -64,7 +64,12 @@ module lab2_proc_ProcBase
 
   input  logic [31:0]  core_id,
   output logic         commit_inst,
-  output logic         stats_en
+  output logic         stats_en,
+
+  // Reason no instruction committed this cycle, see the CPI stack
+  // section of the control unit
+
+  output logic [2:0]   stall_cause
 
 );
 
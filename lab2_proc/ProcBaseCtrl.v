@@ -77,7 +77,8 @@ module lab2_proc_ProcBaseCtrl
 
   // extra ports
   output logic [1:0]  dmem_type_X,
-  output logic        commit_inst
+  output logic        commit_inst,
+  output logic [2:0]  stall_cause
 );
 
   //----------------------------------------------------------------------
@@ -766,6 +767,102 @@ module lab2_proc_ProcBaseCtrl
 
   assign commit_inst = val_W && !stall_W;
 
+  //----------------------------------------------------------------------
+  // CPI stack
+  //----------------------------------------------------------------------
+  // Every cycle in which no instruction commits is charged to one stall
+  // cause. A bubble is tagged with the reason it was inserted when it
+  // enters a stage, and the tag travels with the bubble down to W, so an
+  // empty W stage reports why the instruction that should be there is
+  // missing. A valid instruction stalled in W is waiting on proc2mngr.
+
+  localparam sc_none   = 3'd0; // an instruction committed
+  localparam sc_raw    = 3'd1; // RAW hazard stall in D
+  localparam sc_imul   = 3'd2; // multiplier busy or result not ready
+  localparam sc_squash = 3'd3; // squashed by a jump or taken branch
+  localparam sc_imem   = 3'd4; // waiting on imem response
+  localparam sc_dmem   = 3'd5; // waiting on dmem request or response
+  localparam sc_mngr   = 3'd6; // waiting on mngr2proc or proc2mngr
+  localparam sc_other  = 3'd7; // pipeline filling after reset
+
+  logic [2:0] bubble_cause_F;
+  logic [2:0] bubble_cause_D;
+  logic [2:0] bubble_cause_X;
+  logic [2:0] bubble_cause_M;
+
+  logic [2:0] cause_D;
+  logic [2:0] cause_X;
+  logic [2:0] cause_M;
+  logic [2:0] cause_W;
+
+  // Why each stage is not passing an instruction to the next stage. A
+  // stage only inserts a bubble when the next stage is not stalled, so
+  // only the stall originating in the stage itself can be the reason.
+
+  always_comb begin
+    if ( !val_F )
+      bubble_cause_F = sc_other;
+    else if ( squash_F )
+      bubble_cause_F = sc_squash;
+    else
+      bubble_cause_F = sc_imem;
+  end
+
+  always_comb begin
+    if ( !val_D )
+      bubble_cause_D = cause_D;
+    else if ( squash_D )
+      bubble_cause_D = sc_squash;
+    else if ( ostall_hazard_D )
+      bubble_cause_D = sc_raw;
+    else if ( ostall_imul_D )
+      bubble_cause_D = sc_imul;
+    else
+      bubble_cause_D = sc_mngr;
+  end
+
+  always_comb begin
+    if ( !val_X )
+      bubble_cause_X = cause_X;
+    else if ( ostall_imul_X )
+      bubble_cause_X = sc_imul;
+    else
+      bubble_cause_X = sc_dmem;
+  end
+
+  always_comb begin
+    if ( !val_M )
+      bubble_cause_M = cause_M;
+    else
+      bubble_cause_M = sc_dmem;
+  end
+
+  // Bubble tags move with the pipeline registers
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      cause_D <= sc_other;
+      cause_X <= sc_other;
+      cause_M <= sc_other;
+      cause_W <= sc_other;
+    end
+    else begin
+      if ( reg_en_D ) cause_D <= next_val_F ? sc_none : bubble_cause_F;
+      if ( reg_en_X ) cause_X <= next_val_D ? sc_none : bubble_cause_D;
+      if ( reg_en_M ) cause_M <= next_val_X ? sc_none : bubble_cause_X;
+      if ( reg_en_W ) cause_W <= next_val_M ? sc_none : bubble_cause_M;
+    end
+  end
+
+  always_comb begin
+    if ( commit_inst )
+      stall_cause = sc_none;
+    else if ( val_W )
+      stall_cause = sc_mngr;
+    else
+      stall_cause = cause_W;
+  end
+
 endmodule
 
 `endif /* LAB2_PROC_PROC_BASE_CTRL_V */
@@ -0,0 +1,123 @@
+//=========================================================================
+// Branch Predictor
+//=========================================================================
+// Predicts the next PC of the instruction in F with a branch target
+// buffer (BTB) and a branch history table (BHT) of 2-bit saturating
+// counters. The BTB is direct mapped with full tags, so a hit means the
+// PC holds a branch or jal that was taken before, and the stored target
+// is its actual target. A jal that hits is always predicted taken, a
+// branch that hits is predicted taken if its counter is 2 or 3, and
+// everything else is predicted to fall through to PC+4.
+//
+// Branches and jals update the predictor when they leave X. Only taken
+// ones are written into the BTB, and only branches train the BHT. The
+// counters reset to 1 (weakly not taken), so a branch is predicted taken
+// starting from the second time it is taken.
+//
+// Like the separate instruction cache in SingleCoreSys, the BTB is not
+// updated by stores, so self-modifying code is not supported.
+//
+// BranchPredFL.py is a reference model with the same tables.
+
+`ifndef LAB2_PROC_PROC_BRANCH_PRED_V
+`define LAB2_PROC_PROC_BRANCH_PRED_V
+
+module lab2_proc_ProcBranchPred
+#(
+  parameter p_num_bht_entries = 64,
+  parameter p_num_btb_entries = 16
+)(
+  input  logic        clk,
+  input  logic        reset,
+
+  // Prediction for the instruction in F
+
+  input  logic [31:0] pc_F,
+  output logic        pred_taken_F,
+  output logic [31:0] pred_target_F,
+
+  // Branch or jal leaving X
+
+  input  logic        update_val_X,
+  input  logic        update_jal_X,
+  input  logic        update_taken_X,
+  input  logic [31:0] update_pc_X,
+  input  logic [31:0] update_target_X
+);
+
+  localparam c_bht_idx_nbits = $clog2( p_num_bht_entries );
+  localparam c_btb_idx_nbits = $clog2( p_num_btb_entries );
+  localparam c_btb_tag_nbits = 30 - c_btb_idx_nbits;
+
+  //----------------------------------------------------------------------
+  // Tables
+  //----------------------------------------------------------------------
+
+  logic [1:0]                 bht        [p_num_bht_entries];
+
+  logic                       btb_val    [p_num_btb_entries];
+  logic                       btb_jal    [p_num_btb_entries];
+  logic [c_btb_tag_nbits-1:0] btb_tag    [p_num_btb_entries];
+  logic [31:0]                btb_target [p_num_btb_entries];
+
+  //----------------------------------------------------------------------
+  // Prediction
+  //----------------------------------------------------------------------
+
+  logic [c_bht_idx_nbits-1:0] bht_idx_F;
+  logic [c_btb_idx_nbits-1:0] btb_idx_F;
+  logic [c_btb_tag_nbits-1:0] btb_tag_F;
+
+  assign bht_idx_F = pc_F[c_bht_idx_nbits+1:2];
+  assign btb_idx_F = pc_F[c_btb_idx_nbits+1:2];
+  assign btb_tag_F = pc_F[31:c_btb_idx_nbits+2];
+
+  logic btb_hit_F;
+  assign btb_hit_F = btb_val[btb_idx_F] && ( btb_tag[btb_idx_F] == btb_tag_F );
+
+  assign pred_taken_F  = btb_hit_F && ( btb_jal[btb_idx_F] || bht[bht_idx_F][1] );
+  assign pred_target_F = btb_target[btb_idx_F];
+
+  //----------------------------------------------------------------------
+  // Update
+  //----------------------------------------------------------------------
+
+  logic [c_bht_idx_nbits-1:0] bht_idx_X;
+  logic [c_btb_idx_nbits-1:0] btb_idx_X;
+
+  assign bht_idx_X = update_pc_X[c_bht_idx_nbits+1:2];
+  assign btb_idx_X = update_pc_X[c_btb_idx_nbits+1:2];
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      for ( int i = 0; i < p_num_bht_entries; i = i + 1 )
+        bht[i] <= 2'd1;
+      for ( int i = 0; i < p_num_btb_entries; i = i + 1 )
+        btb_val[i] <= 1'b0;
+    end
+    else if ( update_val_X ) begin
+
+      // Saturating counter update for branches
+
+      if ( !update_jal_X ) begin
+        if ( update_taken_X && ( bht[bht_idx_X] != 2'd3 ) )
+          bht[bht_idx_X] <= bht[bht_idx_X] + 2'd1;
+        else if ( !update_taken_X && ( bht[bht_idx_X] != 2'd0 ) )
+          bht[bht_idx_X] <= bht[bht_idx_X] - 2'd1;
+      end
+
+      // Allocate taken branches and jals in the BTB
+
+      if ( update_taken_X ) begin
+        btb_val   [btb_idx_X] <= 1'b1;
+        btb_jal   [btb_idx_X] <= update_jal_X;
+        btb_tag   [btb_idx_X] <= update_pc_X[31:c_btb_idx_nbits+2];
+        btb_target[btb_idx_X] <= update_target_X;
+      end
+
+    end
+  end
+
+endmodule
+
+`endif /* LAB2_PROC_PROC_BRANCH_PRED_V */
@@ -0,0 +1,296 @@
+#=========================================================================
+# ProcCL
+#=========================================================================
+# Cycle-approximate model of ProcAlt on top of ProcISS. Instructions are
+# executed by the ISS, and every instruction is timed as it executes by
+# computing the cycle in which it enters each of the five stages from
+# the stage entry cycles of the previous instruction:
+#
+#  - an instruction enters a stage once it has spent its time in the
+#    previous stage and the instruction ahead of it has left the stage
+#  - F takes 1+imem_latency cycles and M takes 1+dmem_latency cycles
+#    for lw
+#  - sw takes one cycle in M since the store buffer answers it, and so
+#    does a lw to a word written by one of the last sb_entries stores
+#  - an instruction whose source is written by the lw ahead of it stays
+#    in D until the lw has reached M (the only stall ProcAlt cannot
+#    bypass)
+#  - a mul takes one cycle in X and its result is written back by the
+#    scoreboard once the multiplier is done and the mul has reached W.
+#    An instruction writing the register file that is in W in that cycle
+#    stays in W for another cycle, an instruction that reads or writes
+#    the rd of the mul waits in D until that cycle, and the next mul
+#    waits in D until the cycle after it, when the multiplier is free
+#  - a mispredicted branch or a jalr refetches once it leaves X, and a
+#    jal the predictor missed refetches once it leaves D
+#
+# The branch predictor is BranchPredFL with its updates delayed until
+# the branch leaves X, like in ProcAlt, so predictions match the RTL.
+#
+# Error bound: the model follows ProcAlt cycle for cycle when the test
+# source, sink and memories add no delays. It does not model random
+# source/sink delays or memory stalls (run_test with delays=True), which
+# only add cycles, so it is a lower bound in that case. Neither does it
+# model the store buffer filling up or its stores draining, which only
+# matters with memory latency. The tests hold it to within 5% of the
+# ProcAlt cycle count.
+#
+# ProcCL is a ProcISS, so iss_harness.run_test runs it like the ISS.
+# Latencies are constructor arguments for design-space sweeps.
+
+from collections import deque
+
+from lab1_imul.imul_latency import alt_latency
+
+from lab2_proc.ProcISS import ProcISS, decode, disasm
+from lab2_proc.BranchPredFL import BranchPredFL, branch_conds
+
+#-------------------------------------------------------------------------
+# Instruction classes
+#-------------------------------------------------------------------------
+
+ALU, LOAD, STORE, MUL, BRANCH, JAL, JALR = range( 7 )
+
+# Source registers checked for the load-use and mul stalls. These follow the
+# rs1_en/rs2_en columns of the control table in ProcAltCtrl, including
+# auipc and jalr whose immediates overlap the rs1/rs2 fields.
+
+_no_srcs  = { "lui", "jal", "csrr" }
+_rs1_only = { "lw", "csrw", "auipc", "addi", "andi", "ori", "xori",
+              "slti", "sltiu", "srai", "srli", "slli" }
+
+def _srcs( d ):
+  if d.name in _no_srcs:
+    return ()
+  if d.name in _rs1_only:
+    return ( d.rs1, )
+  return ( d.rs1, d.rs2 )
+
+# Instructions not writing the register file, following the rf_wen
+# column of the control table
+
+_no_wen = { "sw", "csrw" } | set( branch_conds )
+
+def _kind( name ):
+  if name == "lw":          return LOAD
+  if name == "sw":          return STORE
+  if name == "mul":         return MUL
+  if name == "jal":         return JAL
+  if name == "jalr":        return JALR
+  if name in branch_conds:  return BRANCH
+  return ALU
+
+#-------------------------------------------------------------------------
+# ProcCL
+#-------------------------------------------------------------------------
+
+class ProcCL( ProcISS ):
+
+  def __init__( s, num_cores=1, core_id=0, imem_latency=0, dmem_latency=0,
+                num_bht_entries=64, num_btb_entries=16, sb_entries=4 ):
+
+    super().__init__( num_cores, core_id )
+
+    s.imem_latency = imem_latency
+    s.dmem_latency = dmem_latency
+
+    # Branch predictor and its updates waiting for the branch to leave
+    # X, as ( cycle visible, pc, is_jal, taken, target )
+
+    s.bp         = BranchPredFL( num_bht_entries, num_btb_entries )
+    s.bp_pending = deque()
+
+    # Word addresses of the most recent stores, approximating the
+    # contents of the store buffer
+
+    s.sb = deque( maxlen=sb_entries )
+
+    # Decoded timing information: pc -> ( kind, name, rd, srcs, imm, target ),
+    # with rd None for instructions not writing the register file
+
+    s.timing = {}
+
+    # Stage entry cycles ( F, D, X, M, W ) of the previous instruction.
+    # After reset the pipeline fetches the reset vector in cycle 1, as if
+    # an instruction at reset_vector-4 had been fetched in cycle 0.
+
+    s.prev       = ( 0, 1, 2, 3, 4 )
+    s.redirect_F = 0
+    s.load_rd    = 0
+
+    # The mul in the scoreboard: its rd (None if there is none) and the
+    # cycle in which it is written back
+
+    s.mul_rd     = None
+    s.mul_wb     = 0
+
+    # Statistics
+
+    s.num_cycles       = 0
+    s.num_cycles_stats = 0
+    s.nbranches        = 0
+    s.nmispreds        = 0
+
+  def invalidate( s, start, end ):
+    super().invalidate( start, end )
+    for addr in range( start & ~3, end, 4 ):
+      s.timing.pop( addr, None )
+
+  def mk_timing( s, pc, inst ):
+    d    = decode( inst )
+    kind = _kind( d.name )
+    rd   = None if d.name in _no_wen or inst == 0x00000013 else d.rd
+    s.timing[pc] = entry = ( kind, d.name, rd, _srcs( d ), d.imm,
+                             ( pc + d.imm ) & 0xffffffff )
+    return entry
+
+  #-----------------------------------------------------------------------
+  # execute
+  #-----------------------------------------------------------------------
+  # Execute the instruction at the current PC and return its stage entry
+  # cycles.
+
+  def execute( s ):
+
+    pc = s.pc
+    inst, op, is_term = s.decode_pc( pc )
+    kind, name, rd, srcs, imm, target = s.timing.get( pc ) or s.mk_timing( pc, inst )
+
+    # Operands needed for timing, read before the instruction executes
+
+    rf       = s.rf
+    stats_en = s.stats_en
+
+    if kind == MUL:
+      lat = alt_latency( rf[ srcs[0] ], rf[ srcs[1] ] )
+
+    if kind == LOAD or kind == STORE:
+      addr = ( ( rf[ srcs[0] ] + imm ) & 0xffffffff ) >> 2
+
+    if kind == BRANCH:
+      taken = branch_conds[ name ]( rf[ srcs[0] ], rf[ srcs[1] ] )
+    else:
+      taken = kind == JAL
+
+    # Execute
+
+    if is_term:
+      s.pc = op()
+    else:
+      if op is not None:
+        op()
+      s.pc = ( pc + 4 ) & 0xffffffff
+
+    s.num_insts += 1
+    if stats_en:
+      s.num_insts_stats += 1
+
+    # Stage entry cycles
+
+    pF, pD, pX, pM, pW = s.prev
+
+    F = max( pD, s.redirect_F )
+    D = max( F + 1 + s.imem_latency, pX )
+    X = max( D + 1, pM )
+
+    if s.load_rd and s.load_rd in srcs:
+      X = max( X, pM + 1 )
+
+    mul_rd = s.mul_rd
+    if mul_rd is not None:
+      if kind == MUL:
+        X = max( X, s.mul_wb + 2 )
+      elif mul_rd and ( mul_rd in srcs or rd == mul_rd ):
+        X = max( X, s.mul_wb + 1 )
+
+    M = max( X + 1, pW )
+
+    if kind == LOAD and addr not in s.sb:
+      W = M + 1 + s.dmem_latency
+    else:
+      W = M + 1
+
+    if kind == STORE:
+      s.sb.append( addr )
+
+    # The mul write back takes the write port from the instruction in W
+
+    if mul_rd is not None and W == s.mul_wb and rd is not None:
+      W += 1
+
+    # Control flow. The prediction for this instruction is made in its
+    # last cycle in F, with every update written before that cycle.
+
+    s.redirect_F = 0
+
+    if kind == BRANCH or kind == JAL:
+      is_jal  = kind == JAL
+      pending = s.bp_pending
+      while pending and pending[0][0] <= D - 1:
+        s.bp.update( *pending.popleft()[1:] )
+
+      pred_taken, _ = s.bp.predict( pc )
+      pending.append( ( M, pc, is_jal, taken, target ) )
+
+      s.nbranches += 1
+      if pred_taken != taken:
+        s.nmispreds  += 1
+        s.redirect_F  = X if is_jal else M
+
+    elif kind == JALR:
+      s.redirect_F = M
+
+    # State for the next instruction
+
+    s.load_rd = rd if kind == LOAD else 0
+
+    if mul_rd is not None and W > s.mul_wb:
+      s.mul_rd = None
+
+    if kind == MUL:
+      s.mul_rd = rd
+      s.mul_wb = max( W, X + lat - 1 )
+
+    if stats_en:
+      s.num_cycles_stats += W - pW
+
+    s.prev       = ( F, D, X, M, W )
+    s.num_cycles = W + 1
+
+    return pc, inst, s.prev
+
+  #-----------------------------------------------------------------------
+  # run
+  #-----------------------------------------------------------------------
+  # Same interface and stopping conditions as ProcISS.run, but one
+  # instruction at a time since every instruction needs to be timed.
+
+  def run( s, max_insts=10000000, nproc2mngr=None ):
+
+    if nproc2mngr is None:
+      nproc2mngr = s.run_nproc2mngr()
+
+    execute   = s.execute
+    proc2mngr = s.proc2mngr
+    ninsts    = 0
+
+    while ninsts < max_insts and len( proc2mngr ) < nproc2mngr:
+      pc = s.pc
+      execute()
+      ninsts += 1
+
+      # An instruction that jumps to itself halts the program
+
+      if s.pc == pc:
+        break
+
+    return ninsts
+
+  # Line tracing shows the stage entry cycles of every instruction
+
+  def step( s ):
+    pc, inst, ( F, D, X, M, W ) = s.execute()
+    return f"{F:5d} {D:5d} {X:5d} {M:5d} {W:5d}  {pc:08x} {disasm( inst, pc )}"
+
+  def cpi( s ):
+    return s.num_cycles / max( s.num_insts, 1 )
@@ -0,0 +1,530 @@
+#=========================================================================
+# ProcISS
+#=========================================================================
+# Fast instruction-set simulator for TinyRV2. Unlike ProcFL, this is not
+# a PyMTL component: it owns its own memory and register file and runs
+# programs directly, producing the same proc2mngr stream as ProcFL.
+#
+# Each instruction is decoded once per PC into a Python closure with its
+# register specifiers and immediate already extracted. Straight-line
+# runs of instructions are grouped into basic blocks which end at the
+# first instruction that can change control flow, write memory, or talk
+# to the manager, so run() just loops over the closures of one block and
+# then asks the terminator for the next PC. A store to an address
+# covered by a cached block invalidates that block, so self-modifying
+# code behaves correctly.
+
+from collections import deque, namedtuple
+from struct import pack_into, unpack_from
+
+#-------------------------------------------------------------------------
+# Constants
+#-------------------------------------------------------------------------
+
+reset_vector  = 0x00000200
+mem_nbytes    = 1 << 20
+max_block_len = 64
+
+# Control/status registers
+
+csr_proc2mngr = 0x7c0
+csr_stats_en  = 0x7c1
+csr_mngr2proc = 0xfc0
+csr_numcores  = 0xfc1
+csr_coreid    = 0xf14
+
+csr_names = {
+  csr_proc2mngr : "proc2mngr",
+  csr_stats_en  : "stats_en",
+  csr_mngr2proc : "mngr2proc",
+  csr_numcores  : "numcores",
+  csr_coreid    : "coreid",
+}
+
+M = 0xffffffff
+
+def sext( x, nbits=32 ):
+  return x - ( ( ( x >> ( nbits-1 ) ) & 1 ) << nbits )
+
+#-------------------------------------------------------------------------
+# decode
+#-------------------------------------------------------------------------
+# Decode a 32-bit instruction word into its name and fields. The
+# immediate is already sign extended and shifted as the instruction uses
+# it, and is zero for instructions without one.
+
+DecodedInst = namedtuple( "DecodedInst", "name rd rs1 rs2 imm csr" )
+
+_rr_insts = {
+  ( 0b000, 0b0000000 ) : "add",
+  ( 0b000, 0b0100000 ) : "sub",
+  ( 0b000, 0b0000001 ) : "mul",
+  ( 0b111, 0b0000000 ) : "and",
+  ( 0b110, 0b0000000 ) : "or",
+  ( 0b100, 0b0000000 ) : "xor",
+  ( 0b010, 0b0000000 ) : "slt",
+  ( 0b011, 0b0000000 ) : "sltu",
+  ( 0b101, 0b0100000 ) : "sra",
+  ( 0b101, 0b0000000 ) : "srl",
+  ( 0b001, 0b0000000 ) : "sll",
+}
+
+_ri_insts = {
+  0b000 : "addi",
+  0b111 : "andi",
+  0b110 : "ori",
+  0b100 : "xori",
+  0b010 : "slti",
+  0b011 : "sltiu",
+}
+
+_shift_insts = {
+  ( 0b101, 0b0100000 ) : "srai",
+  ( 0b101, 0b0000000 ) : "srli",
+  ( 0b001, 0b0000000 ) : "slli",
+}
+
+_br_insts = {
+  0b000 : "beq",
+  0b001 : "bne",
+  0b100 : "blt",
+  0b101 : "bge",
+  0b110 : "bltu",
+  0b111 : "bgeu",
+}
+
+def decode( inst ):
+
+  opcode = inst & 0x7f
+  rd     = ( inst >>  7 ) & 0x1f
+  funct3 = ( inst >> 12 ) & 0x7
+  rs1    = ( inst >> 15 ) & 0x1f
+  rs2    = ( inst >> 20 ) & 0x1f
+  funct7 = inst >> 25
+
+  imm_i = sext( inst >> 20, 12 )
+  imm_s = sext( ( funct7 << 5 ) | rd, 12 )
+  imm_b = sext( ( ( inst >> 31 ) << 12 ) | ( ( ( inst >> 7 ) & 1 ) << 11 )
+              | ( ( ( inst >> 25 ) & 0x3f ) << 5 ) | ( ( ( inst >> 8 ) & 0xf ) << 1 ), 13 )
+  imm_u = inst & 0xfffff000
+  imm_j = sext( ( ( inst >> 31 ) << 20 ) | ( ( ( inst >> 12 ) & 0xff ) << 12 )
+              | ( ( ( inst >> 20 ) & 1 ) << 11 ) | ( ( ( inst >> 21 ) & 0x3ff ) << 1 ), 21 )
+
+  name = None
+  imm  = 0
+  csr  = 0
+
+  if opcode == 0b0110011:
+    name = _rr_insts.get( ( funct3, funct7 ) )
+
+  elif opcode == 0b0010011:
+    if funct3 in _ri_insts:
+      name, imm = _ri_insts[funct3], imm_i
+    else:
+      name, imm = _shift_insts.get( ( funct3, funct7 ) ), rs2
+
+  elif opcode == 0b0110111:
+    name, imm = "lui", imm_u
+
+  elif opcode == 0b0010111:
+    name, imm = "auipc", imm_u
+
+  elif opcode == 0b0000011 and funct3 == 0b010:
+    name, imm = "lw", imm_i
+
+  elif opcode == 0b0100011 and funct3 == 0b010:
+    name, imm = "sw", imm_s
+
+  elif opcode == 0b1101111:
+    name, imm = "jal", imm_j
+
+  elif opcode == 0b1100111 and funct3 == 0b000:
+    name, imm = "jalr", imm_i
+
+  elif opcode == 0b1100011:
+    name, imm = _br_insts.get( funct3 ), imm_b
+
+  elif opcode == 0b1110011:
+    csr = inst >> 20
+    if funct3 == 0b010 and rs1 == 0:
+      name = "csrr"
+    elif funct3 == 0b001 and rd == 0:
+      name = "csrw"
+
+  if name is None:
+    raise ValueError( f"invalid TinyRV2 instruction {inst:08x}" )
+
+  return DecodedInst( name, rd, rs1, rs2, imm, csr )
+
+#-------------------------------------------------------------------------
+# disasm
+#-------------------------------------------------------------------------
+
+def disasm( inst, pc=None ):
+
+  d = decode( inst )
+
+  if inst == 0x00000013:
+    return "nop"
+
+  if d.name in ( "csrr", "csrw" ):
+    csr = csr_names.get( d.csr, f"0x{d.csr:03x}" )
+    if d.name == "csrr":
+      return f"csrr x{d.rd}, {csr}"
+    return f"csrw {csr}, x{d.rs1}"
+
+  if d.name in ( "lui", "auipc" ):
+    return f"{d.name} x{d.rd}, 0x{d.imm >> 12:05x}"
+
+  if d.name == "lw":
+    return f"lw x{d.rd}, {d.imm}(x{d.rs1})"
+
+  if d.name == "sw":
+    return f"sw x{d.rs2}, {d.imm}(x{d.rs1})"
+
+  if d.name == "jalr":
+    return f"jalr x{d.rd}, x{d.rs1}, {d.imm}"
+
+  # Branch and jump targets are shown as absolute addresses if we know
+  # the PC of the instruction
+
+  if d.name == "jal" or d.name in _br_insts.values():
+    target = f"0x{( pc + d.imm ) & M:08x}" if pc is not None else f"{d.imm:+d}"
+    if d.name == "jal":
+      return f"jal x{d.rd}, {target}"
+    return f"{d.name} x{d.rs1}, x{d.rs2}, {target}"
+
+  if d.name in _rr_insts.values():
+    return f"{d.name} x{d.rd}, x{d.rs1}, x{d.rs2}"
+
+  return f"{d.name} x{d.rd}, x{d.rs1}, {d.imm}"
+
+#-------------------------------------------------------------------------
+# ProcISS
+#-------------------------------------------------------------------------
+
+Block = namedtuple( "Block", "ops term ninsts end_pc writes_stats_en" )
+
+def _words( data ):
+  return [ unpack_from( "<I", data, i )[0] for i in range( 0, len( data ) & ~3, 4 ) ]
+
+class ProcISS:
+
+  def __init__( s, num_cores=1, core_id=0 ):
+
+    s.num_cores = num_cores
+    s.core_id   = core_id
+
+    s.mem = bytearray( mem_nbytes )
+    s.rf  = [ 0 ] * 32
+    s.pc  = reset_vector
+
+    # Manager streams: mngr2proc values still to be read, every value
+    # written to proc2mngr, and the expected proc2mngr values from the
+    # program's .proc2mngr section
+
+    s.mngr2proc     = deque()
+    s.proc2mngr     = []
+    s.proc2mngr_ref = []
+
+    # Statistics
+
+    s.stats_en         = 0
+    s.num_insts        = 0
+    s.num_insts_stats  = 0
+
+    # Decoded instruction cache: pc -> ( inst, op, is_term ), the cached
+    # basic blocks: pc -> Block, and for every cached word the PCs of the
+    # blocks which contain it
+
+    s.insts       = {}
+    s.blocks      = {}
+    s.code_blocks = {}
+
+  #-----------------------------------------------------------------------
+  # load
+  #-----------------------------------------------------------------------
+  # Load a SparseMemoryImage, the same way the test harness loads it
+  # into the test memory and the manager source/sink.
+
+  def load( s, mem_image ):
+    for section in mem_image.get_sections():
+      if section.name == ".mngr2proc":
+        s.mngr2proc.extend( _words( section.data ) )
+      elif section.name == ".proc2mngr":
+        s.proc2mngr_ref.extend( _words( section.data ) )
+      else:
+        s.write_mem( section.addr, section.data )
+
+  # data is any contiguous buffer, e.g. a NumPy array of words
+
+  def write_mem( s, addr, data ):
+    data = memoryview( data ).cast( "B" )
+    s.mem[ addr : addr+len( data ) ] = data
+    s.invalidate( addr, addr+len( data ) )
+
+  def read_mem( s, addr, nbytes ):
+    return bytes( s.mem[ addr : addr+nbytes ] )
+
+  #-----------------------------------------------------------------------
+  # invalidate
+  #-----------------------------------------------------------------------
+  # Drop every cached instruction and block covering [start, end).
+
+  def invalidate( s, start, end ):
+    for addr in range( start & ~3, end, 4 ):
+      s.insts.pop( addr, None )
+      for block_pc in s.code_blocks.pop( addr, () ):
+        s.blocks.pop( block_pc, None )
+
+  def store( s, addr, data ):
+    pack_into( "<I", s.mem, addr, data )
+    if addr in s.code_blocks or addr in s.insts:
+      s.invalidate( addr, addr+4 )
+
+  #-----------------------------------------------------------------------
+  # decode_pc
+  #-----------------------------------------------------------------------
+  # Return the cached ( inst, op, is_term ) for the instruction at pc.
+  # Terminators return the next PC; other ops return nothing, and op is
+  # None for instructions which have no effect (e.g., writes to x0).
+
+  def decode_pc( s, pc ):
+    entry = s.insts.get( pc )
+    if entry is None:
+      inst  = unpack_from( "<I", s.mem, pc )[0]
+      op, is_term = s.mk_op( decode( inst ), pc )
+      entry = s.insts[pc] = ( inst, op, is_term )
+    return entry
+
+  def mk_op( s, d, pc ):
+
+    rf   = s.rf
+    mem  = s.mem
+    name = d.name
+    rd, rs1, rs2, imm = d.rd, d.rs1, d.rs2, d.imm
+
+    next_pc = ( pc + 4 ) & M
+
+    # Register-register and register-immediate arithmetic
+
+    if name in _rr_insts.values() or name in _ri_insts.values() \
+       or name in _shift_insts.values() or name in ( "lui", "auipc", "lw" ):
+
+      if rd == 0:
+        return None, False
+
+      if   name == "add":   fn = lambda: rf.__setitem__( rd, ( rf[rs1] + rf[rs2] ) & M )
+      elif name == "sub":   fn = lambda: rf.__setitem__( rd, ( rf[rs1] - rf[rs2] ) & M )
+      elif name == "mul":   fn = lambda: rf.__setitem__( rd, ( rf[rs1] * rf[rs2] ) & M )
+      elif name == "and":   fn = lambda: rf.__setitem__( rd, rf[rs1] & rf[rs2] )
+      elif name == "or":    fn = lambda: rf.__setitem__( rd, rf[rs1] | rf[rs2] )
+      elif name == "xor":   fn = lambda: rf.__setitem__( rd, rf[rs1] ^ rf[rs2] )
+      elif name == "slt":   fn = lambda: rf.__setitem__( rd, int( sext( rf[rs1] ) < sext( rf[rs2] ) ) )
+      elif name == "sltu":  fn = lambda: rf.__setitem__( rd, int( rf[rs1] < rf[rs2] ) )
+      elif name == "sra":   fn = lambda: rf.__setitem__( rd, ( sext( rf[rs1] ) >> ( rf[rs2] & 31 ) ) & M )
+      elif name == "srl":   fn = lambda: rf.__setitem__( rd, rf[rs1] >> ( rf[rs2] & 31 ) )
+      elif name == "sll":   fn = lambda: rf.__setitem__( rd, ( rf[rs1] << ( rf[rs2] & 31 ) ) & M )
+      elif name == "addi":  fn = lambda: rf.__setitem__( rd, ( rf[rs1] + imm ) & M )
+      elif name == "andi":  fn = lambda: rf.__setitem__( rd, rf[rs1] & ( imm & M ) )
+      elif name == "ori":   fn = lambda: rf.__setitem__( rd, rf[rs1] | ( imm & M ) )
+      elif name == "xori":  fn = lambda: rf.__setitem__( rd, rf[rs1] ^ ( imm & M ) )
+      elif name == "slti":  fn = lambda: rf.__setitem__( rd, int( sext( rf[rs1] ) < imm ) )
+      elif name == "sltiu": fn = lambda: rf.__setitem__( rd, int( rf[rs1] < ( imm & M ) ) )
+      elif name == "srai":  fn = lambda: rf.__setitem__( rd, ( sext( rf[rs1] ) >> imm ) & M )
+      elif name == "srli":  fn = lambda: rf.__setitem__( rd, rf[rs1] >> imm )
+      elif name == "slli":  fn = lambda: rf.__setitem__( rd, ( rf[rs1] << imm ) & M )
+      elif name == "lui":   fn = lambda: rf.__setitem__( rd, imm )
+      elif name == "auipc": fn = lambda: rf.__setitem__( rd, ( pc + imm ) & M )
+      elif name == "lw":    fn = lambda: rf.__setitem__( rd, unpack_from( "<I", mem, ( rf[rs1] + imm ) & M )[0] )
+
+      return fn, False
+
+    # Stores end a block, so the following instructions are refetched if
+    # the store invalidated them
+
+    if name == "sw":
+      store = s.store
+      def fn():
+        store( ( rf[rs1] + imm ) & M, rf[rs2] )
+        return next_pc
+      return fn, True
+
+    # Jumps and branches
+
+    target = ( pc + imm ) & M
+
+    if name == "jal":
+      def fn():
+        if rd:
+          rf[rd] = next_pc
+        return target
+      return fn, True
+
+    if name == "jalr":
+      def fn():
+        jalr_target = ( rf[rs1] + imm ) & M & ~1
+        if rd:
+          rf[rd] = next_pc
+        return jalr_target
+      return fn, True
+
+    if   name == "beq":  cond = lambda: rf[rs1] == rf[rs2]
+    elif name == "bne":  cond = lambda: rf[rs1] != rf[rs2]
+    elif name == "blt":  cond = lambda: sext( rf[rs1] ) <  sext( rf[rs2] )
+    elif name == "bge":  cond = lambda: sext( rf[rs1] ) >= sext( rf[rs2] )
+    elif name == "bltu": cond = lambda: rf[rs1] <  rf[rs2]
+    elif name == "bgeu": cond = lambda: rf[rs1] >= rf[rs2]
+
+    if name in _br_insts.values():
+      return ( lambda: target if cond() else next_pc ), True
+
+    # Manager and statistics CSRs
+
+    if name == "csrr":
+      if d.csr == csr_mngr2proc:
+        def fn():
+          if not s.mngr2proc:
+            raise ValueError( f"csrr mngr2proc at pc {pc:08x} with no message from the manager" )
+          value = s.mngr2proc.popleft()
+          if rd:
+            rf[rd] = value
+          return next_pc
+      elif d.csr in ( csr_numcores, csr_coreid ):
+        value = s.num_cores if d.csr == csr_numcores else s.core_id
+        def fn():
+          if rd:
+            rf[rd] = value
+          return next_pc
+      else:
+        raise ValueError( f"csrr from unknown csr 0x{d.csr:03x} at pc {pc:08x}" )
+      return fn, True
+
+    if name == "csrw":
+      if d.csr == csr_proc2mngr:
+        def fn():
+          s.proc2mngr.append( rf[rs1] )
+          return next_pc
+      elif d.csr == csr_stats_en:
+        def fn():
+          s.stats_en = rf[rs1]
+          return next_pc
+      else:
+        raise ValueError( f"csrw to unknown csr 0x{d.csr:03x} at pc {pc:08x}" )
+      return fn, True
+
+  #-----------------------------------------------------------------------
+  # mk_block
+  #-----------------------------------------------------------------------
+
+  def mk_block( s, start_pc ):
+
+    ops = []
+    pc  = start_pc
+    term = None
+    writes_stats_en = False
+
+    while pc - start_pc < 4*max_block_len:
+      inst, op, is_term = s.decode_pc( pc )
+      s.code_blocks.setdefault( pc, set() ).add( start_pc )
+      pc += 4
+      if is_term:
+        d = decode( inst )
+        term = op
+        writes_stats_en = d.name == "csrw" and d.csr == csr_stats_en
+        break
+      if op is not None:
+        ops.append( op )
+
+    block = s.blocks[start_pc] = Block( tuple( ops ), term, ( pc - start_pc ) // 4, pc,
+                                        writes_stats_en )
+    return block
+
+  #-----------------------------------------------------------------------
+  # run_nproc2mngr
+  #-----------------------------------------------------------------------
+  # Default number of proc2mngr messages to run until, shared with the
+  # models built on the ISS so they all stop in the same place.
+
+  def run_nproc2mngr( s ):
+    return len( s.proc2mngr_ref ) or float( "inf" )
+
+  #-----------------------------------------------------------------------
+  # run
+  #-----------------------------------------------------------------------
+  # Run until the program has written nproc2mngr messages (by default as
+  # many as it is expected to write, or no limit if it is not expected to
+  # write any), halts by jumping to itself, or max_insts instructions
+  # have been executed. Returns the number of instructions executed.
+  # With stop_at_stats_en it also stops right before the first write to
+  # stats_en, leaving the pc on the csrw.
+  #
+  # csrw stats_en is a terminator, so the other instructions of a block
+  # are counted under the value of stats_en before the block and the
+  # terminator under the value it leaves, like step() does.
+
+  def run( s, max_insts=10000000, nproc2mngr=None, stop_at_stats_en=False ):
+
+    if nproc2mngr is None:
+      nproc2mngr = s.run_nproc2mngr()
+
+    blocks    = s.blocks
+    mk_block  = s.mk_block
+    proc2mngr = s.proc2mngr
+    pc        = s.pc
+    ninsts    = 0
+
+    while ninsts < max_insts and len( proc2mngr ) < nproc2mngr:
+
+      block = blocks.get( pc )
+      if block is None:
+        block = mk_block( pc )
+
+      stats_en = s.stats_en
+
+      for op in block.ops:
+        op()
+
+      if stop_at_stats_en and block.writes_stats_en:
+        pc      = block.end_pc - 4
+        ninsts += block.ninsts - 1
+        if stats_en:
+          s.num_insts_stats += block.ninsts - 1
+        break
+
+      pc = block.term() if block.term else block.end_pc
+
+      ninsts += block.ninsts
+      if block.term:
+        s.num_insts_stats += ( block.ninsts-1 if stats_en else 0 ) + ( 1 if s.stats_en else 0 )
+      elif stats_en:
+        s.num_insts_stats += block.ninsts
+
+      # A terminator that jumps to itself halts the program
+
+      if block.term and pc == block.end_pc - 4:
+        break
+
+    s.pc         = pc
+    s.num_insts += ninsts
+    return ninsts
+
+  #-----------------------------------------------------------------------
+  # step
+  #-----------------------------------------------------------------------
+  # Execute a single instruction, bypassing the block cache, and return
+  # its disassembly for line tracing.
+
+  def step( s ):
+    pc = s.pc
+    inst, op, is_term = s.decode_pc( pc )
+    if is_term:
+      s.pc = op()
+    else:
+      if op is not None:
+        op()
+      s.pc = ( pc + 4 ) & M
+    s.num_insts += 1
+    if s.stats_en:
+      s.num_insts_stats += 1
+    return f"{pc:08x} {disasm( inst, pc )}"
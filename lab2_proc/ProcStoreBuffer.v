@@ -0,0 +1,288 @@
+//=========================================================================
+// Store Buffer
+//=========================================================================
+// Sits between the data memory port of the processor and the data
+// memory. A sw is answered right away and its word is kept in a FIFO
+// buffer, from which the stores drain to memory in order whenever no
+// load needs the memory port. A lw whose word is in the buffer gets the
+// data of the youngest matching store without going to memory, and a lw
+// that misses goes to memory ahead of the buffered stores, which is
+// safe because they are to other words.
+//
+// Responses reach the processor in the order of its requests: a queue
+// records for every accepted request whether it was answered here (with
+// the response) or by memory, and a second queue records for every
+// memory request whether its response goes to the processor (a load) or
+// is dropped (a drained store).
+//
+// TinyRV2 only has aligned word accesses, so entries are matched on the
+// word address. empty is high when every store has been sent to memory,
+// which is what the processor waits for on a fence. p_num_entries must
+// be a power of two.
+
+`ifndef LAB2_PROC_PROC_STORE_BUFFER_V
+`define LAB2_PROC_PROC_STORE_BUFFER_V
+
+`include "vc/mem-msgs.v"
+`include "vc/queues.v"
+
+module lab2_proc_ProcStoreBuffer
+#(
+  parameter p_num_entries = 4
+)(
+  input  logic         clk,
+  input  logic         reset,
+
+  // Processor side
+
+  input  mem_req_4B_t  proc_reqstream_msg,
+  input  logic         proc_reqstream_val,
+  output logic         proc_reqstream_rdy,
+
+  output mem_resp_4B_t proc_respstream_msg,
+  output logic         proc_respstream_val,
+  input  logic         proc_respstream_rdy,
+
+  // Memory side
+
+  output mem_req_4B_t  mem_reqstream_msg,
+  output logic         mem_reqstream_val,
+  input  logic         mem_reqstream_rdy,
+
+  input  mem_resp_4B_t mem_respstream_msg,
+  input  logic         mem_respstream_val,
+  output logic         mem_respstream_rdy,
+
+  // No stores left in the buffer
+
+  output logic         empty
+);
+
+  localparam c_idx_nbits = $clog2( p_num_entries );
+
+  //----------------------------------------------------------------------
+  // Buffer
+  //----------------------------------------------------------------------
+
+  logic [31:0]            sb_addr [p_num_entries];
+  logic [31:0]            sb_data [p_num_entries];
+  logic [c_idx_nbits-1:0] head;
+  logic [c_idx_nbits-1:0] tail;
+  logic [c_idx_nbits:0]   count;
+
+  logic  full;
+  assign full  = ( count == p_num_entries );
+  assign empty = ( count == 0 );
+
+  //----------------------------------------------------------------------
+  // Forwarding
+  //----------------------------------------------------------------------
+  // Search from the oldest to the youngest entry, so the last match is
+  // the youngest store to the word.
+
+  logic                   fwd_hit;
+  logic [31:0]            fwd_data;
+  logic [c_idx_nbits-1:0] fwd_idx;
+
+  always_comb begin
+    fwd_hit  = 1'b0;
+    fwd_data = 32'b0;
+    for ( int i = 0; i < p_num_entries; i = i + 1 ) begin
+      fwd_idx = head + c_idx_nbits'(i);
+      if ( ( i < count ) && ( sb_addr[fwd_idx][31:2] == proc_reqstream_msg.addr[31:2] ) ) begin
+        fwd_hit  = 1'b1;
+        fwd_data = sb_data[fwd_idx];
+      end
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Queues
+  //----------------------------------------------------------------------
+
+  // Pending processor responses as { local, response }, where the
+  // response is only used if local is set
+
+  logic [$bits(mem_resp_4B_t):0] pend_enq_msg;
+  logic                          pend_enq_val;
+  logic                          pend_enq_rdy;
+
+  logic [$bits(mem_resp_4B_t):0] pend_deq_msg;
+  logic                          pend_deq_val;
+  logic                          pend_deq_rdy;
+
+  logic [1:0]                    pend_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,$bits(mem_resp_4B_t)+1,2) pend_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(pend_num_free_entries),
+
+    .enq_msg (pend_enq_msg),
+    .enq_val (pend_enq_val),
+    .enq_rdy (pend_enq_rdy),
+
+    .deq_msg (pend_deq_msg),
+    .deq_val (pend_deq_val),
+    .deq_rdy (pend_deq_rdy)
+  );
+
+  // Outstanding memory requests, set for loads and clear for drained
+  // stores
+
+  logic                          infl_enq_msg;
+  logic                          infl_enq_val;
+  logic                          infl_enq_rdy;
+
+  logic                          infl_deq_msg;
+  logic                          infl_deq_val;
+  logic                          infl_deq_rdy;
+
+  logic [2:0]                    infl_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,1,4) infl_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(infl_num_free_entries),
+
+    .enq_msg (infl_enq_msg),
+    .enq_val (infl_enq_val),
+    .enq_rdy (infl_enq_rdy),
+
+    .deq_msg (infl_deq_msg),
+    .deq_val (infl_deq_val),
+    .deq_rdy (infl_deq_rdy)
+  );
+
+  //----------------------------------------------------------------------
+  // Requests
+  //----------------------------------------------------------------------
+
+  logic  is_write;
+  assign is_write = ( proc_reqstream_msg.type_ == `VC_MEM_REQ_MSG_TYPE_WRITE );
+
+  // Stores and forwarded loads are answered here
+
+  logic  local_req;
+  assign local_req = is_write || fwd_hit;
+
+  mem_resp_4B_t local_resp;
+
+  assign local_resp.type_  = proc_reqstream_msg.type_;
+  assign local_resp.opaque = proc_reqstream_msg.opaque;
+  assign local_resp.test   = 2'b0;
+  assign local_resp.len    = proc_reqstream_msg.len;
+  assign local_resp.data   = is_write ? 32'b0 : fwd_data;
+
+  // A load going to memory has priority over draining the buffer
+
+  logic  load_to_mem;
+  assign load_to_mem = proc_reqstream_val && !local_req;
+
+  logic  drain;
+  assign drain = !load_to_mem && !empty;
+
+  always_comb begin
+    mem_reqstream_val = 1'b0;
+    mem_reqstream_msg = proc_reqstream_msg;
+
+    if ( load_to_mem )
+      mem_reqstream_val = pend_enq_rdy && infl_enq_rdy;
+
+    else if ( drain ) begin
+      mem_reqstream_val        = infl_enq_rdy;
+      mem_reqstream_msg.type_  = `VC_MEM_REQ_MSG_TYPE_WRITE;
+      mem_reqstream_msg.opaque = 8'b0;
+      mem_reqstream_msg.addr   = sb_addr[head];
+      mem_reqstream_msg.len    = 2'd0;
+      mem_reqstream_msg.data   = sb_data[head];
+    end
+  end
+
+  logic  sb_deq;
+  assign sb_deq = drain && mem_reqstream_rdy && infl_enq_rdy;
+
+  // A store can take the place of the entry draining this cycle
+
+  always_comb begin
+    if ( is_write )
+      proc_reqstream_rdy = pend_enq_rdy && ( !full || sb_deq );
+    else if ( fwd_hit )
+      proc_reqstream_rdy = pend_enq_rdy;
+    else
+      proc_reqstream_rdy = pend_enq_rdy && infl_enq_rdy && mem_reqstream_rdy;
+  end
+
+  logic  sb_enq;
+  assign sb_enq = proc_reqstream_val && proc_reqstream_rdy && is_write;
+
+  assign pend_enq_val = proc_reqstream_val && proc_reqstream_rdy;
+  assign pend_enq_msg = { local_req, local_resp };
+
+  assign infl_enq_val = ( load_to_mem && proc_reqstream_rdy ) || sb_deq;
+  assign infl_enq_msg = load_to_mem;
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      head  <= '0;
+      tail  <= '0;
+      count <= '0;
+    end
+    else begin
+      if ( sb_enq ) begin
+        sb_addr[tail] <= proc_reqstream_msg.addr;
+        sb_data[tail] <= proc_reqstream_msg.data;
+        tail          <= tail + 1'b1;
+      end
+
+      if ( sb_deq )
+        head <= head + 1'b1;
+
+      if ( sb_enq && !sb_deq )
+        count <= count + 1'b1;
+      else if ( !sb_enq && sb_deq )
+        count <= count - 1'b1;
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Responses
+  //----------------------------------------------------------------------
+  // Responses to drained stores are dropped as they arrive. A response
+  // to a load is passed on once every earlier request has its response.
+
+  logic         pend_local;
+  mem_resp_4B_t pend_resp;
+
+  assign { pend_local, pend_resp } = pend_deq_msg;
+
+  always_comb begin
+    proc_respstream_val = 1'b0;
+    proc_respstream_msg = pend_resp;
+    mem_respstream_rdy  = 1'b0;
+    pend_deq_rdy        = 1'b0;
+    infl_deq_rdy        = 1'b0;
+
+    if ( infl_deq_val && !infl_deq_msg ) begin
+      mem_respstream_rdy = 1'b1;
+      infl_deq_rdy       = mem_respstream_val;
+    end
+
+    if ( pend_deq_val && pend_local ) begin
+      proc_respstream_val = 1'b1;
+      pend_deq_rdy        = proc_respstream_rdy;
+    end
+    else if ( pend_deq_val && infl_deq_val && infl_deq_msg ) begin
+      proc_respstream_val = mem_respstream_val;
+      proc_respstream_msg = mem_respstream_msg;
+      mem_respstream_rdy  = proc_respstream_rdy;
+      pend_deq_rdy        = mem_respstream_val && proc_respstream_rdy;
+      infl_deq_rdy        = mem_respstream_val && proc_respstream_rdy;
+    end
+  end
+
+endmodule
+
+`endif /* LAB2_PROC_PROC_STORE_BUFFER_V */
@@ -0,0 +1,238 @@
+#=========================================================================
+# checkpoint
+#=========================================================================
+# Architectural checkpoints for fast-forwarding long TinyRV2 programs.
+# A program is run on ProcISS up to a marker, by default the first write
+# to the stats_en CSR, and the register file, PC, memory and remaining
+# manager messages are captured in a Checkpoint. The checkpoint turns
+# into a memory image that any processor or system loads like a freshly
+# assembled program, so only the region of interest is simulated in
+# detail:
+#
+#   ckpt = checkpoint.take( gen_test, asm_cache.assemble )
+#   checkpoint.run_test( harness, ProcAlt, ckpt )
+#   checkpoint.run_test( sys_harness, SingleCoreSys, ckpt,
+#                        run=sys_harness.run_score_test )
+#
+# None of the RTL can load a register file or PC directly, so the image
+# restores them with a small stub. The instruction at the reset vector
+# is replaced by a jal to the stub, which puts that instruction back,
+# restores every register, and jumps to the checkpoint PC. stats_en is
+# always still off at the checkpoint, so the stub leaves it alone. The
+# stub is placed in the highest free region below the stack, which the
+# program is unlikely to touch.
+#
+# The instruction at the reset vector is restored with a store, which
+# the instruction cache in SingleCoreSys does not see. Programs that
+# execute the reset vector again after the marker can only be restored
+# on a processor without an instruction cache.
+
+from collections import namedtuple
+
+from lab2_proc.ProcISS import ProcISS, reset_vector, mem_nbytes, sext
+
+#-------------------------------------------------------------------------
+# Encoding
+#-------------------------------------------------------------------------
+# Only the instructions the stub needs.
+
+def _lui( rd, imm ):
+  return ( imm & 0xfffff000 ) | ( rd << 7 ) | 0b0110111
+
+def _addi( rd, rs1, imm ):
+  return ( ( imm & 0xfff ) << 20 ) | ( rs1 << 15 ) | ( rd << 7 ) | 0b0010011
+
+def _sw( rs2, rs1, imm ):
+  return ( ( ( imm >> 5 ) & 0x7f ) << 25 ) | ( rs2 << 20 ) | ( rs1 << 15 ) \
+       | ( 0b010 << 12 ) | ( ( imm & 0x1f ) << 7 ) | 0b0100011
+
+def _jal( rd, offset ):
+  o = offset & 0x1fffff
+  return ( ( ( o >> 20 ) & 1 ) << 31 ) | ( ( ( o >> 1 ) & 0x3ff ) << 21 ) \
+       | ( ( ( o >> 11 ) & 1 ) << 20 ) | ( ( ( o >> 12 ) & 0xff ) << 12 ) \
+       | ( rd << 7 ) | 0b1101111
+
+# Load a 32-bit value into rd with lui and addi, compensating for the
+# sign extension of the addi immediate
+
+def _li( rd, value ):
+  lo = sext( value & 0xfff, 12 )
+  hi = ( value - lo ) & 0xffffffff
+  return [ _lui( rd, hi ), _addi( rd, rd, lo ) ]
+
+#-------------------------------------------------------------------------
+# Memory image
+#-------------------------------------------------------------------------
+# Provides get_sections like the SparseMemoryImage from the assembler,
+# which is all the test harnesses and ProcISS.load use.
+
+Section = namedtuple( "Section", "name addr data" )
+
+class CheckpointImage:
+
+  def __init__( s, sections ):
+    s.sections = sections
+
+  def get_sections( s ):
+    return s.sections
+
+def _words_to_bytes( words ):
+  return bytearray( b"".join( w.to_bytes( 4, "little" ) for w in words ) )
+
+#-------------------------------------------------------------------------
+# Checkpoint
+#-------------------------------------------------------------------------
+
+# Granularity of the memory snapshot, and the space kept free for the
+# stack below the stack pointer when placing the stub
+
+chunk_nbytes = 256
+stack_nbytes = 64 * 1024
+
+class Checkpoint:
+
+  def __init__( s, iss ):
+    s.pc            = iss.pc
+    s.rf            = list( iss.rf )
+    s.num_insts     = iss.num_insts
+    s.mngr2proc     = list( iss.mngr2proc )
+    s.proc2mngr_ref = iss.proc2mngr_ref[ len( iss.proc2mngr ): ]
+
+    # Snapshot the memory in chunks, dropping the chunks of zeros
+
+    s.mem = {}
+    mem   = iss.mem
+    zeros = bytes( chunk_nbytes )
+    for addr in range( 0, len( mem ), chunk_nbytes ):
+      chunk = mem[ addr : addr+chunk_nbytes ]
+      if chunk != zeros:
+        s.mem[addr] = bytes( chunk )
+
+  #-----------------------------------------------------------------------
+  # stub
+  #-----------------------------------------------------------------------
+  # Return the restore stub for the given address as a list of words.
+
+  def stub( s, stub_addr ):
+    reset_inst = int.from_bytes( s.read_mem( reset_vector, 4 ), "little" )
+
+    words  = _li( 1, reset_inst )
+    words += [ _sw( 1, 0, reset_vector ) ]
+
+    for r in range( 1, 32 ):
+      words += _li( r, s.rf[r] )
+
+    pc = stub_addr + 4*len( words )
+    words.append( _jal( 0, s.pc - pc ) )
+    return words
+
+  def read_mem( s, addr, nbytes ):
+    base = addr - addr % chunk_nbytes
+    return s.mem.get( base, bytes( chunk_nbytes ) )[ addr-base : addr-base+nbytes ]
+
+  # Highest free chunks for the stub, below the stack when x2 looks like
+  # a stack pointer
+
+  def stub_addr( s ):
+    nchunks = ( 4*len( s.stub( 0 ) ) + chunk_nbytes - 1 ) // chunk_nbytes
+
+    top = mem_nbytes
+    if reset_vector + stack_nbytes < s.rf[2] <= mem_nbytes:
+      top = s.rf[2] - stack_nbytes
+
+    addr = top - top % chunk_nbytes - nchunks*chunk_nbytes
+    while addr > reset_vector:
+      if all( addr + i*chunk_nbytes not in s.mem for i in range( nchunks ) ):
+        return addr
+      addr -= chunk_nbytes
+
+    raise ValueError( "no free memory for the checkpoint restore stub" )
+
+  #-----------------------------------------------------------------------
+  # mem_image
+  #-----------------------------------------------------------------------
+  # Return the memory image which restores the checkpoint when run from
+  # the reset vector.
+
+  def mem_image( s ):
+
+    stub_addr = s.stub_addr()
+    mem       = dict( s.mem )
+
+    # Jump from the reset vector to the stub
+
+    base  = reset_vector - reset_vector % chunk_nbytes
+    chunk = bytearray( mem.get( base, bytes( chunk_nbytes ) ) )
+    chunk[ reset_vector-base : reset_vector-base+4 ] = \
+      _jal( 0, stub_addr - reset_vector ).to_bytes( 4, "little" )
+    mem[base] = bytes( chunk )
+
+    # Merge adjacent chunks into sections
+
+    sections = []
+    for addr in sorted( mem ):
+      if sections and sections[-1].addr + len( sections[-1].data ) == addr:
+        sections[-1].data.extend( mem[addr] )
+      else:
+        sections.append( Section( ".data", addr, bytearray( mem[addr] ) ) )
+
+    sections.append( Section( ".text", stub_addr, _words_to_bytes( s.stub( stub_addr ) ) ) )
+
+    # Manager messages not yet exchanged
+
+    sections.append( Section( ".mngr2proc", 0, _words_to_bytes( s.mngr2proc     ) ) )
+    sections.append( Section( ".proc2mngr", 0, _words_to_bytes( s.proc2mngr_ref ) ) )
+
+    return CheckpointImage( sections )
+
+#-------------------------------------------------------------------------
+# fast_forward
+#-------------------------------------------------------------------------
+# Run a program loaded into a ProcISS up to, but not including, the
+# first write to stats_en, or for about max_insts instructions (the ISS
+# runs whole basic blocks), whichever comes first. The stats_en write is
+# left for the restored processor so that its statistics cover the
+# whole region of interest.
+
+def fast_forward( iss, max_insts=10000000 ):
+  iss.run( max_insts, stop_at_stats_en=True )
+  return iss
+
+#-------------------------------------------------------------------------
+# take
+#-------------------------------------------------------------------------
+# Assemble and fast-forward a test program, and return its checkpoint.
+# The assembler is passed in, usually the assemble function from
+# lab2_proc.test.asm_cache or the test harness.
+
+def take( gen_test, assemble, max_insts=10000000 ):
+  iss = ProcISS()
+  iss.load( assemble( gen_test() ) )
+  return Checkpoint( fast_forward( iss, max_insts ) )
+
+#-------------------------------------------------------------------------
+# run_test
+#-------------------------------------------------------------------------
+# Run a checkpoint with the run_test of a test harness, e.g. the lab2
+# harness for ProcAlt, by handing the harness the checkpoint image
+# instead of an assembled program. Harnesses with several run functions
+# name the one to use with run, e.g. run_score_test of the lab4 harness
+# for SingleCoreSys.
+
+def run_test( harness, model, ckpt, delays=False, cmdline_opts=None, run=None ):
+
+  mem_image = ckpt.mem_image()
+  marker    = f"# checkpoint at pc {ckpt.pc:08x}"
+  assemble  = harness.assemble
+
+  def assemble_ckpt( asm_code ):
+    if asm_code == marker:
+      return mem_image
+    return assemble( asm_code )
+
+  harness.assemble = assemble_ckpt
+  try:
+    run = run or harness.run_test
+    return run( model, lambda: marker, delays, cmdline_opts )
+  finally:
+    harness.assemble = assemble
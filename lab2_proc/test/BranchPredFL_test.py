@@ -0,0 +1,151 @@
+#=========================================================================
+# BranchPredFL_test.py
+#=========================================================================
+# Unit tests for the branch predictor reference model, and a check that
+# ProcAlt mispredicts exactly the branches that BranchPredFL mispredicts
+# when replaying the branch trace of the same program from ProcISS.
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc.tinyrv2_encoding import assemble
+from lab2_proc.ProcISS import ProcISS
+from lab2_proc.ProcAlt import ProcAlt
+from lab2_proc.BranchPredFL import BranchPredFL, branch_trace, replay
+
+from common import probe
+
+from lab2_proc.test import harness
+
+#-------------------------------------------------------------------------
+# BranchPredFL
+#-------------------------------------------------------------------------
+
+def test_loop():
+  bp = BranchPredFL()
+
+  # First taken instance misses in the BTB, then the loop is predicted
+  # taken until the final fall through
+
+  mispreds = [ bp.access( 0x210, False, True, 0x200 ) for _ in range( 9 ) ]
+  mispreds.append( bp.access( 0x210, False, False, 0x200 ) )
+
+  assert mispreds == [ True ] + [ False ]*8 + [ True ]
+  assert bp.nbranches == 10
+  assert bp.nmispreds == 2
+
+def test_saturate():
+  bp = BranchPredFL()
+  for _ in range( 8 ):
+    bp.access( 0x210, False, True, 0x200 )
+
+  # Two not taken instances are needed to flip the prediction
+
+  assert bp.predict( 0x210 ) == ( True, 0x200 )
+  bp.update( 0x210, False, False, 0x200 )
+  assert bp.predict( 0x210 ) == ( True, 0x200 )
+  bp.update( 0x210, False, False, 0x200 )
+  assert bp.predict( 0x210 ) == ( False, 0x214 )
+
+def test_jal():
+  bp = BranchPredFL()
+  assert bp.access( 0x204, True, True, 0x300 )
+  assert not bp.access( 0x204, True, True, 0x300 )
+  assert bp.predict( 0x204 ) == ( True, 0x300 )
+
+def test_btb_conflict():
+  bp = BranchPredFL( num_bht_entries=64, num_btb_entries=4 )
+  bp.update( 0x200, True, True, 0x300 )
+  bp.update( 0x210, True, True, 0x400 )
+
+  # 0x200 and 0x210 map to the same BTB entry, full tags tell them apart
+
+  assert bp.predict( 0x200 ) == ( False, 0x204 )
+  assert bp.predict( 0x210 ) == ( True,  0x400 )
+
+#-------------------------------------------------------------------------
+# Test programs
+#-------------------------------------------------------------------------
+# Every loop body is at least three instructions long, see BranchPredFL,
+# and nothing follows the final csrw since ProcAlt would resolve it.
+
+def gen_nested_loop_test():
+  return """
+    csrr x1, mngr2proc < 4
+    addi x3, x0, 0
+    addi x4, x0, 0
+  outer:
+    addi x2, x0, 5
+  inner:
+    addi x3, x3, 1
+    addi x2, x2, -1
+    bne  x2, x0, inner
+    addi x4, x4, 1
+    blt  x4, x1, outer
+    csrw proc2mngr, x3 > 20
+  """
+
+def gen_alternating_test():
+  return """
+    csrr x1, mngr2proc < 16
+    addi x2, x0, 0
+    addi x3, x0, 0
+  loop:
+    andi x4, x2, 1
+    beq  x4, x0, even
+    addi x3, x3, 1
+  even:
+    addi x2, x2, 1
+    nop
+    bne  x2, x1, loop
+    csrw proc2mngr, x3 > 8
+  """
+
+def gen_call_test():
+  return """
+    jal  x0, main
+  incr:
+    addi x3, x3, 2
+    jalr x0, x5, 0
+  main:
+    csrr x1, mngr2proc < 6
+    addi x3, x0, 0
+  loop:
+    jal  x5, incr
+    addi x1, x1, -1
+    nop
+    bne  x1, x0, loop
+    csrw proc2mngr, x3 > 12
+  """
+
+#-------------------------------------------------------------------------
+# ProcAlt against BranchPredFL
+#-------------------------------------------------------------------------
+
+def count_bp_stats( s ):
+  s.nbranches = 0
+  s.nmispreds = 0
+
+  @update_ff
+  def up_bp_stats():
+    if not s.reset:
+      s.nbranches += int( s.proc.bp_resolve )
+      s.nmispreds += int( s.proc.bp_mispred )
+
+@pytest.mark.parametrize( "gen_test", [
+  gen_nested_loop_test,
+  gen_alternating_test,
+  gen_call_test,
+])
+def test_procalt( gen_test, cmdline_opts ):
+
+  iss = ProcISS()
+  iss.load( assemble( gen_test() ) )
+  ref = replay( branch_trace( iss ) )
+
+  th = probe.run_probe( harness, count_bp_stats, harness.run_test, ProcAlt,
+                        gen_test, cmdline_opts=cmdline_opts )
+
+  assert th.nbranches == ref.nbranches
+  assert th.nmispreds == ref.nmispreds
@@ -0,0 +1,67 @@
+#=========================================================================
+# ProcAlt_sb_test.py
+#=========================================================================
+# Store buffer tests for ProcAlt: forwarding, overflow and overwrite in
+# the buffer, and the drain before every write to stats_en.
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.mem import MemMsgType
+
+from common import probe
+
+from lab2_proc.test.harness import asm_test, run_test
+from lab2_proc.test import harness
+from lab2_proc.ProcAlt import ProcAlt
+
+from lab2_proc.test import inst_sw
+
+#-------------------------------------------------------------------------
+# sw
+#-------------------------------------------------------------------------
+
+sw_tests = [
+  asm_test( inst_sw.gen_store_buffer_test ),
+  asm_test( inst_sw.gen_fence_test        ),
+]
+
+@pytest.mark.parametrize( "name,test", sw_tests )
+def test_sw( name, test, cmdline_opts ):
+  run_test( ProcAlt, test, cmdline_opts=cmdline_opts )
+
+@pytest.mark.parametrize( "name,test", sw_tests )
+def test_sw_delays( name, test, cmdline_opts ):
+  run_test( ProcAlt, test, delays=True, cmdline_opts=cmdline_opts )
+
+#-------------------------------------------------------------------------
+# fence
+#-------------------------------------------------------------------------
+# Records how many stores had reached the data memory each time stats_en
+# changes, counting only the stores of earlier cycles since the stats_en
+# port changes the cycle after the csrw writes it.
+
+def count_fence_stores( s ):
+  s.nstores       = 0
+  s.stats_en      = 0
+  s.fence_nstores = []
+
+  @update_ff
+  def up_fence_stores():
+    if not s.reset:
+      if int( s.proc.stats_en ) != s.stats_en:
+        s.stats_en = int( s.proc.stats_en )
+        s.fence_nstores.append( s.nstores )
+
+      dmem = s.proc.dmem.reqstream
+      if dmem.val & dmem.rdy & ( dmem.msg.type_ == MemMsgType.WRITE ):
+        s.nstores += 1
+
+# gen_fence_test stores two words before turning stats_en on, and one
+# more before turning it off
+
+@pytest.mark.parametrize( "delays", [ False, True ] )
+def test_fence( delays, cmdline_opts ):
+  th = probe.run_probe( harness, count_fence_stores, harness.run_test,
+                        ProcAlt, inst_sw.gen_fence_test, delays, cmdline_opts )
+  assert th.fence_nstores == [ 2, 3 ]
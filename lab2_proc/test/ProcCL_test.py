@@ -0,0 +1,296 @@
+#=========================================================================
+# ProcCL_test.py
+#=========================================================================
+# Reuse the ProcFL test classes for the cycle-approximate model, check
+# the timing of each hazard in isolation, and compare its cycle counts
+# against ProcAlt on a few longer programs.
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc.ProcCL  import ProcCL
+from lab2_proc.ProcAlt import ProcAlt
+
+from lab2_proc.test import iss_harness
+from lab2_proc.test import cpi_stack
+from lab2_proc.test import inst_random
+from lab2_proc.test import inst_sw
+from lab2_proc.test import ProcFL_rr_test
+from lab2_proc.test import ProcFL_rimm_test
+from lab2_proc.test import ProcFL_branch_test
+from lab2_proc.test import ProcFL_random_test
+from lab2_proc.test.ProcISS_test import gen_no_proc2mngr_test
+
+@pytest.fixture( autouse=True )
+def use_iss_harness( monkeypatch ):
+  for module in [ ProcFL_rr_test, ProcFL_rimm_test, ProcFL_branch_test,
+                  ProcFL_random_test ]:
+    monkeypatch.setattr( module, "run_test", iss_harness.run_test )
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+class TestsRR( ProcFL_rr_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcCL
+
+class TestsRImm( ProcFL_rimm_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcCL
+
+class TestsBranch( ProcFL_branch_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcCL
+
+class TestsRandom( ProcFL_random_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcCL
+
+#-------------------------------------------------------------------------
+# Hazards
+#-------------------------------------------------------------------------
+# Each program is the same four instructions long, so a hazard shows up
+# as extra cycles over the straight-line program.
+
+def gen_straight_test():
+  return """
+    csrr x1, mngr2proc < 5
+    addi x2, x1, 1
+    addi x3, x2, 1
+    csrw proc2mngr, x3 > 7
+  """
+
+def gen_load_use_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    lw   x2, 0(x1)
+    addi x3, x2, 1
+    csrw proc2mngr, x3 > 8
+
+    .data
+    .word 7
+  """
+
+def gen_mul_test():
+  return """
+    csrr x1, mngr2proc < 3
+    csrr x2, mngr2proc < 7
+    mul  x3, x1, x2
+    csrw proc2mngr, x3 > 21
+  """
+
+def gen_mul_indep_test():
+  return """
+    csrr x1, mngr2proc < 3
+    csrr x2, mngr2proc < 7
+    mul  x3, x1, x2
+    csrw proc2mngr, x1 > 3
+  """
+
+def gen_jal_test():
+  return """
+    csrr x1, mngr2proc < 5
+    jal  x0, next
+  next:
+    addi x3, x1, 2
+    csrw proc2mngr, x3 > 7
+  """
+
+def gen_branch_test():
+  return """
+    csrr x1, mngr2proc < 5
+    bne  x1, x0, next
+  next:
+    addi x3, x1, 2
+    csrw proc2mngr, x3 > 7
+  """
+
+def gen_store_load_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    sw   x1, 0(x1)
+    lw   x3, 0(x1)
+    csrw proc2mngr, x3 > 0x00002000
+  """
+
+@pytest.mark.parametrize( "gen_test, nstalls", [
+  ( gen_straight_test, 0 ),
+  ( gen_load_use_test, 1 ),
+  ( gen_mul_test,      4 ),
+  ( gen_mul_indep_test, 0 ),
+  ( gen_jal_test,      1 ),
+  ( gen_branch_test,   2 ),
+])
+def test_hazard( gen_test, nstalls, cmdline_opts ):
+  straight = iss_harness.run_test( ProcCL, gen_straight_test, cmdline_opts=cmdline_opts )
+  proc     = iss_harness.run_test( ProcCL, gen_test, cmdline_opts=cmdline_opts )
+  assert proc.num_cycles - straight.num_cycles == nstalls
+
+@pytest.mark.parametrize( "gen_test, imem_latency, dmem_latency, nstalls", [
+
+  # Every fetch takes two extra cycles
+
+  ( gen_straight_test, 2, 0, 2*4 ),
+
+  # The lw takes three extra cycles in M, one of which hides the
+  # load-use stall of the addi
+
+  ( gen_load_use_test, 0, 3, 3-1 ),
+
+  # The sw is answered by the store buffer, and the lw gets its data
+  # from the store buffer
+
+  ( gen_store_load_test, 0, 3, 0 ),
+])
+def test_memory_latency( gen_test, imem_latency, dmem_latency, nstalls ):
+  proc = ProcCL( imem_latency=imem_latency, dmem_latency=dmem_latency )
+  proc.load( iss_harness.assemble( gen_test() ) )
+  proc.run()
+
+  ref = iss_harness.run_test( ProcCL, gen_test )
+  assert proc.num_cycles - ref.num_cycles == nstalls
+
+# Without proc2mngr messages ProcCL runs until the program jumps to
+# itself, like ProcISS
+
+def test_no_proc2mngr():
+  proc = ProcCL()
+  proc.load( iss_harness.assemble( gen_no_proc2mngr_test() ) )
+  assert proc.run() == 3
+  assert proc.num_insts == 3
+  assert proc.rf[2] == 2
+
+#-------------------------------------------------------------------------
+# ProcAlt
+#-------------------------------------------------------------------------
+# Longer programs mixing every hazard, so that the ProcCL cycle count can
+# be held to within 5% of ProcAlt.
+
+def gen_vvadd_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    csrr x2, mngr2proc < 8
+    addi x3, x0, 0
+  loop:
+    lw   x4, 0(x1)
+    lw   x5, 4(x1)
+    add  x6, x4, x5
+    add  x3, x3, x6
+    addi x1, x1, 8
+    addi x2, x2, -1
+    bne  x2, x0, loop
+    csrw proc2mngr, x3 > 136
+
+    .data
+    .word 1
+    .word 2
+    .word 3
+    .word 4
+    .word 5
+    .word 6
+    .word 7
+    .word 8
+    .word 9
+    .word 10
+    .word 11
+    .word 12
+    .word 13
+    .word 14
+    .word 15
+    .word 16
+  """
+
+def gen_mul_loop_test():
+  return """
+    csrr x1, mngr2proc < 10
+    addi x2, x0, 1
+    addi x3, x0, 0
+  loop:
+    mul  x2, x2, x1
+    andi x2, x2, 0xff
+    addi x3, x3, 1
+    blt  x3, x1, loop
+    csrw proc2mngr, x3 > 10
+  """
+
+def gen_call_test():
+  return """
+    jal  x0, main
+  incr:
+    addi x3, x3, 2
+    jalr x0, x5, 0
+  main:
+    csrr x1, mngr2proc < 12
+    addi x3, x0, 0
+  loop:
+    jal  x5, incr
+    addi x1, x1, -1
+    nop
+    bne  x1, x0, loop
+    csrw proc2mngr, x3 > 24
+  """
+
+# Mixed mul/add code, with the use of the product either right after the
+# mul or after the four independent instructions in the loop, which the
+# scoreboard lets go past the mul
+
+def gen_mul_add_test( use_first ):
+  use = "add  x3, x3, x5"
+  return lambda: f"""
+    csrr x1, mngr2proc < 10
+    csrr x2, mngr2proc < 3
+    addi x3, x0, 0
+    addi x4, x0, 0
+  loop:
+    mul  x5, x1, x2
+    {use if use_first else ""}
+    add  x4, x4, x1
+    addi x6, x1, 7
+    add  x4, x4, x6
+    addi x1, x1, -1
+    {"" if use_first else use}
+    bne  x1, x0, loop
+    csrw proc2mngr, x3 > 165
+    csrw proc2mngr, x4 > 180
+  """
+
+@pytest.mark.parametrize( "gen_test", [
+  gen_vvadd_test,
+  gen_mul_loop_test,
+  gen_mul_add_test( False ),
+  gen_call_test,
+  inst_random.gen_loop_test,
+  inst_sw.gen_swap_test,
+])
+def test_procalt( gen_test, cmdline_opts ):
+  stack = cpi_stack.run_test( ProcAlt, gen_test, cmdline_opts=cmdline_opts )
+  proc  = iss_harness.run_test( ProcCL, gen_test, cmdline_opts=cmdline_opts )
+
+  assert proc.num_insts == stack.num_insts()
+  assert proc.num_cycles == pytest.approx( stack.num_cycles(), rel=0.05 )
+
+def test_mul_overlap( cmdline_opts ):
+  use_first = cpi_stack.run_test( ProcAlt, gen_mul_add_test( True ), cmdline_opts=cmdline_opts )
+  use_last  = cpi_stack.run_test( ProcAlt, gen_mul_add_test( False ), cmdline_opts=cmdline_opts )
+
+  assert use_last.num_insts() == use_first.num_insts()
+  assert use_last.num_cycles() < use_first.num_cycles()
+
+  # In ProcCL the use right after the mul waits three cycles in D for the
+  # product, and the independent instructions only lose the cycle in
+  # which the product takes the write port
+
+  use_first = iss_harness.run_test( ProcCL, gen_mul_add_test( True ), cmdline_opts=cmdline_opts )
+  use_last  = iss_harness.run_test( ProcCL, gen_mul_add_test( False ), cmdline_opts=cmdline_opts )
+
+  assert use_first.num_cycles - use_last.num_cycles == 2*10
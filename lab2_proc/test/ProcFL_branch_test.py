@@ -9,7 +9,8 @@
 import pytest
 
 from pymtl3 import *
-from lab2_proc.test.harness import asm_test, run_test
+from lab2_proc.test.harness import asm_test
+from lab2_proc.test import harness, asm_cache
 from lab2_proc.ProcFL import ProcFL
 
 from lab2_proc.test import inst_beq
@@ -19,6 +20,10 @@ from lab2_proc.test import inst_bgeu
 from lab2_proc.test import inst_blt
 from lab2_proc.test import inst_bltu
 
+# Reuse assembled programs across test runs
+
+run_test = asm_cache.cached( harness, harness.run_test )
+
 #-------------------------------------------------------------------------
 # Tests
 #-------------------------------------------------------------------------
@@ -0,0 +1,71 @@
+#=========================================================================
+# ProcFL_random_test.py
+#=========================================================================
+# We group all our test cases into a class so that we can easily reuse
+# these test cases in our RTL tests. We can simply inherit from this test
+# class, overload the setup_class method, and set the ProcType
+# appropriately.
+
+import pytest
+
+from pymtl3 import *
+from lab2_proc.test.harness import asm_test
+from lab2_proc.test import harness, asm_cache
+from lab2_proc.ProcFL import ProcFL
+
+from lab2_proc.test import inst_random
+from lab2_proc.test.inst_random import RandomProgram
+
+# Reuse assembled programs across test runs
+
+run_test = asm_cache.cached( harness, harness.run_test )
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.usefixtures("cmdline_opts")
+class Tests:
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcFL
+
+  #-----------------------------------------------------------------------
+  # random programs
+  #-----------------------------------------------------------------------
+
+  @pytest.mark.parametrize( "name,test", [
+    asm_test( inst_random.gen_bypass_test   ),
+    asm_test( inst_random.gen_load_use_test ),
+    asm_test( inst_random.gen_mul_test      ),
+    asm_test( inst_random.gen_branch_test   ),
+    asm_test( inst_random.gen_loop_test     ),
+  ])
+  def test_random( s, name, test ):
+    run_test( s.ProcType, test, cmdline_opts=s.__class__.cmdline_opts )
+
+  def test_random_delays( s ):
+    run_test( s.ProcType, inst_random.gen_bypass_test, delays=True,
+              cmdline_opts=s.__class__.cmdline_opts )
+
+#-------------------------------------------------------------------------
+# Generator
+#-------------------------------------------------------------------------
+
+def test_raw_dist():
+  prog = RandomProgram( seed=0, ninsts=1000, body_len=1000,
+                        mix={ "alu": 1 }, raw_dist={ 1: 1 } )
+
+  # Every source after the first instruction reads the previous result
+
+  assert prog.raw_distances() == { 1: 2*999 }
+
+def test_loop():
+  prog = RandomProgram( seed=0, ninsts=1000, body_len=100, branch_density=0.1 )
+  assert prog.loop and prog.niters == 10
+  assert prog.num_insts <= 1000 + 2*10 + 1 + 2*8 + 1
+
+def test_reproducible():
+  assert inst_random.gen_random_program( seed=1, ninsts=500 ) \
+      == inst_random.gen_random_program( seed=1, ninsts=500 )
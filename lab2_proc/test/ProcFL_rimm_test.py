@@ -9,7 +9,8 @@
 import pytest
 
 from pymtl3 import *
-from lab2_proc.test.harness import asm_test, run_test
+from lab2_proc.test.harness import asm_test
+from lab2_proc.test import harness, asm_cache
 from lab2_proc.ProcFL import ProcFL
 
 from lab2_proc.test import inst_addi
@@ -24,6 +25,10 @@ from lab2_proc.test import inst_slli
 from lab2_proc.test import inst_lui
 from lab2_proc.test import inst_auipc
 
+# Reuse assembled programs across test runs
+
+run_test = asm_cache.cached( harness, harness.run_test )
+
 #-------------------------------------------------------------------------
 # Tests
 #-------------------------------------------------------------------------
@@ -9,7 +9,8 @@
 import pytest
 
 from pymtl3 import *
-from lab2_proc.test.harness import asm_test, run_test
+from lab2_proc.test.harness import asm_test
+from lab2_proc.test import harness, asm_cache
 from lab2_proc.ProcFL import ProcFL
 
 from lab2_proc.test import inst_add
@@ -24,6 +25,10 @@ from lab2_proc.test import inst_sra
 from lab2_proc.test import inst_srl
 from lab2_proc.test import inst_sll
 
+# Reuse assembled programs across test runs
+
+run_test = asm_cache.cached( harness, harness.run_test )
+
 #-------------------------------------------------------------------------
 # Tests
 #-------------------------------------------------------------------------
@@ -0,0 +1,160 @@
+#=========================================================================
+# ProcISS_test.py
+#=========================================================================
+# Reuse the ProcFL test classes for the instruction-set simulator. The
+# ProcFL tests call run_test from the regular harness, so we redirect
+# them to iss_harness.run_test, which runs ProcISS directly.
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc.ProcFL  import ProcFL
+from lab2_proc.ProcISS import ProcISS, disasm
+
+from lab2_proc.test import iss_harness
+from lab2_proc.test import ProcFL_rr_test
+from lab2_proc.test import ProcFL_rimm_test
+from lab2_proc.test import ProcFL_branch_test
+from lab2_proc.test import ProcFL_random_test
+
+@pytest.fixture( autouse=True )
+def use_iss_harness( monkeypatch ):
+  for module in [ ProcFL_rr_test, ProcFL_rimm_test, ProcFL_branch_test,
+                  ProcFL_random_test ]:
+    monkeypatch.setattr( module, "run_test", iss_harness.run_test )
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+class TestsRR( ProcFL_rr_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcISS
+
+class TestsRImm( ProcFL_rimm_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcISS
+
+class TestsBranch( ProcFL_branch_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcISS
+
+class TestsRandom( ProcFL_random_test.Tests ):
+
+  @classmethod
+  def setup_class( cls ):
+    cls.ProcType = ProcISS
+
+#-------------------------------------------------------------------------
+# Self-modifying code
+#-------------------------------------------------------------------------
+# Call a subroutine, overwrite its first instruction with a store, and
+# call it again. The ISS must drop the cached block for the subroutine.
+
+def gen_self_modifying_test():
+  return """
+    csrr  x1, mngr2proc < 0x00700113
+    jal   x5, patch_me
+    csrw  proc2mngr, x2 > 1
+    auipc x3, 0
+    sw    x1, 20(x3)
+    jal   x5, patch_me
+    csrw  proc2mngr, x2 > 7
+  end:
+    jal   x0, end
+  patch_me:
+    addi  x2, x0, 1
+    jalr  x0, x5, 0
+  """
+
+@pytest.mark.parametrize( "ProcType", [ ProcFL, ProcISS ] )
+def test_self_modifying( ProcType, cmdline_opts ):
+  iss_harness.run_test( ProcType, gen_self_modifying_test, cmdline_opts=cmdline_opts )
+
+#-------------------------------------------------------------------------
+# Disassembly
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "inst, asm", [
+  ( 0x002081b3, "add x3, x1, x2"          ),
+  ( 0x4020d193, "srai x3, x1, 2"          ),
+  ( 0xfff00113, "addi x2, x0, -1"         ),
+  ( 0x0082a303, "lw x6, 8(x5)"            ),
+  ( 0x0022a423, "sw x2, 8(x5)"            ),
+  ( 0x000012b7, "lui x5, 0x00001"         ),
+  ( 0x0080056f, "jal x10, 0x00000208"     ),
+  ( 0xfe009ce3, "bne x1, x0, 0x000001f8"  ),
+  ( 0x00028067, "jalr x0, x5, 0"          ),
+  ( 0xfc0020f3, "csrr x1, mngr2proc"      ),
+  ( 0x7c011073, "csrw proc2mngr, x2"      ),
+  ( 0x00000013, "nop"                     ),
+])
+def test_disasm( inst, asm ):
+  assert disasm( inst, 0x200 ) == asm
+
+#-------------------------------------------------------------------------
+# Statistics
+#-------------------------------------------------------------------------
+# Three addi between the csrw that turns stats_en on and the one that
+# turns it off. Like the processors, the enabling csrw counts and the
+# disabling one does not, whether the program runs by blocks or by
+# single steps.
+
+def gen_stats_test():
+  return """
+    addi x1, x0, 1
+    addi x2, x0, 2
+    addi x3, x0, 3
+    addi x4, x0, 4
+    addi x5, x0, 5
+    csrw stats_en, x1
+    addi x6, x0, 6
+    addi x7, x0, 7
+    addi x8, x0, 8
+    csrw stats_en, x0
+    addi x9, x0, 9
+    addi x10, x0, 10
+    addi x11, x0, 11
+    addi x12, x0, 12
+    addi x13, x0, 13
+    csrw proc2mngr, x13 > 13
+  """
+
+def test_stats_run_step():
+  mem_image = iss_harness.assemble( gen_stats_test() )
+
+  blocks = ProcISS()
+  blocks.load( mem_image )
+  blocks.run()
+
+  steps = ProcISS()
+  steps.load( mem_image )
+  while not steps.proc2mngr:
+    steps.step()
+
+  assert blocks.num_insts == steps.num_insts == 16
+  assert blocks.num_insts_stats == steps.num_insts_stats == 4
+
+# Without proc2mngr messages, run() stops when the program jumps to
+# itself instead of before the first instruction
+
+def gen_no_proc2mngr_test():
+  return """
+    addi x1, x0, 1
+    addi x2, x1, 1
+  end:
+    jal  x0, end
+  """
+
+def test_no_proc2mngr():
+  iss = ProcISS()
+  iss.load( iss_harness.assemble( gen_no_proc2mngr_test() ) )
+  assert iss.run() == 3
+  assert iss.rf[2] == 2
@@ -0,0 +1,130 @@
+#=========================================================================
+# asm_cache
+#=========================================================================
+# On-disk cache of assembled test programs. The key is the SHA-256 of the
+# assembly text together with the source of the assembler, so editing
+# tinyrv2_encoding invalidates every entry. The value is the pickled
+# memory image, which holds the program binary and the .mngr2proc and
+# .proc2mngr value streams, so a hit skips assembly entirely.
+#
+# The cache is bounded by max_nbytes. A hit touches the entry, and after
+# every insert the least recently used entries are evicted until the
+# cache fits again.
+#
+# The cache lives in the temporary directory unless the ASM_CACHE_DIR
+# environment variable says otherwise. Setting it to an empty string
+# disables the cache.
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from lab2_proc import tinyrv2_encoding
+
+cache_dir  = os.environ.get( "ASM_CACHE_DIR",
+               os.path.join( tempfile.gettempdir(), "tinyrv2-asm" ) )
+
+max_nbytes = 64 * 1024 * 1024
+
+#-------------------------------------------------------------------------
+# key
+#-------------------------------------------------------------------------
+# Like assemble, asm_code is either a string or a list of strings.
+
+_assembler_digest = None
+
+def key( asm_code ):
+  global _assembler_digest
+
+  if _assembler_digest is None:
+    with open( tinyrv2_encoding.__file__, "rb" ) as f:
+      _assembler_digest = hashlib.sha256( f.read() ).digest()
+
+  if isinstance( asm_code, list ):
+    asm_code = "\n".join( asm_code )
+
+  h = hashlib.sha256( _assembler_digest )
+  h.update( asm_code.encode() )
+  return h.hexdigest()
+
+#-------------------------------------------------------------------------
+# evict
+#-------------------------------------------------------------------------
+# Remove least recently used entries until the cache fits in nbytes.
+
+def evict( nbytes=None ):
+  nbytes  = max_nbytes if nbytes is None else nbytes
+  entries = []
+
+  for entry in os.scandir( cache_dir ):
+    if entry.name.endswith( ".pkl" ):
+      st = entry.stat()
+      entries.append( ( st.st_mtime, st.st_size, entry.path ) )
+
+  total = sum( size for _, size, _ in entries )
+
+  for _, size, path in sorted( entries ):
+    if total <= nbytes:
+      break
+    try:
+      os.remove( path )
+    except FileNotFoundError:
+      pass
+    total -= size
+
+#-------------------------------------------------------------------------
+# assemble
+#-------------------------------------------------------------------------
+# Drop-in replacement for tinyrv2_encoding.assemble. A corrupt or
+# unreadable entry is treated as a miss and rewritten. Entries are written
+# to a temporary file and renamed so that concurrent test processes never
+# see a partial entry.
+
+def assemble( asm_code ):
+
+  if not cache_dir:
+    return tinyrv2_encoding.assemble( asm_code )
+
+  path = os.path.join( cache_dir, key( asm_code ) + ".pkl" )
+
+  try:
+    with open( path, "rb" ) as f:
+      mem_image = pickle.load( f )
+    os.utime( path )
+    return mem_image
+  except Exception:
+    pass
+
+  mem_image = tinyrv2_encoding.assemble( asm_code )
+
+  os.makedirs( cache_dir, exist_ok=True )
+  fd, tmp_path = tempfile.mkstemp( dir=cache_dir, suffix=".tmp" )
+  with os.fdopen( fd, "wb" ) as f:
+    pickle.dump( mem_image, f, pickle.HIGHEST_PROTOCOL )
+  os.replace( tmp_path, path )
+
+  evict()
+
+  return mem_image
+
+#-------------------------------------------------------------------------
+# cached
+#-------------------------------------------------------------------------
+# Return a version of run_test, a run function of the harness module,
+# which assembles through the cache. The harnesses import assemble by
+# name, so it is rebound in the harness module for each run only:
+#
+#   run_test = asm_cache.cached( harness, harness.run_test )
+
+def cached( harness, run_test ):
+
+  def run_test_cached( *args, **kwargs ):
+    harness_assemble = harness.assemble
+    harness.assemble = assemble
+    try:
+      return run_test( *args, **kwargs )
+    finally:
+      harness.assemble = harness_assemble
+
+  return run_test_cached
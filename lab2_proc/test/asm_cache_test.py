@@ -0,0 +1,87 @@
+#=========================================================================
+# asm_cache_test.py
+#=========================================================================
+
+import os
+import pytest
+
+from lab2_proc import tinyrv2_encoding
+from lab2_proc.test import asm_cache
+from lab2_proc.test import inst_sub
+from lab2_proc.test import inst_sw
+
+#-------------------------------------------------------------------------
+# Fixtures
+#-------------------------------------------------------------------------
+# Use an empty cache directory and count the calls to the assembler.
+
+@pytest.fixture
+def nassembles( tmp_path, monkeypatch ):
+  count    = [ 0 ]
+  assemble = tinyrv2_encoding.assemble
+
+  def counting_assemble( asm_code ):
+    count[0] += 1
+    return assemble( asm_code )
+
+  monkeypatch.setattr( asm_cache, "cache_dir", str( tmp_path ) )
+  monkeypatch.setattr( tinyrv2_encoding, "assemble", counting_assemble )
+  return count
+
+def sections( mem_image ):
+  return [ ( s.name, s.addr, bytes( s.data ) ) for s in mem_image.get_sections() ]
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_hit( nassembles ):
+  ref = tinyrv2_encoding.assemble( inst_sw.gen_basic_test() )
+  nassembles[0] = 0
+
+  miss = asm_cache.assemble( inst_sw.gen_basic_test() )
+  hit  = asm_cache.assemble( inst_sw.gen_basic_test() )
+
+  assert nassembles[0] == 1
+  assert sections( miss ) == sections( ref )
+  assert sections( hit  ) == sections( ref )
+
+def test_list( nassembles ):
+  asm_code = inst_sub.gen_random_test()
+  asm_cache.assemble( asm_code )
+  asm_cache.assemble( "\n".join( asm_code ) )
+  assert nassembles[0] == 1
+
+def test_corrupt_entry( nassembles ):
+  asm_code = inst_sw.gen_basic_test()
+  path = os.path.join( asm_cache.cache_dir, asm_cache.key( asm_code ) + ".pkl" )
+
+  asm_cache.assemble( asm_code )
+  with open( path, "wb" ) as f:
+    f.write( b"garbage" )
+  mem_image = asm_cache.assemble( asm_code )
+
+  assert nassembles[0] == 2
+  assert sections( mem_image ) == sections( tinyrv2_encoding.assemble( asm_code ) )
+
+def test_evict( nassembles ):
+  asm_code = [ inst_sub.gen_basic_test(), inst_sw.gen_basic_test() ]
+  paths    = [ os.path.join( asm_cache.cache_dir, asm_cache.key( x ) + ".pkl" )
+               for x in asm_code ]
+
+  for x in asm_code:
+    asm_cache.assemble( x )
+
+  # Make the first entry the most recently used one
+
+  os.utime( paths[1], ( 0, 0 ) )
+  asm_cache.evict( os.path.getsize( paths[0] ) )
+
+  assert os.path.exists( paths[0] )
+  assert not os.path.exists( paths[1] )
+
+def test_disabled( nassembles, monkeypatch ):
+  monkeypatch.setattr( asm_cache, "cache_dir", "" )
+  asm_cache.assemble( inst_sw.gen_basic_test() )
+  asm_cache.assemble( inst_sw.gen_basic_test() )
+  assert nassembles[0] == 2
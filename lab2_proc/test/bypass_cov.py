@@ -0,0 +1,132 @@
+#=========================================================================
+# bypass_cov
+#=========================================================================
+# Coverage of the bypass paths and stall conditions in ProcAltCtrl. The
+# control unit raises one bit of its cov_events port per event (see the
+# coverage section of ProcAltCtrl.v), and the monitor_bypass_cov probe
+# counts them for every test into the session-wide Coverage.
+#
+# To collect coverage over a whole pytest session, set BYPASS_COV to the
+# path of a JSON file:
+#
+#   BYPASS_COV=bypass_cov.json pytest lab2_proc/test
+#
+# conftest.py then attaches the probe to the harness of every lab2 test,
+# and prints the coverage matrix at the end of the session, together
+# with the tests that add no event the other tests do not already cover.
+
+import json
+
+from pymtl3 import *
+
+cov_events = [
+  "byp_rs1_X",    # rs1 bypassed from X
+  "byp_rs1_M",    # rs1 bypassed from M
+  "byp_rs1_W",    # rs1 bypassed from W
+  "byp_rs2_X",    # rs2 bypassed from X
+  "byp_rs2_M",    # rs2 bypassed from M
+  "byp_rs2_W",    # rs2 bypassed from W
+  "ld_use_rs1",   # load-use stall on rs1
+  "ld_use_rs2",   # load-use stall on rs2
+  "imul_D",       # multiplier busy when a mul is in D
+  "mngr2proc_D",  # csrr waiting on mngr2proc
+  "imul_sb_D",    # D uses the rd of a mul in flight
+  "dmem_req_X",   # dmem request not ready
+  "dmem_resp_M",  # dmem response not valid
+  "proc2mngr_W",  # csrw waiting on proc2mngr
+  "squash_D",     # jal redirect
+  "squash_X",     # branch or jalr redirect
+]
+
+#-------------------------------------------------------------------------
+# Coverage
+#-------------------------------------------------------------------------
+
+class Coverage:
+
+  def __init__( s ):
+    s.counts = {}
+
+  def tick( s, test, events ):
+    counts = s.counts.setdefault( test, [ 0 ] * len( cov_events ) )
+    i = 0
+    while events:
+      if events & 1:
+        counts[i] += 1
+      events >>= 1
+      i      += 1
+
+  def totals( s ):
+    return [ sum( col ) for col in zip( *s.counts.values() ) ] \
+           if s.counts else [ 0 ] * len( cov_events )
+
+  def missed( s ):
+    return [ name for name, n in zip( cov_events, s.totals() ) if n == 0 ]
+
+  # Greedily pick tests covering every event any test covers, and return
+  # the tests left over
+
+  def redundant( s ):
+    covers    = { test: { i for i, n in enumerate( counts ) if n }
+                  for test, counts in s.counts.items() }
+    uncovered = set().union( *covers.values() )
+    needed    = set()
+
+    while uncovered:
+      test = max( sorted( covers ), key=lambda t: len( covers[t] & uncovered ) )
+      needed.add( test )
+      uncovered -= covers[test]
+
+    return sorted( set( covers ) - needed )
+
+  def report( s ):
+    width = max( [ len( t ) for t in s.counts ] + [ 5 ] )
+    lines = [ " ".join( [ "test".ljust( width ) ]
+                        + [ f"{i:>6d}" for i in range( len( cov_events ) ) ] ) ]
+
+    for test, counts in sorted( s.counts.items() ):
+      lines.append( " ".join( [ test.ljust( width ) ]
+                              + [ f"{n:>6d}" for n in counts ] ) )
+
+    lines.append( " ".join( [ "total".ljust( width ) ]
+                            + [ f"{n:>6d}" for n in s.totals() ] ) )
+    lines.append( "" )
+
+    for i, name in enumerate( cov_events ):
+      lines.append( f"{i:>2d}: {name}" )
+
+    lines.append( "" )
+    lines.append( "never covered: " + ( ", ".join( s.missed() ) or "none" ) )
+    lines.append( "redundant tests:" )
+    lines.extend( "  " + test for test in s.redundant() )
+
+    return "\n".join( lines )
+
+  def save( s, path ):
+    with open( path, "w" ) as f:
+      json.dump( { "events": cov_events, "counts": s.counts }, f, indent=2 )
+
+# Coverage of the whole session, and the test currently running
+
+session = Coverage()
+current = None
+
+#-------------------------------------------------------------------------
+# monitor_bypass_cov
+#-------------------------------------------------------------------------
+# Probe for the regular test harness with a monitor on cov_events.
+# Models without the port (e.g., ProcFL and ProcBase) are not counted.
+
+def monitor_bypass_cov( s ):
+
+  if not hasattr( s.proc, "cov_events" ):
+    return
+
+  test = current
+
+  @update_ff
+  def up_bypass_cov():
+    if not s.reset:
+      events = int( s.proc.cov_events )
+      if events:
+        session.tick( test, events )
@@ -0,0 +1,92 @@
+#=========================================================================
+# bypass_cov_test.py
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+
+from common import probe
+
+from lab2_proc.ProcAlt import ProcAlt
+
+from lab2_proc.test import harness, bypass_cov
+from lab2_proc.test.bypass_cov import Coverage, cov_events
+
+#-------------------------------------------------------------------------
+# Coverage
+#-------------------------------------------------------------------------
+
+def test_coverage():
+  cov = Coverage()
+  cov.tick( "a", 0b011 )
+  cov.tick( "a", 0b001 )
+  cov.tick( "b", 0b010 )
+  cov.tick( "c", 1 << cov_events.index( "squash_X" ) )
+
+  assert cov.counts["a"][:2] == [ 2, 1 ]
+  assert cov.totals()[:2]    == [ 2, 2 ]
+  assert "squash_X" not in cov.missed()
+  assert "byp_rs2_W" in cov.missed()
+
+  # a covers everything b covers
+
+  assert cov.redundant() == [ "b" ]
+
+#-------------------------------------------------------------------------
+# Test programs
+#-------------------------------------------------------------------------
+# The distance between the producer and the consumer selects the bypass
+# path: 0 nops bypasses from X, 1 from M and 2 from W.
+
+def gen_bypass_test( nnops ):
+  nops = "nop\n" * nnops
+  return lambda: f"""
+    csrr x1, mngr2proc < 5
+    {nops}
+    add  x2, x1, x1
+    {nops}
+    add  x3, x0, x2
+    csrw proc2mngr, x3 > 10
+  """
+
+def gen_load_use_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    lw   x2, 0(x1)
+    add  x3, x2, x0
+    csrw proc2mngr, x3 > 7
+
+    .data
+    .word 7
+  """
+
+def gen_mul_use_test():
+  return """
+    csrr x1, mngr2proc < 3
+    mul  x2, x1, x1
+    add  x3, x2, x0
+    csrw proc2mngr, x3 > 9
+  """
+
+#-------------------------------------------------------------------------
+# ProcAlt
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "gen_test, events", [
+  ( gen_bypass_test( 0 ), [ "byp_rs1_X", "byp_rs2_X" ] ),
+  ( gen_bypass_test( 1 ), [ "byp_rs1_M", "byp_rs2_M" ] ),
+  ( gen_bypass_test( 2 ), [ "byp_rs1_W", "byp_rs2_W" ] ),
+  ( gen_load_use_test,    [ "ld_use_rs1" ] ),
+  ( gen_mul_use_test,     [ "imul_sb_D" ] ),
+])
+def test_procalt( gen_test, events, cmdline_opts, monkeypatch ):
+  monkeypatch.setattr( bypass_cov, "session", Coverage() )
+  monkeypatch.setattr( bypass_cov, "current", "test" )
+
+  probe.run_probe( harness, bypass_cov.monitor_bypass_cov, harness.run_test,
+                   ProcAlt, gen_test, cmdline_opts=cmdline_opts )
+
+  counts = bypass_cov.session.counts["test"]
+  for event in events:
+    assert counts[ cov_events.index( event ) ] > 0
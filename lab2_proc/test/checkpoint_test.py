@@ -0,0 +1,87 @@
+#=========================================================================
+# checkpoint_test.py
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc import checkpoint
+from lab2_proc.ProcISS import ProcISS
+from lab2_proc.ProcAlt import ProcAlt
+
+from lab2_proc.test import harness
+from lab2_proc.test.asm_cache import assemble
+
+#-------------------------------------------------------------------------
+# Test program
+#-------------------------------------------------------------------------
+# Fill an array with squares, then sum it with stats enabled. The value
+# read after the region of interest checks that the checkpoint keeps the
+# remaining manager messages.
+
+def gen_sum_squares_test():
+  return """
+    csrr x2, mngr2proc < 10
+    csrr x1, mngr2proc < 0x00002000
+    addi x3, x0, 0
+    addi x4, x1, 0
+  init:
+    mul  x5, x3, x3
+    sw   x5, 0(x4)
+    addi x4, x4, 4
+    addi x3, x3, 1
+    bne  x3, x2, init
+
+    addi x6, x0, 1
+    csrw stats_en, x6
+
+    addi x3, x0, 0
+    addi x7, x0, 0
+    addi x4, x1, 0
+  sum:
+    lw   x5, 0(x4)
+    add  x7, x7, x5
+    addi x4, x4, 4
+    addi x3, x3, 1
+    bne  x3, x2, sum
+
+    csrw stats_en, x0
+    csrw proc2mngr, x7 > 285
+    csrr x8, mngr2proc < 100
+    add  x9, x8, x7
+    csrw proc2mngr, x9 > 385
+  """
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_fast_forward():
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble )
+
+  # Stopped at the stats_en write, with the array filled in
+
+  assert ckpt.rf[3] == 10
+  assert ckpt.read_mem( 0x2000 + 4*9, 4 ) == ( 81 ).to_bytes( 4, "little" )
+  assert ckpt.mngr2proc     == [ 100 ]
+  assert ckpt.proc2mngr_ref == [ 285, 385 ]
+
+@pytest.mark.parametrize( "max_insts", [ 7, 20, 1000 ] )
+def test_restore_iss( max_insts ):
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble, max_insts )
+
+  iss = ProcISS()
+  iss.load( ckpt.mem_image() )
+  iss.run()
+
+  assert iss.proc2mngr == [ 285, 385 ]
+
+def test_restore_procalt( cmdline_opts ):
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble )
+  checkpoint.run_test( harness, ProcAlt, ckpt, cmdline_opts=cmdline_opts )
+
+def test_restore_procalt_delays( cmdline_opts ):
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble )
+  checkpoint.run_test( harness, ProcAlt, ckpt, delays=True,
+                       cmdline_opts=cmdline_opts )
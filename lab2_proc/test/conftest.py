@@ -0,0 +1,32 @@
+#=========================================================================
+# conftest.py
+#=========================================================================
+# Collects bypass coverage over the session when BYPASS_COV is set, see
+# bypass_cov.py. Nothing is imported otherwise.
+
+import os
+
+import pytest
+
+bypass_cov_path = os.environ.get( "BYPASS_COV" ) or None
+
+@pytest.fixture( autouse=True )
+def bypass_cov_harness( request ):
+  if bypass_cov_path is None:
+    yield
+    return
+
+  from common import probe
+  from lab2_proc.test import harness, bypass_cov
+
+  bypass_cov.current = request.node.nodeid
+  with probe.attach( harness, bypass_cov.monitor_bypass_cov ):
+    yield
+
+def pytest_terminal_summary( terminalreporter ):
+  if bypass_cov_path is not None:
+    from lab2_proc.test import bypass_cov
+    if bypass_cov.session.counts:
+      terminalreporter.section( "bypass coverage" )
+      terminalreporter.write_line( bypass_cov.session.report() )
+      bypass_cov.session.save( bypass_cov_path )
@@ -0,0 +1,117 @@
+#=========================================================================
+# cpi_stack
+#=========================================================================
+# Breaks the cycles of a processor run down into a CPI stack. ProcBase
+# and ProcAlt charge every cycle in which no instruction commits to one
+# stall cause on their stall_cause port (see the CPI stack section of
+# the control units), so the cycles per cause always add up to the total
+# number of cycles.
+#
+# run_test is a drop-in replacement for run_test in
+# lab2_proc.test.harness which also returns the CPI stack of the run. If
+# the program turns on stats_en, only the cycles with stats_en set are
+# counted, like in the evaluation.
+
+from pymtl3 import *
+
+from common import probe
+
+from lab2_proc.test import harness
+
+# Stall cause names, indexed by the value of stall_cause
+
+stall_causes = [
+  "commit", # an instruction committed
+  "raw",    # RAW hazard stall (only load-use in ProcAlt)
+  "imul",   # multiplier busy or result not ready
+  "squash", # squashed by a jump or taken branch
+  "imem",   # waiting on imem response
+  "dmem",   # waiting on dmem or the store buffer
+  "mngr",   # waiting on mngr2proc or proc2mngr
+  "other",  # pipeline filling after reset
+]
+
+#-------------------------------------------------------------------------
+# CpiStack
+#-------------------------------------------------------------------------
+
+class CpiStack:
+
+  def __init__( s ):
+    s.ncycles = [ 0 ] * len( stall_causes )
+
+  def tick( s, stall_cause ):
+    s.ncycles[ stall_cause ] += 1
+
+  def num_cycles( s ):
+    return sum( s.ncycles )
+
+  def num_insts( s ):
+    return s.ncycles[0]
+
+  # Cycles per instruction contributed by each cause
+
+  def as_dict( s ):
+    ninsts = max( s.num_insts(), 1 )
+    return { cause : ncycles / ninsts
+             for cause, ncycles in zip( stall_causes, s.ncycles ) }
+
+  def __add__( s, other ):
+    stack = CpiStack()
+    stack.ncycles = [ x + y for x, y in zip( s.ncycles, other.ncycles ) ]
+    return stack
+
+  def report( s ):
+    ncycles = max( s.num_cycles(), 1 )
+    lines = [ f"  {'cause':8s} {'cycles':>10s} {'cpi':>8s} {'%':>7s}" ]
+    for ( cause, cpi ), n in zip( s.as_dict().items(), s.ncycles ):
+      lines.append( f"  {cause:8s} {n:10d} {cpi:8.3f} {100*n/ncycles:6.1f}%" )
+    lines.append( f"  {'total':8s} {s.num_cycles():10d} "
+                  f"{s.num_cycles()/max( s.num_insts(), 1 ):8.3f}" )
+    return "\n".join( lines )
+
+#-------------------------------------------------------------------------
+# monitor_cpi_stack
+#-------------------------------------------------------------------------
+# Probe for the regular test harness with a monitor on the processor
+# commit and stall cause ports. Models without a stall_cause port (e.g.,
+# ProcFL) only count committed instructions.
+
+def monitor_cpi_stack( s ):
+
+  s.cpi_stack       = CpiStack()
+  s.cpi_stack_stats = CpiStack()
+
+  has_stall_cause = hasattr( s.proc, "stall_cause" )
+
+  @update_ff
+  def up_cpi_stack():
+    if not s.reset:
+      if has_stall_cause:
+        cause = int( s.proc.stall_cause )
+      elif s.proc.commit_inst:
+        cause = 0
+      else:
+        return
+      s.cpi_stack.tick( cause )
+      if s.proc.stats_en:
+        s.cpi_stack_stats.tick( cause )
+
+#-------------------------------------------------------------------------
+# run_test
+#-------------------------------------------------------------------------
+
+def run_test( ProcModel, gen_test, delays=False, cmdline_opts=None ):
+
+  th = probe.run_probe( harness, monitor_cpi_stack, harness.run_test,
+                        ProcModel, gen_test, delays, cmdline_opts )
+
+  if th.cpi_stack_stats.num_cycles() > 0:
+    cpi_stack = th.cpi_stack_stats
+  else:
+    cpi_stack = th.cpi_stack
+
+  print( "" )
+  print( cpi_stack.report() )
+
+  return cpi_stack
@@ -0,0 +1,89 @@
+#=========================================================================
+# cpi_stack_test.py
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc.ProcBase import ProcBase
+from lab2_proc.ProcAlt  import ProcAlt
+
+from lab2_proc.test.cpi_stack import CpiStack, stall_causes, run_test
+
+#-------------------------------------------------------------------------
+# CpiStack
+#-------------------------------------------------------------------------
+
+def test_cpi_stack():
+  stack = CpiStack()
+  for cause in [ 0, 0, 1, 3, 3, 0, 7, 0 ]:
+    stack.tick( cause )
+
+  assert stack.num_insts()  == 4
+  assert stack.num_cycles() == 8
+
+  cpi = stack.as_dict()
+  assert cpi["commit"] == 1.0
+  assert cpi["raw"]    == 0.25
+  assert cpi["squash"] == 0.5
+  assert sum( cpi.values() ) == 2.0
+
+  total = stack + stack
+  assert total.ncycles == [ 2*n for n in stack.ncycles ]
+
+#-------------------------------------------------------------------------
+# Test programs
+#-------------------------------------------------------------------------
+
+def gen_load_use_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    lw   x2, 0(x1)
+    addi x3, x2, 1
+    csrw proc2mngr, x3 > 0x00010001
+
+    .data
+    .word 0x00010000
+  """
+
+def gen_branch_test():
+  return """
+    csrr x1, mngr2proc < 3
+    addi x2, x0, 0
+  loop:
+    addi x2, x2, 1
+    bne  x2, x1, loop
+    csrw proc2mngr, x2 > 3
+  """
+
+def gen_mul_test():
+  return """
+    csrr x1, mngr2proc < 3
+    csrr x2, mngr2proc < 7
+    mul  x3, x1, x2
+    csrw proc2mngr, x3 > 21
+  """
+
+#-------------------------------------------------------------------------
+# Stall attribution
+#-------------------------------------------------------------------------
+# Each program must charge some cycles to the hazard it exercises.
+
+@pytest.mark.parametrize( "ProcModel", [ ProcBase, ProcAlt ] )
+@pytest.mark.parametrize( "gen_test, cause", [
+  ( gen_load_use_test, "raw"    ),
+  ( gen_branch_test,   "squash" ),
+  ( gen_mul_test,      "imul"   ),
+])
+def test_stall_cause( ProcModel, gen_test, cause, cmdline_opts ):
+  stack = run_test( ProcModel, gen_test, cmdline_opts=cmdline_opts )
+  assert stack.ncycles[ stall_causes.index( cause ) ] > 0
+
+@pytest.mark.parametrize( "ProcModel", [ ProcBase, ProcAlt ] )
+def test_delays( ProcModel, cmdline_opts ):
+  stack = run_test( ProcModel, gen_load_use_test, delays=True,
+                    cmdline_opts=cmdline_opts )
+
+  assert stack.ncycles[ stall_causes.index( "imem" ) ] > 0
+  assert stack.ncycles[ stall_causes.index( "dmem" ) ] > 0
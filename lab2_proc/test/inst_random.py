@@ -0,0 +1,349 @@
+#=========================================================================
+# random programs
+#=========================================================================
+# Generator for long random TinyRV2 programs. The gen_random_test
+# functions in the inst_*.py files test one instruction at a time with
+# every value surrounded by nops, so they hardly exercise the bypass
+# paths. The programs here mix every kind of instruction with a tunable
+# distribution of RAW distances, so most instructions read a value that
+# is still in the pipeline, and are long enough to measure throughput.
+#
+# A program is a loop body of random instructions run a number of times
+# by a counter in x31, or a single pass through a straight-line body.
+# Straight-line bodies are limited to max_body_len instructions by the
+# memory layout, so longer programs loop. The knobs are:
+#
+#  - mix: relative weights of the instruction classes in insts below
+#  - raw_dist: relative weights of the RAW distance of every source,
+#    where distance d reads the destination of the d-th instruction
+#    before, and None reads a register not written recently
+#  - branch_density: probability of a forward branch over the next one
+#    to three instructions before each instruction
+#
+# Working values live in x1..x<nregs>, x30 holds the base address of a
+# data array that lw and sw access, and x31 counts loop iterations. The
+# expected results come from a small reference interpreter over the
+# generated instructions, independent of ProcISS, and are checked with a
+# csrw of every working register at the end of the program.
+
+import random
+
+from lab2_proc.ProcISS import sext, reset_vector
+
+M = 0xffffffff
+
+#-------------------------------------------------------------------------
+# Instruction classes
+#-------------------------------------------------------------------------
+
+insts = {
+  "alu"  : [ "add", "sub", "and", "or", "xor", "slt", "sltu", "sra", "srl", "sll" ],
+  "alui" : [ "addi", "andi", "ori", "xori", "slti", "sltiu", "srai", "srli", "slli" ],
+  "mul"  : [ "mul" ],
+  "lw"   : [ "lw" ],
+  "sw"   : [ "sw" ],
+}
+
+branches = [ "beq", "bne", "blt", "bge", "bltu", "bgeu" ]
+
+default_mix      = { "alu": 6, "alui": 3, "mul": 1, "lw": 2, "sw": 1 }
+default_raw_dist = { 1: 4, 2: 3, 3: 2, 4: 1, None: 2 }
+
+data_base   = 0x00002000
+data_nwords = 64
+
+# The assembler places .data at 0x2000, so the text has to fit between
+# the reset vector and the data, leaving room for the setup and checks
+
+max_body_len = ( data_base - reset_vector ) // 4 - 64
+
+#-------------------------------------------------------------------------
+# Reference semantics
+#-------------------------------------------------------------------------
+# Same semantics as ProcISS, written out again so that the generator
+# does not trust the model it is used to test.
+
+alu_fns = {
+  "add"   : lambda a, b: ( a + b ) & M,
+  "sub"   : lambda a, b: ( a - b ) & M,
+  "mul"   : lambda a, b: ( a * b ) & M,
+  "and"   : lambda a, b: a & b,
+  "or"    : lambda a, b: a | b,
+  "xor"   : lambda a, b: a ^ b,
+  "slt"   : lambda a, b: int( sext( a ) < sext( b ) ),
+  "sltu"  : lambda a, b: int( a < b ),
+  "sra"   : lambda a, b: ( sext( a ) >> ( b & 31 ) ) & M,
+  "srl"   : lambda a, b: a >> ( b & 31 ),
+  "sll"   : lambda a, b: ( a << ( b & 31 ) ) & M,
+}
+
+for _name in insts["alui"]:
+  alu_fns[ _name ] = alu_fns[ _name.replace( "i", "", 1 ) ]
+
+br_fns = {
+  "beq"   : lambda a, b: a == b,
+  "bne"   : lambda a, b: a != b,
+  "blt"   : lambda a, b: sext( a ) <  sext( b ),
+  "bge"   : lambda a, b: sext( a ) >= sext( b ),
+  "bltu"  : lambda a, b: a <  b,
+  "bgeu"  : lambda a, b: a >= b,
+}
+
+#-------------------------------------------------------------------------
+# RandomProgram
+#-------------------------------------------------------------------------
+# Every instruction in the body is a tuple ( name, rd, rs1, rs2, imm ).
+# Register-immediate instructions have rs2 set to None, and the imm of a
+# branch is the index of the instruction it jumps to.
+
+class RandomProgram:
+
+  def __init__( s, seed=0, ninsts=10000, body_len=1000, mix=None,
+                raw_dist=None, branch_density=0.0, nregs=8 ):
+
+    assert 1 <= nregs <= 29
+
+    s.rng            = random.Random( seed )
+    s.mix            = mix      or default_mix
+    s.raw_dist       = raw_dist or default_raw_dist
+    s.branch_density = branch_density
+    s.nregs          = nregs
+
+    # A body at least as long as the program is a single straight-line
+    # pass without the loop counter
+
+    s.body_len = min( body_len, ninsts )
+    assert s.body_len <= max_body_len
+    s.niters   = max( 1, round( ninsts / s.body_len ) )
+    s.loop     = s.niters > 1
+
+    rng = s.rng
+    s.init = [ rng.randint( 0, M ) for _ in range( nregs ) ]
+    s.data = [ rng.randint( 0, M ) for _ in range( data_nwords ) ]
+
+    s.history = []
+    s.body    = s.gen_body()
+
+    s.result = s.run()
+
+  #-----------------------------------------------------------------------
+  # Body generation
+  #-----------------------------------------------------------------------
+
+  def src( s ):
+    rng   = s.rng
+    dists = list( s.raw_dist )
+    dist  = rng.choices( dists, weights=[ s.raw_dist[d] for d in dists ] )[0]
+
+    if dist is not None and dist <= len( s.history ) and s.history[-dist]:
+      return s.history[-dist]
+
+    # Pick a register none of the recent instructions wrote if possible
+
+    recent = set( s.history[-4:] )
+    regs   = [ r for r in range( 1, s.nregs+1 ) if r not in recent ]
+    return rng.choice( regs or range( 1, s.nregs+1 ) )
+
+  def dest( s ):
+    rd = s.rng.randint( 1, s.nregs )
+    s.history.append( rd )
+    return rd
+
+  def gen_inst( s ):
+    rng     = s.rng
+    classes = list( s.mix )
+    cls     = rng.choices( classes, weights=[ s.mix[c] for c in classes ] )[0]
+    name    = rng.choice( insts[cls] )
+
+    if cls == "lw":
+      return ( name, s.dest(), 30, None, 4*rng.randrange( data_nwords ) )
+
+    if cls == "sw":
+      value = s.src()
+      s.history.append( 0 )
+      return ( name, 0, 30, value, 4*rng.randrange( data_nwords ) )
+
+    if cls == "alui":
+      rs1 = s.src()
+      if name in ( "srai", "srli", "slli" ):
+        imm = rng.randint( 0, 31 )
+      else:
+        imm = rng.randint( -2048, 2047 )
+      return ( name, s.dest(), rs1, None, imm )
+
+    rs1 = s.src()
+    rs2 = s.src()
+    return ( name, s.dest(), rs1, rs2, None )
+
+  def gen_body( s ):
+    rng  = s.rng
+    body = []
+
+    while len( body ) < s.body_len:
+      if rng.random() < s.branch_density and len( body ) + 1 < s.body_len:
+        nskip  = min( rng.randint( 1, 3 ), s.body_len - len( body ) - 1 )
+        rs1    = s.src()
+        rs2    = s.src()
+        s.history.append( 0 )
+        target = len( body ) + 1 + nskip
+        body.append( ( rng.choice( branches ), 0, rs1, rs2, target ) )
+        for _ in range( nskip ):
+          body.append( s.gen_inst() )
+      else:
+        body.append( s.gen_inst() )
+
+    return body
+
+  #-----------------------------------------------------------------------
+  # Reference interpreter
+  #-----------------------------------------------------------------------
+  # Run the program and return the final values of the working
+  # registers. Also counts the dynamic instructions.
+
+  def run( s ):
+    rf   = [ 0 ] + s.init + [ 0 ] * ( 31 - s.nregs )
+    mem  = list( s.data )
+    body = s.body
+
+    ninsts = 0
+    for _ in range( s.niters ):
+      i = 0
+      while i < len( body ):
+        name, rd, rs1, rs2, imm = body[i]
+        ninsts += 1
+        i      += 1
+
+        if name in br_fns:
+          if br_fns[ name ]( rf[rs1], rf[rs2] ):
+            i = imm
+        elif name == "lw":
+          rf[rd] = mem[ imm // 4 ]
+        elif name == "sw":
+          mem[ imm // 4 ] = rf[rs2]
+        elif rs2 is None:
+          rf[rd] = alu_fns[ name ]( rf[rs1], imm & M )
+        else:
+          rf[rd] = alu_fns[ name ]( rf[rs1], rf[rs2] )
+
+    # Every csrr and the final csrws, and the loop counter
+
+    s.num_insts = ninsts + 2*s.nregs + 1
+    if s.loop:
+      s.num_insts += 2*s.niters + 1
+
+    return rf[ 1 : s.nregs+1 ]
+
+  #-----------------------------------------------------------------------
+  # Assembly
+  #-----------------------------------------------------------------------
+
+  def asm_inst( s, inst ):
+    name, rd, rs1, rs2, imm = inst
+
+    if name in br_fns:
+      return f"{name} x{rs1}, x{rs2}, skip_{imm}"
+    if name == "lw":
+      return f"lw x{rd}, {imm}(x30)"
+    if name == "sw":
+      return f"sw x{rs2}, {imm}(x30)"
+    if rs2 is None:
+      return f"{name} x{rd}, x{rs1}, {imm}"
+    return f"{name} x{rd}, x{rs1}, x{rs2}"
+
+  def asm( s ):
+    lines = [ f"csrr x30, mngr2proc < 0x{data_base:08x}" ]
+    for r, value in enumerate( s.init, 1 ):
+      lines.append( f"csrr x{r}, mngr2proc < 0x{value:08x}" )
+
+    if s.loop:
+      lines.append( f"csrr x31, mngr2proc < {s.niters}" )
+      lines.append( "loop:" )
+
+    targets = { inst[4] for inst in s.body if inst[0] in br_fns }
+    for i, inst in enumerate( s.body ):
+      if i in targets:
+        lines.append( f"skip_{i}:" )
+      lines.append( s.asm_inst( inst ) )
+    if len( s.body ) in targets:
+      lines.append( f"skip_{len( s.body )}:" )
+
+    if s.loop:
+      lines.append( "addi x31, x31, -1" )
+      lines.append( "bne x31, x0, loop" )
+
+    for r, value in enumerate( s.result, 1 ):
+      lines.append( f"csrw proc2mngr, x{r} > 0x{value:08x}" )
+
+    lines.append( ".data" )
+    for value in s.data:
+      lines.append( f".word 0x{value:08x}" )
+
+    return "\n".join( lines ) + "\n"
+
+  # Histogram of the RAW distance of every source register read in the
+  # body, in static program order. Taken branches change the distances
+  # the processor actually sees.
+
+  def raw_distances( s ):
+    hist = {}
+    last = {}
+    for i, ( name, rd, rs1, rs2, imm ) in enumerate( s.body ):
+      srcs = [ rs1, rs2 ] if name != "sw" else [ rs2 ]
+      if name == "lw":
+        srcs = []
+      for r in srcs:
+        if r is not None and r in last:
+          dist = i - last[r]
+          hist[dist] = hist.get( dist, 0 ) + 1
+      if rd:
+        last[rd] = i
+    return hist
+
+#-------------------------------------------------------------------------
+# gen_random_program
+#-------------------------------------------------------------------------
+
+def gen_random_program( **kwargs ):
+  return RandomProgram( **kwargs ).asm()
+
+#-------------------------------------------------------------------------
+# Test programs
+#-------------------------------------------------------------------------
+
+# Back-to-back dependences, so almost every source is bypassed
+
+def gen_bypass_test():
+  return gen_random_program( seed=0xdeadbeef, ninsts=1500, body_len=1500,
+                             raw_dist={ 1: 4, 2: 2, 3: 1 } )
+
+# Loads followed by their uses, for the load-use stall
+
+def gen_load_use_test():
+  return gen_random_program( seed=0x1, ninsts=1500, body_len=1500,
+                             mix={ "alu": 2, "lw": 2, "sw": 1 },
+                             raw_dist={ 1: 1 } )
+
+# Back-to-back multiplies
+
+def gen_mul_test():
+  return gen_random_program( seed=0x2, ninsts=1500, body_len=1500,
+                             mix={ "mul": 3, "alu": 1 },
+                             raw_dist={ 1: 2, 2: 1 } )
+
+# Forward branches on freshly computed values
+
+def gen_branch_test():
+  return gen_random_program( seed=0x3, ninsts=1500, body_len=1500,
+                             branch_density=0.2 )
+
+# Loop with branches whose direction changes between iterations
+
+def gen_loop_test():
+  return gen_random_program( seed=0x4, ninsts=10000, body_len=200,
+                             branch_density=0.1 )
+
+# Long program for throughput measurements
+
+def gen_throughput_test():
+  return gen_random_program( seed=0x5, ninsts=1000000, body_len=1000,
+                             branch_density=0.05 )
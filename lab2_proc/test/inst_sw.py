@@ -171,3 +171,108 @@ def gen_random_test():
 
   asm_code.append( gen_word_data( data ) )
   return asm_code
+
+#-------------------------------------------------------------------------
+# gen_store_buffer_test
+#-------------------------------------------------------------------------
+# Back-to-back stores, more than the store buffer holds, followed by
+# loads of words still in the buffer, overwritten in the buffer, and
+# never stored.
+
+def gen_store_buffer_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    csrr x2, mngr2proc < 0x0a0b0c0d
+    csrr x3, mngr2proc < 0xdeadbeef
+    sw   x2, 0(x1)
+    sw   x3, 4(x1)
+    sw   x2, 8(x1)
+    sw   x3, 12(x1)
+    sw   x2, 16(x1)
+    sw   x3, 20(x1)
+    sw   x3, 16(x1)
+    lw   x4, 16(x1)
+    lw   x5, 20(x1)
+    lw   x6, 0(x1)
+    lw   x7, 24(x1)
+    csrw proc2mngr, x4 > 0xdeadbeef
+    csrw proc2mngr, x5 > 0xdeadbeef
+    csrw proc2mngr, x6 > 0x0a0b0c0d
+    csrw proc2mngr, x7 > 0x01020304
+
+    .data
+    .word 0
+    .word 0
+    .word 0
+    .word 0
+    .word 0
+    .word 0
+    .word 0x01020304
+  """
+
+#-------------------------------------------------------------------------
+# gen_fence_test
+#-------------------------------------------------------------------------
+# Stores right before the csrw of stats_en, which waits for them to
+# drain.
+
+def gen_fence_test():
+  return """
+    csrr x1, mngr2proc < 0x00002000
+    csrr x2, mngr2proc < 0xdeadbeef
+    csrr x3, mngr2proc < 1
+    sw   x2, 0(x1)
+    sw   x3, 4(x1)
+    csrw stats_en, x3
+    lw   x4, 0(x1)
+    sw   x4, 8(x1)
+    csrw stats_en, x0
+    lw   x5, 4(x1)
+    lw   x6, 8(x1)
+    csrw proc2mngr, x5 > 1
+    csrw proc2mngr, x6 > 0xdeadbeef
+
+    .data
+    .word 0
+    .word 0
+    .word 0
+  """
+
+#-------------------------------------------------------------------------
+# gen_swap_test
+#-------------------------------------------------------------------------
+# Bubble sort, whose swaps store two words that the next iteration loads
+# again right away.
+
+def gen_swap_test():
+
+  data = [ 7, 3, 8, 1, 6, 2, 5, 4, 9, 0 ]
+
+  asm_code = [ f"""
+    csrr x1, mngr2proc < 0x00002000
+    csrr x3, mngr2proc < {len( data ) - 1}
+  outer:
+    addi x4, x1, 0
+    addi x5, x3, 0
+  inner:
+    lw   x6, 0(x4)
+    lw   x7, 4(x4)
+    bge  x7, x6, noswap
+    sw   x7, 0(x4)
+    sw   x6, 4(x4)
+  noswap:
+    addi x4, x4, 4
+    addi x5, x5, -1
+    bne  x5, x0, inner
+    addi x3, x3, -1
+    bne  x3, x0, outer
+  """ ]
+
+  for i, value in enumerate( sorted( data ) ):
+    asm_code.append( f"""
+    lw   x8, {4*i}(x1)
+    csrw proc2mngr, x8 > {value}
+    """ )
+
+  asm_code.append( gen_word_data( data ) )
+  return asm_code
@@ -0,0 +1,71 @@
+#=========================================================================
+# iss_harness
+#=========================================================================
+# Drop-in replacement for run_test in lab2_proc.test.harness which also
+# accepts ProcISS as the processor model. ProcISS programs are assembled
+# through asm_cache, but run directly on the ISS instead of being
+# simulated cycle by cycle, and the proc2mngr stream is checked against
+# the same reference. Every other model is passed straight
+# through to the regular harness.
+
+from lab2_proc.ProcISS import ProcISS
+
+from lab2_proc.test import harness
+from lab2_proc.test.asm_cache import assemble
+
+# Default instruction limit, used like --max-cycles for the RTL models
+
+max_insts = 1000000
+
+#-------------------------------------------------------------------------
+# run_test
+#-------------------------------------------------------------------------
+# The ISS has no notion of time, so delays has no effect on it.
+
+def run_test( ProcModel, gen_test, delays=False, cmdline_opts=None ):
+
+  if not ( isinstance( ProcModel, type ) and issubclass( ProcModel, ProcISS ) ):
+    return harness.run_test( ProcModel, gen_test, delays, cmdline_opts )
+
+  cmdline_opts = cmdline_opts or {}
+
+  # Assemble the test program and load it into the ISS
+
+  mem_image = assemble( gen_test() )
+
+  iss = ProcModel()
+  iss.load( mem_image )
+
+  # Run the program, one instruction at a time when line tracing
+
+  limit = cmdline_opts.get( 'max_cycles' ) or max_insts
+  nrefs = len( iss.proc2mngr_ref )
+
+  # A program with no proc2mngr messages runs until it halts by jumping
+  # to itself or reaches the limit
+
+  if cmdline_opts.get( 'line_trace' ):
+    while ( not nrefs or len( iss.proc2mngr ) < nrefs ) and iss.num_insts < limit:
+      pc = iss.pc
+      print( f"{iss.num_insts:4d}: {iss.step()}" )
+      if iss.pc == pc:
+        break
+  else:
+    iss.run( limit )
+
+  # Check the proc2mngr messages
+
+  for i, ( msg, ref ) in enumerate( zip( iss.proc2mngr, iss.proc2mngr_ref ) ):
+    if msg != ref:
+      raise AssertionError(
+        f"\nThe proc2mngr sink received an incorrect message!"
+        f"\n- msg #{i} after {iss.num_insts} instructions"
+        f"\n- actual msg : {msg:08x}"
+        f"\n- expected   : {ref:08x}" )
+
+  if len( iss.proc2mngr ) < nrefs:
+    raise AssertionError(
+      f"\nThe ISS stopped after {iss.num_insts} instructions with only"
+      f" {len(iss.proc2mngr)} of {nrefs} proc2mngr messages" )
+
+  return iss
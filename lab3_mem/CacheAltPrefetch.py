@@ -0,0 +1,51 @@
+#=========================================================================
+# CacheAltPrefetch
+#=========================================================================
+# PyMTL wrapper for CacheAlt with the prefetcher in CachePrefetch.v.
+# prefetch is "off", "next_line" or "stride", and pf_issue, pf_hit,
+# pf_late and refill_miss pulse once per event, see CachePrefetch.v.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.mem import mk_mem_msg
+from pymtl3.stdlib.mem.ifcs import MemRequesterIfc, MemResponderIfc
+
+prefetch_names = {
+  "off"       : 0,
+  "next_line" : 1,
+  "stride"    : 2,
+}
+
+class CacheAltPrefetch( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, prefetch="stride", num_entries=4, num_banks=1 ):
+
+    CacheReqType, CacheRespType = mk_mem_msg( 8, 32, 32  )
+    MemReqType,   MemRespType   = mk_mem_msg( 8, 32, 128 )
+
+    # Interface
+
+    s.proc2cache = MemResponderIfc( CacheReqType, CacheRespType )
+    s.cache2mem  = MemRequesterIfc( MemReqType,   MemRespType   )
+
+    # Statistics
+
+    s.pf_issue    = OutPort()
+    s.pf_hit      = OutPort()
+    s.pf_late     = OutPort()
+    s.refill_miss = OutPort()
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "CacheAltPrefetch.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab3_mem_CacheAltPrefetch" )
+    s.set_metadata( VerilogPlaceholderPass.params, {
+      "p_num_banks"   : num_banks,
+      "p_prefetch"    : prefetch_names[ prefetch ],
+      "p_num_entries" : num_entries,
+    })
@@ -0,0 +1,148 @@
+//=========================================================================
+// Alt Blocking Cache with Prefetcher
+//=========================================================================
+// CacheAlt with the prefetcher in CachePrefetch.v on its cache2mem
+// interface. With p_prefetch = 0 it behaves exactly like CacheAlt, so
+// the miss reduction of each prefetcher can be measured on the same
+// workload by changing one parameter.
+
+`ifndef LAB3_MEM_CACHE_ALT_PREFETCH_V
+`define LAB3_MEM_CACHE_ALT_PREFETCH_V
+
+`include "vc/mem-msgs.v"
+`include "vc/trace.v"
+
+`include "lab3_mem/CacheAlt.v"
+`include "lab3_mem/CachePrefetch.v"
+
+module lab3_mem_CacheAltPrefetch
+#(
+  parameter p_num_banks   = 1, // Total number of cache banks
+  parameter p_prefetch    = 2, // 0: off, 1: next line, 2: stride
+  parameter p_num_entries = 4  // Prefetch buffer entries
+)
+(
+  input  logic          clk,
+  input  logic          reset,
+
+  // Processor <-> Cache Interface
+
+  input  mem_req_4B_t   proc2cache_reqstream_msg,
+  input  logic          proc2cache_reqstream_val,
+  output logic          proc2cache_reqstream_rdy,
+
+  output mem_resp_4B_t  proc2cache_respstream_msg,
+  output logic          proc2cache_respstream_val,
+  input  logic          proc2cache_respstream_rdy,
+
+  // Cache <-> Memory Interface
+
+  output mem_req_16B_t  cache2mem_reqstream_msg,
+  output logic          cache2mem_reqstream_val,
+  input  logic          cache2mem_reqstream_rdy,
+
+  input  mem_resp_16B_t cache2mem_respstream_msg,
+  input  logic          cache2mem_respstream_val,
+  output logic          cache2mem_respstream_rdy,
+
+  // Prefetcher statistics, see CachePrefetch
+
+  output logic          pf_issue,
+  output logic          pf_hit,
+  output logic          pf_late,
+  output logic          refill_miss
+);
+
+  //----------------------------------------------------------------------
+  // Cache
+  //----------------------------------------------------------------------
+
+  mem_req_16B_t  refill_reqstream_msg;
+  logic          refill_reqstream_val;
+  logic          refill_reqstream_rdy;
+
+  mem_resp_16B_t refill_respstream_msg;
+  logic          refill_respstream_val;
+  logic          refill_respstream_rdy;
+
+  lab3_mem_CacheAlt
+  #(
+    .p_num_banks                (p_num_banks)
+  )
+  cache
+  (
+    .clk                        (clk),
+    .reset                      (reset),
+
+    .proc2cache_reqstream_msg   (proc2cache_reqstream_msg),
+    .proc2cache_reqstream_val   (proc2cache_reqstream_val),
+    .proc2cache_reqstream_rdy   (proc2cache_reqstream_rdy),
+
+    .proc2cache_respstream_msg  (proc2cache_respstream_msg),
+    .proc2cache_respstream_val  (proc2cache_respstream_val),
+    .proc2cache_respstream_rdy  (proc2cache_respstream_rdy),
+
+    .cache2mem_reqstream_msg    (refill_reqstream_msg),
+    .cache2mem_reqstream_val    (refill_reqstream_val),
+    .cache2mem_reqstream_rdy    (refill_reqstream_rdy),
+
+    .cache2mem_respstream_msg   (refill_respstream_msg),
+    .cache2mem_respstream_val   (refill_respstream_val),
+    .cache2mem_respstream_rdy   (refill_respstream_rdy)
+  );
+
+  //----------------------------------------------------------------------
+  // Prefetcher
+  //----------------------------------------------------------------------
+
+  lab3_mem_CachePrefetch
+  #(
+    .p_prefetch                 (p_prefetch),
+    .p_num_entries              (p_num_entries)
+  )
+  prefetch
+  (
+    .clk                        (clk),
+    .reset                      (reset),
+
+    .cache_reqstream_msg        (refill_reqstream_msg),
+    .cache_reqstream_val        (refill_reqstream_val),
+    .cache_reqstream_rdy        (refill_reqstream_rdy),
+
+    .cache_respstream_msg       (refill_respstream_msg),
+    .cache_respstream_val       (refill_respstream_val),
+    .cache_respstream_rdy       (refill_respstream_rdy),
+
+    .mem_reqstream_msg          (cache2mem_reqstream_msg),
+    .mem_reqstream_val          (cache2mem_reqstream_val),
+    .mem_reqstream_rdy          (cache2mem_reqstream_rdy),
+
+    .mem_respstream_msg         (cache2mem_respstream_msg),
+    .mem_respstream_val         (cache2mem_respstream_val),
+    .mem_respstream_rdy         (cache2mem_respstream_rdy),
+
+    .pf_issue                   (pf_issue),
+    .pf_hit                     (pf_hit),
+    .pf_late                    (pf_late),
+    .refill_miss                (refill_miss)
+  );
+
+  //----------------------------------------------------------------------
+  // Line tracing
+  //----------------------------------------------------------------------
+
+  `ifndef SYNTHESIS
+
+  `VC_TRACE_BEGIN
+  begin
+    cache.line_trace( trace_str );
+    vc_trace.append_str( trace_str, "|" );
+    prefetch.line_trace( trace_str );
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_ALT_PREFETCH_V */
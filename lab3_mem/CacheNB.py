@@ -0,0 +1,45 @@
+#=========================================================================
+# CacheNB
+#=========================================================================
+# PyMTL wrapper for the non-blocking cache in CacheNB.v. The geometry and
+# repl are as in CacheNWay, num_mshrs is the number of line misses that
+# can be outstanding and num_targets the number of requests each of them
+# can hold.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.mem import mk_mem_msg
+from pymtl3.stdlib.mem.ifcs import MemRequesterIfc, MemResponderIfc
+
+from lab3_mem.cache_model import repl_names
+
+class CacheNB( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, num_sets=8, num_ways=2, repl="lru", num_mshrs=4,
+                 num_targets=4, num_banks=1 ):
+
+    CacheReqType, CacheRespType = mk_mem_msg( 8, 32, 32  )
+    MemReqType,   MemRespType   = mk_mem_msg( 8, 32, 128 )
+
+    # Interface
+
+    s.proc2cache = MemResponderIfc( CacheReqType, CacheRespType )
+    s.cache2mem  = MemRequesterIfc( MemReqType,   MemRespType   )
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "CacheNB.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab3_mem_CacheNB" )
+    s.set_metadata( VerilogPlaceholderPass.params, {
+      "p_num_banks"   : num_banks,
+      "p_num_sets"    : num_sets,
+      "p_num_ways"    : num_ways,
+      "p_repl"        : repl_names[ repl ],
+      "p_num_mshrs"   : num_mshrs,
+      "p_num_targets" : num_targets,
+    })
@@ -0,0 +1,500 @@
+//=========================================================================
+// Non-Blocking Cache
+//=========================================================================
+// Write-back, write-allocate cache with the interfaces of CacheAlt that
+// keeps accepting requests while misses are outstanding. The geometry
+// and replacement policy are those of CacheNWay (p_num_sets sets of
+// p_num_ways ways of 16B lines, see CacheNWayRepl for p_repl).
+//
+// A request is looked up in the cycle it is accepted:
+//
+//  - hit: a read gets its word and a write updates its line right away,
+//    and the response is queued for the next cycle (hit-under-miss)
+//  - hit on a pending line: the line already has an MSHR, and the
+//    request is added to its targets (miss-under-miss merging)
+//  - miss: a free MSHR is allocated and the victim way is reserved for
+//    the line by writing its tag with the pending bit set. A dirty
+//    victim is read out at once, so its writeback and the refill go to
+//    memory in the order the misses were allocated.
+//
+// When a refill returns, the line is written in one cycle and then the
+// targets of its MSHR are replayed in order, one per cycle, like hits.
+// New requests wait while the arrays are busy with a refill, so every
+// line sees its requests in the order they were accepted. A request
+// also waits if it needs an MSHR and none is free, if its line already
+// has p_num_targets targets, or if the victim way of its set is itself
+// pending.
+//
+// Responses can therefore leave out of order and are told apart by the
+// opaque field of the request, which they carry back. The test field is
+// 1 for a read or write that hit in the lookup. Memory requests use the
+// opaque field too: bit 7 is set for a refill, with the MSHR in the low
+// bits, and clear for a writeback, whose response is dropped.
+
+`ifndef LAB3_MEM_CACHE_NB_V
+`define LAB3_MEM_CACHE_NB_V
+
+`include "vc/mem-msgs.v"
+`include "vc/queues.v"
+`include "vc/trace.v"
+
+`include "lab3_mem/CacheNWayRepl.v"
+
+module lab3_mem_CacheNB
+#(
+  parameter p_num_banks   = 1, // Total number of cache banks
+  parameter p_num_sets    = 8, // Sets per bank
+  parameter p_num_ways    = 2, // Ways per set
+  parameter p_repl        = 0, // Replacement policy
+  parameter p_num_mshrs   = 4, // Outstanding line misses
+  parameter p_num_targets = 4  // Requests merged into one miss
+)
+(
+  input  logic          clk,
+  input  logic          reset,
+
+  // Processor <-> Cache Interface
+
+  input  mem_req_4B_t   proc2cache_reqstream_msg,
+  input  logic          proc2cache_reqstream_val,
+  output logic          proc2cache_reqstream_rdy,
+
+  output mem_resp_4B_t  proc2cache_respstream_msg,
+  output logic          proc2cache_respstream_val,
+  input  logic          proc2cache_respstream_rdy,
+
+  // Cache <-> Memory Interface
+
+  output mem_req_16B_t  cache2mem_reqstream_msg,
+  output logic          cache2mem_reqstream_val,
+  input  logic          cache2mem_reqstream_rdy,
+
+  input  mem_resp_16B_t cache2mem_respstream_msg,
+  input  logic          cache2mem_respstream_val,
+  output logic          cache2mem_respstream_rdy
+);
+
+  localparam c_idx_nbits    = $clog2( p_num_sets );
+  localparam c_offset_nbits = 4 + $clog2( p_num_banks );
+  localparam c_tag_nbits    = 32 - c_offset_nbits - c_idx_nbits;
+  localparam c_mshr_nbits   = ( p_num_mshrs   > 1 ) ? $clog2( p_num_mshrs   ) : 1;
+  localparam c_tgt_nbits    = ( p_num_targets > 1 ) ? $clog2( p_num_targets ) : 1;
+
+  //----------------------------------------------------------------------
+  // Arrays
+  //----------------------------------------------------------------------
+
+  logic [c_tag_nbits-1:0] tag_array  [p_num_sets][p_num_ways];
+  logic [127:0]           data_array [p_num_sets][p_num_ways];
+  logic                   valid_bits [p_num_sets][p_num_ways];
+  logic                   dirty_bits [p_num_sets][p_num_ways];
+  logic                   pend_bits  [p_num_sets][p_num_ways];
+
+  //----------------------------------------------------------------------
+  // MSHRs
+  //----------------------------------------------------------------------
+  // Set and way of the line, and the requests waiting for it
+
+  logic                   mshr_val     [p_num_mshrs];
+  logic [c_idx_nbits-1:0] mshr_idx     [p_num_mshrs];
+  logic [2:0]             mshr_way     [p_num_mshrs];
+  logic [c_tgt_nbits:0]   mshr_ntgts   [p_num_mshrs];
+
+  logic [2:0]             tgt_type     [p_num_mshrs][p_num_targets];
+  logic [7:0]             tgt_opaque   [p_num_mshrs][p_num_targets];
+  logic [1:0]             tgt_offset   [p_num_mshrs][p_num_targets];
+  logic [31:0]            tgt_data     [p_num_mshrs][p_num_targets];
+
+  //----------------------------------------------------------------------
+  // Lookup
+  //----------------------------------------------------------------------
+
+  mem_req_4B_t req;
+  assign req = proc2cache_reqstream_msg;
+
+  logic [c_idx_nbits-1:0] req_idx;
+  logic [c_tag_nbits-1:0] req_tag;
+
+  assign req_idx = req.addr[c_offset_nbits +: c_idx_nbits];
+  assign req_tag = req.addr[31 -: c_tag_nbits];
+
+  logic                  hit;
+  logic                  pend_hit;
+  logic [2:0]            hit_way;
+  logic [p_num_ways-1:0] set_busy;
+
+  always_comb begin
+    hit      = 1'b0;
+    pend_hit = 1'b0;
+    hit_way  = 3'd0;
+    for ( int i = 0; i < p_num_ways; i = i + 1 ) begin
+      set_busy[i] = valid_bits[req_idx][i] || pend_bits[req_idx][i];
+      if ( tag_array[req_idx][i] == req_tag ) begin
+        if ( valid_bits[req_idx][i] ) begin
+          hit     = 1'b1;
+          hit_way = 3'(i);
+        end
+        if ( pend_bits[req_idx][i] ) begin
+          pend_hit = 1'b1;
+          hit_way  = 3'(i);
+        end
+      end
+    end
+  end
+
+  // MSHR of the pending line, and the first free MSHR
+
+  logic [c_mshr_nbits-1:0] pend_mshr;
+  logic                    mshr_free;
+  logic [c_mshr_nbits-1:0] free_mshr;
+
+  always_comb begin
+    pend_mshr = '0;
+    mshr_free = 1'b0;
+    free_mshr = '0;
+    for ( int m = p_num_mshrs-1; m >= 0; m = m - 1 ) begin
+      if ( mshr_val[m] && mshr_idx[m] == req_idx && mshr_way[m] == hit_way )
+        pend_mshr = c_mshr_nbits'(m);
+      if ( !mshr_val[m] ) begin
+        mshr_free = 1'b1;
+        free_mshr = c_mshr_nbits'(m);
+      end
+    end
+  end
+
+  // Replacement
+
+  logic       repl_touch;
+  logic [2:0] victim;
+
+  lab3_mem_CacheNWayRepl
+  #(
+    .p_num_sets (p_num_sets),
+    .p_num_ways (p_num_ways),
+    .p_repl     (p_repl)
+  )
+  repl_unit
+  (
+    .clk        (clk),
+    .reset      (reset),
+    .idx        (req_idx),
+    .valid      (set_busy),
+    .victim     (victim),
+    .touch_en   (repl_touch),
+    .touch_way  (hit ? hit_way : pend_hit ? hit_way : victim),
+    .touch_hit  (hit || pend_hit)
+  );
+
+  //----------------------------------------------------------------------
+  // Queues
+  //----------------------------------------------------------------------
+
+  // Responses to the processor
+
+  mem_resp_4B_t resp_enq_msg;
+  logic         resp_enq_val;
+  logic         resp_enq_rdy;
+  logic [1:0]   resp_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,$bits(mem_resp_4B_t),2) resp_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(resp_num_free_entries),
+
+    .enq_msg (resp_enq_msg),
+    .enq_val (resp_enq_val),
+    .enq_rdy (resp_enq_rdy),
+
+    .deq_msg (proc2cache_respstream_msg),
+    .deq_val (proc2cache_respstream_val),
+    .deq_rdy (proc2cache_respstream_rdy)
+  );
+
+  // Memory requests of every allocated miss as { writeback needed,
+  // writeback line, writeback data, refill line, MSHR }
+
+  localparam c_missq_nbits = 1 + 28 + 128 + 28 + c_mshr_nbits;
+
+  logic [c_missq_nbits-1:0] missq_enq_msg;
+  logic                     missq_enq_val;
+  logic                     missq_enq_rdy;
+
+  logic [c_missq_nbits-1:0] missq_deq_msg;
+  logic                     missq_deq_val;
+  logic                     missq_deq_rdy;
+
+  logic [$clog2(p_num_mshrs+1)-1:0] missq_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,c_missq_nbits,p_num_mshrs) miss_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(missq_num_free_entries),
+
+    .enq_msg (missq_enq_msg),
+    .enq_val (missq_enq_val),
+    .enq_rdy (missq_enq_rdy),
+
+    .deq_msg (missq_deq_msg),
+    .deq_val (missq_deq_val),
+    .deq_rdy (missq_deq_rdy)
+  );
+
+  //----------------------------------------------------------------------
+  // Refill and replay
+  //----------------------------------------------------------------------
+  // A refill response is taken whenever no MSHR is being replayed, and
+  // the arrays are busy for the refill and every replayed target.
+
+  logic                    replay;
+  logic [c_mshr_nbits-1:0] replay_mshr;
+  logic [c_tgt_nbits:0]    replay_ptr;
+
+  logic                    memresp_refill;
+  logic [c_mshr_nbits-1:0] memresp_mshr;
+
+  assign memresp_refill = cache2mem_respstream_msg.opaque[7];
+  assign memresp_mshr   = cache2mem_respstream_msg.opaque[c_mshr_nbits-1:0];
+
+  assign cache2mem_respstream_rdy = !memresp_refill || !replay;
+
+  logic  fill;
+  assign fill = cache2mem_respstream_val && memresp_refill && !replay;
+
+  logic [c_idx_nbits-1:0] replay_idx;
+  logic [2:0]             replay_way;
+  logic [c_tgt_nbits-1:0] replay_tgt;
+  logic                   replay_go;
+  logic                   replay_last;
+
+  assign replay_idx  = mshr_idx[replay_mshr];
+  assign replay_way  = mshr_way[replay_mshr];
+  assign replay_tgt  = replay_ptr[c_tgt_nbits-1:0];
+  assign replay_go   = replay && resp_enq_rdy;
+  assign replay_last = ( replay_ptr + 1'b1 == mshr_ntgts[replay_mshr] );
+
+  //----------------------------------------------------------------------
+  // Requests
+  //----------------------------------------------------------------------
+
+  logic  busy;
+  assign busy = fill || replay;
+
+  logic  req_write;
+  assign req_write = ( req.type_ != `VC_MEM_REQ_MSG_TYPE_READ );
+
+  always_comb begin
+    if ( busy )
+      proc2cache_reqstream_rdy = 1'b0;
+    else if ( hit )
+      proc2cache_reqstream_rdy = resp_enq_rdy;
+    else if ( pend_hit )
+      proc2cache_reqstream_rdy = ( mshr_ntgts[pend_mshr] != p_num_targets );
+    else
+      proc2cache_reqstream_rdy = mshr_free && !pend_bits[req_idx][victim] && missq_enq_rdy;
+  end
+
+  logic  req_go;
+  assign req_go = proc2cache_reqstream_val && proc2cache_reqstream_rdy;
+
+  logic  alloc;
+  assign alloc = req_go && !hit && !pend_hit;
+
+  assign repl_touch = req_go;
+
+  // Writeback of the victim and refill of the line, in one entry
+
+  logic victim_dirty;
+  assign victim_dirty = valid_bits[req_idx][victim] && dirty_bits[req_idx][victim];
+
+  assign missq_enq_val = alloc;
+  assign missq_enq_msg = { victim_dirty,
+                           tag_array[req_idx][victim], req.addr[31-c_tag_nbits:4],
+                           data_array[req_idx][victim],
+                           req.addr[31:4], free_mshr };
+
+  // Responses come from a hit or a replayed target
+
+  logic [127:0] hit_line;
+  logic [31:0]  replay_word;
+
+  assign hit_line    = data_array[req_idx][hit_way];
+  assign replay_word = data_array[replay_idx][replay_way][ 32*tgt_offset[replay_mshr][replay_tgt] +: 32 ];
+
+  always_comb begin
+    resp_enq_msg = '0;
+    resp_enq_val = 1'b0;
+
+    if ( replay ) begin
+      resp_enq_val        = 1'b1;
+      resp_enq_msg.type_  = tgt_type[replay_mshr][replay_tgt];
+      resp_enq_msg.opaque = tgt_opaque[replay_mshr][replay_tgt];
+      if ( tgt_type[replay_mshr][replay_tgt] == `VC_MEM_REQ_MSG_TYPE_READ )
+        resp_enq_msg.data = replay_word;
+    end
+    else if ( req_go && hit ) begin
+      resp_enq_val        = 1'b1;
+      resp_enq_msg.type_  = req.type_;
+      resp_enq_msg.opaque = req.opaque;
+      resp_enq_msg.test   = { 1'b0, req.type_ != `VC_MEM_REQ_MSG_TYPE_WRITE_INIT };
+      if ( !req_write )
+        resp_enq_msg.data = hit_line[ 32*req.addr[3:2] +: 32 ];
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Memory requests
+  //----------------------------------------------------------------------
+  // The writeback of an entry (if any) goes out before its refill
+
+  logic                    missq_wb;
+  logic [27:0]             missq_wb_line;
+  logic [127:0]            missq_wb_data;
+  logic [27:0]             missq_refill_line;
+  logic [c_mshr_nbits-1:0] missq_mshr;
+
+  assign { missq_wb, missq_wb_line, missq_wb_data, missq_refill_line, missq_mshr } = missq_deq_msg;
+
+  logic wb_sent;
+  logic send_wb;
+
+  assign send_wb = missq_wb && !wb_sent;
+
+  always_comb begin
+    cache2mem_reqstream_val = missq_deq_val;
+    cache2mem_reqstream_msg = '0;
+
+    if ( send_wb ) begin
+      cache2mem_reqstream_msg.type_ = `VC_MEM_REQ_MSG_TYPE_WRITE;
+      cache2mem_reqstream_msg.addr  = { missq_wb_line, 4'b0000 };
+      cache2mem_reqstream_msg.data  = missq_wb_data;
+    end
+    else begin
+      cache2mem_reqstream_msg.type_  = `VC_MEM_REQ_MSG_TYPE_READ;
+      cache2mem_reqstream_msg.opaque = { 1'b1, 7'(missq_mshr) };
+      cache2mem_reqstream_msg.addr   = { missq_refill_line, 4'b0000 };
+    end
+  end
+
+  assign missq_deq_rdy = cache2mem_reqstream_rdy && !send_wb;
+
+  //----------------------------------------------------------------------
+  // State updates
+  //----------------------------------------------------------------------
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      for ( int s = 0; s < p_num_sets; s = s + 1 ) begin
+        for ( int i = 0; i < p_num_ways; i = i + 1 ) begin
+          valid_bits[s][i] <= 1'b0;
+          dirty_bits[s][i] <= 1'b0;
+          pend_bits[s][i]  <= 1'b0;
+        end
+      end
+      for ( int m = 0; m < p_num_mshrs; m = m + 1 )
+        mshr_val[m] <= 1'b0;
+      replay     <= 1'b0;
+      replay_ptr <= '0;
+      wb_sent    <= 1'b0;
+    end
+    else begin
+
+      // Writeback sent, waiting to send the refill
+
+      if ( send_wb && missq_deq_val && cache2mem_reqstream_rdy )
+        wb_sent <= 1'b1;
+      else if ( missq_deq_val && missq_deq_rdy )
+        wb_sent <= 1'b0;
+
+      // Hit
+
+      if ( req_go && hit && req_write ) begin
+        data_array[req_idx][hit_way][ 32*req.addr[3:2] +: 32 ] <= req.data;
+        dirty_bits[req_idx][hit_way] <= 1'b1;
+      end
+
+      // Merge into the MSHR of a pending line
+
+      if ( req_go && pend_hit ) begin
+        tgt_type  [pend_mshr][mshr_ntgts[pend_mshr][c_tgt_nbits-1:0]] <= req.type_;
+        tgt_opaque[pend_mshr][mshr_ntgts[pend_mshr][c_tgt_nbits-1:0]] <= req.opaque;
+        tgt_offset[pend_mshr][mshr_ntgts[pend_mshr][c_tgt_nbits-1:0]] <= req.addr[3:2];
+        tgt_data  [pend_mshr][mshr_ntgts[pend_mshr][c_tgt_nbits-1:0]] <= req.data;
+        mshr_ntgts[pend_mshr] <= mshr_ntgts[pend_mshr] + 1'b1;
+      end
+
+      // Allocate an MSHR and reserve the victim way
+
+      if ( alloc ) begin
+        mshr_val  [free_mshr]    <= 1'b1;
+        mshr_idx  [free_mshr]    <= req_idx;
+        mshr_way  [free_mshr]    <= victim;
+        mshr_ntgts[free_mshr]    <= 1;
+        tgt_type  [free_mshr][0] <= req.type_;
+        tgt_opaque[free_mshr][0] <= req.opaque;
+        tgt_offset[free_mshr][0] <= req.addr[3:2];
+        tgt_data  [free_mshr][0] <= req.data;
+
+        tag_array [req_idx][victim] <= req_tag;
+        valid_bits[req_idx][victim] <= 1'b0;
+        dirty_bits[req_idx][victim] <= 1'b0;
+        pend_bits [req_idx][victim] <= 1'b1;
+      end
+
+      // Refill the line, then replay its targets
+
+      if ( fill ) begin
+        data_array[mshr_idx[memresp_mshr]][mshr_way[memresp_mshr]] <= cache2mem_respstream_msg.data;
+        valid_bits[mshr_idx[memresp_mshr]][mshr_way[memresp_mshr]] <= 1'b1;
+        pend_bits [mshr_idx[memresp_mshr]][mshr_way[memresp_mshr]] <= 1'b0;
+        replay      <= 1'b1;
+        replay_mshr <= memresp_mshr;
+        replay_ptr  <= '0;
+      end
+
+      if ( replay_go ) begin
+        if ( tgt_type[replay_mshr][replay_tgt] != `VC_MEM_REQ_MSG_TYPE_READ ) begin
+          data_array[replay_idx][replay_way][ 32*tgt_offset[replay_mshr][replay_tgt] +: 32 ]
+            <= tgt_data[replay_mshr][replay_tgt];
+          dirty_bits[replay_idx][replay_way] <= 1'b1;
+        end
+
+        replay_ptr <= replay_ptr + 1'b1;
+
+        if ( replay_last ) begin
+          replay                <= 1'b0;
+          mshr_val[replay_mshr] <= 1'b0;
+        end
+      end
+
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Line tracing
+  //----------------------------------------------------------------------
+  // One character per MSHR: free, waiting for its refill, or replaying
+
+  `ifndef SYNTHESIS
+
+  `VC_TRACE_BEGIN
+  begin
+
+    for ( int m = 0; m < p_num_mshrs; m = m + 1 ) begin
+      if ( !mshr_val[m] )
+        vc_trace.append_str( trace_str, "." );
+      else if ( replay && replay_mshr == c_mshr_nbits'(m) )
+        vc_trace.append_str( trace_str, "r" );
+      else
+        vc_trace.append_str( trace_str, "m" );
+    end
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_NB_V */
@@ -0,0 +1,41 @@
+#=========================================================================
+# CacheNWay
+#=========================================================================
+# PyMTL wrapper for the N-way set-associative cache generator in
+# CacheNWay.v. repl is the name of a replacement policy in
+# cache_model.repl_names.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.mem import mk_mem_msg
+from pymtl3.stdlib.mem.ifcs import MemRequesterIfc, MemResponderIfc
+
+from lab3_mem.cache_model import repl_names
+
+class CacheNWay( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, num_sets=8, num_ways=2, repl="lru", num_banks=1 ):
+
+    CacheReqType, CacheRespType = mk_mem_msg( 8, 32, 32  )
+    MemReqType,   MemRespType   = mk_mem_msg( 8, 32, 128 )
+
+    # Interface
+
+    s.proc2cache = MemResponderIfc( CacheReqType, CacheRespType )
+    s.cache2mem  = MemRequesterIfc( MemReqType,   MemRespType   )
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "CacheNWay.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab3_mem_CacheNWay" )
+    s.set_metadata( VerilogPlaceholderPass.params, {
+      "p_num_banks" : num_banks,
+      "p_num_sets"  : num_sets,
+      "p_num_ways"  : num_ways,
+      "p_repl"      : repl_names[ repl ],
+    })
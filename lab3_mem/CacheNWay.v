@@ -0,0 +1,256 @@
+//=========================================================================
+// N-Way Blocking Cache
+//=========================================================================
+// Generator for a blocking, write-back, write-allocate cache with 16B
+// lines and the same interfaces and states as CacheAlt, parameterized by
+// the number of sets (a power of two), ways (1, 2, 4 or 8) and the
+// replacement policy p_repl (0 LRU, 1 tree pseudo-LRU, 2 random,
+// 3 SRRIP; see CacheNWayRepl). 8 sets of 2 ways with LRU is the
+// geometry of CacheAlt, and 16 sets of 1 way that of CacheBase.
+//
+// The test field of a response is 1 for a read or write hit, and
+// lab3_mem/cache_model.py predicts it for any request stream.
+
+`ifndef LAB3_MEM_CACHE_N_WAY_V
+`define LAB3_MEM_CACHE_N_WAY_V
+
+`include "vc/mem-msgs.v"
+`include "vc/trace.v"
+
+`include "lab3_mem/CacheNWayCtrl.v"
+`include "lab3_mem/CacheNWayDpath.v"
+
+module lab3_mem_CacheNWay
+#(
+  parameter p_num_banks = 1, // Total number of cache banks
+  parameter p_num_sets  = 8, // Sets per bank
+  parameter p_num_ways  = 2, // Ways per set
+  parameter p_repl      = 0  // Replacement policy
+)
+(
+  input  logic          clk,
+  input  logic          reset,
+
+  // Processor <-> Cache Interface
+
+  input  mem_req_4B_t   proc2cache_reqstream_msg,
+  input  logic          proc2cache_reqstream_val,
+  output logic          proc2cache_reqstream_rdy,
+
+  output mem_resp_4B_t  proc2cache_respstream_msg,
+  output logic          proc2cache_respstream_val,
+  input  logic          proc2cache_respstream_rdy,
+
+  // Cache <-> Memory Interface
+
+  output mem_req_16B_t  cache2mem_reqstream_msg,
+  output logic          cache2mem_reqstream_val,
+  input  logic          cache2mem_reqstream_rdy,
+
+  input  mem_resp_16B_t cache2mem_respstream_msg,
+  input  logic          cache2mem_respstream_val,
+  output logic          cache2mem_respstream_rdy
+);
+
+  //----------------------------------------------------------------------
+  // Wires
+  //----------------------------------------------------------------------
+
+  // control signals (ctrl->dpath)
+
+  logic                  cachereq_reg_en;
+  logic                  tag_array_ren;
+  logic [p_num_ways-1:0] tag_array_wen;
+  logic                  data_array_ren;
+  logic [p_num_ways-1:0] data_array_wen;
+  logic [2:0]            way_sel;
+  logic                  read_data_zero_mux_sel;
+  logic                  read_data_reg_en;
+  logic [1:0]            hit;
+  logic                  evict_addr_reg_en;
+  logic                  memreq_addr_mux_sel;
+  logic [2:0]            memreq_type;
+  logic                  memresp_en;
+  logic                  write_data_mux_sel;
+  logic                  wben_mux_sel;
+
+  // status signals (dpath->ctrl)
+
+  logic [2:0]            cachereq_type;
+  logic [31:0]           cachereq_addr;
+  logic [p_num_ways-1:0] tag_match;
+
+  //----------------------------------------------------------------------
+  // Control
+  //----------------------------------------------------------------------
+
+  lab3_mem_CacheNWayCtrl
+  #(
+    .p_num_banks              (p_num_banks),
+    .p_num_sets               (p_num_sets),
+    .p_num_ways               (p_num_ways),
+    .p_repl                   (p_repl)
+  )
+  ctrl
+  (
+   // Processor <-> Cache Interface
+
+   .proc2cache_reqstream_val  (proc2cache_reqstream_val),
+   .proc2cache_reqstream_rdy  (proc2cache_reqstream_rdy),
+   .proc2cache_respstream_val (proc2cache_respstream_val),
+   .proc2cache_respstream_rdy (proc2cache_respstream_rdy),
+
+   // Cache <-> Memory Interface
+
+   .cache2mem_reqstream_val   (cache2mem_reqstream_val),
+   .cache2mem_reqstream_rdy   (cache2mem_reqstream_rdy),
+   .cache2mem_respstream_val  (cache2mem_respstream_val),
+   .cache2mem_respstream_rdy  (cache2mem_respstream_rdy),
+
+    // clk/reset/control/status signals
+
+   .*
+  );
+
+  //----------------------------------------------------------------------
+  // Datapath
+  //----------------------------------------------------------------------
+
+  lab3_mem_CacheNWayDpath
+  #(
+    .p_num_banks              (p_num_banks),
+    .p_num_sets               (p_num_sets),
+    .p_num_ways               (p_num_ways)
+  )
+  dpath
+  (
+   // Processor <-> Cache Interface
+
+   .proc2cache_reqstream_msg  (proc2cache_reqstream_msg),
+   .proc2cache_respstream_msg (proc2cache_respstream_msg),
+
+   // Cache <-> Memory Interface
+
+   .cache2mem_reqstream_msg   (cache2mem_reqstream_msg),
+   .cache2mem_respstream_msg  (cache2mem_respstream_msg),
+
+    // clk/reset/control/status signals
+
+   .*
+  );
+
+  //----------------------------------------------------------------------
+  // Line tracing
+  //----------------------------------------------------------------------
+  // The state of the control unit, like CacheAlt.
+
+  `ifndef SYNTHESIS
+
+  `VC_TRACE_BEGIN
+  begin
+
+    // Display state
+
+    case ( ctrl.state_reg )
+
+      ctrl.STATE_IDLE:              vc_trace.append_str( trace_str, "I " );
+      ctrl.STATE_TAG_CHECK:         vc_trace.append_str( trace_str, "TC" );
+      ctrl.STATE_INIT_DATA_ACCESS:  vc_trace.append_str( trace_str, "IN" );
+      ctrl.STATE_READ_DATA_ACCESS:  vc_trace.append_str( trace_str, "RD" );
+      ctrl.STATE_WRITE_DATA_ACCESS: vc_trace.append_str( trace_str, "WD" );
+      ctrl.STATE_REFILL_REQUEST:    vc_trace.append_str( trace_str, "RR" );
+      ctrl.STATE_REFILL_WAIT:       vc_trace.append_str( trace_str, "RW" );
+      ctrl.STATE_REFILL_UPDATE:     vc_trace.append_str( trace_str, "RU" );
+      ctrl.STATE_EVICT_PREPARE:     vc_trace.append_str( trace_str, "EP" );
+      ctrl.STATE_EVICT_REQUEST:     vc_trace.append_str( trace_str, "ER" );
+      ctrl.STATE_EVICT_WAIT:        vc_trace.append_str( trace_str, "EW" );
+      ctrl.STATE_WAIT:              vc_trace.append_str( trace_str, "W " );
+      default:                      vc_trace.append_str( trace_str, "? " );
+
+    endcase
+
+  end
+  `VC_TRACE_END
+
+  // Binary trace, in the same format as CacheAlt. With
+  // +bintrace=<prefix>, every cycle the state of the control unit and
+  // the handshakes on the four interfaces are written as a fixed-size
+  // record to the file <prefix>.<instance name>, which
+  // lab4_sys/bintrace.py renders into the line trace above offline.
+  //
+  //  word 0 : flags (see bintrace_flags)
+  //  word 1 : address of the proc2cache request
+
+  string  bintrace_prefix;
+  integer bintrace_fd = 0;
+
+  initial begin
+    if ( $value$plusargs( "bintrace=%s", bintrace_prefix ) ) begin
+      bintrace_fd = $fopen( $sformatf( "%s.%m", bintrace_prefix ), "wb" );
+      $fwrite( bintrace_fd, "%u%u%u", 32'h43525442, 32'd2, 32'd2 );
+    end
+  end
+
+  logic [31:0] bintrace_flags;
+  assign bintrace_flags = { 15'b0, reset,
+                            cache2mem_respstream_rdy,  cache2mem_respstream_val,
+                            cache2mem_reqstream_rdy,   cache2mem_reqstream_val,
+                            proc2cache_respstream_rdy, proc2cache_respstream_val,
+                            proc2cache_reqstream_rdy,  proc2cache_reqstream_val,
+                            3'b0, ctrl.state_reg };
+
+  always @( posedge clk ) begin
+    if ( bintrace_fd != 0 )
+      $fwrite( bintrace_fd, "%u%u", bintrace_flags,
+               proc2cache_reqstream_msg.addr );
+  end
+
+  final begin
+    if ( bintrace_fd != 0 )
+      $fclose( bintrace_fd );
+  end
+
+  // These trace modules are useful because they breakout all the
+  // individual fields so you can see them in gtkwave
+
+  vc_MemReqMsg4BTrace proc2cache_reqstream_msg_trace
+  (
+    .clk   (clk),
+    .reset (reset),
+    .val   (proc2cache_reqstream_val),
+    .rdy   (proc2cache_reqstream_rdy),
+    .msg   (proc2cache_reqstream_msg)
+  );
+
+  vc_MemRespMsg4BTrace proc2cache_respstream_trace
+  (
+    .clk   (clk),
+    .reset (reset),
+    .val   (proc2cache_respstream_val),
+    .rdy   (proc2cache_respstream_rdy),
+    .msg   (proc2cache_respstream_msg)
+  );
+
+  vc_MemReqMsg16BTrace cache2mem_reqstream_msg_trace
+  (
+    .clk   (clk),
+    .reset (reset),
+    .val   (cache2mem_reqstream_val),
+    .rdy   (cache2mem_reqstream_rdy),
+    .msg   (cache2mem_reqstream_msg)
+  );
+
+  vc_MemRespMsg16BTrace cache2mem_respstream_msg_trace
+  (
+    .clk   (clk),
+    .reset (reset),
+    .val   (cache2mem_respstream_val),
+    .rdy   (cache2mem_respstream_rdy),
+    .msg   (cache2mem_respstream_msg)
+  );
+
+  `endif
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_N_WAY_V */
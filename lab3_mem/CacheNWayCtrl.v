@@ -0,0 +1,423 @@
+//=========================================================================
+// N-Way Blocking Cache Control
+//=========================================================================
+// Same states as CacheAltCtrl. The tag check registers whether the
+// request hit and the way it uses, the hit way or else the victim of the
+// replacement unit, and every later state reads and writes that way. The
+// replacement state of the set is updated once per request, in the data
+// access state, and an init to a dirty victim evicts it first.
+
+`ifndef LAB3_MEM_CACHE_N_WAY_CTRL_V
+`define LAB3_MEM_CACHE_N_WAY_CTRL_V
+
+`include "vc/regfiles.v"
+`include "vc/regs.v"
+`include "vc/mem-msgs.v"
+
+`include "lab3_mem/CacheNWayRepl.v"
+
+module lab3_mem_CacheNWayCtrl
+#(
+  parameter p_num_banks = 1,
+  parameter p_num_sets  = 8,
+  parameter p_num_ways  = 2,
+  parameter p_repl      = 0
+)
+(
+  input  logic                  clk,
+  input  logic                  reset,
+
+  // Processor <-> Cache Interface
+
+  input  logic                  proc2cache_reqstream_val,
+  output logic                  proc2cache_reqstream_rdy,
+
+  output logic                  proc2cache_respstream_val,
+  input  logic                  proc2cache_respstream_rdy,
+
+  // Cache <-> Memory Interface
+
+  output logic                  cache2mem_reqstream_val,
+  input  logic                  cache2mem_reqstream_rdy,
+
+  input  logic                  cache2mem_respstream_val,
+  output logic                  cache2mem_respstream_rdy,
+
+  // control signals (ctrl->dpath)
+
+  output logic                  cachereq_reg_en,
+  output logic                  tag_array_ren,
+  output logic [p_num_ways-1:0] tag_array_wen,
+  output logic                  data_array_ren,
+  output logic [p_num_ways-1:0] data_array_wen,
+  output logic [2:0]            way_sel,
+  output logic                  read_data_zero_mux_sel,
+  output logic                  read_data_reg_en,
+  output logic [1:0]            hit,
+  output logic                  evict_addr_reg_en,
+  output logic                  memreq_addr_mux_sel,
+  output logic [2:0]            memreq_type,
+  output logic                  memresp_en,
+  output logic                  write_data_mux_sel,
+  output logic                  wben_mux_sel,
+
+  // status signals (dpath->ctrl)
+
+  input  logic [2:0]            cachereq_type,
+  input  logic [31:0]           cachereq_addr,
+  input  logic [p_num_ways-1:0] tag_match
+);
+
+  localparam c_idx_nbits    = $clog2( p_num_sets );
+  localparam c_offset_nbits = 4 + $clog2( p_num_banks );
+
+  //----------------------------------------------------------------------
+  // State Definitions
+  //----------------------------------------------------------------------
+
+  localparam STATE_IDLE              = 5'd0;
+  localparam STATE_TAG_CHECK         = 5'd1;
+  localparam STATE_INIT_DATA_ACCESS  = 5'd2;
+  localparam STATE_READ_DATA_ACCESS  = 5'd3;
+  localparam STATE_WRITE_DATA_ACCESS = 5'd4;
+  localparam STATE_REFILL_REQUEST    = 5'd5;
+  localparam STATE_REFILL_WAIT       = 5'd6;
+  localparam STATE_REFILL_UPDATE     = 5'd7;
+  localparam STATE_EVICT_PREPARE     = 5'd8;
+  localparam STATE_EVICT_REQUEST     = 5'd9;
+  localparam STATE_EVICT_WAIT        = 5'd10;
+  localparam STATE_WAIT              = 5'd11;
+
+  logic [4:0] state_reg;
+  logic [4:0] state_next;
+
+  //----------------------------------------------------------------------
+  // State
+  //----------------------------------------------------------------------
+
+  always @( posedge clk ) begin
+    if ( reset ) begin
+      state_reg <= STATE_IDLE;
+    end
+    else begin
+      state_reg <= state_next;
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Valid/Dirty bits
+  //----------------------------------------------------------------------
+
+  logic [c_idx_nbits-1:0] cachereq_addr_index;
+
+  assign cachereq_addr_index = cachereq_addr[c_offset_nbits +: c_idx_nbits];
+
+  logic [p_num_ways-1:0] is_valid;
+  logic [p_num_ways-1:0] is_dirty;
+  logic [p_num_ways-1:0] valid_bits_write_en;
+  logic [p_num_ways-1:0] dirty_bits_write_en;
+  logic                  valid_bit_in;
+  logic                  dirty_bit_in;
+
+  genvar i;
+  generate
+    for ( i = 0; i < p_num_ways; i = i + 1 ) begin : bits
+
+      vc_ResetRegfile_1r1w#(1,p_num_sets) valid_bits
+      (
+        .clk        (clk),
+        .reset      (reset),
+        .read_addr  (cachereq_addr_index),
+        .read_data  (is_valid[i]),
+        .write_en   (valid_bits_write_en[i]),
+        .write_addr (cachereq_addr_index),
+        .write_data (valid_bit_in)
+      );
+
+      vc_ResetRegfile_1r1w#(1,p_num_sets) dirty_bits
+      (
+        .clk        (clk),
+        .reset      (reset),
+        .read_addr  (cachereq_addr_index),
+        .read_data  (is_dirty[i]),
+        .write_en   (dirty_bits_write_en[i]),
+        .write_addr (cachereq_addr_index),
+        .write_data (dirty_bit_in)
+      );
+
+    end
+  endgenerate
+
+  //----------------------------------------------------------------------
+  // Tag check
+  //----------------------------------------------------------------------
+
+  logic [p_num_ways-1:0] tag_match_valid;
+  logic                  hit_TC;
+  logic [2:0]            hit_way_TC;
+
+  assign tag_match_valid = tag_match & is_valid;
+  assign hit_TC          = ( tag_match_valid != '0 );
+
+  always_comb begin
+    hit_way_TC = 3'd0;
+    for ( int j = 0; j < p_num_ways; j = j + 1 )
+      if ( tag_match_valid[j] )
+        hit_way_TC = 3'(j);
+  end
+
+  // Hit and way registers, loaded in the tag check
+
+  logic tag_check;
+  assign tag_check = ( state_reg == STATE_TAG_CHECK );
+
+  logic hit_reg_out;
+
+  vc_EnResetReg #(1,0) hit_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (tag_check),
+    .d      (hit_TC),
+    .q      (hit_reg_out)
+  );
+
+  // Replacement
+
+  logic       repl_touch;
+  logic [2:0] victim;
+
+  lab3_mem_CacheNWayRepl
+  #(
+    .p_num_sets (p_num_sets),
+    .p_num_ways (p_num_ways),
+    .p_repl     (p_repl)
+  )
+  repl_unit
+  (
+    .clk        (clk),
+    .reset      (reset),
+    .idx        (cachereq_addr_index),
+    .valid      (is_valid),
+    .victim     (victim),
+    .touch_en   (repl_touch),
+    .touch_way  (way_sel),
+    .touch_hit  (hit_reg_out)
+  );
+
+  logic victim_dirty;
+  assign victim_dirty = is_dirty[victim];
+
+  vc_EnResetReg #(3,0) way_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (tag_check),
+    .d      (hit_TC ? hit_way_TC : victim),
+    .q      (way_sel)
+  );
+
+  logic is_read;
+  logic is_write;
+  logic is_init;
+
+  assign is_read  = ( cachereq_type == `VC_MEM_REQ_MSG_TYPE_READ );
+  assign is_write = ( cachereq_type == `VC_MEM_REQ_MSG_TYPE_WRITE );
+  assign is_init  = ( cachereq_type == `VC_MEM_REQ_MSG_TYPE_WRITE_INIT );
+
+  assign hit = { 1'b0, hit_reg_out && !is_init };
+
+  assign memreq_type = ( state_reg == STATE_EVICT_REQUEST ) ? `VC_MEM_REQ_MSG_TYPE_WRITE
+                                                            : `VC_MEM_REQ_MSG_TYPE_READ;
+
+  //----------------------------------------------------------------------
+  // State Transitions
+  //----------------------------------------------------------------------
+
+  always @(*) begin
+
+    state_next = state_reg;
+    case ( state_reg )
+
+      STATE_IDLE:
+        if ( proc2cache_reqstream_val )
+          state_next = STATE_TAG_CHECK;
+
+      STATE_TAG_CHECK:
+        if ( hit_TC && is_init )
+          state_next = STATE_INIT_DATA_ACCESS;
+        else if ( hit_TC && is_read )
+          state_next = STATE_READ_DATA_ACCESS;
+        else if ( hit_TC && is_write )
+          state_next = STATE_WRITE_DATA_ACCESS;
+        else if ( victim_dirty )
+          state_next = STATE_EVICT_PREPARE;
+        else if ( is_init )
+          state_next = STATE_INIT_DATA_ACCESS;
+        else
+          state_next = STATE_REFILL_REQUEST;
+
+      STATE_INIT_DATA_ACCESS:
+        state_next = STATE_WAIT;
+
+      STATE_READ_DATA_ACCESS:
+        state_next = STATE_WAIT;
+
+      STATE_WRITE_DATA_ACCESS:
+        state_next = STATE_WAIT;
+
+      STATE_REFILL_REQUEST:
+        if ( cache2mem_reqstream_rdy )
+          state_next = STATE_REFILL_WAIT;
+
+      STATE_REFILL_WAIT:
+        if ( cache2mem_respstream_val )
+          state_next = STATE_REFILL_UPDATE;
+
+      STATE_REFILL_UPDATE:
+        if ( is_read )
+          state_next = STATE_READ_DATA_ACCESS;
+        else
+          state_next = STATE_WRITE_DATA_ACCESS;
+
+      STATE_EVICT_PREPARE:
+        state_next = STATE_EVICT_REQUEST;
+
+      STATE_EVICT_REQUEST:
+        if ( cache2mem_reqstream_rdy )
+          state_next = STATE_EVICT_WAIT;
+
+      STATE_EVICT_WAIT:
+        if ( cache2mem_respstream_val && is_init )
+          state_next = STATE_INIT_DATA_ACCESS;
+        else if ( cache2mem_respstream_val )
+          state_next = STATE_REFILL_REQUEST;
+
+      STATE_WAIT:
+        if ( proc2cache_respstream_rdy )
+          state_next = STATE_IDLE;
+
+      default:
+        state_next = STATE_IDLE;
+
+    endcase
+
+  end
+
+  //----------------------------------------------------------------------
+  // State Outputs
+  //----------------------------------------------------------------------
+
+  // Read Data Mux Sel
+  localparam way  = 1'b0;
+  localparam zero = 1'b1;
+
+  // Memory Request Addr Mux Sel
+  localparam evict = 1'b0;
+  localparam req   = 1'b1;
+
+  // Write Data Mux Sel
+  localparam repl  = 1'b0;
+  localparam data  = 1'b1;
+
+  // Wben Mux Sel
+  localparam dec  = 1'b0;
+  localparam ffff = 1'b1;
+
+  // An init that hits leaves the dirty bit alone
+
+  logic miss;
+  assign miss = !hit_reg_out;
+
+  // Writes go to the way of the request
+
+  logic tag_wen;
+  logic data_wen;
+  logic valid_wen;
+  logic dirty_wen;
+
+  logic [p_num_ways-1:0] way_onehot;
+  assign way_onehot = p_num_ways'(1) << way_sel;
+
+  assign tag_array_wen       = tag_wen   ? way_onehot : '0;
+  assign data_array_wen      = data_wen  ? way_onehot : '0;
+  assign valid_bits_write_en = valid_wen ? way_onehot : '0;
+  assign dirty_bits_write_en = dirty_wen ? way_onehot : '0;
+
+  task cs
+  (
+    input logic cs_cachereq_rdy,
+    input logic cs_cacheresp_val,
+    input logic cs_cachereq_reg_en,
+    input logic cs_tag_array_ren,
+    input logic cs_tag_wen,
+    input logic cs_data_array_ren,
+    input logic cs_data_wen,
+    input logic cs_valid_bit_in,
+    input logic cs_valid_wen,
+    input logic cs_dirty_bit_in,
+    input logic cs_dirty_wen,
+    input logic cs_repl_touch,
+    input logic cs_read_data_zero_mux_sel,
+    input logic cs_read_data_reg_en,
+    input logic cs_evict_addr_reg_en,
+    input logic cs_memreq_addr_mux_sel,
+    input logic cs_write_data_mux_sel,
+    input logic cs_wben_mux_sel,
+    input logic cs_memresp_en,
+    input logic cs_memreq_val,
+    input logic cs_memresp_rdy
+  );
+  begin
+    proc2cache_reqstream_rdy  = cs_cachereq_rdy;
+    proc2cache_respstream_val = cs_cacheresp_val;
+    cachereq_reg_en           = cs_cachereq_reg_en;
+    tag_array_ren             = cs_tag_array_ren;
+    tag_wen                   = cs_tag_wen;
+    data_array_ren            = cs_data_array_ren;
+    data_wen                  = cs_data_wen;
+    valid_bit_in              = cs_valid_bit_in;
+    valid_wen                 = cs_valid_wen;
+    dirty_bit_in              = cs_dirty_bit_in;
+    dirty_wen                 = cs_dirty_wen;
+    repl_touch                = cs_repl_touch;
+    read_data_zero_mux_sel    = cs_read_data_zero_mux_sel;
+    read_data_reg_en          = cs_read_data_reg_en;
+    evict_addr_reg_en         = cs_evict_addr_reg_en;
+    memreq_addr_mux_sel       = cs_memreq_addr_mux_sel;
+    write_data_mux_sel        = cs_write_data_mux_sel;
+    wben_mux_sel              = cs_wben_mux_sel;
+    memresp_en                = cs_memresp_en;
+    cache2mem_reqstream_val   = cs_memreq_val;
+    cache2mem_respstream_rdy  = cs_memresp_rdy;
+  end
+  endtask
+
+  // Set outputs using a control signal "table"
+
+  always @(*) begin
+                               cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     0,    0,   0,   0,     0,     0,    0,   0,   0 );
+    case ( state_reg )
+      //                          cache cache cache tag tag  data data valid valid dirty dirty repl  read  read evict mem  write  wben  mem  mem  mem
+      //                          req   resp  req   arr arr  arr  arr  bit   wen   bit   wen   touch data  data addr  addr data   mux   resp req  resp
+      //                          rdy   val   en    ren wen  ren  wen  in                            sel   en   en    sel  sel    sel   en   val  rdy
+      STATE_IDLE:              cs( 1,   0,    1,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   0,   0 );
+      STATE_TAG_CHECK:         cs( 0,   0,    0,   1,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   0,   0 );
+      STATE_INIT_DATA_ACCESS:  cs( 0,   0,    0,   0,   1,   0,   1,   1,    1,    0,    miss, 1,     zero, 1,   0,   req,   repl,  dec,  0,   0,   0 );
+      STATE_READ_DATA_ACCESS:  cs( 0,   0,    0,   0,   0,   1,   0,   0,    0,    0,    0,    1,     way,  1,   0,   req,   repl,  dec,  0,   0,   0 );
+      STATE_WRITE_DATA_ACCESS: cs( 0,   0,    0,   0,   0,   0,   1,   0,    0,    1,    1,    1,     zero, 1,   0,   req,   repl,  dec,  0,   0,   0 );
+      STATE_REFILL_REQUEST:    cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   1,   0 );
+      STATE_REFILL_WAIT:       cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  1,   0,   1 );
+      STATE_REFILL_UPDATE:     cs( 0,   0,    0,   0,   1,   0,   1,   1,    1,    0,    1,    0,     way,  0,   0,   req,   data,  ffff, 0,   0,   0 );
+      STATE_EVICT_PREPARE:     cs( 0,   0,    0,   1,   0,   1,   0,   0,    0,    0,    0,    0,     way,  1,   1,   req,   repl,  dec,  0,   0,   0 );
+      STATE_EVICT_REQUEST:     cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   evict, repl,  dec,  0,   1,   0 );
+      STATE_EVICT_WAIT:        cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   0,   1 );
+      STATE_WAIT:              cs( 0,   1,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   0,   0 );
+      default:                 cs( 0,   0,    0,   0,   0,   0,   0,   0,    0,    0,    0,    0,     way,  0,   0,   req,   repl,  dec,  0,   0,   0 );
+
+    endcase
+  end
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_N_WAY_CTRL_V */
@@ -0,0 +1,307 @@
+//=========================================================================
+// N-Way Blocking Cache Datapath
+//=========================================================================
+// One tag array, tag comparator and data array per way, all indexed by
+// the set of the request. way_sel picks the way read into the read data
+// register and the tag of the evicted line.
+
+`ifndef LAB3_MEM_CACHE_N_WAY_DPATH_V
+`define LAB3_MEM_CACHE_N_WAY_DPATH_V
+
+`include "vc/mem-msgs.v"
+`include "vc/srams.v"
+`include "vc/regs.v"
+`include "vc/arithmetic.v"
+`include "vc/muxes.v"
+
+`include "lab3_mem/WbenDecoder.v"
+`include "lab3_mem/ReplUnit.v"
+
+module lab3_mem_CacheNWayDpath
+#(
+  parameter p_num_banks = 1,
+  parameter p_num_sets  = 8,
+  parameter p_num_ways  = 2
+)
+(
+  input  logic                  clk,
+  input  logic                  reset,
+
+  // Processor <-> Cache Interface
+
+  input  mem_req_4B_t           proc2cache_reqstream_msg,
+  output mem_resp_4B_t          proc2cache_respstream_msg,
+
+  // Cache <-> Memory Interface
+
+  output mem_req_16B_t          cache2mem_reqstream_msg,
+  input  mem_resp_16B_t         cache2mem_respstream_msg,
+
+  // control signals (ctrl->dpath)
+
+  input  logic                  cachereq_reg_en,
+  input  logic                  tag_array_ren,
+  input  logic [p_num_ways-1:0] tag_array_wen,
+  input  logic                  data_array_ren,
+  input  logic [p_num_ways-1:0] data_array_wen,
+  input  logic [2:0]            way_sel,
+  input  logic                  read_data_zero_mux_sel,
+  input  logic                  read_data_reg_en,
+  input  logic [1:0]            hit,
+  input  logic                  evict_addr_reg_en,
+  input  logic                  memreq_addr_mux_sel,
+  input  logic [2:0]            memreq_type,
+  input  logic                  memresp_en,
+  input  logic                  write_data_mux_sel,
+  input  logic                  wben_mux_sel,
+
+  // status signals (dpath->ctrl)
+
+  output logic [2:0]            cachereq_type,
+  output logic [31:0]           cachereq_addr,
+  output logic [p_num_ways-1:0] tag_match
+);
+
+  // Address mapping: the bank bits (if any) sit between the offset and
+  // the index, and the tag is everything above the index
+
+  localparam c_idx_nbits    = $clog2( p_num_sets );
+  localparam c_offset_nbits = 4 + $clog2( p_num_banks );
+  localparam c_tag_nbits    = 32 - c_offset_nbits - c_idx_nbits;
+
+  // Register the unpacked proc2cache_reqstream_msg
+
+  logic [31:0] cachereq_data_reg_out;
+  logic  [7:0] cachereq_opaque_reg_out;
+
+  vc_EnResetReg #(3,0) cachereq_type_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (cachereq_reg_en),
+    .d      (proc2cache_reqstream_msg.type_),
+    .q      (cachereq_type)
+  );
+
+  vc_EnResetReg #(32,0) cachereq_addr_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (cachereq_reg_en),
+    .d      (proc2cache_reqstream_msg.addr),
+    .q      (cachereq_addr)
+  );
+
+  vc_EnResetReg #(8,0) cachereq_opaque_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (cachereq_reg_en),
+    .d      (proc2cache_reqstream_msg.opaque),
+    .q      (cachereq_opaque_reg_out)
+  );
+
+  vc_EnResetReg #(32,0) cachereq_data_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (cachereq_reg_en),
+    .d      (proc2cache_reqstream_msg.data),
+    .q      (cachereq_data_reg_out)
+  );
+
+  logic             [1:0] cachereq_addr_word_offset;
+  logic [c_idx_nbits-1:0] cachereq_addr_index;
+  logic [c_tag_nbits-1:0] cachereq_addr_tag;
+
+  assign cachereq_addr_word_offset = cachereq_addr[3:2];
+  assign cachereq_addr_index       = cachereq_addr[c_offset_nbits +: c_idx_nbits];
+  assign cachereq_addr_tag         = cachereq_addr[31 -: c_tag_nbits];
+
+  // Replicate cachereq_data
+
+  logic [127:0] cachereq_data_replicated;
+
+  lab3_mem_ReplUnit repl_unit
+  (
+    .in_ (cachereq_data_reg_out),
+    .out (cachereq_data_replicated)
+  );
+
+  // Write byte enable decoder
+
+  logic [15:0] wben_decoder_out;
+
+  lab3_mem_WbenDecoder wben_decoder
+  (
+    .in_ (cachereq_addr_word_offset),
+    .out (wben_decoder_out)
+  );
+
+  // Memory Response Data Register
+
+  logic [127:0] memresp_data_reg_out;
+
+  vc_EnResetReg #(128,0) memresp_data_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (memresp_en),
+    .d      (cache2mem_respstream_msg.data),
+    .q      (memresp_data_reg_out)
+  );
+
+  // Write Data Mux
+
+  logic [127:0] write_data_mux_out;
+
+  vc_Mux2 #(128) write_data_mux
+  (
+    .in0    (cachereq_data_replicated),
+    .in1    (memresp_data_reg_out),
+    .sel    (write_data_mux_sel),
+    .out    (write_data_mux_out)
+  );
+
+  // Write Byte Enable Mux
+
+  logic [15:0] wben_mux_out;
+
+  vc_Mux2 #(16) wben_mux
+  (
+    .in0    (wben_decoder_out),
+    .in1    (16'hffff),
+    .sel    (wben_mux_sel),
+    .out    (wben_mux_out)
+  );
+
+  // Tag and data arrays (p_num_sets entries each) and tag compare, one
+  // per way
+
+  logic [c_tag_nbits-1:0] tag_array_read_out  [p_num_ways];
+  logic [127:0]           data_array_read_out [p_num_ways];
+
+  genvar i;
+  generate
+    for ( i = 0; i < p_num_ways; i = i + 1 ) begin : ways
+
+      vc_CombinationalBitSRAM_1rw
+      #(
+        .p_data_nbits  (c_tag_nbits),
+        .p_num_entries (p_num_sets)
+      )
+      tag_array
+      (
+        .clk           (clk),
+        .reset         (reset),
+        .read_addr     (cachereq_addr_index),
+        .read_data     (tag_array_read_out[i]),
+        .write_en      (tag_array_wen[i]),
+        .read_en       (tag_array_ren),
+        .write_addr    (cachereq_addr_index),
+        .write_data    (cachereq_addr_tag)
+      );
+
+      vc_EqComparator #(c_tag_nbits) tag_cmp
+      (
+        .in0    (cachereq_addr_tag),
+        .in1    (tag_array_read_out[i]),
+        .out    (tag_match[i])
+      );
+
+      vc_CombinationalSRAM_1rw #(128,p_num_sets) data_array
+      (
+        .clk           (clk),
+        .reset         (reset),
+        .read_addr     (cachereq_addr_index),
+        .read_data     (data_array_read_out[i]),
+        .write_en      (data_array_wen[i]),
+        .read_en       (data_array_ren),
+        .write_byte_en (wben_mux_out),
+        .write_addr    (cachereq_addr_index),
+        .write_data    (write_data_mux_out)
+      );
+
+    end
+  endgenerate
+
+  // Evict Address Register: the tag of the selected way with the index
+  // and bank of the request
+
+  logic [31:0] evict_addr_reg_out;
+
+  vc_EnResetReg #(32,0) evict_addr_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (evict_addr_reg_en),
+    .d      ({ tag_array_read_out[way_sel], cachereq_addr[31-c_tag_nbits:4], 4'b0000 }),
+    .q      (evict_addr_reg_out)
+  );
+
+  // Mem Request Address Mux
+
+  logic [31:0] memreq_addr_mux_out;
+
+  vc_Mux2 #(32) memreq_addr_mux
+  (
+    .in0    (evict_addr_reg_out),
+    .in1    ({ cachereq_addr[31:4], 4'b0000 }),
+    .sel    (memreq_addr_mux_sel),
+    .out    (memreq_addr_mux_out)
+  );
+
+  // Read Data Mux
+
+  logic [127:0] read_data_mux_out;
+
+  vc_Mux2 #(128) read_data_mux
+  (
+    .in0    (data_array_read_out[way_sel]),
+    .in1    (128'b0),
+    .sel    (read_data_zero_mux_sel),
+    .out    (read_data_mux_out)
+  );
+
+  // Read Data Register
+
+  logic [127:0] read_data_reg_out;
+
+  vc_EnResetReg #(128,0) read_data_reg
+  (
+    .clk    (clk),
+    .reset  (reset),
+    .en     (read_data_reg_en),
+    .d      (read_data_mux_out),
+    .q      (read_data_reg_out)
+  );
+
+  // Word Data Mux
+
+  logic [31:0] word_data_mux_out;
+
+  vc_Mux4 #(32) word_data_mux
+  (
+    .in0    (read_data_reg_out[31:0]),
+    .in1    (read_data_reg_out[63:32]),
+    .in2    (read_data_reg_out[95:64]),
+    .in3    (read_data_reg_out[127:96]),
+    .sel    (cachereq_addr_word_offset),
+    .out    (word_data_mux_out)
+  );
+
+  assign proc2cache_respstream_msg.type_  = cachereq_type;
+  assign proc2cache_respstream_msg.opaque = cachereq_opaque_reg_out;
+  assign proc2cache_respstream_msg.test   = hit;
+  assign proc2cache_respstream_msg.len    = 2'b0;
+  assign proc2cache_respstream_msg.data   = word_data_mux_out;
+
+  assign cache2mem_reqstream_msg.type_    = memreq_type;
+  assign cache2mem_reqstream_msg.len      = 4'b0;
+  assign cache2mem_reqstream_msg.addr     = memreq_addr_mux_out;
+  assign cache2mem_reqstream_msg.data     = read_data_reg_out;
+  assign cache2mem_reqstream_msg.opaque   = 8'b0;
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_N_WAY_DPATH_V */
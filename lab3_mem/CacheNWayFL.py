@@ -0,0 +1,95 @@
+#=========================================================================
+# CacheNWayFL
+#=========================================================================
+# Functional-level model of CacheNWay. Every request is passed on to
+# memory as a single word access, one at a time, so the data always
+# comes from memory, and the test field of the response is set by the
+# same CacheModel the tests use to predict the RTL. So the FL model
+# reports a hit on exactly the same requests as CacheNWay.v.
+
+from pymtl3 import *
+from pymtl3.stdlib.mem import mk_mem_msg, MemMsgType
+from pymtl3.stdlib.mem.ifcs import MemRequesterIfc, MemResponderIfc
+
+from lab3_mem.cache_model import CacheModel, repl_names
+
+#-------------------------------------------------------------------------
+# CacheNWayFL
+#-------------------------------------------------------------------------
+
+class CacheNWayFL( Component ):
+
+  # Constructor
+
+  def construct( s, num_sets=8, num_ways=2, repl="lru", num_banks=1 ):
+
+    CacheReqType, CacheRespType = mk_mem_msg( 8, 32, 32  )
+    MemReqType,   MemRespType   = mk_mem_msg( 8, 32, 128 )
+
+    s.CacheRespType = CacheRespType
+    s.MemReqType    = MemReqType
+
+    # Interface
+
+    s.proc2cache = MemResponderIfc( CacheReqType, CacheRespType )
+    s.cache2mem  = MemRequesterIfc( MemReqType,   MemRespType   )
+
+    # State: the request being served, whether it hit, the memory
+    # request still to be sent and the response still to be returned
+
+    s.geometry = ( num_sets, num_ways, repl_names[ repl ], num_banks )
+    s.model    = CacheModel( *s.geometry )
+    s.req      = None
+    s.hit      = False
+    s.memreq   = None
+    s.resp     = None
+
+    @update
+    def up_rdy():
+      s.proc2cache.reqstream.rdy @= ( s.req is None )
+      s.cache2mem.respstream.rdy @= 1
+
+    @update_ff
+    def up_cache():
+
+      if s.reset:
+        s.model  = CacheModel( *s.geometry )
+        s.req    = None
+        s.memreq = None
+        s.resp   = None
+
+      else:
+
+        if s.proc2cache.respstream.val & s.proc2cache.respstream.rdy:
+          s.req  = None
+          s.resp = None
+
+        if s.cache2mem.reqstream.val & s.cache2mem.reqstream.rdy:
+          s.memreq = None
+
+        if s.cache2mem.respstream.val:
+          data = s.cache2mem.respstream.msg.data[0:32]
+          if s.req.type_ != MemMsgType.READ:
+            data = Bits32( 0 )
+          test = int( s.hit and s.req.type_ != MemMsgType.WRITE_INIT )
+          s.resp = s.CacheRespType( s.req.type_, s.req.opaque, test, 0, data )
+
+        if s.proc2cache.reqstream.val & s.proc2cache.reqstream.rdy:
+          s.req = s.proc2cache.reqstream.msg.clone()
+          s.hit = s.model.access( int( s.req.addr ) )
+          type_ = MemMsgType.READ if s.req.type_ == MemMsgType.READ else MemMsgType.WRITE
+          s.memreq = s.MemReqType( type_, 0, s.req.addr, 4, zext( s.req.data, 128 ) )
+
+      s.cache2mem.reqstream.val <<= s.memreq is not None
+      if s.memreq is not None:
+        s.cache2mem.reqstream.msg <<= s.memreq
+
+      s.proc2cache.respstream.val <<= s.resp is not None
+      if s.resp is not None:
+        s.proc2cache.respstream.msg <<= s.resp
+
+  # Line tracing
+
+  def line_trace( s ):
+    hit_str = ( "h" if s.hit else "m" ) if s.req is not None else " "
+    return f"({hit_str})"
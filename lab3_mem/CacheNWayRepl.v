@@ -0,0 +1,184 @@
+//=========================================================================
+// N-Way Cache Replacement Unit
+//=========================================================================
+// Replacement state of every set of CacheNWay and the victim way of the
+// set being accessed. p_repl selects the policy:
+//
+//  - 0 (LRU):    an age per way, 0 for the most recently used way and
+//                p_num_ways-1 for the least recently used one
+//  - 1 (PLRU):   tree pseudo-LRU, p_num_ways-1 bits per set, each of
+//                which points to the half of its subtree to evict from
+//  - 2 (random): the low bits of a 16-bit LFSR shared by all sets,
+//                stepped on every refill
+//  - 3 (SRRIP):  a 2-bit re-reference prediction value per way, 2 on a
+//                refill and 0 on a hit; the victim is the first way with
+//                the largest value, and a refill ages the set so that
+//                the largest value becomes 3
+//
+// An invalid way is always chosen first, the lowest one first. touch_en
+// updates the state of set idx once per request, with touch_hit low if
+// touch_way was just refilled. Ways are numbered with three bits, since
+// there are at most eight. lab3_mem/cache_model.py models this unit
+// exactly.
+
+`ifndef LAB3_MEM_CACHE_N_WAY_REPL_V
+`define LAB3_MEM_CACHE_N_WAY_REPL_V
+
+module lab3_mem_CacheNWayRepl
+#(
+  parameter p_num_sets = 8,
+  parameter p_num_ways = 2,
+  parameter p_repl     = 0
+)(
+  input  logic                          clk,
+  input  logic                          reset,
+
+  input  logic [$clog2(p_num_sets)-1:0] idx,
+  input  logic [p_num_ways-1:0]         valid,
+  output logic [2:0]                    victim,
+
+  input  logic                          touch_en,
+  input  logic [2:0]                    touch_way,
+  input  logic                          touch_hit
+);
+
+  localparam c_levels = $clog2( p_num_ways );
+
+  //----------------------------------------------------------------------
+  // Invalid ways
+  //----------------------------------------------------------------------
+
+  logic       has_invalid;
+  logic [2:0] first_invalid;
+
+  always_comb begin
+    has_invalid   = 1'b0;
+    first_invalid = 3'd0;
+    for ( int i = p_num_ways-1; i >= 0; i = i - 1 ) begin
+      if ( !valid[i] ) begin
+        has_invalid   = 1'b1;
+        first_invalid = 3'(i);
+      end
+    end
+  end
+
+  logic [2:0] repl_victim;
+
+  assign victim = has_invalid ? first_invalid : repl_victim;
+
+  //----------------------------------------------------------------------
+  // Policies
+  //----------------------------------------------------------------------
+
+  generate
+    if ( p_repl == 0 ) begin : lru
+
+      logic [2:0] age [p_num_sets][p_num_ways];
+
+      always_comb begin
+        repl_victim = 3'd0;
+        for ( int i = 0; i < p_num_ways; i = i + 1 )
+          if ( age[idx][i] == 3'(p_num_ways-1) )
+            repl_victim = 3'(i);
+      end
+
+      always_ff @( posedge clk ) begin
+        if ( reset ) begin
+          for ( int s = 0; s < p_num_sets; s = s + 1 )
+            for ( int i = 0; i < p_num_ways; i = i + 1 )
+              age[s][i] <= 3'(i);
+        end
+        else if ( touch_en ) begin
+          for ( int i = 0; i < p_num_ways; i = i + 1 )
+            if ( age[idx][i] < age[idx][touch_way] )
+              age[idx][i] <= age[idx][i] + 3'd1;
+          age[idx][touch_way] <= 3'd0;
+        end
+      end
+
+    end
+    else if ( p_repl == 1 ) begin : plru
+
+      // Node n has children 2n+1 (lower ways) and 2n+2, and the leaves
+      // p_num_ways-1 and up are the ways
+
+      logic [7:0] tree [p_num_sets];
+      logic [7:0] tree_next;
+
+      always_comb begin
+        int node;
+        node = 0;
+        for ( int l = 0; l < c_levels; l = l + 1 )
+          node = 2*node + 1 + int'( tree[idx][node] );
+        repl_victim = 3'( node - ( p_num_ways-1 ) );
+      end
+
+      always_comb begin
+        tree_next = tree[idx];
+        for ( int l = 0; l < c_levels; l = l + 1 )
+          tree_next[ ( 1 << l ) - 1 + ( int'( touch_way ) >> ( c_levels - l ) ) ]
+            = !touch_way[ c_levels-1-l ];
+      end
+
+      always_ff @( posedge clk ) begin
+        if ( reset ) begin
+          for ( int s = 0; s < p_num_sets; s = s + 1 )
+            tree[s] <= 8'b0;
+        end
+        else if ( touch_en )
+          tree[idx] <= tree_next;
+      end
+
+    end
+    else if ( p_repl == 2 ) begin : random
+
+      logic [15:0] lfsr;
+
+      assign repl_victim = lfsr[2:0] & 3'(p_num_ways-1);
+
+      always_ff @( posedge clk ) begin
+        if ( reset )
+          lfsr <= 16'h0001;
+        else if ( touch_en && !touch_hit )
+          lfsr <= { lfsr[14:0], lfsr[15] ^ lfsr[13] ^ lfsr[12] ^ lfsr[10] };
+      end
+
+    end
+    else begin : srrip
+
+      logic [1:0] rrpv [p_num_sets][p_num_ways];
+      logic [1:0] rrpv_max;
+
+      always_comb begin
+        rrpv_max = 2'd0;
+        for ( int i = 0; i < p_num_ways; i = i + 1 )
+          if ( rrpv[idx][i] > rrpv_max )
+            rrpv_max = rrpv[idx][i];
+
+        repl_victim = 3'd0;
+        for ( int i = p_num_ways-1; i >= 0; i = i - 1 )
+          if ( rrpv[idx][i] == rrpv_max )
+            repl_victim = 3'(i);
+      end
+
+      always_ff @( posedge clk ) begin
+        if ( reset ) begin
+          for ( int s = 0; s < p_num_sets; s = s + 1 )
+            for ( int i = 0; i < p_num_ways; i = i + 1 )
+              rrpv[s][i] <= 2'd3;
+        end
+        else if ( touch_en && touch_hit )
+          rrpv[idx][touch_way] <= 2'd0;
+        else if ( touch_en ) begin
+          for ( int i = 0; i < p_num_ways; i = i + 1 )
+            rrpv[idx][i] <= rrpv[idx][i] + ( 2'd3 - rrpv_max );
+          rrpv[idx][touch_way] <= 2'd2;
+        end
+      end
+
+    end
+  endgenerate
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_N_WAY_REPL_V */
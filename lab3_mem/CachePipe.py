@@ -0,0 +1,34 @@
+#=========================================================================
+# CachePipe
+#=========================================================================
+# PyMTL wrapper for the cache with a pipelined hit path in CachePipe.v.
+
+from os import path
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import *
+from pymtl3.stdlib.mem import mk_mem_msg
+from pymtl3.stdlib.mem.ifcs import MemRequesterIfc, MemResponderIfc
+
+class CachePipe( VerilogPlaceholder, Component ):
+
+  # Constructor
+
+  def construct( s, num_banks=1 ):
+
+    CacheReqType, CacheRespType = mk_mem_msg( 8, 32, 32  )
+    MemReqType,   MemRespType   = mk_mem_msg( 8, 32, 128 )
+
+    # Interface
+
+    s.proc2cache = MemResponderIfc( CacheReqType, CacheRespType )
+    s.cache2mem  = MemRequesterIfc( MemReqType,   MemRespType   )
+
+    # Verilog source and parameters
+
+    s.set_metadata( VerilogPlaceholderPass.src_file,
+                    path.join( path.dirname( __file__ ), "CachePipe.v" ) )
+    s.set_metadata( VerilogPlaceholderPass.top_module, "lab3_mem_CachePipe" )
+    s.set_metadata( VerilogPlaceholderPass.params, {
+      "p_num_banks" : num_banks,
+    })
@@ -0,0 +1,379 @@
+//=========================================================================
+// Pipelined Cache
+//=========================================================================
+// Write-back, write-allocate cache with the geometry of CacheAlt (two
+// ways of 8 sets of 16B lines, LRU replacement) whose hit path is a
+// two-stage pipeline instead of the I -> TC -> RD/WD -> W walk of the
+// blocking caches, so back-to-back hits complete one per cycle:
+//
+//  - TC: the request accepted in the previous cycle checks the tags and
+//    reads the line of the matching way.
+//  - DA: the request sends its response with the word it read, and a
+//    write (or init) updates its word of the line, its dirty bit and
+//    the LRU bit of its set once the response is accepted.
+//
+// A request in TC therefore reads the data array in the same cycle as
+// the write of the request ahead of it in DA, which only takes effect at
+// the end of the cycle. When both are to the same line, the written
+// word is forwarded into the line captured for the request in TC.
+//
+// Misses are still handled one at a time by a small FSM. A miss waits
+// in TC until DA is empty, so the dirty and LRU bits it reads for the
+// victim include every earlier write, then evicts the victim if it is
+// dirty and refills the line (an init skips the refill). The request
+// then goes through TC again, now as a hit, and its response reports a
+// miss in the test field like the blocking caches.
+
+`ifndef LAB3_MEM_CACHE_PIPE_V
+`define LAB3_MEM_CACHE_PIPE_V
+
+`include "vc/mem-msgs.v"
+`include "vc/trace.v"
+
+module lab3_mem_CachePipe
+#(
+  parameter p_num_banks = 1 // Total number of cache banks
+)
+(
+  input  logic          clk,
+  input  logic          reset,
+
+  // Processor <-> Cache Interface
+
+  input  mem_req_4B_t   proc2cache_reqstream_msg,
+  input  logic          proc2cache_reqstream_val,
+  output logic          proc2cache_reqstream_rdy,
+
+  output mem_resp_4B_t  proc2cache_respstream_msg,
+  output logic          proc2cache_respstream_val,
+  input  logic          proc2cache_respstream_rdy,
+
+  // Cache <-> Memory Interface
+
+  output mem_req_16B_t  cache2mem_reqstream_msg,
+  output logic          cache2mem_reqstream_val,
+  input  logic          cache2mem_reqstream_rdy,
+
+  input  mem_resp_16B_t cache2mem_respstream_msg,
+  input  logic          cache2mem_respstream_val,
+  output logic          cache2mem_respstream_rdy
+);
+
+  localparam c_num_sets     = 8;
+  localparam c_offset_nbits = 4 + $clog2( p_num_banks );
+  localparam c_tag_nbits    = 32 - c_offset_nbits - 3;
+
+  //----------------------------------------------------------------------
+  // State Definitions
+  //----------------------------------------------------------------------
+
+  localparam STATE_PIPE           = 3'd0;
+  localparam STATE_EVICT_REQUEST  = 3'd1;
+  localparam STATE_EVICT_WAIT     = 3'd2;
+  localparam STATE_REFILL_REQUEST = 3'd3;
+  localparam STATE_REFILL_WAIT    = 3'd4;
+  localparam STATE_INIT_UPDATE    = 3'd5;
+
+  logic [2:0] state_reg;
+  logic [2:0] state_next;
+
+  //----------------------------------------------------------------------
+  // Arrays
+  //----------------------------------------------------------------------
+  // lru_bits holds the least recently used way of each set
+
+  logic [c_tag_nbits-1:0] tag_array  [c_num_sets][2];
+  logic [127:0]           data_array [c_num_sets][2];
+  logic                   valid_bits [c_num_sets][2];
+  logic                   dirty_bits [c_num_sets][2];
+  logic                   lru_bits   [c_num_sets];
+
+  //----------------------------------------------------------------------
+  // Pipeline registers
+  //----------------------------------------------------------------------
+
+  logic         tc_val;
+  mem_req_4B_t  tc_req;
+  logic         tc_missed;
+
+  logic         da_val;
+  mem_req_4B_t  da_req;
+  logic         da_way;
+  logic         da_test;
+  logic [127:0] da_line;
+
+  //----------------------------------------------------------------------
+  // TC stage
+  //----------------------------------------------------------------------
+
+  logic [2:0]             tc_idx;
+  logic [c_tag_nbits-1:0] tc_tag;
+
+  assign tc_idx = tc_req.addr[c_offset_nbits +: 3];
+  assign tc_tag = tc_req.addr[31 -: c_tag_nbits];
+
+  logic tc_match_0;
+  logic tc_match_1;
+  logic tc_hit;
+  logic tc_way;
+
+  assign tc_match_0 = valid_bits[tc_idx][0] && ( tag_array[tc_idx][0] == tc_tag );
+  assign tc_match_1 = valid_bits[tc_idx][1] && ( tag_array[tc_idx][1] == tc_tag );
+  assign tc_hit     = tc_match_0 || tc_match_1;
+  assign tc_way     = tc_match_1;
+
+  // Invalid ways are filled first, then the least recently used one
+
+  logic victim;
+
+  assign victim = !valid_bits[tc_idx][0] ? 1'b0
+                : !valid_bits[tc_idx][1] ? 1'b1
+                :                          lru_bits[tc_idx];
+
+  logic victim_dirty;
+  assign victim_dirty = valid_bits[tc_idx][victim] && dirty_bits[tc_idx][victim];
+
+  logic tc_init;
+  assign tc_init = ( tc_req.type_ == `VC_MEM_REQ_MSG_TYPE_WRITE_INIT );
+
+  //----------------------------------------------------------------------
+  // DA stage
+  //----------------------------------------------------------------------
+
+  logic [2:0] da_idx;
+  logic       da_write;
+  logic       da_go;
+  logic       da_free;
+
+  assign da_idx   = da_req.addr[c_offset_nbits +: 3];
+  assign da_write = ( da_req.type_ != `VC_MEM_REQ_MSG_TYPE_READ );
+  assign da_go    = da_val && proc2cache_respstream_rdy;
+  assign da_free  = !da_val || da_go;
+
+  assign proc2cache_respstream_val = da_val;
+
+  always_comb begin
+    proc2cache_respstream_msg        = '0;
+    proc2cache_respstream_msg.type_  = da_req.type_;
+    proc2cache_respstream_msg.opaque = da_req.opaque;
+    proc2cache_respstream_msg.test   = { 1'b0, da_test };
+    if ( !da_write )
+      proc2cache_respstream_msg.data = da_line[ 32*da_req.addr[3:2] +: 32 ];
+  end
+
+  //----------------------------------------------------------------------
+  // Hazards
+  //----------------------------------------------------------------------
+  // A hit moves from TC to DA when DA is free. A miss starts the FSM
+  // only once DA is empty.
+
+  logic tc_go;
+  logic miss_go;
+
+  assign tc_go   = tc_val && ( state_reg == STATE_PIPE ) && tc_hit && da_free;
+  assign miss_go = tc_val && ( state_reg == STATE_PIPE ) && !tc_hit && !da_val;
+
+  assign proc2cache_reqstream_rdy = !tc_val || tc_go;
+
+  // Forward the word written by DA into the line read by TC
+
+  logic         fwd;
+  logic [127:0] tc_line;
+
+  assign fwd = da_go && da_write && ( da_idx == tc_idx ) && ( da_way == tc_way );
+
+  always_comb begin
+    tc_line = data_array[tc_idx][tc_way];
+    if ( fwd )
+      tc_line[ 32*da_req.addr[3:2] +: 32 ] = da_req.data;
+  end
+
+  //----------------------------------------------------------------------
+  // Miss FSM
+  //----------------------------------------------------------------------
+
+  always_comb begin
+
+    state_next = state_reg;
+    case ( state_reg )
+
+      STATE_PIPE:
+        if ( miss_go ) begin
+          if ( victim_dirty )
+            state_next = STATE_EVICT_REQUEST;
+          else if ( tc_init )
+            state_next = STATE_INIT_UPDATE;
+          else
+            state_next = STATE_REFILL_REQUEST;
+        end
+
+      STATE_EVICT_REQUEST:
+        if ( cache2mem_reqstream_rdy )
+          state_next = STATE_EVICT_WAIT;
+
+      STATE_EVICT_WAIT:
+        if ( cache2mem_respstream_val )
+          state_next = tc_init ? STATE_INIT_UPDATE : STATE_REFILL_REQUEST;
+
+      STATE_REFILL_REQUEST:
+        if ( cache2mem_reqstream_rdy )
+          state_next = STATE_REFILL_WAIT;
+
+      STATE_REFILL_WAIT:
+        if ( cache2mem_respstream_val )
+          state_next = STATE_PIPE;
+
+      STATE_INIT_UPDATE:
+        state_next = STATE_PIPE;
+
+      default:
+        state_next = STATE_PIPE;
+
+    endcase
+
+  end
+
+  // Memory requests
+
+  assign cache2mem_reqstream_val  = ( state_reg == STATE_EVICT_REQUEST )
+                                 || ( state_reg == STATE_REFILL_REQUEST );
+  assign cache2mem_respstream_rdy = ( state_reg == STATE_EVICT_WAIT )
+                                 || ( state_reg == STATE_REFILL_WAIT );
+
+  always_comb begin
+    cache2mem_reqstream_msg = '0;
+    if ( state_reg == STATE_EVICT_REQUEST ) begin
+      cache2mem_reqstream_msg.type_ = `VC_MEM_REQ_MSG_TYPE_WRITE;
+      cache2mem_reqstream_msg.addr  = { tag_array[tc_idx][victim], tc_req.addr[31-c_tag_nbits:4], 4'b0000 };
+      cache2mem_reqstream_msg.data  = data_array[tc_idx][victim];
+    end
+    else begin
+      cache2mem_reqstream_msg.type_ = `VC_MEM_REQ_MSG_TYPE_READ;
+      cache2mem_reqstream_msg.addr  = { tc_req.addr[31:4], 4'b0000 };
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // State updates
+  //----------------------------------------------------------------------
+
+  logic fill;
+  assign fill = ( ( state_reg == STATE_REFILL_WAIT ) && cache2mem_respstream_val )
+             || ( state_reg == STATE_INIT_UPDATE );
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      state_reg <= STATE_PIPE;
+      tc_val    <= 1'b0;
+      da_val    <= 1'b0;
+      for ( int s = 0; s < c_num_sets; s = s + 1 ) begin
+        valid_bits[s][0] <= 1'b0;
+        valid_bits[s][1] <= 1'b0;
+        dirty_bits[s][0] <= 1'b0;
+        dirty_bits[s][1] <= 1'b0;
+        lru_bits[s]      <= 1'b0;
+      end
+    end
+    else begin
+      state_reg <= state_next;
+
+      // DA: update the line and the LRU bit of the set
+
+      if ( da_go ) begin
+        if ( da_write ) begin
+          data_array[da_idx][da_way][ 32*da_req.addr[3:2] +: 32 ] <= da_req.data;
+          dirty_bits[da_idx][da_way] <= 1'b1;
+        end
+        lru_bits[da_idx] <= !da_way;
+      end
+
+      // TC -> DA
+
+      if ( tc_go ) begin
+        da_req  <= tc_req;
+        da_way  <= tc_way;
+        da_test <= !tc_missed && !tc_init;
+        da_line <= tc_line;
+      end
+
+      if ( tc_go )
+        da_val <= 1'b1;
+      else if ( da_go )
+        da_val <= 1'b0;
+
+      // New request into TC
+
+      if ( proc2cache_reqstream_val && proc2cache_reqstream_rdy ) begin
+        tc_req    <= proc2cache_reqstream_msg;
+        tc_missed <= 1'b0;
+      end
+
+      if ( proc2cache_reqstream_val && proc2cache_reqstream_rdy )
+        tc_val <= 1'b1;
+      else if ( tc_go )
+        tc_val <= 1'b0;
+
+      // Miss: allocate the victim way once it has been written back
+
+      if ( miss_go )
+        tc_missed <= 1'b1;
+
+      if ( fill ) begin
+        tag_array [tc_idx][victim] <= tc_tag;
+        data_array[tc_idx][victim] <= tc_init ? 128'b0 : cache2mem_respstream_msg.data;
+        valid_bits[tc_idx][victim] <= 1'b1;
+        dirty_bits[tc_idx][victim] <= 1'b0;
+      end
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Line tracing
+  //----------------------------------------------------------------------
+  // The request in TC (h/m) and in DA (rd/wr/in), or the state of the
+  // miss FSM while it runs
+
+  `ifndef SYNTHESIS
+
+  `VC_TRACE_BEGIN
+  begin
+
+    case ( state_reg )
+
+      STATE_PIPE: begin
+        if ( !tc_val )
+          vc_trace.append_str( trace_str, " " );
+        else if ( tc_hit )
+          vc_trace.append_str( trace_str, "h" );
+        else
+          vc_trace.append_str( trace_str, "m" );
+
+        vc_trace.append_str( trace_str, "|" );
+
+        if ( !da_val )
+          vc_trace.append_str( trace_str, "  " );
+        else if ( da_req.type_ == `VC_MEM_REQ_MSG_TYPE_READ )
+          vc_trace.append_str( trace_str, "rd" );
+        else if ( da_req.type_ == `VC_MEM_REQ_MSG_TYPE_WRITE )
+          vc_trace.append_str( trace_str, "wr" );
+        else
+          vc_trace.append_str( trace_str, "in" );
+      end
+
+      STATE_EVICT_REQUEST:  vc_trace.append_str( trace_str, "ER  " );
+      STATE_EVICT_WAIT:     vc_trace.append_str( trace_str, "EW  " );
+      STATE_REFILL_REQUEST: vc_trace.append_str( trace_str, "RR  " );
+      STATE_REFILL_WAIT:    vc_trace.append_str( trace_str, "RW  " );
+      STATE_INIT_UPDATE:    vc_trace.append_str( trace_str, "IU  " );
+      default:              vc_trace.append_str( trace_str, "?   " );
+
+    endcase
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_PIPE_V */
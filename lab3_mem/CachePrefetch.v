@@ -0,0 +1,447 @@
+//=========================================================================
+// Prefetcher
+//=========================================================================
+// Sits between the cache2mem interface of a cache and the memory. Every
+// refill (a read) the cache sends trains a detector on the sequence of
+// missing lines, which picks one line to prefetch into a small fully
+// associative prefetch buffer:
+//
+//  - p_prefetch = 0: off, every request goes straight to memory
+//  - p_prefetch = 1: next line, the line after the one that missed
+//  - p_prefetch = 2: stride, the line one stride ahead once the same
+//    stride (in lines, any sign) has been seen twice in a row, and the
+//    next line until then. There is no PC, so a single stride is
+//    tracked over all the misses.
+//
+// A refill that finds its line in the buffer is answered from it and
+// frees the entry. If the prefetch of its line is still in flight, the
+// refill waits for it (a late prefetch). Otherwise it goes to memory.
+// Writebacks always go to memory, and drop any copy of their line in the
+// buffer, which would be stale. A prefetch still in flight for that line
+// is marked dead and its data is dropped when it arrives.
+//
+// Like ProcStoreBuffer, responses reach the cache in the order of its
+// requests: a queue records for every accepted request whether it was
+// answered here (with the response) or by memory, and a second queue
+// records for every memory request whether it is a prefetch (with its
+// entry) or comes from the cache. The memory is assumed to answer in
+// order.
+//
+// Like the cache statistics in SingleCoreSys, the statistics pulse for
+// one cycle per event:
+//
+//  - pf_issue    : a prefetch was sent to memory
+//  - pf_hit      : a refill was answered from the buffer
+//  - pf_late     : ... after waiting for its prefetch to arrive
+//  - refill_miss : a refill went to memory
+//
+// so the accuracy is pf_hit/pf_issue and the coverage is pf_hit over
+// pf_hit + refill_miss. p_num_entries must be a power of two.
+
+`ifndef LAB3_MEM_CACHE_PREFETCH_V
+`define LAB3_MEM_CACHE_PREFETCH_V
+
+`include "vc/mem-msgs.v"
+`include "vc/queues.v"
+`include "vc/trace.v"
+
+module lab3_mem_CachePrefetch
+#(
+  parameter p_prefetch    = 2, // 0: off, 1: next line, 2: stride
+  parameter p_num_entries = 4  // Prefetch buffer entries
+)(
+  input  logic          clk,
+  input  logic          reset,
+
+  // Cache side
+
+  input  mem_req_16B_t  cache_reqstream_msg,
+  input  logic          cache_reqstream_val,
+  output logic          cache_reqstream_rdy,
+
+  output mem_resp_16B_t cache_respstream_msg,
+  output logic          cache_respstream_val,
+  input  logic          cache_respstream_rdy,
+
+  // Memory side
+
+  output mem_req_16B_t  mem_reqstream_msg,
+  output logic          mem_reqstream_val,
+  input  logic          mem_reqstream_rdy,
+
+  input  mem_resp_16B_t mem_respstream_msg,
+  input  logic          mem_respstream_val,
+  output logic          mem_respstream_rdy,
+
+  // Statistics
+
+  output logic          pf_issue,
+  output logic          pf_hit,
+  output logic          pf_late,
+  output logic          refill_miss
+);
+
+  localparam c_ptr_nbits = ( p_num_entries > 1 ) ? $clog2( p_num_entries ) : 1;
+
+  localparam PF_OFF       = 0;
+  localparam PF_NEXT_LINE = 1;
+  localparam PF_STRIDE    = 2;
+
+  //----------------------------------------------------------------------
+  // Prefetch buffer
+  //----------------------------------------------------------------------
+
+  localparam ENTRY_FREE  = 2'd0; // unused
+  localparam ENTRY_PEND  = 2'd1; // prefetch in flight
+  localparam ENTRY_READY = 2'd2; // line is in pb_data
+  localparam ENTRY_DEAD  = 2'd3; // in flight, but its line was written back
+
+  logic [1:0]   pb_state [p_num_entries];
+  logic [27:0]  pb_line  [p_num_entries];
+  logic [127:0] pb_data  [p_num_entries];
+
+  // Look up the line of the cache request
+
+  logic [27:0]            req_line;
+  logic                   req_read;
+  logic                   match;
+  logic                   match_ready;
+  logic [c_ptr_nbits-1:0] match_idx;
+
+  assign req_line = cache_reqstream_msg.addr[31:4];
+  assign req_read = ( cache_reqstream_msg.type_ == `VC_MEM_REQ_MSG_TYPE_READ );
+
+  always_comb begin
+    match       = 1'b0;
+    match_ready = 1'b0;
+    match_idx   = '0;
+    for ( int i = 0; i < p_num_entries; i = i + 1 ) begin
+      if ( ( pb_state[i] == ENTRY_PEND || pb_state[i] == ENTRY_READY )
+           && ( pb_line[i] == req_line ) ) begin
+        match       = 1'b1;
+        match_ready = ( pb_state[i] == ENTRY_READY );
+        match_idx   = c_ptr_nbits'(i);
+      end
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Detector
+  //----------------------------------------------------------------------
+  // cand_line is the line to prefetch next, if cand_val
+
+  logic [27:0] last_line;
+  logic [27:0] stride;
+  logic [27:0] delta;
+  logic [27:0] next_cand;
+
+  logic        cand_val;
+  logic [27:0] cand_line;
+
+  assign delta = req_line - last_line;
+
+  always_comb begin
+    if ( p_prefetch == PF_STRIDE && delta == stride && delta != 28'd0 )
+      next_cand = req_line + delta;
+    else
+      next_cand = req_line + 28'd1;
+  end
+
+  // A candidate already in the buffer is dropped. Otherwise it takes a
+  // free entry, or else replaces the ready entry at alloc_ptr.
+
+  logic                   cand_present;
+  logic                   alloc_ok;
+  logic [c_ptr_nbits-1:0] alloc_idx;
+  logic [c_ptr_nbits-1:0] alloc_ptr;
+
+  always_comb begin
+    cand_present = 1'b0;
+    alloc_ok     = ( pb_state[alloc_ptr] == ENTRY_READY );
+    alloc_idx    = alloc_ptr;
+    for ( int i = p_num_entries-1; i >= 0; i = i - 1 ) begin
+      if ( ( pb_state[i] == ENTRY_PEND || pb_state[i] == ENTRY_READY )
+           && ( pb_line[i] == cand_line ) )
+        cand_present = 1'b1;
+      if ( pb_state[i] == ENTRY_FREE ) begin
+        alloc_ok  = 1'b1;
+        alloc_idx = c_ptr_nbits'(i);
+      end
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Queues
+  //----------------------------------------------------------------------
+
+  // Pending cache responses as { local, response }, where the response
+  // is only used if local is set
+
+  logic [$bits(mem_resp_16B_t):0] pend_enq_msg;
+  logic                           pend_enq_val;
+  logic                           pend_enq_rdy;
+
+  logic [$bits(mem_resp_16B_t):0] pend_deq_msg;
+  logic                           pend_deq_val;
+  logic                           pend_deq_rdy;
+
+  logic [1:0]                     pend_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,$bits(mem_resp_16B_t)+1,2) pend_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(pend_num_free_entries),
+
+    .enq_msg (pend_enq_msg),
+    .enq_val (pend_enq_val),
+    .enq_rdy (pend_enq_rdy),
+
+    .deq_msg (pend_deq_msg),
+    .deq_val (pend_deq_val),
+    .deq_rdy (pend_deq_rdy)
+  );
+
+  // Outstanding memory requests as { prefetch, entry }
+
+  logic [c_ptr_nbits:0]           infl_enq_msg;
+  logic                           infl_enq_val;
+  logic                           infl_enq_rdy;
+
+  logic [c_ptr_nbits:0]           infl_deq_msg;
+  logic                           infl_deq_val;
+  logic                           infl_deq_rdy;
+
+  logic [2:0]                     infl_num_free_entries;
+
+  vc_Queue#(`VC_QUEUE_NORMAL,c_ptr_nbits+1,4) infl_queue
+  (
+    .clk     (clk),
+    .reset   (reset),
+    .num_free_entries(infl_num_free_entries),
+
+    .enq_msg (infl_enq_msg),
+    .enq_val (infl_enq_val),
+    .enq_rdy (infl_enq_rdy),
+
+    .deq_msg (infl_deq_msg),
+    .deq_val (infl_deq_val),
+    .deq_rdy (infl_deq_rdy)
+  );
+
+  //----------------------------------------------------------------------
+  // Requests
+  //----------------------------------------------------------------------
+
+  // Refills found in the buffer are answered here, and refills waiting
+  // for their prefetch stall
+
+  logic  local_req;
+  logic  wait_req;
+
+  assign local_req = req_read && match && match_ready;
+  assign wait_req  = req_read && match && !match_ready;
+
+  mem_resp_16B_t local_resp;
+
+  assign local_resp.type_  = `VC_MEM_REQ_MSG_TYPE_READ;
+  assign local_resp.opaque = cache_reqstream_msg.opaque;
+  assign local_resp.test   = 2'b0;
+  assign local_resp.len    = 4'b0;
+  assign local_resp.data   = pb_data[match_idx];
+
+  // A cache request going to memory has priority over a prefetch
+
+  logic  req_to_mem;
+  assign req_to_mem = cache_reqstream_val && !local_req && !wait_req;
+
+  logic  prefetch;
+  assign prefetch = !req_to_mem && cand_val && !cand_present && alloc_ok
+                 && ( p_prefetch != PF_OFF );
+
+  always_comb begin
+    mem_reqstream_val = 1'b0;
+    mem_reqstream_msg = cache_reqstream_msg;
+
+    if ( req_to_mem )
+      mem_reqstream_val = pend_enq_rdy && infl_enq_rdy;
+
+    else if ( prefetch ) begin
+      mem_reqstream_val        = infl_enq_rdy;
+      mem_reqstream_msg        = '0;
+      mem_reqstream_msg.type_  = `VC_MEM_REQ_MSG_TYPE_READ;
+      mem_reqstream_msg.addr   = { cand_line, 4'b0000 };
+    end
+  end
+
+  always_comb begin
+    if ( local_req )
+      cache_reqstream_rdy = pend_enq_rdy;
+    else if ( wait_req )
+      cache_reqstream_rdy = 1'b0;
+    else
+      cache_reqstream_rdy = pend_enq_rdy && infl_enq_rdy && mem_reqstream_rdy;
+  end
+
+  logic  req_go;
+  assign req_go = cache_reqstream_val && cache_reqstream_rdy;
+
+  logic  pf_go;
+  assign pf_go = prefetch && infl_enq_rdy && mem_reqstream_rdy;
+
+  assign pend_enq_val = req_go;
+  assign pend_enq_msg = { local_req, local_resp };
+
+  assign infl_enq_val = ( req_to_mem && req_go ) || pf_go;
+  assign infl_enq_msg = { pf_go, pf_go ? alloc_idx : c_ptr_nbits'(0) };
+
+  //----------------------------------------------------------------------
+  // Responses
+  //----------------------------------------------------------------------
+  // Prefetches fill their entry as they arrive. A response to a cache
+  // request is passed on once every earlier request has its response.
+
+  logic                   pend_local;
+  mem_resp_16B_t          pend_resp;
+
+  assign { pend_local, pend_resp } = pend_deq_msg;
+
+  logic                   infl_pf;
+  logic [c_ptr_nbits-1:0] infl_idx;
+
+  assign { infl_pf, infl_idx } = infl_deq_msg;
+
+  logic fill;
+
+  always_comb begin
+    cache_respstream_val = 1'b0;
+    cache_respstream_msg = pend_resp;
+    mem_respstream_rdy   = 1'b0;
+    pend_deq_rdy         = 1'b0;
+    infl_deq_rdy         = 1'b0;
+    fill                 = 1'b0;
+
+    if ( infl_deq_val && infl_pf ) begin
+      mem_respstream_rdy = 1'b1;
+      infl_deq_rdy       = mem_respstream_val;
+      fill               = mem_respstream_val;
+    end
+
+    if ( pend_deq_val && pend_local ) begin
+      cache_respstream_val = 1'b1;
+      pend_deq_rdy         = cache_respstream_rdy;
+    end
+    else if ( pend_deq_val && infl_deq_val && !infl_pf ) begin
+      cache_respstream_val = mem_respstream_val;
+      cache_respstream_msg = mem_respstream_msg;
+      mem_respstream_rdy   = cache_respstream_rdy;
+      pend_deq_rdy         = mem_respstream_val && cache_respstream_rdy;
+      infl_deq_rdy         = mem_respstream_val && cache_respstream_rdy;
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // State updates
+  //----------------------------------------------------------------------
+
+  logic  invalidate;
+  assign invalidate = req_go && !req_read && match;
+
+  logic  waited;
+
+  always_ff @( posedge clk ) begin
+    if ( reset ) begin
+      for ( int i = 0; i < p_num_entries; i = i + 1 )
+        pb_state[i] <= ENTRY_FREE;
+      alloc_ptr <= '0;
+      cand_val  <= 1'b0;
+      last_line <= '0;
+      stride    <= '0;
+      waited    <= 1'b0;
+    end
+    else begin
+
+      // Prefetch arrived
+
+      if ( fill ) begin
+        pb_data [infl_idx] <= mem_respstream_msg.data;
+        pb_state[infl_idx] <= ( pb_state[infl_idx] == ENTRY_PEND ) ? ENTRY_READY : ENTRY_FREE;
+      end
+
+      // Refill answered here, or writeback of a line in the buffer
+
+      if ( req_go && local_req )
+        pb_state[match_idx] <= ENTRY_FREE;
+
+      if ( invalidate ) begin
+        if ( pb_state[match_idx] == ENTRY_PEND && !( fill && infl_idx == match_idx ) )
+          pb_state[match_idx] <= ENTRY_DEAD;
+        else
+          pb_state[match_idx] <= ENTRY_FREE;
+      end
+
+      // Prefetch sent
+
+      if ( pf_go ) begin
+        pb_state[alloc_idx] <= ENTRY_PEND;
+        pb_line [alloc_idx] <= cand_line;
+        alloc_ptr           <= alloc_idx + 1'b1;
+      end
+
+      // Train the detector on every refill
+
+      if ( req_go && req_read ) begin
+        last_line <= req_line;
+        stride    <= delta;
+        cand_line <= next_cand;
+        cand_val  <= ( p_prefetch != PF_OFF );
+      end
+      else if ( pf_go || ( cand_val && cand_present ) )
+        cand_val  <= 1'b0;
+
+      // Refill waiting for its prefetch
+
+      if ( req_go )
+        waited <= 1'b0;
+      else if ( cache_reqstream_val && wait_req )
+        waited <= 1'b1;
+
+    end
+  end
+
+  //----------------------------------------------------------------------
+  // Statistics
+  //----------------------------------------------------------------------
+
+  assign pf_issue    = pf_go;
+  assign pf_hit      = req_go && local_req;
+  assign pf_late     = req_go && local_req && waited;
+  assign refill_miss = req_go && req_read && !local_req;
+
+  //----------------------------------------------------------------------
+  // Line tracing
+  //----------------------------------------------------------------------
+  // One character per buffer entry: free, in flight, ready or dead
+
+  `ifndef SYNTHESIS
+
+  `VC_TRACE_BEGIN
+  begin
+
+    for ( int i = 0; i < p_num_entries; i = i + 1 ) begin
+      case ( pb_state[i] )
+        ENTRY_FREE:  vc_trace.append_str( trace_str, "." );
+        ENTRY_PEND:  vc_trace.append_str( trace_str, "p" );
+        ENTRY_READY: vc_trace.append_str( trace_str, "r" );
+        default:     vc_trace.append_str( trace_str, "x" );
+      endcase
+    end
+
+  end
+  `VC_TRACE_END
+
+  `endif /* SYNTHESIS */
+
+endmodule
+
+`endif /* LAB3_MEM_CACHE_PREFETCH_V */
@@ -0,0 +1,166 @@
+#=========================================================================
+# cache_model
+#=========================================================================
+# Tag-only model of the N-way set-associative cache in CacheNWay.v, used
+# by CacheNWayFL to set the test field of its responses and by the tests
+# to predict the test fields of the RTL. It tracks which lines are in
+# the cache and the replacement state of every set, but no data.
+#
+# The replacement policies follow the RTL exactly:
+#
+#  - lru:    true LRU, an age per way from 0 (most recently used) to
+#            ways-1 (least recently used).
+#  - plru:   tree pseudo-LRU, ways-1 bits per set. Every bit points to
+#            the half of its subtree to evict from (0 for the lower
+#            ways), and an access points the bits on its path away from
+#            its way.
+#  - random: the low bits of a 16-bit LFSR shared by all sets, which
+#            steps on every refill, so the victims only depend on the
+#            order of the requests and not on their timing.
+#  - srrip:  static re-reference interval prediction with a 2-bit RRPV
+#            per way. A refilled line gets 2 and a hit 0. The victim is
+#            the first way with the largest RRPV, and a refill ages the
+#            other ways of the set so that the largest becomes 3.
+#
+# An invalid way is always chosen over the policy victim, the lowest one
+# first. Init requests allocate their line like a write, but always
+# report a miss in the test field like CacheAlt.
+
+repl_lru    = 0
+repl_plru   = 1
+repl_random = 2
+repl_srrip  = 3
+
+repl_names = { "lru" : repl_lru, "plru" : repl_plru, "random" : repl_random,
+               "srrip" : repl_srrip }
+
+type_in = 2
+
+lfsr_reset = 0x0001
+
+#-------------------------------------------------------------------------
+# lfsr_next
+#-------------------------------------------------------------------------
+# Fibonacci LFSR with taps 16, 14, 13, 11 (maximal length).
+
+def lfsr_next( x ):
+  fb = ( ( x >> 15 ) ^ ( x >> 13 ) ^ ( x >> 12 ) ^ ( x >> 10 ) ) & 1
+  return ( ( x << 1 ) | fb ) & 0xffff
+
+#-------------------------------------------------------------------------
+# CacheModel
+#-------------------------------------------------------------------------
+
+class CacheModel:
+
+  def __init__( s, num_sets=8, num_ways=2, repl=repl_lru, num_banks=1 ):
+    assert num_sets  & ( num_sets-1 ) == 0
+    assert num_ways in [ 1, 2, 4, 8 ]
+    assert num_banks in [ 1, 4 ]
+
+    s.num_sets  = num_sets
+    s.num_ways  = num_ways
+    s.repl      = repl
+    s.line_bits = 4 + ( 2 if num_banks == 4 else 0 )
+    s.idx_bits  = num_sets.bit_length() - 1
+
+    s.tags  = [ [ None ] * num_ways for _ in range( num_sets ) ]
+    s.lfsr  = lfsr_reset
+
+    if repl == repl_lru:
+      s.state = [ list( range( num_ways ) ) for _ in range( num_sets ) ]
+    elif repl == repl_plru:
+      s.state = [ [ 0 ] * ( num_ways-1 ) for _ in range( num_sets ) ]
+    elif repl == repl_srrip:
+      s.state = [ [ 3 ] * num_ways for _ in range( num_sets ) ]
+    elif repl == repl_random:
+      s.state = None
+    else:
+      raise ValueError( f"unknown replacement policy {repl}" )
+
+  # Access the line of addr and return whether it hit. The test field of
+  # the response is hit and not an init.
+
+  def access( s, addr ):
+    line = ( addr & 0xffffffff ) >> s.line_bits
+    idx  = line & ( s.num_sets-1 )
+    tag  = line >> s.idx_bits
+    tags = s.tags[idx]
+
+    hit = tag in tags
+    if hit:
+      way = tags.index( tag )
+    else:
+      way = s.victim( idx )
+      tags[way] = tag
+
+    s.touch( idx, way, hit )
+    return hit
+
+  def victim( s, idx ):
+    if None in s.tags[idx]:
+      return s.tags[idx].index( None )
+
+    state = s.state[idx] if s.state is not None else None
+
+    if s.repl == repl_lru:
+      return state.index( s.num_ways-1 )
+
+    elif s.repl == repl_plru:
+      node = 0
+      while node < s.num_ways-1:
+        node = 2*node + 1 + state[node]
+      return node - ( s.num_ways-1 )
+
+    elif s.repl == repl_random:
+      return s.lfsr & ( s.num_ways-1 )
+
+    else:
+      return state.index( max( state ) )
+
+  def touch( s, idx, way, hit ):
+    state = s.state[idx] if s.state is not None else None
+
+    if s.repl == repl_lru:
+      age = state[way]
+      for w in range( s.num_ways ):
+        if state[w] < age:
+          state[w] += 1
+      state[way] = 0
+
+    elif s.repl == repl_plru:
+      node = 0
+      size = s.num_ways
+      base = 0
+      while size > 1:
+        size //= 2
+        upper = way >= base + size
+        state[node] = 0 if upper else 1
+        if upper:
+          base += size
+        node = 2*node + 1 + upper
+
+    elif s.repl == repl_random:
+      if not hit:
+        s.lfsr = lfsr_next( s.lfsr )
+
+    else:
+      if hit:
+        state[way] = 0
+      else:
+        age = 3 - max( state )
+        for w in range( s.num_ways ):
+          state[w] += age
+        state[way] = 2
+
+#-------------------------------------------------------------------------
+# predict_test_fields
+#-------------------------------------------------------------------------
+# Test field of the response to every request of a trace of request
+# types and addresses, as the RTL would set it.
+
+def predict_test_fields( types, addrs, num_sets=8, num_ways=2, repl=repl_lru,
+                         num_banks=1 ):
+  model = CacheModel( num_sets, num_ways, repl, num_banks )
+  return [ int( model.access( addr ) and t != type_in )
+           for t, addr in zip( types, addrs ) ]
@@ -0,0 +1,308 @@
+#=========================================================================
+# cache_sim
+#=========================================================================
+# Trace-driven cache model for sweeping cache geometries without RTL.
+# CacheBase is a direct-mapped cache of 16 lines of 16B and CacheAlt a
+# two-way cache of 8 sets of 16B lines with LRU replacement. Both are
+# write-back and write-allocate, and any other geometry means editing
+# the Verilog. Here a trace of ( type, address ) pairs is replayed
+# across every combination of cache size, line size, associativity and
+# write policy at once, and the hit rate and memory traffic of each is
+# reported:
+#
+#   python -m lab3_mem.cache_sim trace.txt
+#   python -m lab3_mem.cache_sim --msgs random_mixed_locality_msgs
+#
+# A trace file has one "rd|wr|in <hex address>" access per line, like
+# the request columns of the CacheFL_test tables. --msgs takes the
+# requests of one of the CacheFL_test message functions instead.
+#
+# The model is LRU, for which an access hits in an A-way cache exactly
+# if fewer than A other lines of its set have been accessed since the
+# previous access to its line (the stack distance). So a single
+# computation of the stack distances for a line size and number of sets
+# gives the hits of every associativity. The stack distances are
+# computed for the whole trace at once with NumPy, by counting the
+# distinct lines in between the accesses to a line with a merge-sort
+# tree, in O(n log^2 n).
+#
+# Policies:
+#
+#  - wb: write-back, write-allocate like CacheBase and CacheAlt. A line
+#    is written back when it is evicted dirty. Dirty lines left in the
+#    cache at the end of the trace are not counted.
+#  - wt: write-through, write-allocate. Every write sends its word to
+#    memory and no line is ever dirty.
+#
+# Write-no-allocate is not an LRU stack algorithm (a write miss in a
+# small cache leaves the LRU order alone while the same write hits and
+# updates it in a larger one), so it cannot be swept this way.
+#
+# An init request allocates its line like a read without fetching it,
+# and is not counted as an access.
+
+import sys
+import argparse
+
+from collections import namedtuple
+
+import numpy as np
+
+type_rd = 0
+type_wr = 1
+type_in = 2
+
+type_names = { "rd" : type_rd, "wr" : type_wr, "in" : type_in }
+
+policies = [ "wb", "wt" ]
+
+#-------------------------------------------------------------------------
+# Traces
+#-------------------------------------------------------------------------
+# A trace is a pair of arrays of request types and addresses.
+
+def load_trace( filename ):
+  names, addrs = np.loadtxt( filename, dtype=str, ndmin=2, comments="#" ).T
+  types = np.array( [ type_names[ x ] for x in names ], dtype=np.int64 )
+  addrs = np.array( [ int( x, 16 ) for x in addrs ], dtype=np.int64 )
+  return types, addrs
+
+def save_trace( filename, types, addrs ):
+  names = { v: k for k, v in type_names.items() }
+  with open( filename, "w" ) as f:
+    for t, addr in zip( types, addrs ):
+      f.write( f"{names[ int( t ) ]} {int( addr ):08x}\n" )
+
+# Requests of a CacheFL_test message list, which alternates requests
+# and responses
+
+def from_msgs( msgs ):
+  types = np.array( [ int( m.type_ ) for m in msgs[::2] ], dtype=np.int64 )
+  addrs = np.array( [ int( m.addr  ) for m in msgs[::2] ], dtype=np.int64 )
+  return types, addrs
+
+#-------------------------------------------------------------------------
+# count_above
+#-------------------------------------------------------------------------
+# For every query q, count the j < xs[q] with values[j] > ts[q], where
+# values and ts are in [0, len( values )].
+#
+# The prefix [0, x) is the union of one aligned block of 2^l positions
+# for every bit l set in x. Sorting the values by ( block, value ) for
+# every block size turns counting in one block into a binary search,
+# done for all queries at once. The block ends where the next one
+# starts, at the position of its last element plus one.
+
+def count_above( values, xs, ts ):
+  n      = len( values )
+  m      = n + 1
+  blocks = np.arange( n, dtype=np.int64 )
+  counts = np.zeros( len( xs ), dtype=np.int64 )
+
+  for l in range( n.bit_length() ):
+    keys  = np.sort( ( blocks >> l ) * m + values )
+    take  = ( ( xs >> l ) & 1 ) == 1
+    block = ( xs[take] >> l ) - 1
+    lo    = np.searchsorted( keys, block * m + ts[take], side="right" )
+    counts[take] += ( ( block + 1 ) << l ) - lo
+
+  return counts
+
+#-------------------------------------------------------------------------
+# stack_distances
+#-------------------------------------------------------------------------
+# Return the LRU stack distance of every access within its set and its
+# reach, the distance of the next access to its line or, for the last
+# access to a line, the number of other lines of the set accessed after
+# it. The line is evicted before its next access or the end of the trace
+# in every cache with fewer ways than its reach. Both are capped at
+# max_ways, a miss for every associativity up to max_ways.
+#
+# They are in the order of the permutation of the trace ordering the
+# accesses by set and then time, which is returned as well. A line maps
+# to a single set, so a stable sort by line of the reordered trace lists
+# the accesses to every line in time order, which gives the previous and
+# next access to the line.
+
+def stack_distances( lines, nsets, max_ways ):
+  n     = len( lines )
+  sets  = lines & ( nsets-1 )
+  order = np.argsort( sets, kind="stable" )
+  lines = lines[order]
+  sets  = sets[order]
+
+  by_line = np.argsort( lines, kind="stable" )
+  same    = lines[ by_line[1:] ] == lines[ by_line[:-1] ]
+
+  prev = np.full( n, -1, dtype=np.int64 )
+  nxt  = np.full( n,  n, dtype=np.int64 )
+  prev[ by_line[1:][same]  ] = by_line[:-1][same]
+  nxt[ by_line[:-1][same] ]  = by_line[1:][same]
+
+  # Distinct lines since the previous access: the accesses in between
+  # that are the last to their line before this one
+
+  pos   = np.arange( n, dtype=np.int64 )
+  reuse = prev >= 0
+  dist  = np.full( n, max_ways, dtype=np.int64 )
+  i, p  = pos[reuse], prev[reuse]
+  count = count_above( nxt, np.concatenate( ( i, p + 1 ) ), np.concatenate( ( i, i ) ) )
+  dist[reuse] = np.minimum( max_ways, count[ : len( i ) ] - count[ len( i ) : ] )
+
+  # Reach of the last access to every line: the last accesses to the
+  # other lines further down its set
+
+  last  = nxt == n
+  nlast = np.concatenate( ( [ 0 ], np.cumsum( last ) ) )
+  end   = np.searchsorted( sets, sets, side="right" )
+  reach = dist[ np.minimum( nxt, n-1 ) ]
+  reach[last] = np.minimum( max_ways, nlast[ end[last] ] - nlast[ pos[last] + 1 ] )
+
+  return dist, reach, order, by_line, nxt
+
+#-------------------------------------------------------------------------
+# writebacks
+#-------------------------------------------------------------------------
+# Count the writebacks of a write-back cache for every associativity up
+# to max_ways. A line is dirty after an access if it has been written
+# since it was last brought in, i.e., no access since the last write to
+# it missed. So an access is followed by a writeback for every
+# associativity A with g < A <= r, where g is the largest stack distance
+# since the last write to its line (-1 for a write) and r its reach.
+
+def writebacks( dist, reach, is_write, by_line, nxt, max_ways ):
+  n = len( dist )
+
+  # Largest distance since the last write, in line order. Every write
+  # starts a new segment, and so does every line, and a running maximum
+  # over the distances offset by the segment number stays within the
+  # segment. Accesses to a line never written are never dirty.
+
+  line_start = np.ones( n, dtype=bool )
+  line_start[1:] = nxt[ by_line[:-1] ] != by_line[1:]
+
+  writes = is_write[by_line]
+  start  = line_start | writes
+  seg    = np.cumsum( start )
+  dirty  = writes[ np.flatnonzero( start ) ][ seg - 1 ]
+
+  base  = seg * ( max_ways + 2 )
+  since = np.maximum.accumulate( base + np.where( writes, -1, dist[by_line] ) + 1 ) - base - 1
+
+  g = np.full( n, max_ways + 1, dtype=np.int64 )
+  g[by_line] = np.where( dirty, since, max_ways + 1 )
+
+  lo = np.maximum( g + 1, 1 )
+  ok = lo <= reach
+
+  delta = np.zeros( max_ways + 2, dtype=np.int64 )
+  np.add.at( delta, lo[ok],         1 )
+  np.add.at( delta, reach[ok] + 1, -1 )
+  return np.cumsum( delta )[ : max_ways + 1 ]
+
+#-------------------------------------------------------------------------
+# sweep
+#-------------------------------------------------------------------------
+# Replay the trace across every valid combination of the given sizes,
+# line sizes (bytes), associativities and policies. A combination is
+# valid if the line size and the number of sets are powers of two.
+
+Result = namedtuple( "Result", "size line_bytes ways policy naccesses nhits "
+                               "hit_rate nwritebacks refill_bytes write_bytes" )
+
+def sweep( types, addrs, sizes, line_sizes, ways, policies=policies ):
+  types = np.asarray( types, dtype=np.int64 )
+  addrs = np.asarray( addrs, dtype=np.int64 ) & 0xffffffff
+
+  naccesses = int( np.count_nonzero( types != type_in ) )
+  nwrites   = int( np.count_nonzero( types == type_wr ) )
+  max_ways  = max( ways )
+
+  results = []
+  for line_bytes in line_sizes:
+    lines = addrs >> ( line_bytes.bit_length() - 1 )
+
+    nsets_list = sorted( { size // ( line_bytes * w ) for size in sizes for w in ways
+                           if _valid( size, line_bytes, w ) } )
+
+    for nsets in nsets_list:
+      dist, reach, order, by_line, nxt = stack_distances( lines, nsets, max_ways )
+
+      counted = types[order] != type_in
+      hits    = np.cumsum( np.bincount( dist[counted], minlength=max_ways+1 ) )
+      wbs     = writebacks( dist, reach, types[order] == type_wr, by_line, nxt, max_ways )
+
+      for size in sizes:
+        for w in ways:
+          if not _valid( size, line_bytes, w ) or size // ( line_bytes * w ) != nsets:
+            continue
+
+          nhits   = int( hits[w-1] )
+          nmisses = naccesses - nhits
+
+          for policy in policies:
+            if policy == "wb":
+              nwbs        = int( wbs[w] )
+              write_bytes = nwbs * line_bytes
+            else:
+              nwbs        = 0
+              write_bytes = nwrites * 4
+
+            results.append( Result( size, line_bytes, w, policy, naccesses, nhits,
+                                    nhits / max( naccesses, 1 ), nwbs,
+                                    nmisses * line_bytes, write_bytes ) )
+
+  results.sort( key=lambda r: ( r.policy, r.line_bytes, r.ways, r.size ) )
+  return results
+
+def _valid( size, line_bytes, ways ):
+  nsets = size // ( line_bytes * ways )
+  return nsets >= 1 and nsets * line_bytes * ways == size \
+     and nsets & ( nsets-1 ) == 0 and line_bytes & ( line_bytes-1 ) == 0
+
+#-------------------------------------------------------------------------
+# format_results
+#-------------------------------------------------------------------------
+
+def format_results( results ):
+  lines = [ "policy   size  line  ways  hit rate  writebacks  refill B   write B" ]
+  for r in results:
+    lines.append( f"{r.policy:>6} {r.size:>6d} {r.line_bytes:>5d} {r.ways:>5d}"
+                  f" {r.hit_rate:>9.4f} {r.nwritebacks:>11d} {r.refill_bytes:>9d}"
+                  f" {r.write_bytes:>9d}" )
+  return "\n".join( lines )
+
+#-------------------------------------------------------------------------
+# main
+#-------------------------------------------------------------------------
+
+def _ints( text ):
+  return [ int( x, 0 ) for x in text.split( "," ) ]
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description="sweep cache geometries over a trace" )
+
+  p.add_argument( "trace", nargs="?" )
+  p.add_argument( "--msgs", help="CacheFL_test message function to use as the trace" )
+  p.add_argument( "--sizes",  type=_ints, default=[ 256, 512, 1024, 2048, 4096, 8192, 16384 ] )
+  p.add_argument( "--lines",  type=_ints, default=[ 16, 32, 64 ] )
+  p.add_argument( "--ways",   type=_ints, default=[ 1, 2, 4, 8 ] )
+  p.add_argument( "--policy", choices=policies, action="append" )
+
+  opts = p.parse_args( argv )
+
+  if opts.msgs:
+    from lab3_mem.test import CacheFL_test
+    types, addrs = from_msgs( getattr( CacheFL_test, opts.msgs )() )
+  elif opts.trace:
+    types, addrs = load_trace( opts.trace )
+  else:
+    p.error( "give a trace file or --msgs" )
+
+  results = sweep( types, addrs, opts.sizes, opts.lines, opts.ways,
+                   opts.policy or policies )
+  print( format_results( results ) )
+  return 0
+
+if __name__ == "__main__":
+  sys.exit( main() )
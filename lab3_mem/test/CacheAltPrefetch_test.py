@@ -0,0 +1,102 @@
+#=========================================================================
+# CacheAltPrefetch_test
+#=========================================================================
+# Run the CacheFL_test tables on CacheAlt with each prefetcher, and count
+# the prefetcher statistics on the streaming workloads. The prefetcher
+# sits below the cache, so the cache sees the same hits and misses with
+# or without it and only the refills that go to memory change.
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import mk_test_case_table
+
+from common import probe
+
+from lab3_mem.test import harness
+from lab3_mem.test.harness import req, resp, run_test
+from lab3_mem.test.CacheFL_test import test_case_table_generic, test_case_table_random
+from lab3_mem.test.CacheFL_test import test_case_table_bank, cmp_wo_test_field
+from lab3_mem.test.CacheFL_test import random_unit_stride_msgs, random_stride_msgs, data_1KB
+
+from lab3_mem.CacheAltPrefetch import CacheAltPrefetch
+
+prefetch_modes = [ "off", "next_line", "stride" ]
+
+#-------------------------------------------------------------------------
+# Functional Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "prefetch", prefetch_modes )
+@pytest.mark.parametrize( **test_case_table_generic )
+def test_generic( test_params, prefetch, cmdline_opts ):
+  run_test( CacheAltPrefetch( prefetch ), test_params, cmdline_opts, cmp_wo_test_field )
+
+@pytest.mark.parametrize( "prefetch", prefetch_modes )
+@pytest.mark.parametrize( **test_case_table_random )
+def test_random( test_params, prefetch, cmdline_opts ):
+  run_test( CacheAltPrefetch( prefetch ), test_params, cmdline_opts, cmp_wo_test_field )
+
+@pytest.mark.parametrize( "prefetch", [ "next_line", "stride" ] )
+@pytest.mark.parametrize( **test_case_table_bank )
+def test_bank( test_params, prefetch, cmdline_opts ):
+  run_test( CacheAltPrefetch( prefetch, num_banks=4 ), test_params, cmdline_opts, cmp_wo_test_field )
+
+#-------------------------------------------------------------------------
+# Test Case for Random Line Stride
+#-------------------------------------------------------------------------
+# random_stride_msgs with a stride of two lines, so every access is to a
+# new line and the next line is never used.
+
+def random_line_stride_msgs():
+  return random_stride_msgs( stride=8 )
+
+#-------------------------------------------------------------------------
+# Statistics
+#-------------------------------------------------------------------------
+
+# Counts the prefetcher statistics pulses like MemoTestHarness
+
+def count_prefetch_stats( s ):
+  s.stats = { "issue" : 0, "hit" : 0, "late" : 0, "miss" : 0 }
+
+  @update_ff
+  def up_stats():
+    if not s.reset:
+      s.stats[ "issue" ] += int( s.cache.pf_issue    )
+      s.stats[ "hit"   ] += int( s.cache.pf_hit      )
+      s.stats[ "late"  ] += int( s.cache.pf_late     )
+      s.stats[ "miss"  ] += int( s.cache.refill_miss )
+
+# Each row lists the prefetchers that should remove at least half of the
+# refills that go to memory
+
+stats_test_case_table = mk_test_case_table([
+  (                          "msg_func                 mem_data_func stall lat src sink useful"),
+  [ "random_unit_stride",     random_unit_stride_msgs, data_1KB,     0.0,  0,  0,  0,   ( "next_line", "stride" ) ],
+  [ "random_unit_stride_lat", random_unit_stride_msgs, data_1KB,     0.0,  10, 0,  0,   ( "next_line", "stride" ) ],
+  [ "random_stride",          random_stride_msgs,      data_1KB,     0.0,  0,  0,  0,   ( "next_line", "stride" ) ],
+  [ "random_line_stride",     random_line_stride_msgs, data_1KB,     0.0,  0,  0,  0,   ( "stride",           ) ],
+])
+
+@pytest.mark.parametrize( **stats_test_case_table )
+def test_stats( test_params, cmdline_opts ):
+
+  stats = {}
+  for prefetch in prefetch_modes:
+    th = probe.run_probe( harness, count_prefetch_stats, run_test,
+                          CacheAltPrefetch( prefetch ), test_params, cmdline_opts, cmp_wo_test_field )
+    stats[ prefetch ] = th.stats
+
+  # Without the prefetcher every refill goes to memory
+
+  refills = stats[ "off" ][ "miss" ]
+  assert stats[ "off" ] == { "issue" : 0, "hit" : 0, "late" : 0, "miss" : refills }
+
+  for prefetch in prefetch_modes:
+    s = stats[ prefetch ]
+    assert s[ "hit" ] + s[ "miss" ] == refills
+    assert s[ "late" ] <= s[ "hit" ] <= s[ "issue" ]
+
+  for prefetch in test_params.useful:
+    assert 2*stats[ prefetch ][ "miss" ] <= refills
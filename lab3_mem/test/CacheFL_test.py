@@ -4,17 +4,17 @@
 
 import pytest
 
-from random import seed, randint
+from functools import lru_cache
+from random import Random
 
 from pymtl3 import *
 from pymtl3.stdlib.mem        import MemMsgType
 from pymtl3.stdlib.test_utils import mk_test_case_table
 
-from lab3_mem.test.harness import req, resp, run_test
+from lab3_mem.test.harness import req, resp
+from lab3_mem.test         import mem_load
 from lab3_mem.CacheFL      import CacheFL
 
-seed(0xa4e28cc2)
-
 #-------------------------------------------------------------------------
 # cmp_wo_test_field
 #-------------------------------------------------------------------------
@@ -83,10 +83,10 @@ def data_512B():
 # 1024B of random data
 
 def data_random():
-  seed(0xdeadbeef)
+  rng  = Random( 0xdeadbeef )
   data = []
   for i in range(256):
-    data.extend([0x00001000+i*4,randint(0,0xffffffff)])
+    data.extend([0x00001000+i*4,rng.randint(0,0xffffffff)])
   return data
 
 #----------------------------------------------------------------------
@@ -821,7 +821,7 @@ test_case_table_generic = mk_test_case_table([
 
 @pytest.mark.parametrize( **test_case_table_generic )
 def test_generic( test_params, cmdline_opts ):
-  run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
+  mem_load.run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
 
 #-------------------------------------------------------------------------
 # Test Case with Random Addresses and Data
@@ -888,10 +888,17 @@ def data_1KB():
 # LAB TASK: Add random test cases
 # ''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 
+# Each random test case function draws from its own seeded generator, so
+# its messages do not depend on which tests happened to run before it,
+# and the result is memoized per seed since several rows (and the
+# CacheBase/CacheAlt tests) share the same function.
+
 #-------------------------------------------------------------------------
 # Test Case for Random Reads
 #-------------------------------------------------------------------------
-def random_read_msgs():
+@lru_cache( maxsize=None )
+def random_read_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
 
   # Create list of 100 random request messages with the corresponding
   # correct response message.
@@ -901,7 +908,7 @@ def random_read_msgs():
 
     # Choose a random index to read
 
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
 
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -922,7 +929,9 @@ def random_read_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Writes
 #---------------------------------------------------------------------------
-def random_write_msgs():
+@lru_cache( maxsize=None )
+def random_write_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
 
   # Create list of 100 random request messages with the corresponding
   # correct response message.
@@ -933,7 +942,7 @@ def random_write_msgs():
 
     # Choose a random index to read
 
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
 
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -942,7 +951,7 @@ def random_write_msgs():
 
     addr = 0x00001000+idx*4
     data = 0xabcd1000+idx*4
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
 
     # Create a request/response pair.
 
@@ -956,7 +965,9 @@ def random_write_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Reads and Writes
 #---------------------------------------------------------------------------
-def random_rw_msgs():
+@lru_cache( maxsize=None )
+def random_rw_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
 
   # Create list of 100 random request messages with the corresponding
   # correct response message.
@@ -968,10 +979,10 @@ def random_rw_msgs():
 
     # Choose a random index to read
 
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
 
     # Choose read or write
-    is_read = randint(0,1)
+    is_read = rng.randint(0,1)
 
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -980,7 +991,7 @@ def random_rw_msgs():
 
     addr = 0x00001000+idx*4
     data = 0xabcd1000+idx*4
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
 
     # Create a request/response pair.
 
@@ -999,7 +1010,9 @@ def random_rw_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Mixed Request
 #---------------------------------------------------------------------------
-def random_simple_read_msgs():
+@lru_cache( maxsize=None )
+def random_simple_read_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
 
   # Create list of 100 random request messages with the corresponding
   # correct response message.
@@ -1008,7 +1021,7 @@ def random_simple_read_msgs():
 
   for i in range(100):
     # Choose a random index to read
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
     # Choose read or write
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -1027,17 +1040,19 @@ def random_simple_read_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Mixed Read Write Request
 #---------------------------------------------------------------------------
-def random_simple_rw_msgs():
+@lru_cache( maxsize=None )
+def random_simple_rw_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
   # Create list of 100 random request messages with the corresponding
   # correct response message.
   msgs = []
   mem = data_1KB()
   for i in range(100):
     # Choose a random index to read
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
 
     # Choose read or write
-    is_read = randint(0,1)
+    is_read = rng.randint(0,1)
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
     # the base address which is 0x00001000. We can figure out the correct
@@ -1045,7 +1060,7 @@ def random_simple_rw_msgs():
     addr = 0x00001000+idx*4
     data = 0xabcd1000 + idx*4
 
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
     # Create a request/response pair.
     if is_read:
       msgs.extend([
@@ -1061,7 +1076,9 @@ def random_simple_rw_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Full Request
 #---------------------------------------------------------------------------
-def random_full_msgs():
+@lru_cache( maxsize=None )
+def random_full_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
   # Create list of 200 random request messages with the corresponding
   # correct response message.
   msgs = []
@@ -1069,10 +1086,10 @@ def random_full_msgs():
 
   for i in range(200):
     # Choose a random index to read
-    idx = randint(0,256)
+    idx = rng.randint(0,255)
     
     # Choose read or write
-    is_read = randint(0,1)
+    is_read = rng.randint(0,1)
     
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -1080,7 +1097,7 @@ def random_full_msgs():
     # data from the address.
     addr = 0x00001000+idx*4
     data = 0xabcd1000 + idx*4
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
    
     # Create a request/response pair.
     if is_read:
@@ -1097,7 +1114,9 @@ def random_full_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Unit Stride
 #---------------------------------------------------------------------------
-def random_unit_stride_msgs():
+@lru_cache( maxsize=None )
+def random_unit_stride_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
   # Create list of 200 random request messages with the corresponding
   # correct response message.
   msgs = []
@@ -1107,14 +1126,14 @@ def random_unit_stride_msgs():
     # Choose a random index to read
     idx = i % 256
     # Choose read or write
-    is_read = randint(0,1)
+    is_read = rng.randint(0,1)
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
     # the base address which is 0x00001000. We can figure out the correct
     # data from the address.
     addr = 0x00001000+idx*4
     data = 0xabcd1000 + idx*4
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
 
     # Create a request/response pair.
     if is_read:
@@ -1131,19 +1150,22 @@ def random_unit_stride_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Stride
 #---------------------------------------------------------------------------
-def random_stride_msgs():
+# Accesses words that are stride words apart.
+
+@lru_cache( maxsize=None )
+def random_stride_msgs( seed=0xa4e28cc2, stride=4 ):
+  rng = Random( seed )
   # Create list of 100 random request messages with the corresponding
   # correct response message.
   msgs = []
   mem = data_1KB()
-  stride = 4
 
   for i in range(100):
     # Choose a random index to read
     idx = (i * stride) % 256
      
     # Choose read or write
-    is_read = randint(0,1)
+    is_read = rng.randint(0,1)
      
     # Create address and data. Notice how we turn the random index into
     # an actual address. We multiply the index by four and then add it to
@@ -1151,7 +1173,7 @@ def random_stride_msgs():
     # data from the address.
     addr = 0x00001000+idx*4
     data = 0xabcd1000 + idx*4
-    new_data = randint(0,256) + 0xabcd1000
+    new_data = rng.randint(0,256) + 0xabcd1000
     
     # Create a request/response pair.
     if is_read:
@@ -1168,20 +1190,22 @@ def random_stride_msgs():
 #---------------------------------------------------------------------------
 # Test Case for Random Mixed Locality
 #---------------------------------------------------------------------------
-def random_mixed_locality_msgs():
+@lru_cache( maxsize=None )
+def random_mixed_locality_msgs( seed=0xa4e28cc2 ):
+  rng = Random( seed )
   # Create list of 100 random request messages with the corresponding
   # correct response message.
   msgs = []
   mem = data_1KB()
-  shared_indices = [randint(0,256) for _ in range(4)]
+  shared_indices = [rng.randint(0,255) for _ in range(4)]
   
   for idx in shared_indices:
-    mem[idx*2 + 1] = randint(0,256) + 0xabcd1000
+    mem[idx*2 + 1] = rng.randint(0,256) + 0xabcd1000
     for i in range(100):
       # Choose a random index to read
       idx = i % 256
       # Choose read or write
-      is_read = randint(0,1)
+      is_read = rng.randint(0,1)
 
       # Create address and data. Notice how we turn the random index into
       # an actual address. We multiply the index by four and then add it to
@@ -1189,7 +1213,7 @@ def random_mixed_locality_msgs():
       # data from the address.
       addr = 0x00001000+idx*4
       data = 0xabcd1000 + idx*4
-      new_data = randint(0,256) + 0xabcd1000
+      new_data = rng.randint(0,256) + 0xabcd1000
 
       # Create a request/response pair.
       if is_read:
@@ -1224,7 +1248,7 @@ test_case_table_random = mk_test_case_table([
 
 @pytest.mark.parametrize( **test_case_table_random )
 def test_random( test_params, cmdline_opts ):
-  run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
+  mem_load.run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
 
 #-------------------------------------------------------------------------
 # Test Cases for Direct Mapped
@@ -1287,7 +1311,7 @@ test_case_table_dmap = mk_test_case_table([
 
 @pytest.mark.parametrize( **test_case_table_dmap )
 def test_dmap( test_params, cmdline_opts ):
-  run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
+  mem_load.run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
 
 #-------------------------------------------------------------------------
 # Test Cases for Set Associative
@@ -1323,7 +1347,7 @@ test_case_table_sassoc = mk_test_case_table([
 
 @pytest.mark.parametrize( **test_case_table_sassoc )
 def test_sassoc( test_params, cmdline_opts ):
-  run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
+  mem_load.run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
 
 #-------------------------------------------------------------------------
 # Banked cache test
@@ -1402,4 +1426,4 @@ test_case_table_bank = mk_test_case_table([
 
 @pytest.mark.parametrize( **test_case_table_bank )
 def test_bank( test_params, cmdline_opts ):
-  run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
+  mem_load.run_test( CacheFL(), test_params, cmdline_opts, cmp_wo_test_field )
@@ -0,0 +1,135 @@
+#=========================================================================
+# CacheNB_test
+#=========================================================================
+# Run the CacheFL_test tables on the non-blocking cache with several
+# numbers of MSHRs. Responses can come back out of order, so every
+# request gets its own opaque and the sink matches responses to requests
+# by opaque instead of by position. The test field is not checked since
+# whether a request hits depends on the timing of the refills.
+
+from random import Random
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.mem import MemMsgType
+
+from common import probe
+from common.StreamLazyFL import StreamSinkLazyFL
+
+from lab3_mem.test import harness
+from lab3_mem.test.harness import req, resp, run_test
+from lab3_mem.test.cache_utils import with_opaques
+from lab3_mem.test.CacheFL_test import test_case_table_generic, test_case_table_random
+from lab3_mem.test.CacheFL_test import test_case_table_bank, data_1KB
+
+from lab3_mem.CacheNB import CacheNB
+
+configs = [
+  # sets ways repl   mshrs targets
+  (  8,  2,  "lru",  1,    1 ),
+  (  8,  2,  "lru",  4,    4 ),
+  ( 16,  1,  "lru",  2,    4 ),
+  (  4,  4,  "plru", 8,    2 ),
+]
+
+#-------------------------------------------------------------------------
+# UnorderedSinkFL
+#-------------------------------------------------------------------------
+# Sink of the test harness that accepts responses in any order
+
+class UnorderedSinkFL( StreamSinkLazyFL ):
+
+  def construct( s, *args, **kwargs ):
+    kwargs[ "ordered" ] = False
+    super().construct( *args, **kwargs )
+
+@pytest.fixture( autouse=True )
+def unordered_sink( monkeypatch ):
+  monkeypatch.setattr( harness, "StreamSinkFL", UnorderedSinkFL )
+
+# Check the opaque and the data of reads
+
+def cmp_opaque( msg, ref ):
+  if msg.type_ != ref.type_ or msg.opaque != ref.opaque:
+    return False
+  return msg.type_ != MemMsgType.READ or msg.data == ref.data
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "num_sets, num_ways, repl, num_mshrs, num_targets", configs )
+@pytest.mark.parametrize( **test_case_table_generic )
+def test_generic( test_params, num_sets, num_ways, repl, num_mshrs, num_targets, cmdline_opts ):
+  run_test( CacheNB( num_sets, num_ways, repl, num_mshrs, num_targets ),
+            with_opaques( test_params ), cmdline_opts, cmp_opaque )
+
+@pytest.mark.parametrize( "num_sets, num_ways, repl, num_mshrs, num_targets", configs )
+@pytest.mark.parametrize( **test_case_table_random )
+def test_random( test_params, num_sets, num_ways, repl, num_mshrs, num_targets, cmdline_opts ):
+  run_test( CacheNB( num_sets, num_ways, repl, num_mshrs, num_targets ),
+            with_opaques( test_params ), cmdline_opts, cmp_opaque )
+
+@pytest.mark.parametrize( **test_case_table_bank )
+def test_bank( test_params, cmdline_opts ):
+  run_test( CacheNB( num_banks=4 ), with_opaques( test_params ), cmdline_opts, cmp_opaque )
+
+#-------------------------------------------------------------------------
+# Response order
+#-------------------------------------------------------------------------
+# Like random_mixed_locality_msgs, but the accesses to a few hot words
+# are interleaved with accesses to random words of the whole 1KB, so
+# hits to the hot lines come in while misses are outstanding.
+
+def hot_cold_msgs( seed=0xa4e28cc2, nmsgs=200 ):
+  rng = Random( seed )
+  msgs = []
+  mem = data_1KB()
+  hot_indices = [ rng.randint(0,255) for _ in range(4) ]
+
+  for i in range(nmsgs):
+    if rng.randint(0,1):
+      idx = rng.choice( hot_indices )
+    else:
+      idx = rng.randint(0,255)
+
+    addr = 0x00001000+idx*4
+    new_data = rng.randint(0,256) + 0xabcd1000
+
+    if rng.randint(0,1):
+      msgs.extend([
+        req( 'rd', i & 0xff, addr, 0, 0 ), resp( 'rd', i & 0xff, 0, 0, mem[idx*2 + 1] ),
+      ])
+    else:
+      msgs.extend([
+        req( 'wr', i & 0xff, addr, 0, new_data ), resp( 'wr', i & 0xff, 0, 0, 0 ),
+      ])
+      mem[2*idx + 1] = new_data
+  return msgs
+
+# Records the opaque of every response the cache returns
+
+def record_order( s ):
+  s.opaques = []
+
+  @update_ff
+  def up_order():
+    if not s.reset:
+      if s.cache.proc2cache.respstream.val & s.cache.proc2cache.respstream.rdy:
+        s.opaques.append( int( s.cache.proc2cache.respstream.msg.opaque ) )
+
+@pytest.mark.parametrize( "num_mshrs", [ 1, 4 ] )
+def test_order( num_mshrs, cmdline_opts ):
+  test_params = test_case_table_random[ "argvalues" ][0]._replace(
+    msg_func=hot_cold_msgs, mem_data_func=data_1KB, stall=0.0, lat=8, src=0, sink=0 )
+
+  th = probe.run_probe( harness, record_order, run_test,
+                        CacheNB( num_mshrs=num_mshrs ), test_params, cmdline_opts, cmp_opaque )
+  opaques = th.opaques
+
+  # Every request is answered once, and hits to the hot lines pass the
+  # outstanding misses even with a single MSHR
+
+  assert sorted( opaques ) == list( range( 200 ) )
+  assert opaques != sorted( opaques )
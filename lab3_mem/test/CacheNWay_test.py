@@ -0,0 +1,65 @@
+#=========================================================================
+# CacheNWay_test
+#=========================================================================
+# Run the CacheFL_test tables on the FL model and the RTL of several
+# geometries and replacement policies. The test fields of the tables
+# are written for the baseline and alternative designs, so they are
+# replaced by the predictions of cache_model, which the FL model and the
+# RTL must both match.
+
+import pytest
+
+from pymtl3 import *
+
+from lab3_mem.test.harness import run_test
+from lab3_mem.test.cache_utils import with_test_fields
+from lab3_mem.test.CacheFL_test import test_case_table_generic, test_case_table_random
+from lab3_mem.test.CacheFL_test import test_case_table_bank, cmp_wo_test_field
+
+from lab3_mem.CacheNWay   import CacheNWay
+from lab3_mem.CacheNWayFL import CacheNWayFL
+
+geometries = [
+  # sets ways repl
+  ( 16,  1,  "lru"    ),
+  (  8,  2,  "lru"    ),
+  (  4,  4,  "lru"    ),
+  (  4,  4,  "plru"   ),
+  (  4,  4,  "random" ),
+  (  4,  4,  "srrip"  ),
+  (  2,  8,  "plru"   ),
+  (  2,  8,  "srrip"  ),
+]
+
+# Check the test field and the data of reads
+
+def cmp_test_field( msg, ref ):
+  return cmp_wo_test_field( msg, ref ) and msg.test == ref.test
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "CacheType", [ CacheNWayFL, CacheNWay ] )
+@pytest.mark.parametrize( "num_sets, num_ways, repl", geometries )
+@pytest.mark.parametrize( **test_case_table_generic )
+def test_generic( test_params, num_sets, num_ways, repl, CacheType, cmdline_opts ):
+  run_test( CacheType( num_sets, num_ways, repl ),
+            with_test_fields( test_params, num_sets, num_ways, repl ),
+            cmdline_opts, cmp_test_field )
+
+@pytest.mark.parametrize( "CacheType", [ CacheNWayFL, CacheNWay ] )
+@pytest.mark.parametrize( "num_sets, num_ways, repl", geometries )
+@pytest.mark.parametrize( **test_case_table_random )
+def test_random( test_params, num_sets, num_ways, repl, CacheType, cmdline_opts ):
+  run_test( CacheType( num_sets, num_ways, repl ),
+            with_test_fields( test_params, num_sets, num_ways, repl ),
+            cmdline_opts, cmp_test_field )
+
+@pytest.mark.parametrize( "CacheType", [ CacheNWayFL, CacheNWay ] )
+@pytest.mark.parametrize( "num_sets, num_ways, repl", [ ( 16, 1, "lru" ), ( 8, 2, "lru" ) ] )
+@pytest.mark.parametrize( **test_case_table_bank )
+def test_bank( test_params, num_sets, num_ways, repl, CacheType, cmdline_opts ):
+  run_test( CacheType( num_sets, num_ways, repl, num_banks=4 ),
+            with_test_fields( test_params, num_sets, num_ways, repl, num_banks=4 ),
+            cmdline_opts, cmp_test_field )
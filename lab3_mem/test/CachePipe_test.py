@@ -0,0 +1,118 @@
+#=========================================================================
+# CachePipe_test
+#=========================================================================
+# Run the CacheFL_test tables on the pipelined cache, checking the test
+# field against the two-way LRU cache model like the CacheNWay tests,
+# and measure the throughput of its hit path.
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import mk_test_case_table
+
+from common import probe
+
+from lab3_mem.test import harness
+from lab3_mem.test.harness import req, resp, run_test
+from lab3_mem.test.CacheFL_test import test_case_table_generic, test_case_table_random
+from lab3_mem.test.CacheFL_test import test_case_table_bank, random_unit_stride_msgs, data_1KB
+from lab3_mem.test.CacheNWay_test import cmp_test_field
+from lab3_mem.test.cache_utils import with_test_fields
+
+from lab3_mem.cache_model import predict_test_fields
+from lab3_mem.CachePipe import CachePipe
+
+#-------------------------------------------------------------------------
+# Functional Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table_generic )
+def test_generic( test_params, cmdline_opts ):
+  run_test( CachePipe(), with_test_fields( test_params, 8, 2, "lru" ),
+            cmdline_opts, cmp_test_field )
+
+@pytest.mark.parametrize( **test_case_table_random )
+def test_random( test_params, cmdline_opts ):
+  run_test( CachePipe(), with_test_fields( test_params, 8, 2, "lru" ),
+            cmdline_opts, cmp_test_field )
+
+@pytest.mark.parametrize( **test_case_table_bank )
+def test_bank( test_params, cmdline_opts ):
+  run_test( CachePipe( num_banks=4 ), with_test_fields( test_params, 8, 2, "lru", num_banks=4 ),
+            cmdline_opts, cmp_test_field )
+
+# A write immediately followed by reads of the same line, so every read
+# is in TC while the write ahead of it is in DA
+
+def write_read_forward():
+  return [
+    #    type  opq  addr   len data                type  opq  test len data
+    req( 'in', 0x0, 0x1000, 0, 0x01010101 ), resp( 'in', 0x0, 0,   0,  0          ),
+    req( 'wr', 0x1, 0x1000, 0, 0x0a0a0a0a ), resp( 'wr', 0x1, 1,   0,  0          ),
+    req( 'rd', 0x2, 0x1000, 0, 0          ), resp( 'rd', 0x2, 1,   0,  0x0a0a0a0a ),
+    req( 'wr', 0x3, 0x1004, 0, 0x0b0b0b0b ), resp( 'wr', 0x3, 1,   0,  0          ),
+    req( 'rd', 0x4, 0x1000, 0, 0          ), resp( 'rd', 0x4, 1,   0,  0x0a0a0a0a ),
+    req( 'rd', 0x5, 0x1004, 0, 0          ), resp( 'rd', 0x5, 1,   0,  0x0b0b0b0b ),
+    req( 'wr', 0x6, 0x1008, 0, 0x0c0c0c0c ), resp( 'wr', 0x6, 1,   0,  0          ),
+    req( 'wr', 0x7, 0x1008, 0, 0x0d0d0d0d ), resp( 'wr', 0x7, 1,   0,  0          ),
+    req( 'rd', 0x8, 0x1008, 0, 0          ), resp( 'rd', 0x8, 1,   0,  0x0d0d0d0d ),
+  ]
+
+forward_test_case_table = mk_test_case_table([
+  (                           "msg_func            mem_data_func stall lat src sink"),
+  [ "write_read_forward",      write_read_forward, None,         0.0,  0,  0,  0    ],
+  [ "write_read_forward_sink", write_read_forward, None,         0.0,  0,  0,  3    ],
+])
+
+@pytest.mark.parametrize( **forward_test_case_table )
+def test_forward( test_params, cmdline_opts ):
+  run_test( CachePipe(), test_params, cmdline_opts, cmp_test_field )
+
+#-------------------------------------------------------------------------
+# Throughput Tests
+#-------------------------------------------------------------------------
+# With zero source/sink delay back-to-back hits should complete one per
+# cycle, compared to one every four cycles for CacheBase and CacheAlt.
+# Each miss still costs the refill (and writeback) round trip.
+
+throughput_nmsgs = 100
+
+# read_hit_multi_word with throughput_nmsgs reads
+
+def read_hit_multi_word_stream():
+  msgs = [ req( 'in', 0x0, 0x1000, 0, 0xdeadbeef ), resp( 'in', 0x0, 0, 0, 0 ) ]
+  for i in range( throughput_nmsgs ):
+    msgs.extend([
+      req( 'rd', i & 0xff, 0x1000, 0, 0 ), resp( 'rd', i & 0xff, 1, 0, 0xdeadbeef ),
+    ])
+  return msgs
+
+throughput_test_case_table = mk_test_case_table([
+  (                        "msg_func                    mem_data_func stall lat src sink"),
+  [ "read_hit_multi_word", read_hit_multi_word_stream,  None,         0.0,  0,  0,  0    ],
+  [ "random_unit_stride",  random_unit_stride_msgs,     data_1KB,     0.0,  0,  0,  0    ],
+])
+
+# Counts the cycles after reset
+
+def count_cycles( s ):
+  s.ncycles = 0
+
+  @update_ff
+  def up_ncycles():
+    if not s.reset:
+      s.ncycles += 1
+
+@pytest.mark.parametrize( **throughput_test_case_table )
+def test_throughput( test_params, cmdline_opts ):
+  test_params = with_test_fields( test_params, 8, 2, "lru" )
+  msgs  = test_params.msg_func()
+  tests = predict_test_fields( [ int( m.type_ ) for m in msgs[::2] ],
+                               [ int( m.addr  ) for m in msgs[::2] ] )
+
+  th = probe.run_probe( harness, count_cycles, run_test, CachePipe(),
+                        test_params, cmdline_opts, cmp_test_field )
+
+  nreqs   = len( tests )
+  nmisses = nreqs - sum( tests )
+  assert th.ncycles <= nreqs + 10*nmisses + 12
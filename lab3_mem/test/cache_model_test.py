@@ -0,0 +1,92 @@
+#=========================================================================
+# cache_model_test
+#=========================================================================
+# Check the replacement policies of the cache model against the LRU
+# reference in cache_sim_test and against hand-traced request streams.
+
+import pytest
+
+from lab3_mem import cache_model
+from lab3_mem.cache_model import CacheModel, predict_test_fields
+from lab3_mem.cache_model import repl_lru, repl_plru, repl_random, repl_srrip
+
+from lab3_mem.test.cache_sim_test import simulate, gen_trace
+
+# Reads of the given lines, all in set 0 of a 2-set cache
+
+def reads( *lines ):
+  return [ 0 ] * len( lines ), [ 0x20 * line for line in lines ]
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "num_sets, num_ways", [
+  ( 16, 1 ), ( 8, 2 ), ( 4, 4 ), ( 2, 8 ), ( 1, 8 ),
+])
+def test_lru( num_sets, num_ways ):
+  types, addrs = gen_trace( num_sets, 2000, 60 )
+  tests = predict_test_fields( types, addrs, num_sets, num_ways, repl_lru )
+  nhits, nwbs = simulate( types, addrs, num_sets*num_ways*16, 16, num_ways )
+  assert sum( tests ) == nhits
+
+@pytest.mark.parametrize( "repl", [ repl_plru, repl_random, repl_srrip ] )
+def test_direct_mapped( repl ):
+  types, addrs = gen_trace( 0, 500, 40 )
+  assert predict_test_fields( types, addrs, 16, 1, repl ) == \
+         predict_test_fields( types, addrs, 16, 1, repl_lru )
+
+def test_plru_two_ways():
+  types, addrs = gen_trace( 1, 1000, 30 )
+  assert predict_test_fields( types, addrs, 4, 2, repl_plru ) == \
+         predict_test_fields( types, addrs, 4, 2, repl_lru )
+
+def test_plru():
+
+  # After A B C D A the root points to the pair C D and that node to C,
+  # so E replaces C and B still hits, while LRU replaces B and then C
+
+  types, addrs = reads( 0, 1, 2, 3, 0, 4, 1, 2 )
+  assert predict_test_fields( types, addrs, 2, 4, repl_plru ) == [ 0, 0, 0, 0, 1, 0, 1, 0 ]
+  assert predict_test_fields( types, addrs, 2, 4, repl_lru  ) == [ 0, 0, 0, 0, 1, 0, 0, 0 ]
+
+def test_srrip():
+
+  # A and B are reused before a scan of E F G H, which only evicts the
+  # lines that were never reused, while LRU loses everything
+
+  types, addrs = reads( 0, 1, 2, 3, 0, 1, 4, 5, 6, 7, 0, 1 )
+  tests = predict_test_fields( types, addrs, 2, 4, repl_srrip )
+  assert tests[-2:] == [ 1, 1 ]
+  assert predict_test_fields( types, addrs, 2, 4, repl_lru )[-2:] == [ 0, 0 ]
+
+def test_random():
+  model = CacheModel( 2, 4, repl_random )
+  for line in range( 100 ):
+    model.access( 0x20 * line )
+  assert sorted( model.tags[0] ) == sorted( set( model.tags[0] ) )
+  assert None not in model.tags[0]
+
+  # The LFSR is maximal length
+
+  x, n = cache_model.lfsr_next( cache_model.lfsr_reset ), 1
+  while x != cache_model.lfsr_reset:
+    x, n = cache_model.lfsr_next( x ), n + 1
+  assert n == 0xffff
+
+def test_init():
+
+  # An init allocates its line but never reports a hit
+
+  types  = [ 2, 2, 0, 1 ]
+  addrs  = [ 0x1000, 0x1000, 0x1000, 0x1004 ]
+  assert predict_test_fields( types, addrs ) == [ 0, 0, 1, 1 ]
+
+def test_banks():
+
+  # With four banks the set index starts at bit 6, so these lines map to
+  # sets 0, 4 and 0 and the first one is still there
+
+  types, addrs = [ 0 ] * 4, [ 0x000, 0x100, 0x200, 0x000 ]
+  assert predict_test_fields( types, addrs, 8, 2, repl_lru, num_banks=4 ) == [ 0, 0, 0, 1 ]
+  assert predict_test_fields( types, addrs, 8, 2, repl_lru, num_banks=1 ) == [ 0, 0, 0, 0 ]
@@ -0,0 +1,111 @@
+#=========================================================================
+# cache_sim_test
+#=========================================================================
+# Check the swept results against a direct simulation of every cache
+# configuration, one access at a time.
+
+import pytest
+
+from random import Random
+
+import numpy as np
+
+from lab3_mem import cache_sim
+from lab3_mem.cache_sim import type_rd, type_wr, type_in
+
+#-------------------------------------------------------------------------
+# simulate
+#-------------------------------------------------------------------------
+# Write-back, write-allocate LRU cache. Every set is a list of
+# [ line, dirty ] from the least to the most recently used. Return the
+# number of hits and writebacks.
+
+def simulate( types, addrs, size, line_bytes, ways ):
+  nsets = size // ( line_bytes * ways )
+  sets  = [ [] for _ in range( nsets ) ]
+  nhits = 0
+  nwbs  = 0
+
+  for t, addr in zip( types, addrs ):
+    line  = addr // line_bytes
+    entry = sets[ line % nsets ]
+
+    for way in entry:
+      if way[0] == line:
+        entry.remove( way )
+        nhits += t != type_in
+        break
+    else:
+      if len( entry ) == ways:
+        nwbs += entry.pop( 0 )[1]
+      way = [ line, False ]
+
+    way[1] = way[1] or t == type_wr
+    entry.append( way )
+
+  return nhits, nwbs
+
+def gen_trace( seed, n, nlines ):
+  rng   = Random( seed )
+  types = [ rng.choice( [ type_rd, type_rd, type_wr, type_in ] ) for _ in range( n ) ]
+  addrs = [ rng.randrange( nlines ) * 16 + 4*rng.randrange( 4 ) for _ in range( n ) ]
+  return types, addrs
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "seed, nlines", [
+  ( 0, 8 ), ( 1, 40 ), ( 2, 200 ),
+])
+def test_sweep( seed, nlines ):
+  types, addrs = gen_trace( seed, 2000, nlines )
+  results = cache_sim.sweep( types, addrs, [ 64, 256, 1024 ], [ 16, 32, 64 ], [ 1, 2, 4, 16 ] )
+
+  naccesses = sum( t != type_in for t in types )
+  nwrites   = sum( t == type_wr for t in types )
+
+  for r in results:
+    nhits, nwbs = simulate( types, addrs, r.size, r.line_bytes, r.ways )
+    assert r.naccesses    == naccesses
+    assert r.nhits        == nhits
+    assert r.refill_bytes == ( naccesses - nhits ) * r.line_bytes
+    if r.policy == "wb":
+      assert r.nwritebacks == nwbs
+      assert r.write_bytes == nwbs * r.line_bytes
+    else:
+      assert r.write_bytes == nwrites * 4
+
+def test_geometries():
+
+  # 64B cannot be split into four ways of 32B lines, and 16 ways of 64B
+  # lines need at least 1KB
+
+  results = cache_sim.sweep( [ type_rd ], [ 0 ], [ 64, 1024 ], [ 32, 64 ], [ 1, 4, 16 ],
+                             policies=[ "wb" ] )
+  assert [ ( r.size, r.line_bytes, r.ways ) for r in results ] == [
+    ( 64, 32, 1 ), ( 1024, 32, 1 ), ( 1024, 32, 4 ), ( 1024, 32, 16 ),
+    ( 64, 64, 1 ), ( 1024, 64, 1 ), ( 1024, 64, 4 ), ( 1024, 64, 16 ),
+  ]
+
+def test_count_above():
+  rng    = np.random.default_rng( 0 )
+  values = rng.integers( 0, 101, 100 )
+  xs     = rng.integers( 0, 101, 50 )
+  ts     = rng.integers( 0, 101, 50 )
+  counts = cache_sim.count_above( values, xs, ts )
+  assert counts.tolist() == [ int( np.sum( values[:x] > t ) ) for x, t in zip( xs, ts ) ]
+
+def test_trace_file( tmp_path, capsys ):
+  types, addrs = gen_trace( 0, 100, 20 )
+  path = str( tmp_path/"trace.txt" )
+  cache_sim.save_trace( path, types, addrs )
+
+  loaded = cache_sim.load_trace( path )
+  assert loaded[0].tolist() == types
+  assert loaded[1].tolist() == addrs
+
+  assert cache_sim.main( [ path, "--sizes", "256", "--lines", "16", "--ways", "2",
+                           "--policy", "wb" ] ) == 0
+  nhits, nwbs = simulate( types, addrs, 256, 16, 2 )
+  assert capsys.readouterr().out.splitlines()[1].split()[-3] == str( nwbs )
@@ -0,0 +1,82 @@
+#=========================================================================
+# cache_utils
+#=========================================================================
+# Rewrite the message lists of the CacheFL_test tables for the cache
+# designs whose responses differ from the baseline ones, e.g. in the
+# test field or the order of the responses.
+
+from pymtl3.stdlib.mem import MemMsgType
+
+from lab3_mem.test.harness import req, resp
+from lab3_mem.cache_model import predict_test_fields, repl_names
+
+type_names = {
+  MemMsgType.READ       : 'rd',
+  MemMsgType.WRITE      : 'wr',
+  MemMsgType.WRITE_INIT : 'in',
+}
+
+#-------------------------------------------------------------------------
+# copy_req/copy_resp
+#-------------------------------------------------------------------------
+# Copy a request or response message, replacing the given fields.
+
+def copy_req( msg, opaque=None ):
+  return req( type_names[ int( msg.type_ ) ],
+              int( msg.opaque ) if opaque is None else opaque,
+              int( msg.addr ), int( msg.len ), int( msg.data ) )
+
+def copy_resp( msg, opaque=None, test=None ):
+  return resp( type_names[ int( msg.type_ ) ],
+               int( msg.opaque ) if opaque is None else opaque,
+               int( msg.test   ) if test   is None else test,
+               int( msg.len ), int( msg.data ) )
+
+#-------------------------------------------------------------------------
+# map_msgs
+#-------------------------------------------------------------------------
+# Replace the msg_func of a test case by one that rewrites its messages
+# with fn( msgs ), keeping the list generated on demand.
+
+def map_msgs( test_params, fn ):
+  msg_func = test_params.msg_func
+  return test_params._replace( msg_func=lambda: fn( msg_func() ) )
+
+#-------------------------------------------------------------------------
+# with_test_fields
+#-------------------------------------------------------------------------
+# Set the test field of every response to the prediction of the cache
+# model.
+
+def with_test_fields( test_params, num_sets, num_ways, repl, num_banks=1 ):
+
+  def fn( msgs ):
+    tests = predict_test_fields( [ int( m.type_ ) for m in msgs[::2] ],
+                                 [ int( m.addr  ) for m in msgs[::2] ],
+                                 num_sets, num_ways, repl_names[ repl ], num_banks )
+    result = []
+    for req_msg, resp_msg, test in zip( msgs[::2], msgs[1::2], tests ):
+      result.extend([ req_msg, copy_resp( resp_msg, test=test ) ])
+    return result
+
+  return map_msgs( test_params, fn )
+
+#-------------------------------------------------------------------------
+# with_opaques
+#-------------------------------------------------------------------------
+# Number the requests and their responses, so the opaque tells which
+# request a response answers. The test field is cleared since whether a
+# request hits depends on the timing.
+
+def with_opaques( test_params ):
+
+  def fn( msgs ):
+    result = []
+    for i, ( req_msg, resp_msg ) in enumerate( zip( msgs[::2], msgs[1::2] ) ):
+      result.extend([
+        copy_req ( req_msg,  opaque=i & 0xff ),
+        copy_resp( resp_msg, opaque=i & 0xff, test=0 ),
+      ])
+    return result
+
+  return map_msgs( test_params, fn )
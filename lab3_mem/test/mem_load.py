@@ -0,0 +1,98 @@
+#=========================================================================
+# mem_load
+#=========================================================================
+# Bulk loading of data into a test memory. The test memories keep their
+# contents in a bytearray and write_mem copies a whole buffer into it
+# with one slice assignment, so the cost of loading is in how the data
+# gets there: the data functions in CacheFL_test return alternating
+# address/value lists which the harness writes one word at a time.
+#
+# load_buffer copies any contiguous buffer (bytes, bytearray, memoryview,
+# array.array or NumPy array) to a base address without an intermediate
+# copy. load_words turns address/value lists into runs of consecutive
+# words first, so the usual sequential data sets become a single
+# write_mem. run_test runs a test case through the lab3 harness with its
+# data loaded this way:
+#
+#   from lab3_mem.test import mem_load
+#   mem_load.run_test( CacheFL(), test_params, cmdline_opts )
+
+import numpy as np
+
+from common import probe
+
+#-------------------------------------------------------------------------
+# as_bytes
+#-------------------------------------------------------------------------
+# Return a byte view of a buffer. Words in NumPy arrays are stored in
+# the native byte order, which is little endian like TinyRV2 on every
+# machine the tests run on.
+
+def as_bytes( buf ):
+  view = memoryview( buf )
+  if not view.c_contiguous:
+    raise ValueError( "mem_load needs a contiguous buffer" )
+  return view.cast( "B" )
+
+#-------------------------------------------------------------------------
+# load_buffer
+#-------------------------------------------------------------------------
+# mem is either a memory model with write_mem or a bytearray.
+
+def load_buffer( mem, addr, buf ):
+  data = as_bytes( buf )
+  if hasattr( mem, "write_mem" ):
+    mem.write_mem( addr, data )
+  else:
+    mem[ addr : addr+len( data ) ] = data
+  return len( data )
+
+#-------------------------------------------------------------------------
+# word_runs
+#-------------------------------------------------------------------------
+# Split parallel address and value lists into ( base address, words )
+# runs of consecutive words, in the original order so that a later
+# write to the same address still wins.
+
+def word_runs( addrs, values ):
+  addrs  = np.asarray( addrs,  dtype=np.int64 )
+  values = np.asarray( values, dtype=np.int64 ).astype( "<u4" )
+
+  if len( addrs ) == 0:
+    return []
+
+  starts = np.concatenate( ( [0], np.flatnonzero( np.diff( addrs ) != 4 ) + 1 ) )
+  ends   = np.append( starts[1:], len( addrs ) )
+  return [ ( int( addrs[i] ), values[i:j] ) for i, j in zip( starts, ends ) ]
+
+#-------------------------------------------------------------------------
+# load_words
+#-------------------------------------------------------------------------
+# Drop-in replacement for writing address/value pairs one at a time.
+
+def load_words( mem, addrs, values ):
+  for addr, words in word_runs( addrs, values ):
+    load_buffer( mem, addr, words )
+
+def load_pairs( mem, data ):
+  load_words( mem, data[::2], data[1::2] )
+
+#-------------------------------------------------------------------------
+# run_test
+#-------------------------------------------------------------------------
+# run_test of the lab3 harness, loading the data of the test case in
+# bulk. The harness loads the data function of a test case with
+# load( addrs, values ), which bulk_load replaces on the harness of this
+# run only.
+
+def bulk_load( s ):
+  s.load = lambda addrs, values: load_words( s.mem, addrs, values )
+
+def run_test( *args, **kwargs ):
+
+  # Imported here, the rest of the module does not need the harness
+
+  from lab3_mem.test import harness
+
+  with probe.attach( harness, bulk_load ):
+    return harness.run_test( *args, **kwargs )
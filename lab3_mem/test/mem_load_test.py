@@ -0,0 +1,68 @@
+#=========================================================================
+# mem_load_test.py
+#=========================================================================
+
+import struct
+
+from array import array
+
+import numpy as np
+
+from lab2_proc.ProcISS import ProcISS
+
+from lab3_mem.test.mem_load import as_bytes, load_buffer, load_pairs, word_runs
+
+#-------------------------------------------------------------------------
+# Reference
+#-------------------------------------------------------------------------
+# Write address/value pairs one word at a time, like the harness did.
+
+def load_pairs_ref( mem, data ):
+  for addr, value in zip( data[::2], data[1::2] ):
+    mem[ addr : addr+4 ] = struct.pack( "<I", value )
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_word_runs():
+  runs = word_runs( [ 0x1000, 0x1004, 0x1008, 0x2000, 0x2004, 0x1000 ],
+                    [ 1, 2, 3, 4, 5, 6 ] )
+
+  assert [ ( addr, list( words ) ) for addr, words in runs ] == [
+    ( 0x1000, [ 1, 2, 3 ] ),
+    ( 0x2000, [ 4, 5    ] ),
+    ( 0x1000, [ 6       ] ),
+  ]
+
+def test_load_pairs():
+  data = []
+  for i in range( 128 ):
+    data.extend( [ 0x00001000+i*4, 0xabcd1000+i*4 ] )
+  data.extend( [ 0x00003000, 0xffffffff, 0x00001010, 0xdeadbeef ] )
+
+  mem = bytearray( 1 << 16 )
+  ref = bytearray( 1 << 16 )
+  load_pairs( mem, data )
+  load_pairs_ref( ref, data )
+
+  assert mem == ref
+
+def test_load_buffer():
+  words = np.arange( 1 << 18, dtype=np.uint32 )
+
+  mem = bytearray( 1 << 21 )
+  assert load_buffer( mem, 0x1000, words ) == 4 << 18
+  assert struct.unpack_from( "<I", mem, 0x1000 + 4*12345 )[0] == 12345
+
+  # Any buffer works the same way
+
+  for buf in [ words.tobytes(), memoryview( words ), array( "I", words.tolist() ) ]:
+    assert bytes( as_bytes( buf ) ) == words.tobytes()
+
+def test_load_iss():
+  iss   = ProcISS()
+  words = np.array( [ 0x00000013, 0xdeadbeef ], dtype=np.uint32 )
+
+  load_buffer( iss, 0x2000, words )
+  assert iss.read_mem( 0x2000, 8 ) == words.tobytes()
@@ -306,6 +306,56 @@ module lab4_sys_NetRouter
   end
   `VC_TRACE_END
 
+  // Binary trace. With +bintrace=<prefix>, every cycle the input queue
+  // occupancy, the requests and grants in each switch unit, and the
+  // output handshakes are written as a fixed-size record to the file
+  // <prefix>.<instance name>, which lab4_sys/bintrace.py renders into
+  // the line trace above offline.
+  //
+  //  word 0 : free entries of inq0-2 in 3-bit fields, ostream val/rdy
+  //  word 1 : requests to sunit0-2 in 3-bit fields, grants from bit 16
+
+  string  bintrace_prefix;
+  integer bintrace_fd = 0;
+
+  initial begin
+    if ( $value$plusargs( "bintrace=%s", bintrace_prefix ) ) begin
+      bintrace_fd = $fopen( $sformatf( "%s.%m", bintrace_prefix ), "wb" );
+      $fwrite( bintrace_fd, "%u%u%u", 32'h43525442, 32'd3, 32'd2 );
+    end
+  end
+
+  logic [2:0] bintrace_reqs   [3];
+  logic [2:0] bintrace_grants [3];
+
+  assign bintrace_reqs[0]   = { sunit0.istream_val[2], sunit0.istream_val[1], sunit0.istream_val[0] };
+  assign bintrace_reqs[1]   = { sunit1.istream_val[2], sunit1.istream_val[1], sunit1.istream_val[0] };
+  assign bintrace_reqs[2]   = { sunit2.istream_val[2], sunit2.istream_val[1], sunit2.istream_val[0] };
+
+  assign bintrace_grants[0] = bintrace_reqs[0] & { sunit0.istream_rdy[2], sunit0.istream_rdy[1], sunit0.istream_rdy[0] };
+  assign bintrace_grants[1] = bintrace_reqs[1] & { sunit1.istream_rdy[2], sunit1.istream_rdy[1], sunit1.istream_rdy[0] };
+  assign bintrace_grants[2] = bintrace_reqs[2] & { sunit2.istream_rdy[2], sunit2.istream_rdy[1], sunit2.istream_rdy[0] };
+
+  logic [31:0] bintrace_queues;
+  assign bintrace_queues = { 16'b0, reset,
+                             ostream_rdy[2], ostream_rdy[1], ostream_rdy[0],
+                             ostream_val[2], ostream_val[1], ostream_val[0],
+                             inq2_num_free_entries, inq1_num_free_entries, inq0_num_free_entries };
+
+  logic [31:0] bintrace_switch;
+  assign bintrace_switch = { 7'b0, bintrace_grants[2], bintrace_grants[1], bintrace_grants[0],
+                             7'b0, bintrace_reqs[2],   bintrace_reqs[1],   bintrace_reqs[0] };
+
+  always @( posedge clk ) begin
+    if ( bintrace_fd != 0 )
+      $fwrite( bintrace_fd, "%u%u", bintrace_queues, bintrace_switch );
+  end
+
+  final begin
+    if ( bintrace_fd != 0 )
+      $fclose( bintrace_fd );
+  end
+
   `endif /* SYNTHESIS */
 
 endmodule
@@ -0,0 +1,222 @@
+#=========================================================================
+# bintrace
+#=========================================================================
+# Offline rendering of the binary traces written by ProcAlt, CacheAlt and
+# NetRouter. Building the text line trace in Verilog formats strings and
+# disassembles the instruction in D every cycle, which dominates the
+# simulation time of long runs. Run the simulator with +bintrace=<prefix>
+# instead, and every instance writes a fixed-size record per cycle to
+# <prefix>.<instance name>. The same line trace is rendered here on
+# demand:
+#
+#   python -m lab4_sys.bintrace render  trace.top.proc
+#   python -m lab4_sys.bintrace grep    trace.top.proc "lw"
+#   python -m lab4_sys.bintrace diff    a.top.proc b.top.proc
+#
+# Several files given to render are shown side by side, one column per
+# file. diff compares the raw records, so only the cycles that differ
+# are rendered.
+#
+# Every file starts with a header of three little-endian words: the
+# magic number, the kind of the module, and the number of words per
+# record. The records follow, one per cycle including the reset cycles.
+#
+# The instruction columns are rendered with the ProcISS disassembler,
+# which matches the tinyrv2 disassembler of the line trace except that
+# branch and jump targets are shown as offsets.
+
+import re
+import sys
+import argparse
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from lab2_proc.ProcISS import decode, disasm
+
+magic = 0x43525442 # "BTRC"
+
+kind_proc   = 1
+kind_cache  = 2
+kind_router = 3
+
+#-------------------------------------------------------------------------
+# read
+#-------------------------------------------------------------------------
+
+Trace = namedtuple( "Trace", "kind records" )
+
+def read( path ):
+  data = np.fromfile( path, dtype="<u4" )
+
+  if len( data ) < 3 or data[0] != magic:
+    raise ValueError( f"{path} is not a binary trace" )
+
+  kind, nwords = int( data[1] ), int( data[2] )
+  nrecords     = ( len( data ) - 3 ) // nwords
+  records      = data[ 3 : 3 + nrecords*nwords ].reshape( nrecords, nwords )
+
+  return Trace( kind, records )
+
+#-------------------------------------------------------------------------
+# ProcAlt
+#-------------------------------------------------------------------------
+# Flag bits: val F-W in bits 0-4, stall F-W in bits 5-9, squash F and D
+# in bits 10-11, reset in bit 12.
+
+@lru_cache( maxsize=None )
+def _disasm( inst ):
+  try:
+    return disasm( inst )
+  except ValueError:
+    return "?"
+
+@lru_cache( maxsize=None )
+def _disasm_tiny( inst ):
+  try:
+    name = "nop" if inst == 0x00000013 else decode( inst ).name
+  except ValueError:
+    name = "?"
+  return name[:4].ljust( 4 )
+
+def _stage( flags, stage, width, text ):
+  if not ( flags >> stage ) & 1:
+    return " " * width
+  if stage <= 1 and ( flags >> ( 10+stage ) ) & 1:
+    return "/".ljust( width )
+  if ( flags >> ( 5+stage ) ) & 1:
+    return "#".ljust( width )
+  return text().ljust( width )
+
+def render_proc( record ):
+  flags, pc_F, pc_D, pc_X, inst_D, inst_X, inst_M, inst_W = map( int, record )
+  return "|".join([
+    _stage( flags, 0,  8, lambda: f"{pc_F:08x}"           ),
+    _stage( flags, 1, 23, lambda: _disasm( inst_D )       ),
+    _stage( flags, 2,  4, lambda: _disasm_tiny( inst_X )  ),
+    _stage( flags, 3,  4, lambda: _disasm_tiny( inst_M )  ),
+    _stage( flags, 4,  4, lambda: _disasm_tiny( inst_W )  ),
+  ])
+
+#-------------------------------------------------------------------------
+# CacheAlt
+#-------------------------------------------------------------------------
+# State of the control unit in bits 0-4 of the flags, in the order of
+# the state definitions in CacheAltCtrl.
+
+cache_states = [ "I ", "TC", "IN", "RD", "WD", "RR", "RW", "RU", "EP", "ER",
+                 "EW", "W " ]
+
+def render_cache( record ):
+  state = int( record[0] ) & 0x1f
+  return cache_states[state] if state < len( cache_states ) else "? "
+
+#-------------------------------------------------------------------------
+# NetRouter
+#-------------------------------------------------------------------------
+# Free entries of each input queue, then the number of requests to each
+# switch unit.
+
+queue_chars  = { 4: " ", 3: ".", 2: ":", 1: "*", 0: "#" }
+switch_chars = [ " ", ".", ":", "#" ]
+
+def render_router( record ):
+  queues, switch = int( record[0] ), int( record[1] )
+  return "".join( queue_chars.get( ( queues >> 3*i ) & 0x7, "?" ) for i in range( 3 ) ) \
+       + "|" \
+       + "".join( switch_chars[ bin( ( switch >> 3*i ) & 0x7 ).count( "1" ) ] for i in range( 3 ) )
+
+renderers = {
+  kind_proc   : render_proc,
+  kind_cache  : render_cache,
+  kind_router : render_router,
+}
+
+#-------------------------------------------------------------------------
+# render
+#-------------------------------------------------------------------------
+# Yield ( cycle, line ) for the given cycles of one or more traces of the
+# same run, with one column per trace.
+
+def render( traces, start=0, end=None ):
+  ncycles = min( len( t.records ) for t in traces )
+  end     = ncycles if end is None else min( end, ncycles )
+
+  fns = [ renderers[ t.kind ] for t in traces ]
+  for cycle in range( start, end ):
+    yield cycle, " | ".join( fn( t.records[cycle] ) for fn, t in zip( fns, traces ) )
+
+def format_line( cycle, line ):
+  return f"{cycle:3d}: {line}"
+
+#-------------------------------------------------------------------------
+# grep
+#-------------------------------------------------------------------------
+
+def grep( traces, pattern, start=0, end=None ):
+  regex = re.compile( pattern )
+  for cycle, line in render( traces, start, end ):
+    if regex.search( line ):
+      yield cycle, line
+
+#-------------------------------------------------------------------------
+# diff
+#-------------------------------------------------------------------------
+# Return the cycles in which two traces of the same kind differ. Cycles
+# only present in the longer trace count as different.
+
+def diff( a, b ):
+  if a.kind != b.kind:
+    raise ValueError( "cannot diff traces of different modules" )
+
+  n      = min( len( a.records ), len( b.records ) )
+  cycles = np.flatnonzero( np.any( a.records[:n] != b.records[:n], axis=1 ) )
+  extra  = np.arange( n, max( len( a.records ), len( b.records ) ) )
+  return np.concatenate( ( cycles, extra ) ).tolist()
+
+#-------------------------------------------------------------------------
+# main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description="render binary line traces" )
+  sub = p.add_subparsers( dest="cmd", required=True )
+
+  p_render = sub.add_parser( "render" )
+  p_render.add_argument( "files", nargs="+" )
+
+  p_grep = sub.add_parser( "grep" )
+  p_grep.add_argument( "files", nargs="+" )
+  p_grep.add_argument( "pattern" )
+
+  p_diff = sub.add_parser( "diff" )
+  p_diff.add_argument( "a" )
+  p_diff.add_argument( "b" )
+
+  for q in ( p_render, p_grep ):
+    q.add_argument( "--start", type=int, default=0 )
+    q.add_argument( "--end",   type=int, default=None )
+
+  opts = p.parse_args( argv )
+
+  if opts.cmd == "render":
+    lines = render( [ read( f ) for f in opts.files ], opts.start, opts.end )
+  elif opts.cmd == "grep":
+    lines = grep( [ read( f ) for f in opts.files ], opts.pattern, opts.start, opts.end )
+  else:
+    a, b  = read( opts.a ), read( opts.b )
+    lines = []
+    for cycle in diff( a, b ):
+      la = next( render( [ a ], cycle, cycle+1 ), ( cycle, "" ) )[1]
+      lb = next( render( [ b ], cycle, cycle+1 ), ( cycle, "" ) )[1]
+      lines.append( ( cycle, f"{la}  <>  {lb}" ) )
+
+  for cycle, line in lines:
+    print( format_line( cycle, line ) )
+
+  return 0
+
+if __name__ == "__main__":
+  sys.exit( main() )
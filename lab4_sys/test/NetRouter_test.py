@@ -13,8 +13,7 @@ from lab4_sys.NetRouter import NetRouter
 
 import random
 
-# Fix the random seed so results are reproducible
-random.seed(0xdeadbeef)
+from functools import lru_cache
 
 #-------------------------------------------------------------------------
 # Message Types
@@ -162,27 +161,36 @@ all_to_dest3 = [
 #---------------------------------------------------------
 # Additional Directed Tests
 #---------------------------------------------------------
-stream_to_dest0 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=0, opaque=i, payload=i )
-  stream_to_dest0.append( msg )
-
-stream_to_dest1 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=1, opaque=i, payload=i )
-  stream_to_dest1.append( msg )
-
-stream_to_dest2 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=2, opaque=i, payload=i )
-  stream_to_dest2.append( msg )
-
-stream_to_all = []
-for i in range(16):
-  m0 = NetMsgType( src=0, dest=0, opaque=0x00+i, payload=0x0000+i )
-  m1 = NetMsgType( src=0, dest=1, opaque=0x40+i, payload=0x1000+i )
-  m2 = NetMsgType( src=0, dest=2, opaque=0x80+i, payload=0x2000+i )
-  stream_to_all.extend([m0, m1, m2])
+@lru_cache( maxsize=None )
+def stream_to_dest0():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=0, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_dest1():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=1, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_dest2():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=2, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_all():
+  msgs = []
+  for i in range(16):
+    m0 = NetMsgType( src=0, dest=0, opaque=0x00+i, payload=0x0000+i )
+    m1 = NetMsgType( src=0, dest=1, opaque=0x40+i, payload=0x1000+i )
+    m2 = NetMsgType( src=0, dest=2, opaque=0x80+i, payload=0x2000+i )
+    msgs.extend([m0, m1, m2])
+  return msgs
 
 def test_basic_1( cmdline_opts ):
 
@@ -231,18 +239,24 @@ def test_basic_2( cmdline_opts ):
 #-------------------------------------------------------------------------
 # Very Basic Random Test Cases
 #-------------------------------------------------------------------------
-basic_random_test = []
-randomNum = random.randint(2,4)
-for i in range(randomNum):
-  random_src = random.randint(0,2)
-  random_dest = random.randint(0,3)
-  msg = NetMsgType( src=random_src, dest=random_dest, opaque=i, payload=i )
-  basic_random_test.append( msg )
+@lru_cache( maxsize=None )
+def basic_random_test( seed=0xdeadbeef ):
+  rng  = random.Random( seed )
+  msgs = []
+  randomNum = rng.randint(2,4)
+  for i in range(randomNum):
+    random_src = rng.randint(0,2)
+    random_dest = rng.randint(0,3)
+    msgs.append( NetMsgType( src=random_src, dest=random_dest, opaque=i, payload=i ) )
+  return msgs
 
 
 #-------------------------------------------------------------------------
 # Test Case Table
 #-------------------------------------------------------------------------
+# The msgs column is either a list or a function returning the list.
+# Functions are only called when a test case runs, so collection does
+# not build every message list up front.
 
 test_case_table = mk_test_case_table([
   (                                  "msgs    src_delay sink_delay delay_mode ordered"),
@@ -270,41 +284,47 @@ test_case_table = mk_test_case_table([
 ])
 
 #-------------------------------------------------------------------------
-# test w/ router id == 0
+# run_test
 #-------------------------------------------------------------------------
+# Run one row of the test case table through a router with the given
+# router id. Messages to the router id leave through the first output,
+# all others through the second one.
 
-@pytest.mark.parametrize( **test_case_table )
-def test_router_id_0( test_params, cmdline_opts ):
+def run_test( test_params, router_id, cmdline_opts ):
 
-  th = TestHarness( router_id=0 )
+  msgs = test_params.msgs
+  if callable( msgs ):
+    msgs = msgs()
+
+  th = TestHarness( router_id=router_id )
 
   th.set_param("top.srcs[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 0 ],
+    msgs                = [ m for m in msgs if m.src == 0 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.srcs[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 1 ],
+    msgs                = [ m for m in msgs if m.src == 1 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.srcs[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 2 ],
+    msgs                = [ m for m in msgs if m.src == 2 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.sinks[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 0 ],
+    msgs                = [ m for m in msgs if m.dest == router_id ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay,
     ordered             = test_params.ordered )
 
   th.set_param("top.sinks[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest != 0 ],
+    msgs                = [ m for m in msgs if m.dest != router_id ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay,
@@ -321,6 +341,14 @@ def test_router_id_0( test_params, cmdline_opts ):
 
   run_sim( th, cmdline_opts, duts=['router'] )
 
+#-------------------------------------------------------------------------
+# test w/ router id == 0
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test_router_id_0( test_params, cmdline_opts ):
+  run_test( test_params, 0, cmdline_opts )
+
 #'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 
 #-------------------------------------------------------------------------
@@ -329,51 +357,7 @@ def test_router_id_0( test_params, cmdline_opts ):
 
 @pytest.mark.parametrize( **test_case_table )
 def test_router_id_1( test_params, cmdline_opts ):
-
-  th = TestHarness( router_id=1 )
-
-  th.set_param("top.srcs[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 0 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 1 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 2 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.sinks[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 1 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest != 1 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[2].construct",
-    msgs                = [],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.elaborate()
-
-  run_sim( th, cmdline_opts, duts=['router'] )
+  run_test( test_params, 1, cmdline_opts )
 
 #'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 
@@ -383,51 +367,7 @@ def test_router_id_1( test_params, cmdline_opts ):
 
 @pytest.mark.parametrize( **test_case_table )
 def test_router_id_2( test_params, cmdline_opts ):
-
-  th = TestHarness( router_id=2 )
-
-  th.set_param("top.srcs[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 0 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 1 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 2 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.sinks[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 2 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest != 2 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[2].construct",
-    msgs                = [],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.elaborate()
-
-  run_sim( th, cmdline_opts, duts=['router'] )
+  run_test( test_params, 2, cmdline_opts )
 
 #'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
 
@@ -437,51 +377,6 @@ def test_router_id_2( test_params, cmdline_opts ):
 
 @pytest.mark.parametrize( **test_case_table )
 def test_router_id_3( test_params, cmdline_opts ):
-
-  th = TestHarness( router_id=3 )
-
-  th.set_param("top.srcs[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 0 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 1 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.srcs[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 2 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.src_delay,
-    interval_delay      = test_params.src_delay )
-
-  th.set_param("top.sinks[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 3 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest != 3 ],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.set_param("top.sinks[2].construct",
-    msgs                = [],
-    interval_delay_mode = test_params.delay_mode,
-    initial_delay       = test_params.sink_delay,
-    interval_delay      = test_params.sink_delay,
-    ordered             = test_params.ordered )
-
-  th.elaborate()
-
-  run_sim( th, cmdline_opts, duts=['router'] )
+  run_test( test_params, 3, cmdline_opts )
 
 #'''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''''
-
@@ -11,10 +11,11 @@ from pymtl3.stdlib.stream import StreamSourceFL, StreamSinkFL
 from lab4_sys.NetMsg import mk_net_msg
 from lab4_sys.Net import Net
 
+from common.StreamLazyFL import StreamSourceLazyFL, StreamSinkLazyFL
+
 import random
 
-# Fix the random seed so results are reproducible
-random.seed(0xdeadbeef)
+from functools import lru_cache
 
 
 #-------------------------------------------------------------------------
@@ -29,13 +30,19 @@ NetMsgType = mk_net_msg( 32 )
 
 class TestHarness( Component ):
 
-  def construct( s ):
+  def construct( s, lazy=False ):
+
+    # Instantiate models. The lazy sources/sinks pull their messages from
+    # generators instead of lists, for long soak runs.
 
-    # Instantiate models
+    if lazy:
+      s.srcs  = [ StreamSourceLazyFL( NetMsgType ) for _ in range(4) ]
+      s.sinks = [ StreamSinkLazyFL( NetMsgType, ordered=False ) for _ in range(4) ]
+    else:
+      s.srcs  = [ StreamSourceFL( NetMsgType ) for _ in range(4) ]
+      s.sinks = [ StreamSinkFL( NetMsgType, ordered=False ) for _ in range(4) ]
 
-    s.srcs  = [ StreamSourceFL( NetMsgType ) for _ in range(4) ]
-    s.net   = Net( p_msg_nbits=44 )
-    s.sinks = [ StreamSinkFL( NetMsgType, ordered=False ) for _ in range(4) ]
+    s.net = Net( p_msg_nbits=44 )
 
     # Connect
 
@@ -159,48 +166,64 @@ all_to_dest3 = [
 #---------------------------------------------------------
 # Additional Directed Tests
 #---------------------------------------------------------
-stream_to_dest0 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=0, opaque=i, payload=i )
-  stream_to_dest0.append( msg )
-
-stream_to_dest1 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=1, opaque=i, payload=i )
-  stream_to_dest1.append( msg )
-
-stream_to_dest2 = []
-for i in range(16):
-  msg = NetMsgType( src=0, dest=2, opaque=i, payload=i )
-  stream_to_dest2.append( msg )
-
-stream_to_all = []
-for i in range(16):
-  m0 = NetMsgType( src=0, dest=0, opaque=0x00+i, payload=0x0000+i )
-  m1 = NetMsgType( src=0, dest=1, opaque=0x40+i, payload=0x1000+i )
-  m2 = NetMsgType( src=0, dest=2, opaque=0x80+i, payload=0x2000+i )
-  stream_to_all.extend([m0, m1, m2])
+@lru_cache( maxsize=None )
+def stream_to_dest0():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=0, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_dest1():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=1, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_dest2():
+  msgs = []
+  for i in range(16):
+    msgs.append( NetMsgType( src=0, dest=2, opaque=i, payload=i ) )
+  return msgs
+
+@lru_cache( maxsize=None )
+def stream_to_all():
+  msgs = []
+  for i in range(16):
+    m0 = NetMsgType( src=0, dest=0, opaque=0x00+i, payload=0x0000+i )
+    m1 = NetMsgType( src=0, dest=1, opaque=0x40+i, payload=0x1000+i )
+    m2 = NetMsgType( src=0, dest=2, opaque=0x80+i, payload=0x2000+i )
+    msgs.extend([m0, m1, m2])
+  return msgs
 
 #-------------------------------------------------------------------------
 # Random Test Cases
 #-------------------------------------------------------------------------
-random_test = []
-for i in range(16):
-  random_src = random.randint(0,3)
-  random_dest = random.randint(0,3)
-  m0 = NetMsgType( src=random_src, dest=random_dest, opaque=0x00+i, payload=0x0000+i )
-  random_src = random.randint(0,3)
-  random_dest = random.randint(0,3)
-  m1 = NetMsgType( src=random_src, dest=random_dest, opaque=0x40+i, payload=0x1000+i )
-  random_src = random.randint(0,3)
-  random_dest = random.randint(0,3)
-  m2 = NetMsgType( src=random_src, dest=random_dest, opaque=0x80+i, payload=0x2000+i )
-  random_test.extend([m0, m1, m2])
+@lru_cache( maxsize=None )
+def random_test( seed=0xdeadbeef ):
+  rng  = random.Random( seed )
+  msgs = []
+  for i in range(16):
+    random_src = rng.randint(0,3)
+    random_dest = rng.randint(0,3)
+    m0 = NetMsgType( src=random_src, dest=random_dest, opaque=0x00+i, payload=0x0000+i )
+    random_src = rng.randint(0,3)
+    random_dest = rng.randint(0,3)
+    m1 = NetMsgType( src=random_src, dest=random_dest, opaque=0x40+i, payload=0x1000+i )
+    random_src = rng.randint(0,3)
+    random_dest = rng.randint(0,3)
+    m2 = NetMsgType( src=random_src, dest=random_dest, opaque=0x80+i, payload=0x2000+i )
+    msgs.extend([m0, m1, m2])
+  return msgs
 
 
 #-------------------------------------------------------------------------
 # Test Case Table
 #-------------------------------------------------------------------------
+# The msgs column is either a list or a function returning the list.
+# Functions are only called when a test case runs, so collection does
+# not build every message list up front.
 
 test_case_table = mk_test_case_table([
   (                                  "msgs    src_delay sink_delay delay_mode"),
@@ -234,52 +257,56 @@ test_case_table = mk_test_case_table([
 @pytest.mark.parametrize( **test_case_table )
 def test( test_params, cmdline_opts ):
 
+  msgs = test_params.msgs
+  if callable( msgs ):
+    msgs = msgs()
+
   th = TestHarness()
 
   th.set_param("top.srcs[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 0 ],
+    msgs                = [ m for m in msgs if m.src == 0 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.srcs[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 1 ],
+    msgs                = [ m for m in msgs if m.src == 1 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.srcs[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 2 ],
+    msgs                = [ m for m in msgs if m.src == 2 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.srcs[3].construct",
-    msgs                = [ m for m in test_params.msgs if m.src == 3 ],
+    msgs                = [ m for m in msgs if m.src == 3 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.src_delay,
     interval_delay      = test_params.src_delay )
 
   th.set_param("top.sinks[0].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 0 ],
+    msgs                = [ m for m in msgs if m.dest == 0 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay )
 
   th.set_param("top.sinks[1].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 1 ],
+    msgs                = [ m for m in msgs if m.dest == 1 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay )
 
   th.set_param("top.sinks[2].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 2 ],
+    msgs                = [ m for m in msgs if m.dest == 2 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay )
 
   th.set_param("top.sinks[3].construct",
-    msgs                = [ m for m in test_params.msgs if m.dest == 3 ],
+    msgs                = [ m for m in msgs if m.dest == 3 ],
     interval_delay_mode = test_params.delay_mode,
     initial_delay       = test_params.sink_delay,
     interval_delay      = test_params.sink_delay )
@@ -287,3 +314,47 @@ def test( test_params, cmdline_opts ):
   th.elaborate()
 
   run_sim( th, cmdline_opts, duts=['net'] )
+
+#-------------------------------------------------------------------------
+# Soak Tests
+#-------------------------------------------------------------------------
+# A long random stream fed through the lazy sources/sinks. Every source
+# and sink replays the same seeded stream and keeps only the messages
+# for its own port, so memory stays constant and soak_nmsgs can be
+# raised to millions of messages (along with --max-cycles).
+
+soak_nmsgs = 1000
+
+def gen_soak_msgs( nmsgs, seed=0xdeadbeef ):
+  rng = random.Random( seed )
+  for i in range( nmsgs ):
+    yield NetMsgType( src=rng.randint(0,3), dest=rng.randint(0,3),
+                      opaque=i & 0xff, payload=rng.getrandbits(32) )
+
+@pytest.mark.parametrize( "src_delay, sink_delay, delay_mode", [
+  ( 0, 0, 'fixed'  ),
+  ( 3, 3, 'random' ),
+])
+def test_soak( src_delay, sink_delay, delay_mode, cmdline_opts ):
+
+  th = TestHarness( lazy=True )
+
+  for i in range(4):
+
+    th.set_param(f"top.srcs[{i}].construct",
+      msgs                = lambda i=i: ( m for m in gen_soak_msgs( soak_nmsgs ) if m.src == i ),
+      interval_delay_mode = delay_mode,
+      initial_delay       = src_delay,
+      interval_delay      = src_delay,
+      seed                = i )
+
+    th.set_param(f"top.sinks[{i}].construct",
+      msgs                = lambda i=i: ( m for m in gen_soak_msgs( soak_nmsgs ) if m.dest == i ),
+      interval_delay_mode = delay_mode,
+      initial_delay       = sink_delay,
+      interval_delay      = sink_delay,
+      seed                = 4+i )
+
+  th.elaborate()
+
+  run_sim( th, cmdline_opts, duts=['net'] )
@@ -8,7 +8,8 @@ import pytest
 from pymtl3 import *
 
 from lab4_sys.test.harness import asm_test
-from lab4_sys.test.harness import run_score_test as run_test
+from lab4_sys.test import harness
+from lab2_proc.test import asm_cache
 
 from lab4_sys.SingleCoreSysFL import SingleCoreSysFL
 
@@ -23,6 +24,11 @@ from lab2_proc.test import inst_jal
 from lab2_proc.test import inst_jalr
 from lab2_proc.test import inst_lui
 
+# Reuse assembled programs across test runs, including the programs
+# already cached by the lab2 tests
+
+run_test = asm_cache.cached( harness, harness.run_score_test )
+
 #-------------------------------------------------------------------------
 # Tests
 #-------------------------------------------------------------------------
@@ -0,0 +1,29 @@
+#=========================================================================
+# SingleCoreSys_checkpoint_test.py
+#=========================================================================
+# Fast-forward the lab2 checkpoint test program on the ISS and restore
+# the checkpoint into the single core system. The program never runs
+# the reset vector again, so the instruction cache not seeing the stub
+# put the reset vector instruction back does not matter.
+
+import pytest
+
+from pymtl3 import *
+
+from lab2_proc import checkpoint
+from lab2_proc.test.asm_cache import assemble
+from lab2_proc.test.checkpoint_test import gen_sum_squares_test
+
+from lab4_sys.test import harness
+from lab4_sys.SingleCoreSys import SingleCoreSys
+
+@pytest.mark.parametrize( "max_insts", [ 20, 10000000 ] )
+def test_restore( max_insts, cmdline_opts ):
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble, max_insts )
+  checkpoint.run_test( harness, SingleCoreSys, ckpt, cmdline_opts=cmdline_opts,
+                       run=harness.run_score_test )
+
+def test_restore_delays( cmdline_opts ):
+  ckpt = checkpoint.take( gen_sum_squares_test, assemble )
+  checkpoint.run_test( harness, SingleCoreSys, ckpt, delays=True,
+                       cmdline_opts=cmdline_opts, run=harness.run_score_test )
@@ -0,0 +1,114 @@
+#=========================================================================
+# bintrace_test
+#=========================================================================
+# Render hand-written records in the format the Verilog writes and check
+# them against the line traces the modules print.
+
+import numpy as np
+import pytest
+
+from lab4_sys import bintrace
+
+def write_trace( path, kind, records ):
+  records = np.asarray( records, dtype="<u4" )
+  header  = np.array( [ bintrace.magic, kind, records.shape[1] ], dtype="<u4" )
+  np.concatenate( ( header, records.ravel() ) ).tofile( path )
+  return str( path )
+
+# Flags of a ProcAlt record
+
+def proc_flags( val=0, stall=0, squash=0, reset=0 ):
+  return val | ( stall << 5 ) | ( squash << 10 ) | ( reset << 12 )
+
+addi = 0x00108093 # addi x1, x1, 1
+lw   = 0x0000a103 # lw x2, 0(x1)
+nop  = 0x00000013
+
+proc_records = [
+  [ proc_flags( reset=1 ),                        0,     0,     0,    0,    0,    0,    0 ],
+  [ proc_flags( val=0b00001 ),                0x200,     0,     0,    0,    0,    0,    0 ],
+  [ proc_flags( val=0b00011 ),                0x204, 0x200,     0, addi,    0,    0,    0 ],
+  [ proc_flags( val=0b00111 ),                0x208, 0x204, 0x200,   lw, addi,    0,    0 ],
+  [ proc_flags( val=0b01111, stall=0b00011 ), 0x20c, 0x208, 0x204, addi,   lw, addi,    0 ],
+  [ proc_flags( val=0b11011, squash=0b11 ),   0x20c, 0x208, 0x204, addi,   lw,  nop, addi ],
+]
+
+#-------------------------------------------------------------------------
+# ProcAlt
+#-------------------------------------------------------------------------
+
+def test_proc( tmp_path ):
+  trace = bintrace.read( write_trace( tmp_path/"t.proc", bintrace.kind_proc, proc_records ) )
+  lines = [ line for cycle, line in bintrace.render( [ trace ] ) ]
+
+  assert lines == [
+    "        |                       |    |    |    ",
+    "00000200|                       |    |    |    ",
+    "00000204|addi x1, x1, 1         |    |    |    ",
+    "00000208|lw x2, 0(x1)           |addi|    |    ",
+    "#       |#                      |lw  |addi|    ",
+    "/       |/                      |    |nop |addi",
+  ]
+
+#-------------------------------------------------------------------------
+# CacheAlt and NetRouter
+#-------------------------------------------------------------------------
+
+def test_cache( tmp_path ):
+  path  = write_trace( tmp_path/"t.cache", bintrace.kind_cache,
+                       [ [ 0, 0 ], [ 1 | 0x100, 0x1000 ], [ 6, 0 ], [ 11, 0 ], [ 20, 0 ] ] )
+  lines = [ line for cycle, line in bintrace.render( [ bintrace.read( path ) ] ) ]
+  assert lines == [ "I ", "TC", "RW", "W ", "? " ]
+
+def test_router( tmp_path ):
+
+  # inq0 empty, inq1 with 2 free entries, inq2 full; one request to
+  # sunit0, two to sunit1 and three to sunit2
+
+  queues = 4 | ( 2 << 3 ) | ( 0 << 6 )
+  switch = 0b001 | ( 0b101 << 3 ) | ( 0b111 << 6 )
+
+  path  = write_trace( tmp_path/"t.router", bintrace.kind_router,
+                       [ [ 4 | ( 4 << 3 ) | ( 4 << 6 ), 0 ], [ queues, switch ] ] )
+  lines = [ line for cycle, line in bintrace.render( [ bintrace.read( path ) ] ) ]
+  assert lines == [ "   |   ", " :#|.:#" ]
+
+#-------------------------------------------------------------------------
+# Searching and diffing
+#-------------------------------------------------------------------------
+
+def test_side_by_side( tmp_path ):
+  proc  = bintrace.read( write_trace( tmp_path/"t.proc", bintrace.kind_proc, proc_records ) )
+  cache = bintrace.read( write_trace( tmp_path/"t.cache", bintrace.kind_cache,
+                                      [ [ 0, 0 ] ] * 3 + [ [ 1, 0 ] ] * 3 ) )
+
+  cycle, line = list( bintrace.render( [ proc, cache ], 3, 4 ) )[0]
+  assert cycle == 3
+  assert line == "00000208|lw x2, 0(x1)           |addi|    |     | TC"
+
+def test_grep( tmp_path ):
+  trace = bintrace.read( write_trace( tmp_path/"t.proc", bintrace.kind_proc, proc_records ) )
+  assert [ cycle for cycle, line in bintrace.grep( [ trace ], r"\|lw" ) ] == [ 3, 4 ]
+
+def test_diff( tmp_path ):
+  other = [ list( r ) for r in proc_records ]
+  other[4][1] = 0x210
+
+  a = bintrace.read( write_trace( tmp_path/"a.proc", bintrace.kind_proc, proc_records ) )
+  b = bintrace.read( write_trace( tmp_path/"b.proc", bintrace.kind_proc, other + other[-1:] ) )
+  assert bintrace.diff( a, b ) == [ 4, 6 ]
+
+  c = bintrace.read( write_trace( tmp_path/"c.cache", bintrace.kind_cache, [ [ 0, 0 ] ] ) )
+  with pytest.raises( ValueError ):
+    bintrace.diff( a, c )
+
+def test_not_a_trace( tmp_path ):
+  path = tmp_path/"junk"
+  path.write_bytes( b"not a trace at all" )
+  with pytest.raises( ValueError ):
+    bintrace.read( str( path ) )
+
+def test_main( tmp_path, capsys ):
+  path = write_trace( tmp_path/"t.proc", bintrace.kind_proc, proc_records )
+  assert bintrace.main( [ "grep", path, "addi x1", "--start", "1" ] ) == 0
+  assert capsys.readouterr().out == "  2: 00000204|addi x1, x1, 1         |    |    |    \n"